@@ -0,0 +1,139 @@
+"""
+Synthetic journal corpus generator for the benchmarks.
+
+Writes a tree of journals and Markdown entries straight to disk, laid out
+exactly like the app stores them, with configurable journal count, entries
+per journal and entry-size distribution. Generation is seeded so the same
+parameters always produce the same corpus.
+
+Usage:
+    python benchmarks/corpus.py DEST [--journals N] [--entries N] ...
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sys
+from dataclasses import asdict, dataclass
+
+from silentmemoir.config import (
+    DEFAULT_ENTRY_PREFIX,
+    MARKDOWN_EXTENSION,
+    TIMESTAMP_FORMAT,
+)
+
+WORDS = (
+    "the quiet morning light fell across the desk while coffee cooled and "
+    "thoughts drifted toward work travel family reading garden rain music "
+    "walk dinner meeting idea plan worry hope today tomorrow yesterday week "
+    "project friend letter city river mountain book note memory dream"
+).split()
+
+SIZE_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+@dataclass
+class CorpusSpec:
+    """Parameters describing a synthetic corpus."""
+
+    journals: int = 5
+    entries_per_journal: int = 1000
+    size_distribution: str = "lognormal"
+    mean_words: int = 250
+    seed: int = 1
+
+
+def entry_word_count(spec: CorpusSpec, rng: random.Random) -> int:
+    """
+    Draw the word count of one entry from the spec's size distribution.
+
+    Args:
+        spec: The corpus parameters
+        rng: Random source
+
+    Returns:
+        Number of words for the entry
+    """
+    if spec.size_distribution == "fixed":
+        return spec.mean_words
+    if spec.size_distribution == "uniform":
+        return rng.randint(1, 2 * spec.mean_words)
+    # Long tail: most entries are short, a few are very long
+    return max(1, int(rng.lognormvariate(0, 1) * spec.mean_words / 1.65))
+
+
+def entry_text(words: int, rng: random.Random) -> str:
+    """
+    Build the Markdown text of one entry.
+
+    Args:
+        words: Number of body words
+        rng: Random source
+
+    Returns:
+        The entry text
+    """
+    title = " ".join(rng.choices(WORDS, k=4)).capitalize()
+    body = rng.choices(WORDS, k=words)
+    paragraphs = [" ".join(body[i : i + 60]) for i in range(0, words, 60)]
+    return f"# {title}\n\n" + "\n\n".join(paragraphs) + "\n"
+
+
+def generate_corpus(journals_path: str, spec: CorpusSpec) -> int:
+    """
+    Write a synthetic corpus into a journals directory.
+
+    Entries are named the way the app names untitled entries, one minute
+    apart, so layouts keyed on timestamps see realistic names.
+
+    Args:
+        journals_path: Directory to create the journals in
+        spec: The corpus parameters
+
+    Returns:
+        Total number of bytes written
+    """
+    if spec.size_distribution not in SIZE_DISTRIBUTIONS:
+        raise ValueError(f"Unknown size distribution: {spec.size_distribution}")
+
+    rng = random.Random(spec.seed)
+    start = datetime.datetime(2015, 1, 1)
+    total = 0
+
+    for j in range(spec.journals):
+        journal_path = os.path.join(journals_path, f"journal_{j:03d}")
+        os.makedirs(journal_path, exist_ok=True)
+        for i in range(spec.entries_per_journal):
+            stamp = (start + datetime.timedelta(minutes=i)).strftime(TIMESTAMP_FORMAT)
+            filename = f"{DEFAULT_ENTRY_PREFIX}{stamp}{MARKDOWN_EXTENSION}"
+            text = entry_text(entry_word_count(spec, rng), rng)
+            with open(os.path.join(journal_path, filename), "w", encoding="utf-8") as f:
+                total += f.write(text)
+
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("dest", help="journals directory to generate into")
+    parser.add_argument("--journals", type=int, default=CorpusSpec.journals)
+    parser.add_argument(
+        "--entries", type=int, default=CorpusSpec.entries_per_journal,
+        help="entries per journal",
+    )
+    parser.add_argument(
+        "--sizes", choices=SIZE_DISTRIBUTIONS, default=CorpusSpec.size_distribution,
+        help="entry size distribution",
+    )
+    parser.add_argument("--mean-words", type=int, default=CorpusSpec.mean_words)
+    parser.add_argument("--seed", type=int, default=CorpusSpec.seed)
+    args = parser.parse_args()
+
+    spec = CorpusSpec(args.journals, args.entries, args.sizes, args.mean_words, args.seed)
+    written = generate_corpus(args.dest, spec)
+    sys.stdout.write(f"wrote {written / 1e6:.1f} MB: {asdict(spec)}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Headless performance benchmarks for SilentMemoir.
+
+Generates a synthetic corpus in a temporary SILENTMEMOIR_HOME, times the
+storage layer (listing, saving, reading, searching) and full screen flows
+driven through Textual's App.run_test pilot, and writes the results as JSON so
+runs can be compared between releases.
+
+Usage:
+    python benchmarks/run.py [--journals N] [--entries N] [--output FILE]
+                             [--baseline FILE] [--segments]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+
+# Where the app flows wait for the UI to settle before giving up
+FLOW_TIMEOUT = 120
+
+
+def summarize(timings: list[float]) -> dict:
+    """
+    Reduce a list of timings to summary statistics.
+
+    Args:
+        timings: Elapsed seconds per run
+
+    Returns:
+        Dict with run count and min/median/max seconds
+    """
+    return {
+        "runs": len(timings),
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "max_s": max(timings),
+    }
+
+
+def measure(func, repeat: int, setup=None) -> dict:
+    """
+    Time a callable several times.
+
+    Args:
+        func: The callable to time
+        repeat: Number of timed runs
+        setup: Optional untimed callable run before each timed run
+
+    Returns:
+        Summary statistics of the runs
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return summarize(timings)
+
+
+def remove_database(path: str) -> None:
+    """Delete an SQLite database and its WAL side files."""
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+# ----------------------------
+# Storage benchmarks
+# ----------------------------
+
+
+def bench_storage(repeat: int, ops: int) -> dict:
+    """
+    Time the model layer directly.
+
+    Args:
+        repeat: Number of timed runs per benchmark
+        ops: Number of entries saved/read per run
+
+    Returns:
+        Results keyed by benchmark name
+    """
+    from silentmemoir.catalog import Catalog
+    from silentmemoir.models import Journal, JournalEntry
+    from silentmemoir.search import SearchIndex
+
+    results = {}
+    journal = Journal.list_all()[0]
+
+    def drop_catalog():
+        remove_database(Catalog.path)
+
+    results["journal_list_all_cold"] = measure(Journal.list_all, repeat, drop_catalog)
+    results["journal_list_all_warm"] = measure(Journal.list_all, repeat)
+    results["list_entries_cold"] = measure(journal.list_entries, repeat, drop_catalog)
+    results["list_entries_warm"] = measure(journal.list_entries, repeat)
+
+    scratch = Journal("bench_scratch")
+    text = "# Benchmark\n\n" + "lorem ipsum dolor sit amet " * 50
+    entries = [JournalEntry(scratch, f"bench_{i:05d}") for i in range(ops)]
+
+    def save_all():
+        for entry in entries:
+            entry.save(text)
+
+    def read_all():
+        for entry in entries:
+            entry.read()
+
+    results["entry_save"] = per_op(measure(save_all, repeat), ops)
+    results["entry_read"] = per_op(measure(read_all, repeat), ops)
+    scratch.delete()
+
+    def sync_index():
+        with SearchIndex() as index:
+            index.sync()
+
+    def drop_index():
+        remove_database(SearchIndex.path)
+
+    results["search_sync_cold"] = measure(sync_index, 1, drop_index)
+    results["search_sync_warm"] = measure(sync_index, repeat)
+
+    with SearchIndex() as index:
+        results["search_query"] = measure(
+            lambda: index.search("quiet morning coffee"), repeat
+        )
+
+    return results
+
+
+def per_op(summary: dict, ops: int) -> dict:
+    """
+    Convert a summary of batched runs into per-operation seconds.
+
+    Args:
+        summary: Summary statistics of runs that each did ops operations
+        ops: Operations per run
+
+    Returns:
+        The summary with per-operation timings and the batch size
+    """
+    return {
+        **{k: v / ops if k.endswith("_s") else v for k, v in summary.items()},
+        "ops_per_run": ops,
+    }
+
+
+# ----------------------------
+# UI flow benchmarks
+# ----------------------------
+
+
+async def wait_until(pilot, condition) -> None:
+    """Let the app process messages until condition() is true."""
+    deadline = time.perf_counter() + FLOW_TIMEOUT
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("UI did not settle in time")
+        await pilot.pause(0.01)
+
+
+async def bench_flows(repeat: int) -> dict:
+    """
+    Time screen flows headlessly through the Textual pilot.
+
+    Args:
+        repeat: Number of timed runs per flow
+
+    Returns:
+        Results keyed by flow name
+    """
+    from silentmemoir.main import SilentMemoir
+
+    timings = {
+        "flow_open_journals": [],
+        "flow_open_journal": [],
+        "flow_open_entry": [],
+        "flow_toggle_preview": [],
+    }
+
+    app = SilentMemoir()
+    async with app.run_test(size=(120, 40)) as pilot:
+        for _ in range(repeat):
+            await wait_until(pilot, lambda: type(app.screen).__name__ == "OpeningScreen")
+            started = time.perf_counter()
+            await pilot.press("e")
+            await wait_until(
+                pilot,
+                lambda: type(app.screen).__name__ == "ViewJournals"
+                and app.screen.journals_list.children,
+            )
+            timings["flow_open_journals"].append(time.perf_counter() - started)
+            view = app.screen
+
+            view.journals_list.focus()
+            view.journals_list.index = 0
+            await pilot.pause()
+            started = time.perf_counter()
+            await pilot.press("right")
+            await wait_until(pilot, lambda view=view: view.entries_list.row_count > 1)
+            timings["flow_open_journal"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await pilot.press("down", "enter")
+            await wait_until(
+                pilot,
+                lambda: type(app.screen).__name__ == "Entry" and app.screen.loaded,
+            )
+            timings["flow_open_entry"].append(time.perf_counter() - started)
+            entry = app.screen
+
+            started = time.perf_counter()
+            await pilot.press("tab")
+            await wait_until(
+                pilot, lambda entry=entry: entry.markdown_viewer.chunk_widgets
+            )
+            await pilot.pause()
+            timings["flow_toggle_preview"].append(time.perf_counter() - started)
+
+            await pilot.press("escape")
+            await wait_until(pilot, lambda view=view: app.screen is view)
+            await pilot.press("left", "h")
+
+    return {name: summarize(values) for name, values in timings.items()}
+
+
+# ----------------------------
+# Reporting
+# ----------------------------
+
+
+def compare(results: dict, baseline_path: str, tolerance: float) -> int:
+    """
+    Print median changes against a previous run and count regressions.
+
+    Args:
+        results: Results of this run
+        baseline_path: JSON file written by an earlier run
+        tolerance: Allowed slowdown ratio before a benchmark counts as regressed
+
+    Returns:
+        Number of benchmarks slower than the baseline by more than tolerance
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    regressions = 0
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        ratio = current["median_s"] / max(baseline[name]["median_s"], 1e-9)
+        flag = ""
+        if ratio > tolerance:
+            regressions += 1
+            flag = "  REGRESSION"
+        sys.stderr.write(f"{name:28} {ratio:6.2f}x{flag}\n")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--journals", type=int, default=5)
+    parser.add_argument("--entries", type=int, default=2000, help="entries per journal")
+    parser.add_argument(
+        "--sizes", choices=("fixed", "uniform", "lognormal"), default="lognormal"
+    )
+    parser.add_argument("--mean-words", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--ops", type=int, default=200, help="saves/reads per run")
+    parser.add_argument("--skip-ui", action="store_true", help="skip the screen flows")
+    parser.add_argument(
+        "--segments", action="store_true", help="store the corpus in segment stores"
+    )
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON output to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=1.25,
+        help="slowdown ratio that counts as a regression (default 1.25)",
+    )
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix="silentmemoir-bench-")
+    # Must be set before anything imports silentmemoir.config
+    os.environ["SILENTMEMOIR_HOME"] = home
+
+    try:
+        from corpus import CorpusSpec, generate_corpus
+
+        from silentmemoir.config import JOURNALS_BASE_PATH
+
+        spec = CorpusSpec(
+            args.journals, args.entries, args.sizes, args.mean_words, args.seed
+        )
+        started = time.perf_counter()
+        corpus_bytes = generate_corpus(JOURNALS_BASE_PATH, spec)
+        generate_s = time.perf_counter() - started
+
+        if args.segments:
+            from silentmemoir.models import Journal
+
+            for journal in Journal.list_all():
+                journal.enable_segments()
+
+        results = bench_storage(args.repeat, args.ops)
+        if not args.skip_ui:
+            results.update(asyncio.run(bench_flows(args.repeat)))
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+    try:
+        from importlib.metadata import version
+
+        app_version = version("silentmemoir")
+    except Exception:
+        app_version = "unknown"
+
+    report = {
+        "version": app_version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "corpus": {
+            **asdict(spec),
+            "bytes": corpus_bytes,
+            "generate_s": generate_s,
+            "segments": args.segments,
+        },
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+    if args.baseline:
+        return 1 if compare(results, args.baseline, args.tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""
+Crash-recovery autosave for the entry editor.
+
+While an entry is being edited, its text is periodically compared with the
+last autosaved state and only the changed span is appended to a swap file
+(one JSON record per line). The swap starts with a header holding the CRC of
+the text it is relative to, so recovery can check that the deltas still apply.
+Swap records are folded into the real entry file from time to time, after
+which the swap is removed.
+
+Swap files live outside the journals directory, at
+SWAP_PATH/<journal>/<title>.swp. Unsaved new entries use NEW_ENTRY_SWAP_NAME
+as their title until they are saved under a real one.
+"""
+
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Optional
+
+from silentmemoir.config import (
+    AUTOSAVE_COALESCE_BYTES,
+    AUTOSAVE_COALESCE_INTERVAL,
+    SWAP_PATH,
+)
+
+SWAP_EXTENSION = ".swp"
+
+# Characters compared per step when looking for the changed span
+_COMPARE_BLOCK = 4096
+
+
+class SwapMismatchError(Exception):
+    """Raised when a swap file no longer applies to the entry's saved text."""
+
+
+def swap_path(journal_name: str, title: str) -> str:
+    """
+    Return the swap file used for an entry.
+
+    Args:
+        journal_name: Name of the journal containing the entry
+        title: The entry title (without .md extension)
+
+    Returns:
+        Path of the swap file
+    """
+    return os.path.join(SWAP_PATH, journal_name, f"{title}{SWAP_EXTENSION}")
+
+
+def text_crc(text: str) -> int:
+    """
+    Checksum a text the way swap headers record it.
+
+    Args:
+        text: The text to checksum
+
+    Returns:
+        The CRC-32 of the text's UTF-8 encoding
+    """
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def _common_prefix(a: str, b: str) -> int:
+    limit = min(len(a), len(b))
+    i = 0
+    # Slice comparisons run in C, so skip equal blocks before going char by char
+    while (
+        i + _COMPARE_BLOCK <= limit
+        and a[i : i + _COMPARE_BLOCK] == b[i : i + _COMPARE_BLOCK]
+    ):
+        i += _COMPARE_BLOCK
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _common_suffix(a: str, b: str, floor: int) -> int:
+    limit = min(len(a), len(b)) - floor
+    i = 0
+    while (
+        i + _COMPARE_BLOCK <= limit
+        and a[len(a) - i - _COMPARE_BLOCK : len(a) - i]
+        == b[len(b) - i - _COMPARE_BLOCK : len(b) - i]
+    ):
+        i += _COMPARE_BLOCK
+    while i < limit and a[len(a) - i - 1] == b[len(b) - i - 1]:
+        i += 1
+    return i
+
+
+def text_delta(old: str, new: str) -> Optional[tuple[int, int, str]]:
+    """
+    Find the single span that turns old into new.
+
+    Args:
+        old: The previous text
+        new: The current text
+
+    Returns:
+        (start, end, replacement): replacing old[start:end] with replacement
+        gives new. None if the texts are equal.
+    """
+    if old == new:
+        return None
+    start = _common_prefix(old, new)
+    tail = _common_suffix(old, new, start)
+    return start, len(old) - tail, new[start : len(new) - tail]
+
+
+def recover(path: str, saved_text: str) -> Optional[str]:
+    """
+    Rebuild the text an interrupted editing session left in a swap file.
+
+    Args:
+        path: The swap file
+        saved_text: The entry's text as currently saved
+
+    Returns:
+        The recovered text, or None if there is nothing newer than saved_text
+
+    Raises:
+        SwapMismatchError: If the swap was written against different text
+        OSError: If the swap file cannot be read
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return None
+
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            break  # A torn final record from the crash
+
+    if not records:
+        return None
+
+    saved_crc = text_crc(saved_text)
+    if records[0].get("base") != saved_crc:
+        # The last coalesce may have reached the entry file before the swap
+        # was removed; then there is nothing to recover.
+        if records[-1].get("saved") == saved_crc:
+            return None
+        raise SwapMismatchError(f"Swap file {path} does not match the saved entry")
+
+    text = saved_text
+    for record in records[1:]:
+        if "start" in record:
+            text = text[: record["start"]] + record["text"] + text[record["end"] :]
+    return None if text == saved_text else text
+
+
+class Autosaver:
+    """Append-only swap file of one entry's unsaved edits."""
+
+    def __init__(self, path: str, base_text: str):
+        """
+        Track edits made on top of base_text.
+
+        Args:
+            path: The swap file to write
+            base_text: The entry's text as currently saved
+        """
+        self.path = path
+        self.base_crc = text_crc(base_text)
+        self.base_length = len(base_text)
+        self.last_text = base_text
+        self.swap_bytes = 0
+        self.last_coalesce = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _append(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        if not os.path.exists(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            header = {"base": self.base_crc, "created": time.time()}
+            line = json.dumps(header) + "\n" + line
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+        self.swap_bytes += len(line)
+
+    def record(self, text: str) -> bool:
+        """
+        Append the change since the last record to the swap file.
+
+        Args:
+            text: The editor's current text
+
+        Returns:
+            True if anything changed and was written
+
+        Raises:
+            OSError: If the swap file cannot be written
+        """
+        with self.lock:
+            delta = text_delta(self.last_text, text)
+            if delta is None:
+                return False
+            start, end, replacement = delta
+            self._append({"start": start, "end": end, "text": replacement})
+            self.last_text = text
+            return True
+
+    def adopt(self, text: str) -> None:
+        """
+        Continue an existing swap file whose recovered text is now in the editor.
+
+        Args:
+            text: The recovered text
+        """
+        with self.lock:
+            self.last_text = text
+            try:
+                self.swap_bytes = os.path.getsize(self.path)
+            except FileNotFoundError:
+                self.swap_bytes = 0
+
+    def coalesce_due(self) -> bool:
+        """
+        Check whether the swap should be folded into the entry file.
+
+        Returns:
+            True if the swap is large or old enough
+        """
+        return self.swap_bytes > 0 and (
+            self.swap_bytes >= AUTOSAVE_COALESCE_BYTES
+            or time.monotonic() - self.last_coalesce >= AUTOSAVE_COALESCE_INTERVAL
+        )
+
+    def mark_saved(self, text: str) -> None:
+        """
+        Note in the swap that text is about to be written to the entry file.
+
+        A crash between the write and discard() then leaves a swap that
+        recover() recognizes as already saved.
+
+        Args:
+            text: The text being saved
+        """
+        with self.lock:
+            if self.swap_bytes:
+                self._append({"saved": text_crc(text)})
+
+    def discard(self, saved_text: str) -> None:
+        """
+        Remove the swap file after saved_text reached the entry file.
+
+        Edits recorded after saved_text was captured are kept.
+
+        Args:
+            saved_text: The text that was saved
+        """
+        with self.lock:
+            self.base_crc = text_crc(saved_text)
+            self.base_length = len(saved_text)
+            self.last_coalesce = time.monotonic()
+            pending = text_delta(saved_text, self.last_text)
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.swap_bytes = 0
+            if pending:
+                start, end, replacement = pending
+                self._append({"start": start, "end": end, "text": replacement})
+
+    def rewrite(self, text: str) -> None:
+        """
+        Replace the swap's records with a single one holding text.
+
+        Used to keep the swap of an unsaved new entry small, since there is
+        no entry file to coalesce into yet.
+
+        Args:
+            text: The editor's current text
+        """
+        with self.lock:
+            tmp_path = self.path + ".tmp"
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            header = {"base": self.base_crc, "created": time.time()}
+            record = {"start": 0, "end": self.base_length, "text": text}
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps(header) + "\n")
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+            self.last_text = text
+            self.swap_bytes = os.path.getsize(self.path)
+            self.last_coalesce = time.monotonic()
+
+    def remove(self) -> None:
+        """Delete the swap file, dropping any unsaved edits it holds."""
+        with self.lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.swap_bytes = 0
@@ -0,0 +1,621 @@
+"""
+Incremental local backups of the journals.
+
+Each backup is a snapshot directory under the backup target holding a copy of
+JOURNALS_BASE_PATH and a manifest with the SHA-256, size and mtime of every
+file. A new snapshot only reads the files whose size or mtime differ from the
+previous manifest, and only copies content that is new: a file whose hash is
+already in the previous snapshot, under any name, is hard linked to it. Every
+snapshot is therefore complete on its own while costing only what changed.
+
+A snapshot is assembled under a temporary name and renamed into place once
+its manifest is written, so an interrupted backup never looks finished. The
+metadata catalog and search index are caches rebuilt from the journals, and
+aren't backed up. SQLite databases inside the journals (revision histories)
+are copied through SQLite's backup API rather than byte for byte, so changes
+still in their write-ahead log are included.
+
+Usage:
+    python -m silentmemoir.backup create [--target DIR]
+    python -m silentmemoir.backup list [--target DIR]
+    python -m silentmemoir.backup verify [SNAPSHOT] [--quick] [--target DIR]
+    python -m silentmemoir.backup restore [SNAPSHOT] [--journal NAME]
+        [--overwrite] [--target DIR]
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from typing import Optional
+
+from silentmemoir import durable
+from silentmemoir.config import BACKUP_PATH, JOURNALS_BASE_PATH, TIMESTAMP_FORMAT
+
+MANIFEST_NAME = "manifest.json"
+"""File inside a snapshot listing its files and their hashes."""
+
+MANIFEST_VERSION = 1
+
+JOURNALS_DIRNAME = "journals"
+"""Directory inside a snapshot holding the copy of the journals."""
+
+PARTIAL_SUFFIX = ".partial"
+"""Suffix of snapshots still being written."""
+
+# Bytes read at a time when hashing or copying a file
+_CHUNK_SIZE = 1024 * 1024
+
+# Files handled between two progress callbacks
+_PROGRESS_STEP = 200
+
+# SQLite databases, copied through the backup API, and the files that sit
+# next to a live database; their content is part of the database's
+_SQLITE_EXTENSION = ".db"
+_SQLITE_SIDECARS = ("-wal", "-shm", "-journal")
+
+
+class BackupError(Exception):
+    """Raised when a snapshot is missing or unreadable."""
+
+
+@dataclass
+class FileRecord:
+    """A backed-up file as recorded in a manifest."""
+
+    sha256: str
+    size: int
+    mtime_ns: int
+
+
+@dataclass
+class Snapshot:
+    """A completed backup."""
+
+    name: str
+    path: str
+    created: float
+    files: dict[str, FileRecord]
+    directories: list[str]
+
+    def file_path(self, relpath: str) -> str:
+        """
+        Return where a backed-up file is stored in the snapshot.
+
+        Args:
+            relpath: The file's path relative to the journals directory
+
+        Returns:
+            The absolute path of the copy
+        """
+        return os.path.join(self.path, JOURNALS_DIRNAME, relpath)
+
+
+@dataclass
+class BackupResult:
+    """What creating a snapshot did."""
+
+    snapshot: Snapshot
+    copied: int
+    linked: int
+    bytes_copied: int
+
+
+def _walk(root: str) -> Iterator[tuple[str, Optional[os.stat_result]]]:
+    # Yields (relpath, stat) for files and (relpath, None) for directories,
+    # skipping the temporary files of saves in progress
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        rel_dir = os.path.relpath(directory, root)
+        if rel_dir != ".":
+            yield rel_dir.replace(os.sep, "/"), None
+        for filename in sorted(filenames):
+            if filename.endswith((durable.TEMP_SUFFIX, *_SQLITE_SIDECARS)):
+                continue
+            path = os.path.join(directory, filename)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield os.path.relpath(path, root).replace(os.sep, "/"), st
+
+
+def hash_file(path: str) -> str:
+    """
+    Return the SHA-256 of a file's content.
+
+    Args:
+        path: The file to hash
+
+    Returns:
+        The hex digest
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy_hashed(src: str, dst: str) -> tuple[str, int]:
+    # Hash what is actually copied, so the manifest matches the copy even if
+    # the source changes meanwhile
+    digest = hashlib.sha256()
+    size = 0
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        while chunk := fin.read(_CHUNK_SIZE):
+            digest.update(chunk)
+            fout.write(chunk)
+            size += len(chunk)
+    shutil.copystat(src, dst)
+    durable.written(dst)
+    return digest.hexdigest(), size
+
+
+def _is_sqlite(path: str) -> bool:
+    return path.endswith(_SQLITE_EXTENSION)
+
+
+def _copy_sqlite(src: str, dst: str, standalone: bool = True) -> None:
+    # A consistent copy that includes what is still in the write-ahead log
+    uri = pathlib.Path(os.path.abspath(src)).as_uri() + "?mode=ro"
+    source = sqlite3.connect(uri, uri=True, timeout=10)
+    try:
+        target = sqlite3.connect(dst, timeout=10)
+        try:
+            source.backup(target)
+            if standalone:
+                # Keep the copy a single file that opens without a WAL
+                target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+
+def _copy_sqlite_hashed(src: str, dst: str) -> tuple[str, int]:
+    try:
+        _copy_sqlite(src, dst)
+    except sqlite3.Error as e:
+        if not os.path.exists(src):
+            raise FileNotFoundError(src) from e
+        raise OSError(f"Failed to back up {src}: {e}") from e
+    durable.written(dst)
+    return hash_file(dst), os.path.getsize(dst)
+
+
+def _link(src: str, dst: str) -> bool:
+    try:
+        os.link(src, dst)
+        return True
+    except OSError:
+        # Missing from the older snapshot, or a filesystem without hard links
+        return False
+
+
+# ----------------------------
+# Snapshots
+# ----------------------------
+
+
+def load_snapshot(path: str) -> Snapshot:
+    """
+    Read a snapshot's manifest.
+
+    Args:
+        path: The snapshot directory
+
+    Returns:
+        The snapshot
+
+    Raises:
+        BackupError: If the manifest is missing or unreadable
+    """
+    try:
+        with open(os.path.join(path, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+        files = {
+            relpath: FileRecord(*record)
+            for relpath, record in manifest["files"].items()
+        }
+        return Snapshot(
+            os.path.basename(path),
+            path,
+            manifest["created"],
+            files,
+            manifest["directories"],
+        )
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise BackupError(f"Failed to read snapshot {path}: {e}") from e
+
+
+def list_snapshots(target: str = BACKUP_PATH) -> list[Snapshot]:
+    """
+    List the completed snapshots in a backup target.
+
+    Args:
+        target: The backup directory
+
+    Returns:
+        Snapshots, oldest first; unfinished or unreadable ones are left out
+    """
+    snapshots = []
+    for name in _snapshot_names(target):
+        try:
+            snapshots.append(load_snapshot(os.path.join(target, name)))
+        except BackupError:
+            continue
+    return snapshots
+
+
+def _snapshot_names(target: str) -> list[str]:
+    try:
+        names = sorted(os.listdir(target))
+    except FileNotFoundError:
+        return []
+    return [name for name in names if not name.endswith(PARTIAL_SUFFIX)]
+
+
+def find_snapshot(name: Optional[str] = None, target: str = BACKUP_PATH) -> Snapshot:
+    """
+    Look up a snapshot by name.
+
+    Args:
+        name: The snapshot's name, or None for the latest
+        target: The backup directory
+
+    Returns:
+        The snapshot
+
+    Raises:
+        BackupError: If there is no such snapshot
+    """
+    if name is not None:
+        return load_snapshot(os.path.join(target, name))
+    for latest in reversed(_snapshot_names(target)):
+        try:
+            return load_snapshot(os.path.join(target, latest))
+        except BackupError:
+            continue
+    raise BackupError(f"No backups in {target}")
+
+
+def _snapshot_name(target: str) -> str:
+    base = time.strftime(TIMESTAMP_FORMAT)
+    name, n = base, 1
+    while os.path.exists(os.path.join(target, name)):
+        n += 1
+        name = f"{base}-{n}"
+    return name
+
+
+def _clear_partial_snapshots(target: str) -> None:
+    # Leftovers of interrupted backups
+    for name in os.listdir(target):
+        if name.endswith(PARTIAL_SUFFIX):
+            shutil.rmtree(os.path.join(target, name), ignore_errors=True)
+
+
+def _back_up_file(
+    src: str,
+    dst: str,
+    st: os.stat_result,
+    old: Optional[FileRecord],
+    stored: dict[str, str],
+) -> tuple[FileRecord, bool]:
+    """
+    Back up one file, linking it to stored content with the same hash.
+
+    Args:
+        src: The file to back up
+        dst: Where it goes in the new snapshot
+        st: The file's stat from the directory listing
+        old: The file's record in the previous snapshot, if any
+        stored: Paths of backed-up content by hash; updated with new copies
+
+    Returns:
+        The file's record, and whether it was copied rather than linked
+
+    Raises:
+        FileNotFoundError: If the file was deleted meanwhile
+        OSError: If the file cannot be backed up
+    """
+    if _is_sqlite(src):
+        # A live database's size and mtime don't cover its write-ahead log,
+        # so it is always copied; unchanged content is still linked
+        copy = dst + durable.TEMP_SUFFIX
+        digest, size = _copy_sqlite_hashed(src, copy)
+        if digest in stored and _link(stored[digest], dst):
+            os.remove(copy)
+            return FileRecord(digest, size, st.st_mtime_ns), False
+        os.rename(copy, dst)
+        stored[digest] = dst
+        return FileRecord(digest, size, st.st_mtime_ns), True
+
+    if old and (old.size, old.mtime_ns) == (st.st_size, st.st_mtime_ns):
+        digest = old.sha256
+    else:
+        digest = hash_file(src)
+    if digest in stored and _link(stored[digest], dst):
+        return FileRecord(digest, st.st_size, st.st_mtime_ns), False
+    digest, size = _copy_hashed(src, dst)
+    stored[digest] = dst
+    return FileRecord(digest, size, st.st_mtime_ns), True
+
+
+def _write_manifest(
+    path: str, files: dict[str, FileRecord], directories: list[str]
+) -> None:
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "created": time.time(),
+        "files": {
+            relpath: [r.sha256, r.size, r.mtime_ns] for relpath, r in files.items()
+        },
+        "directories": directories,
+    }
+    durable.atomic_write(
+        os.path.join(path, MANIFEST_NAME), json.dumps(manifest, indent=1)
+    )
+
+
+def create_snapshot(
+    target: str = BACKUP_PATH,
+    source: str = JOURNALS_BASE_PATH,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> BackupResult:
+    """
+    Back up the journals into a new snapshot.
+
+    Args:
+        target: The backup directory
+        source: The journals directory to back up
+        progress: Called with (files done, total files) as the backup runs
+
+    Returns:
+        The new snapshot and how much of it had to be copied
+
+    Raises:
+        OSError: If the snapshot cannot be written
+    """
+    os.makedirs(target, exist_ok=True)
+    _clear_partial_snapshots(target)
+    try:
+        previous = find_snapshot(target=target)
+    except BackupError:
+        previous = None
+    name = _snapshot_name(target)
+    partial = os.path.join(target, name + PARTIAL_SUFFIX)
+    root = os.path.join(partial, JOURNALS_DIRNAME)
+    os.makedirs(root)
+
+    # Content already backed up, by hash, whatever file it was in
+    stored = {}
+    if previous is not None:
+        for relpath, record in previous.files.items():
+            stored.setdefault(record.sha256, previous.file_path(relpath))
+
+    items = list(_walk(source))
+    files, directories = {}, []
+    copied = linked = bytes_copied = 0
+    with durable.batch():
+        for done, (relpath, st) in enumerate(items, 1):
+            dst = os.path.join(root, relpath)
+            if st is None:
+                directories.append(relpath)
+                os.makedirs(dst, exist_ok=True)
+                continue
+
+            old = previous.files.get(relpath) if previous else None
+            try:
+                record, was_copied = _back_up_file(
+                    os.path.join(source, relpath), dst, st, old, stored
+                )
+            except FileNotFoundError:
+                continue  # Deleted since the directory was listed
+            files[relpath] = record
+            if was_copied:
+                copied += 1
+                bytes_copied += record.size
+            else:
+                linked += 1
+
+            if progress and (done % _PROGRESS_STEP == 0 or done == len(items)):
+                progress(done, len(items))
+        _write_manifest(partial, files, directories)
+
+    final = os.path.join(target, name)
+    os.rename(partial, final)
+    return BackupResult(load_snapshot(final), copied, linked, bytes_copied)
+
+
+def verify_snapshot(
+    snapshot: Snapshot,
+    quick: bool = False,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> list[str]:
+    """
+    Check that a snapshot's files are all present and intact.
+
+    Files hard linked to each other are only hashed once.
+
+    Args:
+        snapshot: The snapshot to check
+        quick: Only compare sizes instead of hashing every file
+        progress: Called with (files done, total files) as the check runs
+
+    Returns:
+        A description of each problem found; empty if the snapshot is intact
+    """
+    problems = []
+    hashed: dict[tuple[int, int], str] = {}
+    total = len(snapshot.files)
+    for done, (relpath, record) in enumerate(sorted(snapshot.files.items()), 1):
+        path = snapshot.file_path(relpath)
+        try:
+            st = os.stat(path)
+            if st.st_size != record.size:
+                problems.append(f"{relpath}: size {st.st_size}, expected {record.size}")
+            elif not quick:
+                inode = (st.st_dev, st.st_ino)
+                if inode not in hashed:
+                    hashed[inode] = hash_file(path)
+                if hashed[inode] != record.sha256:
+                    problems.append(f"{relpath}: content does not match its hash")
+        except FileNotFoundError:
+            problems.append(f"{relpath}: missing")
+        except OSError as e:
+            problems.append(f"{relpath}: {e}")
+
+        if progress and (done % _PROGRESS_STEP == 0 or done == total):
+            progress(done, total)
+    return problems
+
+
+def _needs_restore(path: str, record: FileRecord, overwrite: bool) -> bool:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return True
+    if not overwrite or (st.st_size, st.st_mtime_ns) == (record.size, record.mtime_ns):
+        return False
+    return st.st_size != record.size or hash_file(path) != record.sha256
+
+
+def _restore_file(src: str, path: str) -> None:
+    if _is_sqlite(path) and os.path.exists(path):
+        # Replacing a live database's file would strand its write-ahead log
+        try:
+            _copy_sqlite(src, path, standalone=False)
+        except sqlite3.Error as e:
+            raise OSError(f"Failed to restore {path}: {e}") from e
+        durable.written(path)
+        return
+    directory, name = os.path.split(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{name}.", suffix=durable.TEMP_SUFFIX
+    )
+    os.close(fd)
+    try:
+        shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    durable.written(path)
+
+
+def restore_snapshot(
+    snapshot: Snapshot,
+    journals: Optional[list[str]] = None,
+    overwrite: bool = False,
+    dest: str = JOURNALS_BASE_PATH,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    Copy files from a snapshot back into the journals.
+
+    By default only files missing from the journals are restored, which
+    brings back deleted journals and entries without touching anything
+    edited since. Files are written atomically, and files already matching
+    the snapshot are never rewritten.
+
+    Args:
+        snapshot: The snapshot to restore from
+        journals: Only restore these journals; None restores all of them
+        overwrite: Also replace files whose content differs from the snapshot
+        dest: The journals directory to restore into
+        progress: Called with (files done, total files) as the restore runs
+
+    Returns:
+        Number of files restored
+
+    Raises:
+        OSError: If a file cannot be restored
+    """
+
+    def selected(relpath: str) -> bool:
+        return journals is None or relpath.split("/", 1)[0] in journals
+
+    for relpath in snapshot.directories:
+        if selected(relpath):
+            os.makedirs(os.path.join(dest, relpath), exist_ok=True)
+
+    items = sorted(r for r in snapshot.files.items() if selected(r[0]))
+    restored = 0
+    with durable.batch():
+        for done, (relpath, record) in enumerate(items, 1):
+            path = os.path.join(dest, relpath)
+            if _needs_restore(path, record, overwrite):
+                _restore_file(snapshot.file_path(relpath), path)
+                restored += 1
+
+            if progress and (done % _PROGRESS_STEP == 0 or done == len(items)):
+                progress(done, len(items))
+    return restored
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Back up and restore journals.")
+    parser.add_argument("command", choices=("create", "list", "verify", "restore"))
+    parser.add_argument("snapshot", nargs="?", help="snapshot name (default: latest)")
+    parser.add_argument("--target", default=BACKUP_PATH, help="backup directory")
+    parser.add_argument("--quick", action="store_true", help="verify sizes only")
+    parser.add_argument(
+        "--journal", action="append", help="restore only this journal (repeatable)"
+    )
+    parser.add_argument(
+        "--overwrite", action="store_true", help="also replace files edited since"
+    )
+    args = parser.parse_args()
+
+    def report(done: int, total: int) -> None:
+        sys.stdout.write(f"\r{done}/{total}")
+        sys.stdout.flush()
+
+    try:
+        if args.command == "create":
+            result = create_snapshot(args.target, progress=report)
+            sys.stdout.write(
+                f"\r{result.snapshot.name}: copied {result.copied} files "
+                f"({result.bytes_copied} bytes), linked {result.linked} unchanged\n"
+            )
+        elif args.command == "list":
+            for snapshot in list_snapshots(args.target):
+                sys.stdout.write(f"{snapshot.name}  {len(snapshot.files)} files\n")
+        elif args.command == "verify":
+            snapshot = find_snapshot(args.snapshot, args.target)
+            problems = verify_snapshot(snapshot, args.quick, report)
+            sys.stdout.write(f"\r{snapshot.name}: {len(problems) or 'no'} problems\n")
+            for problem in problems:
+                sys.stdout.write(f"  {problem}\n")
+            if problems:
+                raise SystemExit(1)
+        else:
+            snapshot = find_snapshot(args.snapshot, args.target)
+            restored = restore_snapshot(
+                snapshot, args.journal, args.overwrite, progress=report
+            )
+            sys.stdout.write(f"\r{snapshot.name}: restored {restored} files\n")
+    except BackupError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
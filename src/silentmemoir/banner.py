@@ -0,0 +1,66 @@
+"""
+Cached FIGlet banner for the opening screen.
+
+Importing pyfiglet and parsing a font costs more than drawing the rest of the
+first frame, so rendered banners are cached on disk per font and text.
+pyfiglet is only imported on a cache miss.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from silentmemoir.config import BANNER_CACHE_PATH, BANNER_TEXT
+
+
+def banner_cache_file(font: str, text: str = BANNER_TEXT) -> str:
+    """
+    Return the cache file used for a banner.
+
+    Args:
+        font: The FIGlet font name
+        text: The text the banner spells out
+
+    Returns:
+        Path of the cache file
+    """
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(BANNER_CACHE_PATH, f"banner-{font}-{digest}.txt")
+
+
+def render_banner(font: str, text: str = BANNER_TEXT) -> str:
+    """
+    Render the app title as a FIGlet banner, using the on-disk cache if possible.
+
+    The banner is laid out at FIGlet's default width, as it always was, so it
+    looks the same whatever the terminal size.
+
+    Args:
+        font: The FIGlet font name
+        text: The text to spell out
+
+    Returns:
+        The rendered banner
+    """
+    cache_file = banner_cache_file(font, text)
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        pass
+
+    from pyfiglet import Figlet
+
+    banner = Figlet(font=font).renderText(text)
+
+    # Write atomically so a concurrent launch never reads a partial banner
+    try:
+        os.makedirs(BANNER_CACHE_PATH, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=BANNER_CACHE_PATH, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(banner)
+        os.replace(tmp_path, cache_file)
+    except OSError:
+        pass  # Caching is best effort
+
+    return banner
@@ -0,0 +1,123 @@
+"""
+Buffers of recently edited entries.
+
+An Entry screen is normally thrown away when it is dismissed. The buffer
+manager instead keeps the screens of recently opened entries installed on the
+app, so going back to one reattaches to the same editor: text, cursor, scroll
+position, undo history and rendered preview included. Buffers are evicted
+least recently used first once there are more than BUFFER_CACHE_COUNT of them
+or they hold more than BUFFER_CACHE_BYTES.
+"""
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+from silentmemoir.config import (
+    BUFFER_CACHE_BYTES,
+    BUFFER_CACHE_COUNT,
+    MARKDOWN_EXTENSION,
+)
+
+if TYPE_CHECKING:
+    from textual.app import App
+
+    from silentmemoir.models import Journal
+    from silentmemoir.screens.entry import Entry
+
+
+class BufferManager:
+    """LRU set of Entry screens kept alive between visits."""
+
+    def __init__(
+        self,
+        app: "App",
+        max_bytes: int = BUFFER_CACHE_BYTES,
+        max_buffers: int = BUFFER_CACHE_COUNT,
+    ):
+        """
+        Create an empty buffer manager.
+
+        Args:
+            app: The app the Entry screens are installed on
+            max_bytes: Approximate memory the parked buffers may use
+            max_buffers: Maximum number of buffers kept
+        """
+        self.app = app
+        self.max_bytes = max_bytes
+        self.max_buffers = max_buffers
+        self._buffers: OrderedDict[tuple[str, str], Entry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    @staticmethod
+    def _screen_name(key: tuple[str, str]) -> str:
+        return f"entry:{key[0]}:{key[1]}"
+
+    def open(self, journal: "Journal", entry_name: str) -> "Entry":
+        """
+        Return the Entry screen for an entry, reusing its buffer if it has one.
+
+        Args:
+            journal: The parent journal
+            entry_name: The entry name (with or without .md extension)
+
+        Returns:
+            The screen to push
+        """
+        from silentmemoir.screens.entry import Entry
+
+        title = entry_name.replace(MARKDOWN_EXTENSION, "")
+        key = (journal.journal_path, title)
+        screen = self._buffers.get(key)
+        if screen is not None:
+            self._buffers.move_to_end(key)
+            # Pick up changes made on disk while the buffer was parked
+            screen.revalidate()
+            return screen
+
+        screen = Entry(journal=journal, entry_name=entry_name, is_new_entry=False)
+        self.app.install_screen(screen, self._screen_name(key))
+        self._buffers[key] = screen
+        self.trim(keep=screen)
+        return screen
+
+    def discard(self, journal: "Journal", title: Optional[str] = None) -> None:
+        """
+        Drop the buffers of a deleted entry, or of every entry in a journal.
+
+        Args:
+            journal: The journal
+            title: The entry title, or None for the whole journal
+        """
+        for key in list(self._buffers):
+            if key[0] == journal.journal_path and title in (None, key[1]):
+                self._evict(key)
+
+    def trim(self, keep: "Entry" = None) -> None:
+        """
+        Evict least recently used buffers until within the limits.
+
+        Buffers whose screen is on the screen stack are never evicted.
+
+        Args:
+            keep: A buffer that must survive, e.g. the one about to be shown
+        """
+        total = sum(screen.buffer_size() for screen in self._buffers.values())
+        for key, screen in list(self._buffers.items()):
+            if len(self._buffers) <= self.max_buffers and total <= self.max_bytes:
+                break
+            if screen is keep or screen in self.app.screen_stack:
+                continue
+            total -= screen.buffer_size()
+            self._evict(key)
+
+    def _evict(self, key: tuple[str, str]) -> None:
+        screen = self._buffers[key]
+        if screen in self.app.screen_stack:
+            return
+        del self._buffers[key]
+        self.app.uninstall_screen(self._screen_name(key))
+        # Uninstalled screens that aren't on the stack must be removed by hand
+        if screen.is_attached:
+            screen.remove()
@@ -0,0 +1,424 @@
+"""
+Metadata catalog for SilentMemoir.
+
+This module keeps journal and entry metadata (size, mtime, created time, word
+count) in SQLite so listing journals and entries is an index read instead of a
+directory scan. Cached listings are validated against the directory's mtime:
+adding, removing or renaming a file bumps it, so a single stat tells us whether
+the cached names are still correct.
+"""
+
+import os
+import sqlite3
+from collections.abc import Sequence
+from typing import ClassVar, NamedTuple, Optional
+
+from silentmemoir import compression
+from silentmemoir.config import CATALOG_PATH
+
+SCHEMA_VERSION = 2
+"""Bumped whenever SCHEMA changes; older catalogs are rebuilt from disk."""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS journals (
+    name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS entries (
+    journal TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    shard TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    created REAL NOT NULL,
+    words INTEGER NOT NULL,
+    PRIMARY KEY (journal, filename)
+) WITHOUT ROWID;
+"""
+
+
+def dir_mtime_ns(path: str) -> Optional[int]:
+    """
+    Return a directory's mtime in nanoseconds.
+
+    Args:
+        path: The directory to stat
+
+    Returns:
+        The mtime, or None if the directory doesn't exist
+    """
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def count_words(text: str) -> int:
+    """
+    Count whitespace-separated words.
+
+    Args:
+        text: The text to count
+
+    Returns:
+        Number of words
+    """
+    return len(text.split())
+
+
+class EntryInfo(NamedTuple):
+    """Cached metadata for a single entry file."""
+
+    filename: str
+    size: int
+    mtime: float
+    created: float
+    words: int
+
+
+class Catalog:
+    """SQLite-backed cache of journal and entry metadata."""
+
+    path: ClassVar[str] = CATALOG_PATH
+
+    def __init__(self):
+        """Open (and create if needed) the on-disk catalog."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # The catalog is only a cache, so an outdated one is simply rebuilt
+            self.conn.executescript(
+                "DROP TABLE IF EXISTS directories;"
+                "DROP TABLE IF EXISTS journals;"
+                "DROP TABLE IF EXISTS entries;"
+            )
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self) -> "Catalog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self.conn.close()
+
+    # ----------------------------
+    # Validation
+    # ----------------------------
+
+    def cached_mtime(self, path: str) -> Optional[int]:
+        """
+        Return the directory mtime the catalog was last validated against.
+
+        Args:
+            path: The directory path
+
+        Returns:
+            The recorded mtime, or None if the directory was never scanned
+        """
+        row = self.conn.execute(
+            "SELECT mtime_ns FROM directories WHERE path = ?", (path,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_mtime(self, path: str, mtime_ns: Optional[int]) -> None:
+        if mtime_ns is None:
+            self.conn.execute("DELETE FROM directories WHERE path = ?", (path,))
+        else:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO directories (path, mtime_ns) VALUES (?, ?)",
+                (path, mtime_ns),
+            )
+
+    def _forget_directories(self, journal_path: str) -> None:
+        self.conn.execute(
+            "DELETE FROM directories WHERE path = ? OR path LIKE ?",
+            (journal_path, os.path.join(journal_path, "%")),
+        )
+
+    def _advance_mtime(self, path: str, mtime_before: Optional[int]) -> None:
+        # Our own change bumped the directory mtime. If the catalog was current
+        # before it, it is still current now; otherwise leave it stale so the
+        # next listing rescans and picks up whatever else changed.
+        if mtime_before is not None and self.cached_mtime(path) == mtime_before:
+            self._set_mtime(path, dir_mtime_ns(path))
+
+    # ----------------------------
+    # Journals
+    # ----------------------------
+
+    def journal_names(self, base_path: str) -> list[str]:
+        """
+        List journal names, rescanning the base directory only if it changed.
+
+        Args:
+            base_path: Directory containing the journals
+
+        Returns:
+            Sorted list of journal names
+        """
+        mtime = dir_mtime_ns(base_path)
+        if mtime is not None and mtime == self.cached_mtime(base_path):
+            rows = self.conn.execute("SELECT name FROM journals ORDER BY name")
+            return [name for (name,) in rows]
+
+        names = []
+        if mtime is not None:
+            with os.scandir(base_path) as it:
+                names = sorted(d.name for d in it if d.is_dir())
+
+        with self.conn:
+            self.conn.execute("DELETE FROM journals")
+            self.conn.executemany(
+                "INSERT INTO journals (name) VALUES (?)", ((n,) for n in names)
+            )
+            self._set_mtime(base_path, mtime)
+        return names
+
+    def record_journal(
+        self, base_path: str, name: str, mtime_before: Optional[int]
+    ) -> None:
+        """
+        Note that the app created a journal.
+
+        Args:
+            base_path: Directory containing the journals
+            name: Name of the new journal
+            mtime_before: The base directory's mtime before the journal was created
+        """
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO journals (name) VALUES (?)", (name,))
+            self._advance_mtime(base_path, mtime_before)
+
+    def remove_journal(
+        self, base_path: str, name: str, journal_path: str, mtime_before: Optional[int]
+    ) -> None:
+        """
+        Note that the app deleted a journal.
+
+        Args:
+            base_path: Directory containing the journals
+            name: Name of the deleted journal
+            journal_path: Directory the journal lived in
+            mtime_before: The base directory's mtime before the journal was removed
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM journals WHERE name = ?", (name,))
+            self.conn.execute("DELETE FROM entries WHERE journal = ?", (name,))
+            self._forget_directories(journal_path)
+            self._advance_mtime(base_path, mtime_before)
+
+    # ----------------------------
+    # Entries
+    # ----------------------------
+
+    def entry_names(
+        self, journal: str, journal_path: str, shards: Sequence[str] = ("",)
+    ) -> list[str]:
+        """
+        List entry filenames, rescanning only directories that changed.
+
+        Args:
+            journal: Name of the journal
+            journal_path: Directory holding the journal's entries
+            shards: Subdirectories of journal_path to list ("" is the top level)
+
+        Returns:
+            Sorted list of entry filenames
+        """
+        self.refresh_entries(journal, journal_path, shards)
+        rows = self.conn.execute(
+            "SELECT filename FROM entries WHERE journal = ?"
+            f" AND shard IN ({', '.join('?' * len(shards))}) ORDER BY filename",
+            (journal, *shards),
+        )
+        return [name for (name,) in rows]
+
+    def entry_details(
+        self, journal: str, journal_path: str, shards: Sequence[str] = ("",)
+    ) -> list[EntryInfo]:
+        """
+        List metadata for every entry, rescanning only directories that changed.
+
+        Args:
+            journal: Name of the journal
+            journal_path: Directory holding the journal's entries
+            shards: Subdirectories of journal_path to list ("" is the top level)
+
+        Returns:
+            Entry metadata sorted by filename
+        """
+        self.refresh_entries(journal, journal_path, shards)
+        rows = self.conn.execute(
+            "SELECT filename, size, mtime_ns, created, words FROM entries"
+            f" WHERE journal = ? AND shard IN ({', '.join('?' * len(shards))})"
+            " ORDER BY filename",
+            (journal, *shards),
+        )
+        return [
+            EntryInfo(filename, size, mtime_ns / 1e9, created, words)
+            for filename, size, mtime_ns, created, words in rows
+        ]
+
+    def refresh_entries(
+        self, journal: str, journal_path: str, shards: Sequence[str] = ("",)
+    ) -> None:
+        """
+        Bring a journal's entry rows up to date for directories that changed.
+
+        Only files that are new to the catalog are stat'ed and read; names that
+        disappeared are dropped. Entries the app itself saves are kept current
+        by record_entry.
+
+        Args:
+            journal: Name of the journal
+            journal_path: Directory holding the journal's entries
+            shards: Subdirectories of journal_path to check ("" is the top level)
+        """
+        for shard in shards:
+            self._refresh_directory(journal, journal_path, shard)
+
+    def _refresh_directory(self, journal: str, journal_path: str, shard: str) -> None:
+        directory = os.path.join(journal_path, shard) if shard else journal_path
+        mtime = dir_mtime_ns(directory)
+        if mtime is not None and mtime == self.cached_mtime(directory):
+            return
+
+        # Entry filename -> file actually holding it (maybe compressed)
+        on_disk = {}
+        if mtime is not None:
+            with os.scandir(directory) as it:
+                # Dotfiles are layout markers or in-flight temporary files
+                for name in sorted(
+                    d.name for d in it if d.is_file() and not d.name.startswith(".")
+                ):
+                    # Sorted, so a plain file wins over its compressed copy
+                    on_disk.setdefault(compression.entry_filename(name), name)
+
+        known = {
+            name
+            for (name,) in self.conn.execute(
+                "SELECT filename FROM entries WHERE journal = ? AND shard = ?",
+                (journal, shard),
+            )
+        }
+
+        rows = []
+        for filename in on_disk.keys() - known:
+            try:
+                rows.append(
+                    self._scan_file(
+                        journal,
+                        filename,
+                        shard,
+                        os.path.join(directory, on_disk[filename]),
+                    )
+                )
+            except (OSError, UnicodeDecodeError):
+                continue
+
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM entries WHERE journal = ? AND filename = ? AND shard = ?",
+                ((journal, name, shard) for name in known - on_disk.keys()),
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries"
+                " (journal, filename, shard, size, mtime_ns, created, words)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._set_mtime(directory, mtime)
+
+    def reset_entries(self, journal: str, journal_path: str) -> None:
+        """
+        Forget a journal's entry rows so the next listing rescans it.
+
+        Args:
+            journal: Name of the journal
+            journal_path: Directory holding the journal's entries
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM entries WHERE journal = ?", (journal,))
+            self._forget_directories(journal_path)
+
+    def _scan_file(self, journal: str, filename: str, shard: str, path: str) -> tuple:
+        st = os.stat(path)
+        size, mtime_ns = st.st_size, st.st_mtime_ns
+        if not path.endswith(filename):
+            header = compression.read_header(path)
+            if header is not None:
+                # Report the entry as it was before compression
+                _, size, mtime_ns = header
+        with compression.open_text(path) as f:
+            words = sum(count_words(line) for line in f)
+        created = getattr(st, "st_birthtime", st.st_mtime)
+        return (journal, filename, shard, size, mtime_ns, created, words)
+
+    def record_entry(
+        self,
+        journal: str,
+        filename: str,
+        path: str,
+        content: str,
+        mtime_before: Optional[int],
+        shard: str = "",
+    ) -> None:
+        """
+        Store fresh metadata for an entry the app just saved.
+
+        Args:
+            journal: Name of the journal
+            filename: The entry's filename
+            path: Path of the entry file
+            content: The text that was written
+            mtime_before: The entry directory's mtime before the save
+            shard: Subdirectory of the journal the entry is in
+        """
+        st = os.stat(path)
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO entries"
+                " (journal, filename, shard, size, mtime_ns, created, words)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (journal, filename) DO UPDATE SET"
+                " shard = excluded.shard, size = excluded.size,"
+                " mtime_ns = excluded.mtime_ns, words = excluded.words",
+                (
+                    journal,
+                    filename,
+                    shard,
+                    st.st_size,
+                    st.st_mtime_ns,
+                    getattr(st, "st_birthtime", st.st_mtime),
+                    count_words(content),
+                ),
+            )
+            self._advance_mtime(os.path.dirname(path), mtime_before)
+
+    def remove_entry(
+        self, journal: str, filename: str, directory: str, mtime_before: Optional[int]
+    ) -> None:
+        """
+        Drop an entry the app just deleted.
+
+        Args:
+            journal: Name of the journal
+            filename: The entry's filename
+            directory: Directory the entry file was in
+            mtime_before: That directory's mtime before the delete
+        """
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM entries WHERE journal = ? AND filename = ?",
+                (journal, filename),
+            )
+            self._advance_mtime(directory, mtime_before)
@@ -0,0 +1,272 @@
+"""
+Command-line entry point for SilentMemoir.
+
+Without arguments this launches the app. With a subcommand it works on the
+journals directly through the models, without importing Textual or pyfiglet,
+so scripts and cron jobs start quickly. Output is written as it is produced,
+one journal, entry or line at a time, so it can be piped into other tools.
+
+Usage:
+    silentmemoir
+    silentmemoir new JOURNAL [TITLE] [-m TEXT]
+    silentmemoir append JOURNAL TITLE [-m TEXT]
+    silentmemoir ls [JOURNAL] [-l] [--recent N]
+    silentmemoir cat JOURNAL TITLE [TITLE ...]
+    silentmemoir grep PATTERN [JOURNAL ...] [-i] [-l]
+    silentmemoir export JOURNAL DEST
+
+Entry text for new and append is read from standard input unless -m is given.
+"""
+
+import argparse
+import datetime
+import os
+import re
+import sys
+from collections.abc import Iterator
+from typing import Optional
+
+from silentmemoir import layout
+from silentmemoir.config import LARGE_ENTRY_CHUNK_SIZE, MARKDOWN_EXTENSION
+from silentmemoir.models import Journal, JournalEntry
+
+
+def _journal_name(parser: argparse.ArgumentParser, name: str) -> str:
+    if not layout.is_valid_journal_name(name):
+        parser.error(f"invalid journal name: {name!r}")
+    return name
+
+
+def _journal(parser: argparse.ArgumentParser, name: str) -> Journal:
+    return Journal(_journal_name(parser, name))
+
+
+def _existing_journal(parser: argparse.ArgumentParser, name: str) -> Journal:
+    journal = Journal(_journal_name(parser, name), create=False)
+    if not os.path.isdir(journal.journal_path):
+        parser.error(f"no such journal: {name}")
+    return journal
+
+
+def _title(parser: argparse.ArgumentParser, title: str) -> str:
+    title = title.strip()
+    if title.endswith(MARKDOWN_EXTENSION):
+        title = title[: -len(MARKDOWN_EXTENSION)]
+    if not title or "/" in title or os.sep in title:
+        parser.error(f"invalid entry title: {title!r}")
+    return title
+
+
+def _text(args: argparse.Namespace) -> str:
+    return args.message if args.message is not None else sys.stdin.read()
+
+
+def lines(entry: JournalEntry) -> Iterator[str]:
+    """
+    Read an entry line by line without loading all of it.
+
+    Args:
+        entry: The entry to read
+
+    Yields:
+        Each line, without its line break
+    """
+    pending = ""
+    for chunk in entry.read_chunks(LARGE_ENTRY_CHUNK_SIZE):
+        pending += chunk
+        *complete, pending = pending.split("\n")
+        yield from complete
+    if pending:
+        yield pending
+
+
+# ----------------------------
+# Commands
+# ----------------------------
+
+
+def cmd_new(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    journal = _journal(parser, args.journal)
+    if args.title:
+        title = _title(parser, args.title)
+    else:
+        title = layout.dated_title(datetime.datetime.now())
+    entry = JournalEntry(journal, title)
+    if entry.exists():
+        parser.error(f"entry already exists: {title} (use append)")
+    entry.save(_text(args))
+    sys.stdout.write(f"{title}\n")
+    return 0
+
+
+def cmd_append(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    entry = JournalEntry(_journal(parser, args.journal), _title(parser, args.title))
+    text = _text(args)
+    content = entry.read() if entry.exists() else ""
+    if content and not content.endswith("\n"):
+        content += "\n"
+    entry.save(content + text)
+    return 0
+
+
+def cmd_ls(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    if args.journal is None and args.recent is None and not args.long:
+        for name in Journal.list_names():
+            sys.stdout.write(f"{name}\n")
+        return 0
+
+    journals = (
+        [_existing_journal(parser, args.journal)]
+        if args.journal is not None
+        else Journal.list_all()
+    )
+    # Across journals, entries are shown as JOURNAL/TITLE
+    prefix = args.journal is None
+    rows = (
+        (journal, info) for journal in journals for info in journal.entry_details()
+    )
+    if args.recent is not None:
+        rows = sorted(rows, key=lambda row: row[1].mtime, reverse=True)[: args.recent]
+
+    for journal, info in rows:
+        title = info.filename[: -len(MARKDOWN_EXTENSION)]
+        name = f"{journal.name}/{title}" if prefix else title
+        if args.long:
+            modified = datetime.datetime.fromtimestamp(info.mtime)
+            sys.stdout.write(f"{modified:%Y-%m-%d %H:%M}  {info.words:>7}  {name}\n")
+        else:
+            sys.stdout.write(f"{name}\n")
+    return 0
+
+
+def cmd_cat(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    journal = _existing_journal(parser, args.journal)
+    status = 0
+    for title in args.titles:
+        entry = JournalEntry(journal, _title(parser, title))
+        if not entry.exists():
+            sys.stderr.write(f"silentmemoir cat: {title}: no such entry\n")
+            status = 1
+            continue
+        for chunk in entry.read_chunks(LARGE_ENTRY_CHUNK_SIZE):
+            sys.stdout.write(chunk)
+    return status
+
+
+def cmd_grep(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    try:
+        pattern = re.compile(args.pattern, re.IGNORECASE if args.ignore_case else 0)
+    except re.error as e:
+        parser.error(f"invalid pattern: {e}")
+    journals = (
+        [_existing_journal(parser, name) for name in args.journals]
+        if args.journals
+        else Journal.list_all()
+    )
+
+    found = False
+    for journal in journals:
+        for filename in journal.list_entries():
+            title = filename[: -len(MARKDOWN_EXTENSION)]
+            entry = JournalEntry(journal, title)
+            try:
+                for number, line in enumerate(lines(entry), 1):
+                    if not pattern.search(line):
+                        continue
+                    found = True
+                    if args.files_with_matches:
+                        sys.stdout.write(f"{journal.name}/{title}\n")
+                        break
+                    sys.stdout.write(f"{journal.name}/{title}:{number}:{line}\n")
+            except BrokenPipeError:
+                raise
+            except (OSError, UnicodeDecodeError) as e:
+                sys.stderr.write(f"silentmemoir grep: {journal.name}/{title}: {e}\n")
+    return 0 if found else 1
+
+
+def cmd_export(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    journal = _existing_journal(parser, args.journal)
+    sys.stdout.write(f"exported {journal.export_entries(args.dest)} entries\n")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the parser for the subcommands.
+
+    Returns:
+        The argument parser
+    """
+    parser = argparse.ArgumentParser(
+        prog="silentmemoir",
+        description="Terminal journaling. Run without arguments to open the app.",
+    )
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    new = commands.add_parser("new", help="create an entry")
+    new.add_argument("journal", help="journal name (created if missing)")
+    new.add_argument("title", nargs="?", help="entry title (default: timestamp)")
+    new.add_argument("-m", "--message", help="entry text (default: stdin)")
+
+    append = commands.add_parser("append", help="append text to an entry")
+    append.add_argument("journal", help="journal name (created if missing)")
+    append.add_argument("title", help="entry title (created if missing)")
+    append.add_argument("-m", "--message", help="text to append (default: stdin)")
+
+    ls = commands.add_parser("ls", help="list journals, or the entries of one")
+    ls.add_argument("journal", nargs="?", help="journal name")
+    ls.add_argument("-l", "--long", action="store_true", help="show date and words")
+    ls.add_argument(
+        "--recent", type=int, metavar="N", help="the N most recently modified entries"
+    )
+
+    cat = commands.add_parser("cat", help="print entries")
+    cat.add_argument("journal", help="journal name")
+    cat.add_argument("titles", nargs="+", metavar="title", help="entry titles")
+
+    grep = commands.add_parser("grep", help="search entries line by line")
+    grep.add_argument("pattern", help="regular expression")
+    grep.add_argument("journals", nargs="*", help="journals to search (default: all)")
+    grep.add_argument("-i", "--ignore-case", action="store_true")
+    grep.add_argument(
+        "-l",
+        "--files-with-matches",
+        action="store_true",
+        help="only print the entries that match",
+    )
+
+    export = commands.add_parser("export", help="copy entries as .md files")
+    export.add_argument("journal", help="journal name")
+    export.add_argument("dest", help="destination directory")
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        # Only the app pays for importing Textual
+        from silentmemoir.main import run
+
+        run()
+        return
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    handler = globals()[f"cmd_{args.command}"]
+    try:
+        status = handler(parser, args)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); stop quietly like other tools
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        status = 1
+    except OSError as e:
+        sys.stderr.write(f"silentmemoir {args.command}: {e}\n")
+        status = 1
+    raise SystemExit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Command palette providers for SilentMemoir.
+
+The title finder lets Ctrl+P jump straight to any journal or entry by typing
+part of its name, instead of picking the journal and scrolling its entries.
+The backup commands run the backup module in a background worker, once a
+restore has been confirmed.
+"""
+
+from functools import partial
+
+from textual.command import DiscoveryHit, Hit, Hits, Provider
+
+from silentmemoir import backup, storage
+from silentmemoir.finder import Match, title_index
+from silentmemoir.models import Journal
+
+
+class TitleFinder(Provider):
+    """Fuzzy-find journals and entries by title."""
+
+    @property
+    def journals_view(self):
+        return self.app.get_screen("View Journals")
+
+    def _can_show_journals(self) -> bool:
+        # Jumping to a journal from an open editor would skip saving it
+        view = self.journals_view
+        return self.screen is view or view not in self.app.screen_stack
+
+    async def startup(self) -> None:
+        """Load the title index if it isn't loaded yet."""
+        await storage.run_io(title_index.build)
+
+    async def search(self, query: str) -> Hits:
+        """
+        Find journals and entries matching what was typed.
+
+        Args:
+            query: The palette input
+
+        Yields:
+            A hit per matching title
+        """
+        matcher = self.matcher(query)
+        show_journals = self._can_show_journals()
+        for match in title_index.search(query):
+            if not match.title and not show_journals:
+                continue
+            name = match.title or match.journal
+            # Near misses from the typo fallback don't match as a subsequence
+            score = matcher.match(name) or match.similarity / 2
+            yield Hit(
+                score,
+                matcher.highlight(name),
+                partial(self.open, match),
+                text=name,
+                help=f"Entry in {match.journal}" if match.title else "Journal",
+            )
+
+    async def discover(self) -> Hits:
+        """
+        List the journals before anything is typed.
+
+        Yields:
+            A hit per journal
+        """
+        if not self._can_show_journals():
+            return
+        for name in title_index.journals():
+            yield DiscoveryHit(
+                name, partial(self.open, Match(name, "", 1.0)), help="Journal"
+            )
+
+    async def open(self, match: Match) -> None:
+        """
+        Open a journal in the journals view, or an entry in the editor.
+
+        Args:
+            match: The chosen journal or entry
+        """
+        journal = Journal(match.journal, create=False)
+        if match.title:
+            self.app.push_screen(self.app.buffers.open(journal, match.title))
+            return
+        view = self.journals_view
+        if view not in self.app.screen_stack:
+            await self.app.push_screen(view)
+        view.show_journal(match.journal)
+
+
+def run_backup_command(app, command: str) -> None:
+    """
+    Run a backup command, reporting the outcome as a notification.
+
+    Meant for a thread worker: backups read and hash every changed file.
+
+    Args:
+        app: The running app
+        command: "create", "verify" or "restore"
+    """
+    try:
+        if command == "create":
+            result = backup.create_snapshot()
+            message = (
+                f"Backup {result.snapshot.name}: copied {result.copied} files, "
+                f"linked {result.linked} unchanged"
+            )
+        elif command == "verify":
+            snapshot = backup.find_snapshot()
+            problems = backup.verify_snapshot(snapshot)
+            message = f"Backup {snapshot.name}: {len(problems) or 'no'} problems"
+            if problems:
+                app.call_from_thread(
+                    app.notify, "\n".join(problems[:5]), severity="error"
+                )
+        else:
+            snapshot = backup.find_snapshot()
+            restored = backup.restore_snapshot(snapshot)
+            # Restored journals and entries need to show up in the finder
+            title_index.clear()
+            title_index.build()
+            message = f"Restored {restored} missing files from {snapshot.name}"
+    except (OSError, backup.BackupError) as e:
+        app.call_from_thread(app.notify, f"Backup failed: {e}", severity="error")
+        return
+    app.call_from_thread(app.notify, message)
+
+
+class BackupCommands(Provider):
+    """Back up, verify and restore the journals."""
+
+    COMMANDS = (
+        (
+            "Back up journals",
+            "Snapshot the journals, copying only what changed",
+            "create",
+        ),
+        (
+            "Verify latest backup",
+            "Check every file of the latest snapshot against its hash",
+            "verify",
+        ),
+        (
+            "Restore from latest backup",
+            "Bring back journals and entries missing since the latest snapshot",
+            "restore",
+        ),
+    )
+
+    def run(self, command: str) -> None:
+        """
+        Start a backup command in the background.
+
+        Args:
+            command: "create", "verify" or "restore"; restoring asks for
+                confirmation first
+        """
+        if command == "restore":
+            from silentmemoir.screens.backup import ConfirmRestoreModal
+
+            def on_confirm(confirmed: bool):
+                if confirmed:
+                    self.start(command)
+
+            self.app.push_screen(ConfirmRestoreModal(), on_confirm)
+        else:
+            self.start(command)
+
+    def start(self, command: str) -> None:
+        """
+        Run a backup command in a thread worker.
+
+        Args:
+            command: "create", "verify" or "restore"
+        """
+        self.app.run_worker(
+            partial(run_backup_command, self.app, command),
+            thread=True,
+            group="backup",
+            exclusive=True,
+        )
+
+    async def search(self, query: str) -> Hits:
+        """
+        Find the backup commands matching what was typed.
+
+        Args:
+            query: The palette input
+
+        Yields:
+            A hit per matching command
+        """
+        matcher = self.matcher(query)
+        for name, help_text, command in self.COMMANDS:
+            score = matcher.match(name)
+            if score > 0:
+                yield Hit(
+                    score,
+                    matcher.highlight(name),
+                    partial(self.run, command),
+                    help=help_text,
+                )
+
+    async def discover(self) -> Hits:
+        """
+        List the backup commands before anything is typed.
+
+        Yields:
+            A hit per command
+        """
+        for name, help_text, command in self.COMMANDS:
+            yield DiscoveryHit(name, partial(self.run, command), help=help_text)
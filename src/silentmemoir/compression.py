@@ -0,0 +1,378 @@
+"""
+Transparent compression of cold journal entries.
+
+When COLD_ENTRY_DAYS is set, entries that haven't been modified for that long
+are rewritten as <title>.md + COMPRESSED_EXTENSION by a background job. A compressed file
+starts with a small header: a magic marker, the algorithm, and the original
+size and mtime. The entry's version (and so the search index) stays unchanged
+across compression. JournalEntry reads these files transparently; a plain .md
+file always takes precedence, so saving an entry simply writes it uncompressed
+again.
+
+Usage:
+    python -m silentmemoir.compression [--days N] [--algorithm gzip|lzma]
+"""
+
+import io
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from silentmemoir import durable
+from silentmemoir.config import (
+    COLD_ENTRY_DAYS,
+    COLD_ENTRY_MIN_BYTES,
+    COMPRESSED_EXTENSION,
+    COMPRESSION_ALGORITHM,
+    INCOMPRESSIBLE_PATH,
+    MARKDOWN_EXTENSION,
+)
+
+MAGIC = b"SMZ1"
+HEADER = struct.Struct("<4sBQQ")
+"""Header: magic, algorithm id, original size, original mtime ns."""
+
+ALGORITHMS = {"gzip": 1, "lzma": 2}
+
+# Bytes copied per step while compressing
+_COPY_BUFFER = 256 * 1024
+
+# Outcomes of compressing one file
+_COMPRESSED = "compressed"
+_NOT_SMALLER = "not smaller"
+_CHANGED = "changed"
+
+
+def compressed_path(path: str) -> str:
+    """
+    Return where the compressed form of an entry file is kept.
+
+    Args:
+        path: The plain .md path of the entry
+
+    Returns:
+        The compressed file's path
+    """
+    return path + COMPRESSED_EXTENSION
+
+
+def entry_filename(name: str) -> str:
+    """
+    Map a file name in a journal directory to the entry's .md filename.
+
+    Args:
+        name: A file name, compressed or not
+
+    Returns:
+        The name with any compression suffix removed
+    """
+    if name.endswith(MARKDOWN_EXTENSION + COMPRESSED_EXTENSION):
+        return name[: -len(COMPRESSED_EXTENSION)]
+    return name
+
+
+def read_header(path: str) -> Optional[tuple[str, int, int]]:
+    """
+    Read the metadata of a compressed entry.
+
+    Args:
+        path: The compressed file
+
+    Returns:
+        (algorithm, original size, original mtime ns), or None if the file
+        has no valid header
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    with open(path, "rb") as f:
+        return _parse_header(f.read(HEADER.size))
+
+
+def _parse_header(data: bytes) -> Optional[tuple[str, int, int]]:
+    if len(data) < HEADER.size:
+        return None
+    magic, algorithm_id, size, mtime_ns = HEADER.unpack(data)
+    algorithm = next((k for k, v in ALGORITHMS.items() if v == algorithm_id), None)
+    if magic != MAGIC or algorithm is None:
+        return None
+    return algorithm, size, mtime_ns
+
+
+def _stream(fileobj, algorithm: str, mode: str):
+    # The codecs are imported on first use: listing and reading plain
+    # entries, and the command-line tools, never need them
+    if algorithm == "gzip":
+        import gzip
+
+        return gzip.GzipFile(fileobj=fileobj, mode=mode, mtime=0)
+    import lzma
+
+    return lzma.LZMAFile(fileobj, mode=mode)
+
+
+@contextmanager
+def open_text(path: str):
+    """
+    Open an entry file for reading text, decompressing on the fly if needed.
+
+    Args:
+        path: A plain or compressed entry file
+
+    Yields:
+        A text stream of the entry's content
+
+    Raises:
+        OSError: If the file cannot be read or its header is invalid
+    """
+    with open(path, "rb") as raw:
+        header = _parse_header(raw.read(HEADER.size))
+        if header is None:
+            raw.seek(0)
+            stream = raw
+        else:
+            stream = _stream(raw, header[0], "rb")
+        with io.TextIOWrapper(stream, encoding="utf-8") as text:
+            yield text
+
+
+def read_text(path: str) -> str:
+    """
+    Read a whole entry file, decompressing if needed.
+
+    Args:
+        path: A plain or compressed entry file
+
+    Returns:
+        The entry content
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    with open_text(path) as f:
+        return f.read()
+
+
+def compress_file(path: str, algorithm: str = COMPRESSION_ALGORITHM) -> bool:
+    """
+    Replace a plain entry file with its compressed form.
+
+    The plain file is only removed if it didn't change while compressing and
+    compression actually saved space.
+
+    Args:
+        path: The plain .md file
+        algorithm: "gzip" or "lzma"
+
+    Returns:
+        True if the entry is now stored compressed
+
+    Raises:
+        OSError: If the file cannot be read or written
+    """
+    return _compress(path, algorithm) == _COMPRESSED
+
+
+def _compress(path: str, algorithm: str) -> str:
+    st = os.stat(path)
+    target = compressed_path(path)
+    directory = os.path.dirname(path)
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(target)}.", suffix=durable.TEMP_SUFFIX
+    )
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(HEADER.pack(MAGIC, ALGORITHMS[algorithm], st.st_size, st.st_mtime_ns))
+            with open(path, "rb") as src, _stream(out, algorithm, "wb") as compressor:
+                shutil.copyfileobj(src, compressor, _COPY_BUFFER)
+            compressed_size = out.tell()
+
+        if compressed_size >= st.st_size:
+            os.remove(tmp_path)
+            return _NOT_SMALLER
+        os.chmod(tmp_path, st.st_mode & 0o777)
+        os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # Move the plain file aside rather than checking and then deleting it: a
+    # save landing after the rename creates a new file, one landing before it
+    # shows up as a different file here, and neither is ever deleted.
+    # The aside name is reserved with a file of our own and replaced, so no
+    # other process can claim it between choosing the name and the rename.
+    fd, aside = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=durable.TEMP_SUFFIX
+    )
+    os.close(fd)
+    try:
+        os.replace(path, aside)
+    except FileNotFoundError:
+        # Deleted (or being replaced) while we were compressing
+        _discard(aside)
+        _discard(target)
+        return _CHANGED
+    now = os.stat(aside)
+    if (now.st_ino, now.st_mtime_ns, now.st_size) != (st.st_ino, st.st_mtime_ns, st.st_size):
+        # Saved while we were compressing: the plain file is the current one
+        _put_back(aside, path)
+        _discard(target)
+        return _CHANGED
+
+    os.remove(aside)
+    durable.written(target)
+    return _COMPRESSED
+
+
+def _put_back(aside: str, path: str) -> None:
+    """Move a file set aside back into place, unless a newer save replaced it."""
+    try:
+        # Linking fails instead of overwriting if the entry was saved again
+        os.link(aside, path)
+    except FileExistsError:
+        pass
+    except OSError:
+        if not os.path.exists(path):
+            os.replace(aside, path)
+            return
+    os.remove(aside)
+
+
+def _discard(target: str) -> None:
+    try:
+        os.remove(target)
+    except FileNotFoundError:
+        pass
+
+
+def _load_incompressible() -> dict[str, list]:
+    try:
+        with open(INCOMPRESSIBLE_PATH, encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return record if isinstance(record, dict) else {}
+
+
+def _save_incompressible(record: dict[str, list]) -> None:
+    try:
+        os.makedirs(os.path.dirname(INCOMPRESSIBLE_PATH), exist_ok=True)
+        durable.atomic_write(INCOMPRESSIBLE_PATH, json.dumps(record, sort_keys=True))
+    except OSError:
+        pass
+
+
+def compress_cold_entries(
+    days: float, algorithm: str = COMPRESSION_ALGORITHM
+) -> int:
+    """
+    Compress every file-backed entry not modified for the given number of days.
+
+    Entries that didn't get smaller are remembered with their size and mtime,
+    and skipped by later runs until they change.
+
+    Args:
+        days: Minimum age since the last modification
+        algorithm: "gzip" or "lzma"
+
+    Returns:
+        Number of entries compressed
+    """
+    from silentmemoir.models import Journal
+
+    cutoff = time.time() - days * 86400
+    compressed = 0
+    known = _load_incompressible()
+    incompressible: dict[str, list] = {}
+    for journal in Journal.list_all():
+        if journal.segment_store is not None:
+            continue
+        with durable.batch():
+            compressed += _compress_journal(
+                journal, cutoff, algorithm, known, incompressible
+            )
+    if incompressible != known:
+        _save_incompressible(incompressible)
+    return compressed
+
+
+def _compress_journal(
+    journal, cutoff: float, algorithm: str, known: dict, incompressible: dict
+) -> int:
+    """
+    Compress the cold entries of one journal.
+
+    Args:
+        journal: The journal
+        cutoff: Entries modified after this time are left alone
+        algorithm: "gzip" or "lzma"
+        known: Entries found incompressible by earlier runs
+        incompressible: Filled with the entries still incompressible
+
+    Returns:
+        Number of entries compressed
+    """
+    from silentmemoir.models import JournalEntry
+
+    compressed = 0
+    for info in journal.entry_details():
+        if info.mtime > cutoff or info.size < COLD_ENTRY_MIN_BYTES:
+            continue
+        if not info.filename.endswith(MARKDOWN_EXTENSION):
+            continue
+        key = f"{journal.name}/{info.filename}"
+        version = [info.size, info.mtime]
+        if known.get(key) == version:
+            incompressible[key] = version
+            continue
+        entry = JournalEntry(journal, info.filename[: -len(MARKDOWN_EXTENSION)])
+        path = entry.stored_path()
+        if path != entry.filepath:
+            continue  # Already compressed, or gone
+        try:
+            result = _compress(path, algorithm)
+        except OSError:
+            continue
+        if result == _COMPRESSED:
+            compressed += 1
+        elif result == _NOT_SMALLER:
+            incompressible[key] = version
+    return compressed
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compress cold journal entries.")
+    parser.add_argument(
+        "--days",
+        type=float,
+        default=COLD_ENTRY_DAYS,
+        help=f"minimum days since last modification (default {COLD_ENTRY_DAYS})",
+    )
+    parser.add_argument(
+        "--algorithm", choices=sorted(ALGORITHMS), default=COMPRESSION_ALGORITHM
+    )
+    args = parser.parse_args()
+    if args.days is None:
+        parser.error("--days is required while COLD_ENTRY_DAYS is not set")
+    if args.days < 0:
+        parser.error("--days must be zero or more")
+
+    count = compress_cold_entries(args.days, args.algorithm)
+    sys.stdout.write(f"Compressed {count} entries\n")
+
+
+if __name__ == "__main__":
+    main()
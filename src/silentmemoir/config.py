@@ -11,9 +11,127 @@ import os
 # File System Paths
 # ----------------------------
 
-JOURNALS_BASE_PATH = os.path.expanduser("~/.silentmemoir/journals/")
+SILENTMEMOIR_PATH = os.path.join(
+    os.path.expanduser(os.environ.get("SILENTMEMOIR_HOME", "~/.silentmemoir")), ""
+)
+"""Root directory for all SilentMemoir data (overridable with $SILENTMEMOIR_HOME)."""
+
+JOURNALS_BASE_PATH = os.path.join(SILENTMEMOIR_PATH, "journals/")
 """Base directory where all journals are stored."""
 
+CATALOG_PATH = os.path.join(SILENTMEMOIR_PATH, "catalog.db")
+"""SQLite file caching journal and entry metadata."""
+
+SEARCH_INDEX_PATH = os.path.join(SILENTMEMOIR_PATH, "search.db")
+"""SQLite file holding the full-text search index."""
+
+STATS_PATH = os.path.join(SILENTMEMOIR_PATH, "stats.db")
+"""SQLite file holding the running writing statistics."""
+
+BANNER_CACHE_PATH = os.path.join(SILENTMEMOIR_PATH, "cache/")
+"""Directory holding pre-rendered FIGlet banners."""
+
+TRACE_PATH = os.path.join(SILENTMEMOIR_PATH, "trace.json")
+"""Default Chrome trace-event file written when tracing is enabled."""
+
+SWAP_PATH = os.path.join(SILENTMEMOIR_PATH, "swap/")
+"""Directory holding autosave swap files of entries with unsaved edits."""
+
+INCOMPRESSIBLE_PATH = os.path.join(SILENTMEMOIR_PATH, "cache/incompressible.json")
+"""Record of cold entries that compression didn't shrink, so they aren't retried."""
+
+TRASH_PATH = os.path.join(SILENTMEMOIR_PATH, "trash/")
+"""Directory deleted journals are moved to until they are purged."""
+
+BACKUP_PATH = os.path.join(SILENTMEMOIR_PATH, "backups/")
+"""Default directory backup snapshots are written to."""
+
+# ----------------------------
+# Storage
+# ----------------------------
+
+STORAGE_MAX_WORKERS = 4
+"""Size of the thread pool that runs disk I/O off the UI thread."""
+
+LARGE_ENTRY_THRESHOLD = 1024 * 1024
+"""Entries bigger than this many bytes are loaded into the editor in chunks."""
+
+LARGE_ENTRY_CHUNK_SIZE = 256 * 1024
+"""Number of characters appended to the editor per chunk for large entries."""
+
+DURABILITY_POLICY = "group"
+"""When saves are fsynced: "none", "save" (every save) or "group" (batched)."""
+
+DURABILITY_GROUP_INTERVAL = 1.0
+"""Seconds between background fsync rounds under the "group" policy."""
+
+LAYOUT_MARKER = ".layout"
+"""File inside a journal marking it as using the year/month sharded layout."""
+
+SHARDED_LAYOUT_DEFAULT = False
+"""Whether newly created journals file dated entries in year/month folders."""
+
+SEGMENTS_DIRNAME = ".segments"
+"""Directory inside a journal that holds its segment store, if it uses one."""
+
+SEGMENT_STORE_DEFAULT = False
+"""Whether newly created journals keep their entries in a segment store."""
+
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+"""Size at which the active segment is sealed and a new one started."""
+
+SEGMENT_COMPACT_RATIO = 0.5
+"""Fraction of segment bytes that must be dead before compaction runs."""
+
+SEGMENT_SNAPSHOT_INTERVAL = 256
+"""Number of appended records after which the segment index is snapshotted."""
+
+HISTORY_FILENAME = ".history.db"
+"""File inside a journal that holds the revision history of its entries."""
+
+HISTORY_KEYFRAME_INTERVAL = 32
+"""Most revisions stored per full copy; the rest are deltas against the previous."""
+
+COLD_ENTRY_DAYS = None
+"""Days without modification after which the app compresses an entry (None: never)."""
+
+COLD_ENTRY_MIN_BYTES = 1024
+"""Entries smaller than this are left uncompressed; savings would be negligible."""
+
+COMPRESSION_ALGORITHM = "lzma"
+"""Algorithm used to compress cold entries: "gzip" or "lzma"."""
+
+COMPRESSED_EXTENSION = ".z"
+"""Suffix appended to the .md name of a compressed entry."""
+
+COMPRESSION_START_DELAY = 30.0
+"""Seconds after startup before the app compresses cold entries in the background."""
+
+TRASH_PURGE_DELAY = 30.0
+"""Seconds a deleted journal stays in the trash, restorable, before it is purged."""
+
+IMPORT_BATCH_SIZE = 256
+"""Documents per batch normalized by an import worker and written together."""
+
+EXPORT_BATCH_SIZE = 64
+"""Entries per batch rendered to HTML by a site export worker."""
+
+# ----------------------------
+# Autosave
+# ----------------------------
+
+AUTOSAVE_INTERVAL = 2.0
+"""Seconds between swap file writes while an entry is being edited."""
+
+AUTOSAVE_COALESCE_INTERVAL = 60.0
+"""Seconds after which autosaved edits are written to the entry file itself."""
+
+AUTOSAVE_COALESCE_BYTES = 256 * 1024
+"""Swap file size at which autosaved edits are written to the entry file."""
+
+NEW_ENTRY_SWAP_NAME = "__new__"
+"""Swap file title used for a journal's new entry until it is first saved."""
+
 # ----------------------------
 # File Formats
 # ----------------------------
@@ -31,6 +149,75 @@ TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"
 ERROR_MESSAGE_DISPLAY_DURATION = 3
 """Duration in seconds to display error messages before clearing them."""
 
+BANNER_TEXT = "Silent Memoir"
+"""Title drawn as a FIGlet banner on the opening screen."""
+
+BANNER_FONT = "shadow"
+"""FIGlet font used for the opening screen banner."""
+
+STARTUP_BUDGET_SECONDS = 1.0
+"""Maximum time from process start to the first rendered frame."""
+
+TRACE_SAMPLE_SIZE = 1000
+"""Number of recent timings kept per operation for the performance overlay."""
+
+TRACE_OVERLAY_REFRESH = 0.5
+"""Seconds between refreshes of the performance overlay."""
+
+PREFETCH_DELAY = 0.1
+"""Seconds the entries list cursor must rest before entries are prefetched."""
+
+PREFETCH_NEIGHBOURS = 1
+"""Number of entries above and below the highlighted one that are prefetched."""
+
+PREFETCH_CACHE_BYTES = 32 * 1024 * 1024
+"""Approximate memory the prefetched entry texts and preview chunks may use."""
+
+BUFFER_CACHE_COUNT = 8
+"""Number of recently edited entries whose editor screens are kept alive."""
+
+BUFFER_CACHE_BYTES = 16 * 1024 * 1024
+"""Approximate memory the kept-alive entry editors may use."""
+
+WATCH_POLL_INTERVAL = 2.0
+"""Seconds between directory listings where inotify isn't available."""
+
+# ----------------------------
+# Markdown Preview
+# ----------------------------
+
+PREVIEW_CACHE_SIZE = 16
+"""Number of documents whose block split is kept in memory."""
+
+PREVIEW_CHUNK_BLOCKS = 8
+"""Average number of Markdown blocks rendered together as one preview chunk."""
+
+PREVIEW_THROTTLE_INTERVAL = 0.3
+"""Minimum seconds between live preview refreshes in split view."""
+
+# ----------------------------
+# Search
+# ----------------------------
+
+SEARCH_RESULT_LIMIT = 50
+"""Maximum number of hits returned by a search."""
+
+SEARCH_SNIPPET_LENGTH = 80
+"""Approximate number of characters shown around a search hit."""
+
+SEARCH_DEBOUNCE_DELAY = 0.15
+"""Seconds of typing pause before the search screen runs the query."""
+
+FINDER_RESULT_LIMIT = 100
+"""Maximum number of journals and entries the command palette offers per query."""
+
+# ----------------------------
+# Statistics
+# ----------------------------
+
+STATS_RECENT_DAYS = 84
+"""Number of days, up to today, shown day by day on the statistics dashboard."""
+
 # ----------------------------
 # Default Entry Content
 # ----------------------------
@@ -41,5 +228,8 @@ DEFAULT_ENTRY_PREFIX = "entry_"
 EMPTY_PREVIEW_MESSAGE = "# Empty Entry\n\nNo content to preview"
 """Message to display when previewing an empty entry."""
 
+NEW_ENTRY_LABEL = "Create New Entry"
+"""Label of the first row in the entries list, used to start a new entry."""
+
 NEW_ENTRY_PLACEHOLDER = "# New Entry\n\nstart writing your markdown here..."
 """Placeholder text for new entries."""
@@ -0,0 +1,249 @@
+"""
+Crash-safe file writes for SilentMemoir.
+
+Entries are written to a temporary file in the same directory and renamed over
+the original. Unless the policy is "none", the temporary file is fsynced
+before the rename, so a crash leaves either the old or the new version, never
+an empty or truncated one, even on filesystems that don't order data before
+renames (XFS, btrfs, ext4 with noauto_da_alloc). What happens after the
+rename is set by DURABILITY_POLICY:
+
+- "none": rely on the OS to write back eventually, temporary file included.
+- "save": fsync the directory too, so a save is durable when it returns.
+- "group": let a background thread fsync each changed directory once (and
+  any file written in place) DURABILITY_GROUP_INTERVAL seconds after the
+  first change. Many saves share one round of directory fsyncs. The thread
+  sleeps until there is something to commit.
+
+Bulk operations wrap their writes in batch(). Except under "none", files
+written with atomic_write() inside a batch stay in their temporary files
+until the batch ends, when they are fsynced in one pass and only then renamed
+into place, followed by one fsync per directory. A bulk import therefore
+costs no fsync per entry, yet a crash still leaves each file either old or
+complete. Batches are per thread: saves from other threads are unaffected.
+"""
+
+import atexit
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Iterable
+from contextlib import contextmanager
+
+from silentmemoir.config import DURABILITY_GROUP_INTERVAL, DURABILITY_POLICY
+
+POLICIES = ("none", "save", "group")
+
+TEMP_SUFFIX = ".tmp"
+"""Suffix of in-flight temporary files; they also start with a dot."""
+
+if DURABILITY_POLICY not in POLICIES:
+    raise ValueError(f"Unknown durability policy: {DURABILITY_POLICY}")
+
+# Read once, while importing is still single-threaded
+_umask = os.umask(0)
+os.umask(_umask)
+
+_lock = threading.Condition()
+_pending_files: set[str] = set()
+_pending_dirs: set[str] = set()
+_batch_depth = 0
+_committer = None
+
+# Writes of the current thread's batch waiting to be renamed into place, as
+# (temporary file, destination, files it supersedes); None outside a batch
+_local = threading.local()
+
+
+def _fsync_path(path: str, directory: bool = False) -> None:
+    flags = os.O_RDONLY
+    if directory:
+        flags |= getattr(os, "O_DIRECTORY", 0)
+    try:
+        fd = os.open(path, flags)
+    except (FileNotFoundError, IsADirectoryError, PermissionError):
+        return  # Gone since, or a platform that can't open directories
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # Some filesystems don't support fsync on directories
+    finally:
+        os.close(fd)
+
+
+def _defer(path: str, file: bool = True) -> None:
+    global _committer
+    with _lock:
+        if file:
+            _pending_files.add(path)
+        _pending_dirs.add(os.path.dirname(path))
+        if _committer is None and _batch_depth == 0:
+            _committer = threading.Thread(
+                target=_commit_loop, name="silentmemoir-fsync", daemon=True
+            )
+            _committer.start()
+            atexit.register(commit)
+        _lock.notify()
+
+
+def _has_pending() -> bool:
+    return bool(_pending_files or _pending_dirs) and _batch_depth == 0
+
+
+def _commit_loop() -> None:
+    while True:
+        with _lock:
+            _lock.wait_for(_has_pending)  # Idle until something is deferred
+        # Give other saves the interval to join the same round
+        time.sleep(DURABILITY_GROUP_INTERVAL)
+        commit()
+
+
+def commit() -> None:
+    """Fsync every deferred file and then each of their directories."""
+    with _lock:
+        files = list(_pending_files)
+        dirs = list(_pending_dirs)
+        _pending_files.clear()
+        _pending_dirs.clear()
+    for path in files:
+        _fsync_path(path)
+    for path in dirs:
+        _fsync_path(path, directory=True)
+
+
+def _syncing_each_save() -> bool:
+    return DURABILITY_POLICY == "save" and _batch_depth == 0
+
+
+@contextmanager
+def batch():
+    """
+    Group the fsyncs of many writes into one commit at the end.
+
+    Files written with atomic_write() inside the block only replace their
+    destinations when the outermost batch of the thread exits.
+
+    Yields:
+        Nothing; writes inside the block are committed when it exits
+
+    Raises:
+        OSError: If a deferred write cannot be renamed into place
+    """
+    global _batch_depth
+    outer = getattr(_local, "writes", None) is None
+    if outer:
+        _local.writes = []
+    with _lock:
+        _batch_depth += 1
+    try:
+        yield
+    finally:
+        try:
+            if outer:
+                writes, _local.writes = _local.writes, None
+                _publish(writes)
+        finally:
+            with _lock:
+                _batch_depth -= 1
+                outermost = _batch_depth == 0
+            if outermost and DURABILITY_POLICY != "none":
+                commit()
+
+
+def _publish(writes: list[tuple[str, str, tuple[str, ...]]]) -> None:
+    """Fsync a batch's temporary files, then rename them into place in order."""
+    for tmp_path, _, _ in writes:
+        _fsync_path(tmp_path)
+    error = None
+    for tmp_path, path, superseded in writes:
+        try:
+            os.replace(tmp_path, path)
+        except OSError as e:
+            _remove(tmp_path)
+            error = error or e
+            continue
+        for old in superseded:
+            _remove(old)
+        _defer(path, file=False)
+    if error is not None:
+        raise error
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def written(path: str) -> None:
+    """
+    Make a file written in place (e.g. by appending) durable per the policy.
+
+    Args:
+        path: The file that was written
+    """
+    if DURABILITY_POLICY == "none":
+        return
+    if _syncing_each_save():
+        _fsync_path(path)
+    else:
+        _defer(path)
+
+
+def atomic_write(path: str, content: str, supersedes: Iterable[str] = ()) -> None:
+    """
+    Replace a file's content so readers and crashes never see a partial write.
+
+    Inside a batch() the new content only replaces the file when the batch
+    ends (see the module docstring).
+
+    Args:
+        path: The file to write
+        content: The text to write (UTF-8)
+        supersedes: Other files to remove once the new one is in place, e.g.
+            an older copy of the same entry elsewhere
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    directory, name = os.path.split(path)
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o666 & ~_umask
+    superseded = tuple(p for p in supersedes if p != path)
+    writes = getattr(_local, "writes", None)
+    deferred = writes is not None and DURABILITY_POLICY != "none"
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{name}.", suffix=TEMP_SUFFIX
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            # The data must be on disk before the rename can be, whatever
+            # happens to the directory entry afterwards; a batch syncs all
+            # of its files in one pass at the end instead
+            if DURABILITY_POLICY != "none" and not deferred:
+                os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        if deferred:
+            writes.append((tmp_path, path, superseded))
+            return
+        os.replace(tmp_path, path)
+    except BaseException:
+        _remove(tmp_path)
+        raise
+
+    for old in superseded:
+        _remove(old)
+    if DURABILITY_POLICY == "none":
+        return
+    if _syncing_each_save():
+        _fsync_path(directory, directory=True)
+    else:
+        _defer(path, file=False)
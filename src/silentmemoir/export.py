@@ -0,0 +1,599 @@
+"""
+Export of journals to a single archive or a static HTML site.
+
+Archives (.tar, .tar.gz, .tar.xz, .tar.bz2 or .zip) are written as a stream:
+plain entries are copied straight from disk and compressed or segment-stored
+ones are decoded a chunk at a time, so no entry is ever held whole. The
+archive is assembled under a temporary name and renamed into place when
+complete; "-" streams an uncompressed tar to standard output instead.
+
+A site is one HTML page per entry, an index page per journal and a site
+index. Markdown is rendered to HTML in a process pool, a batch of entries per
+task. The site keeps a manifest of the version and SHA-256 of every entry it
+rendered: on the next export an entry whose version is unchanged is skipped
+without being read, and one whose content hashes the same is skipped without
+being rendered, so rebuilding a large site after a few edits only renders
+those few pages. Pages of deleted entries are removed.
+
+Usage:
+    python -m silentmemoir.export archive DEST [--journal NAME]
+    python -m silentmemoir.export site DEST [--journal NAME] [--workers N]
+"""
+
+import datetime
+import hashlib
+import html
+import json
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+from urllib.parse import quote
+
+from silentmemoir import durable
+from silentmemoir.config import (
+    EXPORT_BATCH_SIZE,
+    LARGE_ENTRY_CHUNK_SIZE,
+    MARKDOWN_EXTENSION,
+)
+from silentmemoir.models import Journal, JournalEntry
+
+ARCHIVE_MODES = {
+    ".tar": "w|",
+    ".tar.gz": "w|gz",
+    ".tgz": "w|gz",
+    ".tar.bz2": "w|bz2",
+    ".tar.xz": "w|xz",
+}
+"""Archive name suffixes and the tarfile stream mode each is written with."""
+
+SITE_MANIFEST_NAME = ".silentmemoir-site.json"
+"""File inside a site directory recording the entries it was built from."""
+
+SITE_VERSION = 1
+"""Bumped whenever the page templates change, so every page is rebuilt."""
+
+ENTRIES_DIRNAME = "entries"
+"""Directory inside a journal's site directory holding its entry pages."""
+
+# Decoded entries up to this size are spooled in memory before being added to
+# a tar archive, which needs their size up front; larger ones go to disk
+_SPOOL_SIZE = 8 * 1024 * 1024
+
+_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<style>
+body {{ max-width: 42rem; margin: 2rem auto; padding: 0 1rem;
+  font: 17px/1.6 Georgia, serif; color: #222; background: #fdfdfb; }}
+nav {{ font-size: 0.9rem; margin-bottom: 2rem; }}
+a {{ color: #2a5db0; }}
+ul.entries {{ list-style: none; padding: 0; }}
+ul.entries li {{ display: flex; gap: 1rem; }}
+ul.entries time, ul.entries span {{ color: #777; white-space: nowrap; }}
+pre {{ overflow-x: auto; background: #f3f3f0; padding: 0.75rem; }}
+</style>
+</head>
+<body>
+<nav>{nav}</nav>
+<main>
+{body}
+</main>
+</body>
+</html>
+"""
+
+
+class ExportError(Exception):
+    """Raised when an export destination cannot be used."""
+
+
+@dataclass
+class SiteResult:
+    """Totals of a site export."""
+
+    rendered: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    seconds: float = 0.0
+
+
+def _journals(names: Optional[Iterable[str]]) -> list[Journal]:
+    if not names:
+        return Journal.list_all()
+    journals = []
+    for name in names:
+        journal = Journal(name, create=False)
+        if not os.path.isdir(journal.journal_path):
+            raise ExportError(f"no such journal: {name}")
+        journals.append(journal)
+    return journals
+
+
+def _entries(journal: Journal) -> Iterator[JournalEntry]:
+    for filename in journal.list_entries():
+        yield JournalEntry(journal, filename[: -len(MARKDOWN_EXTENSION)])
+
+
+def _encoded_chunks(entry: JournalEntry) -> Iterator[bytes]:
+    for chunk in entry.read_chunks(LARGE_ENTRY_CHUNK_SIZE):
+        yield chunk.encode("utf-8")
+
+
+# ----------------------------
+# Archives
+# ----------------------------
+
+
+def _archive_mode(dest: str) -> Optional[str]:
+    """Return the tarfile mode for dest, or None for a zip archive."""
+    name = dest.lower()
+    if name.endswith(".zip"):
+        return None
+    for suffix, mode in ARCHIVE_MODES.items():
+        if name.endswith(suffix):
+            return mode
+    raise ExportError(
+        f"unknown archive type: {dest} (use .zip, .tar, .tar.gz, .tar.xz or .tar.bz2)"
+    )
+
+
+def _add_to_tar(tar: tarfile.TarFile, entry: JournalEntry, arcname: str) -> bool:
+    path = entry.stored_path()
+    if path is not None and path == entry.filepath:
+        tar.add(path, arcname, recursive=False)
+        return True
+    version = entry.version()
+    if version is None:
+        return False
+    with tempfile.SpooledTemporaryFile(_SPOOL_SIZE) as spool:
+        for data in _encoded_chunks(entry):
+            spool.write(data)
+        info = tarfile.TarInfo(arcname)
+        info.size = spool.tell()
+        info.mtime = version[0] / 1e9
+        info.mode = 0o644
+        spool.seek(0)
+        tar.addfile(info, spool)
+    return True
+
+
+def _add_to_zip(archive: zipfile.ZipFile, entry: JournalEntry, arcname: str) -> bool:
+    path = entry.stored_path()
+    if path is not None and path == entry.filepath:
+        archive.write(path, arcname)
+        return True
+    version = entry.version()
+    if version is None:
+        return False
+    modified = datetime.datetime.fromtimestamp(version[0] / 1e9)
+    info = zipfile.ZipInfo(arcname, modified.timetuple()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    with archive.open(info, "w", force_zip64=True) as out:
+        for data in _encoded_chunks(entry):
+            out.write(data)
+    return True
+
+
+def _write_archive(
+    fileobj,
+    mode: Optional[str],
+    journals: list[Journal],
+    progress: Optional[Callable[[int], None]],
+) -> int:
+    written = 0
+    if mode is None:
+        archive = zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED)
+        add = _add_to_zip
+    else:
+        archive = tarfile.open(fileobj=fileobj, mode=mode)
+        add = _add_to_tar
+    with archive:
+        for journal in journals:
+            for entry in _entries(journal):
+                arcname = f"{journal.name}/{entry.title}{MARKDOWN_EXTENSION}"
+                if add(archive, entry, arcname):
+                    written += 1
+                    if progress:
+                        progress(written)
+    return written
+
+
+def write_archive(
+    dest: str,
+    journals: Optional[Iterable[str]] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Write journals to a tar or zip archive, one JOURNAL/TITLE.md per entry.
+
+    Args:
+        dest: Archive path, its type taken from the suffix; "-" writes an
+            uncompressed tar to standard output
+        journals: Names of the journals to export; defaults to all
+        progress: Called with the number of entries written so far
+
+    Returns:
+        Number of entries written
+
+    Raises:
+        ExportError: If the archive type or a journal is unknown
+        OSError: If an entry cannot be read or the archive written
+    """
+    selected = _journals(journals)
+    if dest == "-":
+        return _write_archive(sys.stdout.buffer, "w|", selected, progress)
+
+    mode = _archive_mode(dest)
+    directory, name = os.path.split(os.path.abspath(dest))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            written = _write_archive(f, mode, selected, progress)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return written
+
+
+# ----------------------------
+# Static site
+# ----------------------------
+
+
+def _markdown():
+    # markdown-it-py comes with Textual; imported here so archive exports
+    # don't pay for it. Raw HTML in entries is escaped, not passed through.
+    from markdown_it import MarkdownIt
+
+    return MarkdownIt("js-default")
+
+
+def render_batch(pages: list[tuple[str, str, str]]) -> list[str]:
+    """
+    Render entry pages in a pool worker.
+
+    Args:
+        pages: (journal, title, markdown) of each entry
+
+    Returns:
+        The HTML page of each entry
+    """
+    md = _markdown()
+    rendered = []
+    for journal, title, text in pages:
+        nav = (
+            '<a href="../../index.html">Journals</a> / '
+            f'<a href="../index.html">{html.escape(journal)}</a>'
+        )
+        rendered.append(
+            _PAGE.format(title=html.escape(title), nav=nav, body=md.render(text))
+        )
+    return rendered
+
+
+def _rendered(
+    jobs: Iterable[tuple[str, tuple[str, str, str]]], workers: int
+) -> Iterator[tuple[list[str], list[str]]]:
+    """Yield (page paths, page HTML) per batch of (path, page) jobs."""
+
+    def batches():
+        batch = []
+        for job in jobs:
+            batch.append(job)
+            if len(batch) == EXPORT_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    if workers <= 1:
+        for batch in batches():
+            paths, pages = zip(*batch)
+            yield paths, render_batch(list(pages))
+        return
+    # As in the importer, a couple of batches per worker are in flight at
+    # most, so entry texts waiting to be rendered don't pile up in memory
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for batch in batches():
+            paths, pages = zip(*batch)
+            pending.append((paths, pool.submit(render_batch, list(pages))))
+            if len(pending) >= 2 * workers:
+                paths, future = pending.popleft()
+                yield paths, future.result()
+        while pending:
+            paths, future = pending.popleft()
+            yield paths, future.result()
+
+
+def _load_manifest(dest: str) -> dict[str, dict[str, dict]]:
+    try:
+        with open(os.path.join(dest, SITE_MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("version") != SITE_VERSION:
+        return {}
+    journals = manifest.get("journals")
+    if not isinstance(journals, dict):
+        return {}
+    # Names in the manifest are deleted from the site when they go away, so
+    # only keep ones that can't point outside it
+    return {
+        name: {
+            title: record
+            for title, record in entries.items()
+            if _is_plain_name(title) and isinstance(record, dict)
+        }
+        for name, entries in journals.items()
+        if _is_plain_name(name) and isinstance(entries, dict)
+    }
+
+
+def _is_plain_name(name: object) -> bool:
+    return (
+        isinstance(name, str)
+        and bool(name)
+        and "/" not in name
+        and os.sep not in name
+        and not name.startswith(".")
+    )
+
+
+def _write_if_changed(path: str, content: str) -> None:
+    # Unchanged pages keep their mtime, so syncing the site uploads less
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == content:
+                return
+    except OSError:
+        pass
+    durable.atomic_write(path, content)
+
+
+def _page_name(title: str) -> str:
+    return f"{title}.html"
+
+
+def _journal_page(journal: Journal) -> str:
+    items = []
+    details = journal.entry_details()
+    for info in sorted(details, key=lambda info: info.mtime, reverse=True):
+        title = info.filename[: -len(MARKDOWN_EXTENSION)]
+        modified = datetime.datetime.fromtimestamp(info.mtime)
+        href = f"{ENTRIES_DIRNAME}/{quote(_page_name(title))}"
+        items.append(
+            f'<li><time datetime="{modified:%Y-%m-%dT%H:%M}">'
+            f"{modified:%Y-%m-%d}</time>"
+            f' <a href="{href}">{html.escape(title)}</a>'
+            f" <span>{info.words} words</span></li>"
+        )
+    body = (
+        f"<h1>{html.escape(journal.name)}</h1>\n"
+        f'<ul class="entries">\n' + "\n".join(items) + "\n</ul>"
+    )
+    return _PAGE.format(
+        title=html.escape(journal.name),
+        nav='<a href="../index.html">Journals</a>',
+        body=body,
+    )
+
+
+def _index_page(counts: dict[str, int]) -> str:
+    items = [
+        f'<li><a href="{quote(name)}/index.html">{html.escape(name)}</a>'
+        f" <span>{count} entries</span></li>"
+        for name, count in sorted(counts.items())
+    ]
+    body = '<h1>Journals</h1>\n<ul class="entries">\n' + "\n".join(items) + "\n</ul>"
+    return _PAGE.format(title="Journals", nav="", body=body)
+
+
+def _remove_journal_pages(dest: str, name: str, titles: Iterable[str]) -> int:
+    directory = os.path.join(dest, name)
+    removed = 0
+    for title in titles:
+        try:
+            os.remove(os.path.join(directory, ENTRIES_DIRNAME, _page_name(title)))
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def build_site(
+    dest: str,
+    journals: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[SiteResult], None]] = None,
+) -> SiteResult:
+    """
+    Render journals to a static HTML site, or bring an existing one up to date.
+
+    Args:
+        dest: Directory of the site
+        journals: Names of the journals to publish; defaults to all
+        workers: Processes rendering Markdown; defaults to the CPU count
+        progress: Called with the running totals after each rendered batch
+
+    Returns:
+        Totals for the export
+
+    Raises:
+        ExportError: If a journal is unknown
+        OSError: If an entry cannot be read or a page written
+    """
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    selected = _journals(journals)
+    previous = _load_manifest(dest)
+    records: dict[str, dict[str, dict]] = {}
+    result = SiteResult()
+    os.makedirs(dest, exist_ok=True)
+
+    with durable.batch():
+        changed = _changed_pages(dest, selected, previous, records, result)
+        for paths, pages in _rendered(changed, workers):
+            for path, page in zip(paths, pages):
+                durable.atomic_write(path, page)
+            result.rendered += len(paths)
+            result.seconds = time.perf_counter() - start
+            if progress:
+                progress(result)
+
+        for journal in selected:
+            _write_if_changed(
+                os.path.join(dest, journal.name, "index.html"), _journal_page(journal)
+            )
+        # When only some journals are exported the others are left as they were
+        if journals:
+            for name, old in previous.items():
+                records.setdefault(name, old)
+        result.removed += _remove_stale_pages(dest, previous, records)
+
+        _write_if_changed(
+            os.path.join(dest, "index.html"),
+            _index_page({name: len(titles) for name, titles in records.items()}),
+        )
+        durable.atomic_write(
+            os.path.join(dest, SITE_MANIFEST_NAME),
+            json.dumps({"version": SITE_VERSION, "journals": records}),
+        )
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _changed_pages(
+    dest: str,
+    selected: list[Journal],
+    previous: dict[str, dict[str, dict]],
+    records: dict[str, dict[str, dict]],
+    result: SiteResult,
+) -> Iterator[tuple[str, tuple[str, str, str]]]:
+    """
+    Find the entries whose pages need rendering.
+
+    Args:
+        dest: Directory of the site
+        selected: The journals being exported
+        previous: The manifest of the last export
+        records: Filled with the new manifest records of the selected journals
+        result: Counts the entries skipped as unchanged
+
+    Yields:
+        (page path, (journal name, entry title, text)) per entry to render
+    """
+    for journal in selected:
+        old = previous.get(journal.name, {})
+        new = records[journal.name] = {}
+        entries_dir = os.path.join(dest, journal.name, ENTRIES_DIRNAME)
+        os.makedirs(entries_dir, exist_ok=True)
+        for entry in _entries(journal):
+            version = entry.version()
+            if version is None:
+                continue
+            page = os.path.join(entries_dir, _page_name(entry.title))
+            record = old.get(entry.title)
+            current = record is not None and os.path.exists(page)
+            if current and record["version"] == list(version):
+                new[entry.title] = record
+                result.unchanged += 1
+                continue
+            text = entry.read()
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            new[entry.title] = {"version": list(version), "sha256": digest}
+            if current and record["sha256"] == digest:
+                # Touched or rewritten with the same content
+                result.unchanged += 1
+                continue
+            yield page, (journal.name, entry.title, text)
+
+
+def _remove_stale_pages(
+    dest: str,
+    previous: dict[str, dict[str, dict]],
+    records: dict[str, dict[str, dict]],
+) -> int:
+    """
+    Delete the pages of entries and journals that are no longer published.
+
+    Args:
+        dest: Directory of the site
+        previous: The manifest of the last export
+        records: The new manifest
+
+    Returns:
+        Number of entry pages removed
+    """
+    removed = 0
+    for name, old in previous.items():
+        if name not in records:
+            # A journal published before but since deleted
+            removed += len(old)
+            shutil.rmtree(os.path.join(dest, name), ignore_errors=True)
+        else:
+            gone = old.keys() - records[name].keys()
+            removed += _remove_journal_pages(dest, name, gone)
+    return removed
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export journals.")
+    parser.add_argument("command", choices=("archive", "site"))
+    parser.add_argument(
+        "dest", help='archive file (.zip, .tar[.gz|.xz|.bz2], "-") or site directory'
+    )
+    parser.add_argument(
+        "--journal", action="append", help="export only this journal (repeatable)"
+    )
+    parser.add_argument("--workers", type=int, help="rendering processes (site)")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "archive":
+            # Keep progress out of an archive written to stdout
+            out = sys.stderr if args.dest == "-" else sys.stdout
+
+            def report(written: int) -> None:
+                if written % 100 == 0:
+                    out.write(f"\r{written} entries")
+                    out.flush()
+
+            written = write_archive(args.dest, args.journal, report)
+            out.write(f"\r{written} entries written\n")
+        else:
+
+            def report(result: SiteResult) -> None:
+                sys.stdout.write(f"\r{result.rendered} rendered")
+                sys.stdout.flush()
+
+            result = build_site(args.dest, args.journal, args.workers, report)
+            sys.stdout.write(
+                f"\r{result.rendered} rendered, {result.unchanged} unchanged, "
+                f"{result.removed} removed in {result.seconds:.1f}s\n"
+            )
+    except ExportError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Fuzzy title finder for SilentMemoir.
+
+This module keeps every journal name and entry title in memory, indexed by
+trigram and by word prefix, so the command palette can narrow even 100k
+titles down to a few candidates per keystroke without scanning them all. The
+index is built once from the metadata catalog, then kept current as entries
+are saved and deleted.
+
+Titles are normalized before indexing: lowercased, with every run of
+punctuation, underscores and whitespace folded into one space, so "morning
+pages" finds "Morning_Pages" as well as "morning-pages".
+"""
+
+import re
+import threading
+from array import array
+from collections import Counter, defaultdict
+from functools import partial
+from itertools import islice
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+from silentmemoir.config import FINDER_RESULT_LIMIT, MARKDOWN_EXTENSION
+
+if TYPE_CHECKING:
+    from silentmemoir.models import Journal
+
+WORD_PATTERN = re.compile(r"[^\W_]+")
+
+# Longest query served from the word prefix index; longer ones use trigrams
+PREFIX_LENGTH = 2
+
+# Candidates checked per query at most, bounding the cost of a keystroke when
+# a trigram occurs in nearly every title
+CANDIDATE_LIMIT = 5000
+
+_EMPTY = array("I")
+_postings = partial(array, "I")
+
+
+def normalize(text: str) -> str:
+    """
+    Fold a title to the form it is indexed and matched in.
+
+    Args:
+        text: A title or query
+
+    Returns:
+        The lowercased words of the text, separated by single spaces
+    """
+    return " ".join(WORD_PATTERN.findall(text.lower()))
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Return the three-character substrings of a normalized text.
+
+    Args:
+        text: The normalized text
+
+    Returns:
+        Set of trigrams; empty for texts shorter than three characters
+    """
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _prefixes(text: str) -> set[str]:
+    return {word[:n] for word in text.split() for n in range(1, PREFIX_LENGTH + 1)}
+
+
+def _title(filename: str) -> str:
+    if filename.endswith(MARKDOWN_EXTENSION):
+        return filename[: -len(MARKDOWN_EXTENSION)]
+    return filename
+
+
+class Match(NamedTuple):
+    """A journal or entry found by the finder."""
+
+    journal: str
+    title: str
+    """The entry title, or "" when the journal itself matched."""
+    similarity: float
+    """1.0 when every trigram (or the prefix) of the query was found, less for
+    near misses such as typos."""
+
+
+class TitleIndex:
+    """Thread-safe in-memory trigram and prefix index of all titles."""
+
+    def __init__(self):
+        """Create an empty index; build() loads it."""
+        self.built = False
+        self._lock = threading.Lock()
+        # Updates arriving while the index is being built, replayed after it
+        self._pending: list[tuple] = []
+        self._reset([])
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _reset(self, keys: list[tuple[str, str]]) -> None:
+        # Ids index _keys/_texts; removed titles leave a None behind, and are
+        # dropped from the posting lists when the index is compacted
+        self._keys: list[Optional[tuple[str, str]]] = []
+        self._texts: list[str] = []
+        self._ids: dict[tuple[str, str], int] = {}
+        self._trigrams: dict[str, array] = defaultdict(_postings)
+        self._prefixes: dict[str, array] = defaultdict(_postings)
+        self._dead = 0
+        for key in keys:
+            self._add(key)
+
+    def _add(self, key: tuple[str, str]) -> None:
+        if key in self._ids:
+            return
+        text = normalize(key[1] or key[0])
+        doc_id = len(self._keys)
+        self._keys.append(key)
+        self._texts.append(text)
+        self._ids[key] = doc_id
+        for postings, grams in (
+            (self._trigrams, trigrams(text)),
+            (self._prefixes, _prefixes(text)),
+        ):
+            for gram in grams:
+                postings[gram].append(doc_id)
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        doc_id = self._ids.pop(key, None)
+        if doc_id is None:
+            return
+        self._keys[doc_id] = None
+        self._dead += 1
+        if self._dead > len(self._ids):
+            self._reset(list(self._ids))
+
+    def _apply(self, op: str, key: tuple[str, str]) -> None:
+        if not self.built:
+            self._pending.append((op, key))
+        elif op == "add":
+            self._add(key)
+        elif op == "remove":
+            self._remove(key)
+        else:
+            for other in [k for k in self._ids if k[0] == key[0]]:
+                self._remove(other)
+
+    # ----------------------------
+    # Maintenance
+    # ----------------------------
+
+    def build(self) -> None:
+        """Load every journal and entry title, unless already loaded."""
+        from silentmemoir.models import Journal
+
+        if self.built:
+            return
+        keys = []
+        for journal in Journal.list_all():
+            keys.append((journal.name, ""))
+            try:
+                filenames = journal.list_entries()
+            except OSError:
+                continue
+            keys.extend((journal.name, _title(name)) for name in filenames)
+        with self._lock:
+            if self.built:
+                return
+            self._reset(keys)
+            self.built = True
+            for op, key in self._pending:
+                self._apply(op, key)
+            self._pending.clear()
+
+    def add(self, journal: str, title: str = "") -> None:
+        """
+        Index a journal, or an entry of one.
+
+        Args:
+            journal: Name of the journal
+            title: Title of the entry, or "" for the journal itself
+        """
+        with self._lock:
+            self._apply("add", (journal, title))
+
+    def add_journal(self, journal: "Journal") -> None:
+        """
+        Index a journal together with all of its entries.
+
+        Args:
+            journal: The journal, e.g. one just restored from the trash
+        """
+        keys = [(journal.name, _title(name)) for name in journal.list_entries()]
+        with self._lock:
+            for key in [(journal.name, ""), *keys]:
+                self._apply("add", key)
+
+    def remove(self, journal: str, title: str = "") -> None:
+        """
+        Drop an entry from the index, or a journal's own title.
+
+        Args:
+            journal: Name of the journal
+            title: Title of the entry, or "" for the journal itself
+        """
+        with self._lock:
+            self._apply("remove", (journal, title))
+
+    def remove_journal(self, journal: str) -> None:
+        """
+        Drop a journal and all of its entries from the index.
+
+        Args:
+            journal: Name of the journal
+        """
+        with self._lock:
+            self._apply("remove_journal", (journal, ""))
+
+    def clear(self) -> None:
+        """Forget everything; the next build() reloads from disk."""
+        with self._lock:
+            self.built = False
+            self._pending.clear()
+            self._reset([])
+
+    # ----------------------------
+    # Queries
+    # ----------------------------
+
+    def journals(self) -> list[str]:
+        """
+        Return the names of all indexed journals.
+
+        Returns:
+            Sorted list of journal names
+        """
+        with self._lock:
+            return sorted(journal for journal, title in self._ids if not title)
+
+    def search(self, query: str, limit: int = FINDER_RESULT_LIMIT) -> list[Match]:
+        """
+        Find the titles that best match a query.
+
+        Queries of one or two characters match the start of any word in a
+        title. Longer ones first look for titles containing every trigram of
+        the query, then fall back to titles sharing most of its trigrams, so a
+        typo still finds something. Ranking within the candidates is left to
+        the caller's fuzzy matcher.
+
+        Args:
+            query: What the user typed
+            limit: Maximum number of matches returned
+
+        Returns:
+            Matching journals and entries, closest first
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        with self._lock:
+            if len(query) <= PREFIX_LENGTH:
+                postings = self._prefixes.get(query, _EMPTY)
+                scored = [(doc_id, 1.0) for doc_id in self._live(postings, limit)]
+            else:
+                scored = self._search_trigrams(query, limit)
+            return [Match(*self._keys[doc_id], score) for doc_id, score in scored]
+
+    def _live(self, postings: array, limit: int) -> list[int]:
+        return list(islice(filter(self._keys.__getitem__, postings), limit))
+
+    def _search_trigrams(self, query: str, limit: int) -> list[tuple[int, float]]:
+        grams = trigrams(query)
+        postings = sorted(
+            (self._trigrams.get(gram, _EMPTY) for gram in grams), key=len
+        )
+        # Titles containing the whole query come first, then those holding
+        # every trigram of it in some other order
+        exact, scattered = [], []
+        for doc_id in islice(postings[0], CANDIDATE_LIMIT):
+            if self._keys[doc_id] is None:
+                continue
+            text = self._texts[doc_id]
+            if query in text:
+                exact.append((doc_id, 1.0))
+                if len(exact) == limit:
+                    break
+            elif all(gram in text for gram in grams):
+                scattered.append((doc_id, 1.0))
+        if exact or scattered:
+            return (exact + scattered)[:limit]
+
+        # Nothing has every trigram: rank titles by how many they share
+        shared = Counter()
+        for candidates in postings:
+            if candidates:
+                shared.update(islice(candidates, CANDIDATE_LIMIT))
+        return [
+            (doc_id, count / len(grams))
+            for doc_id, count in shared.most_common()
+            if self._keys[doc_id] is not None
+        ][:limit]
+
+
+title_index = TitleIndex()
+"""The index shared by the command palette and the storage layer."""
@@ -0,0 +1,343 @@
+"""
+Revision history of journal entries.
+
+Every save of an entry is recorded as a revision in its journal's history
+store, a SQLite database named HISTORY_FILENAME inside the journal directory,
+so the history moves with the journal into the trash and into backups.
+
+A revision is normally stored as a delta against the revision before it: the
+text is split into words (each with the whitespace after it), and the delta
+lists the runs of words copied from the previous revision and the new text
+between them. Typing a sentence into a long entry therefore costs about the
+sentence, not the entry. Every HISTORY_KEYFRAME_INTERVAL revisions, or when a
+delta would be no smaller than the text itself, the full text is stored as a
+keyframe instead, so reading any revision replays at most
+HISTORY_KEYFRAME_INTERVAL - 1 deltas. Deltas and keyframes are zlib
+compressed.
+
+Usage:
+    python -m silentmemoir.history log JOURNAL TITLE
+    python -m silentmemoir.history show JOURNAL TITLE REVISION
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from silentmemoir.config import HISTORY_FILENAME, HISTORY_KEYFRAME_INTERVAL
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS revisions (
+    title TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    saved REAL NOT NULL,
+    keyframe INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (title, number)
+) WITHOUT ROWID;
+"""
+
+# A word and the whitespace after it, or leading whitespace. Joining the
+# tokens gives back the text, and any run of them re-splits the same way.
+_TOKEN = re.compile(r"\S+\s*|\s+")
+
+Delta = list[Union[str, list[int]]]
+"""Copies from the previous revision as [start, count] token runs, and new
+text as strings, in order."""
+
+# Tokens of the latest revision of the entries saved most recently, so the
+# next save of an entry being edited diffs against them without replaying
+# its deltas
+_RECENT_LIMIT = 4
+_recent: "OrderedDict[tuple[str, str], tuple[int, list[str]]]" = OrderedDict()
+_recent_lock = threading.Lock()
+
+
+def _remember(key: tuple[str, str], number: int, tokens: list[str]) -> None:
+    with _recent_lock:
+        _recent[key] = (number, tokens)
+        _recent.move_to_end(key)
+        while len(_recent) > _RECENT_LIMIT:
+            _recent.popitem(last=False)
+
+
+@dataclass
+class Revision:
+    """A recorded version of an entry."""
+
+    number: int
+    saved: float
+    """Unix time of the save."""
+    length: int
+    """Length of the text in characters."""
+    stored: int
+    """Bytes the revision takes up in the store."""
+    keyframe: bool
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into the tokens deltas are made of.
+
+    Args:
+        text: The text to split
+
+    Returns:
+        Words with their trailing whitespace; joined they give back the text
+    """
+    return _TOKEN.findall(text)
+
+
+def make_delta(old: list[str], new: list[str]) -> Delta:
+    """
+    Describe how to build one token list from another.
+
+    Args:
+        old: Tokens of the previous revision
+        new: Tokens of the new revision
+
+    Returns:
+        The delta turning old into new
+    """
+    # Most saves change one region; matching only what lies between the
+    # common prefix and suffix keeps diffing cheap for long entries
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end = 0
+    while end < limit - start and old[-1 - end] == new[-1 - end]:
+        end += 1
+
+    # Imported here so that reading entries, e.g. from the command line,
+    # doesn't pay for it
+    from difflib import SequenceMatcher
+
+    delta: Delta = [[0, start]] if start else []
+    matcher = SequenceMatcher(
+        None, old[start : len(old) - end], new[start : len(new) - end]
+    )
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            delta.append([start + i1, i2 - i1])
+        elif j2 > j1:
+            delta.append("".join(new[start + j1 : start + j2]))
+    if end:
+        delta.append([len(old) - end, end])
+    return delta
+
+
+def apply_delta(old: list[str], delta: Delta) -> list[str]:
+    """
+    Build a revision's tokens from the previous revision's.
+
+    Args:
+        old: Tokens of the previous revision
+        delta: The delta recorded for the revision
+
+    Returns:
+        Tokens of the revision
+    """
+    tokens = []
+    for op in delta:
+        if isinstance(op, str):
+            tokens.extend(tokenize(op))
+        else:
+            tokens.extend(old[op[0] : op[0] + op[1]])
+    return tokens
+
+
+class HistoryStore:
+    """SQLite-backed revision history of one journal's entries."""
+
+    def __init__(self, journal_path: str):
+        """
+        Open (and create if needed) a journal's history store.
+
+        Args:
+            journal_path: Directory of the journal
+        """
+        self.path = os.path.join(journal_path, HISTORY_FILENAME)
+        self.conn = sqlite3.connect(self.path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self.conn.close()
+
+    def _tokens(self, title: str, number: int) -> Optional[list[str]]:
+        # The revision and the deltas back to the keyframe it builds on
+        rows = self.conn.execute(
+            "SELECT number, keyframe, data FROM revisions"
+            " WHERE title = ? AND number <= ? AND number >= ("
+            "  SELECT MAX(number) FROM revisions"
+            "  WHERE title = ? AND keyframe = 1 AND number <= ?"
+            ") ORDER BY number",
+            (title, number, title, number),
+        ).fetchall()
+        if not rows or rows[-1][0] != number:
+            return None
+        tokens: list[str] = []
+        for _, keyframe, data in rows:
+            text = zlib.decompress(data).decode("utf-8")
+            if keyframe:
+                tokens = tokenize(text)
+            else:
+                tokens = apply_delta(tokens, json.loads(text))
+        return tokens
+
+    def _latest(self, title: str) -> tuple[int, int]:
+        """Return the latest revision number and that of its keyframe."""
+        row = self.conn.execute(
+            "SELECT MAX(number), MAX(CASE WHEN keyframe THEN number END)"
+            " FROM revisions WHERE title = ?",
+            (title,),
+        ).fetchone()
+        return row[0] or 0, row[1] or 0
+
+    def record(self, title: str, content: str, saved: Optional[float] = None) -> int:
+        """
+        Record a new revision of an entry.
+
+        Args:
+            title: The entry title
+            content: The saved text
+            saved: Unix time of the save; defaults to now
+
+        Returns:
+            The revision number, or 0 if the text equals the latest revision
+        """
+        saved = time.time() if saved is None else saved
+        raw = content.encode("utf-8")
+        new = tokenize(content)
+        key = (self.path, title)
+        with self.conn:
+            latest, keyframe = self._latest(title)
+            data = full = None
+            if latest:
+                with _recent_lock:
+                    cached = _recent.get(key)
+                if cached is not None and cached[0] == latest:
+                    old = cached[1]
+                else:
+                    old = self._tokens(title, latest)
+                if old == new:
+                    return 0
+                if latest - keyframe + 1 < HISTORY_KEYFRAME_INTERVAL:
+                    delta = json.dumps(make_delta(old, new), separators=(",", ":"))
+                    data = zlib.compress(delta.encode("utf-8"))
+                    # Small deltas obviously win; only compress the full
+                    # text to compare when it's close
+                    if len(data) * 4 >= len(raw):
+                        full = zlib.compress(raw)
+                        if len(full) <= len(data):
+                            data = None
+            is_keyframe = data is None
+            if is_keyframe:
+                data = full if full is not None else zlib.compress(raw)
+            self.conn.execute(
+                "INSERT INTO revisions (title, number, saved, keyframe, length, data)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (title, latest + 1, saved, is_keyframe, len(content), data),
+            )
+        _remember(key, latest + 1, new)
+        return latest + 1
+
+    def revisions(self, title: str) -> list[Revision]:
+        """
+        List the revisions of an entry.
+
+        Args:
+            title: The entry title
+
+        Returns:
+            Revisions, newest first
+        """
+        rows = self.conn.execute(
+            "SELECT number, saved, length, LENGTH(data), keyframe FROM revisions"
+            " WHERE title = ? ORDER BY number DESC",
+            (title,),
+        )
+        return [
+            Revision(number, saved, length, stored, bool(keyframe))
+            for number, saved, length, stored, keyframe in rows
+        ]
+
+    def text(self, title: str, number: int) -> Optional[str]:
+        """
+        Reconstruct the text of a revision.
+
+        Args:
+            title: The entry title
+            number: The revision number
+
+        Returns:
+            The text, or None if there is no such revision
+        """
+        tokens = self._tokens(title, number)
+        return None if tokens is None else "".join(tokens)
+
+    def stored_bytes(self) -> int:
+        """
+        Return how many bytes the recorded revisions take up.
+
+        Returns:
+            Total size of the stored deltas and keyframes
+        """
+        row = self.conn.execute("SELECT SUM(LENGTH(data)) FROM revisions").fetchone()
+        return row[0] or 0
+
+
+def main() -> None:
+    import argparse
+    import datetime
+    import sys
+
+    from silentmemoir.models import Journal
+
+    parser = argparse.ArgumentParser(description="Show the history of an entry.")
+    parser.add_argument("command", choices=("log", "show"))
+    parser.add_argument("journal", help="journal name")
+    parser.add_argument("title", help="entry title")
+    parser.add_argument("revision", nargs="?", type=int, help="revision number")
+    args = parser.parse_args()
+
+    journal = Journal(args.journal, create=False)
+    if not os.path.isdir(journal.journal_path):
+        parser.error(f"no such journal: {args.journal}")
+    with HistoryStore(journal.journal_path) as history:
+        if args.command == "log":
+            for revision in history.revisions(args.title):
+                saved = datetime.datetime.fromtimestamp(revision.saved)
+                kind = "full" if revision.keyframe else "delta"
+                sys.stdout.write(
+                    f"{revision.number:>5}  {saved:%Y-%m-%d %H:%M:%S}  "
+                    f"{revision.length:>8} chars  {revision.stored:>7} bytes {kind}\n"
+                )
+            return
+        if args.revision is None:
+            parser.error("show needs a revision number")
+        text = history.text(args.title, args.revision)
+        if text is None:
+            parser.error(f"no revision {args.revision} of {args.title}")
+        sys.stdout.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,579 @@
+"""
+Bulk import of existing notes into journals.
+
+Documents are streamed from a directory tree of Markdown or text files, a tar
+archive (optionally compressed) or a JSONL file with one {"title", "body",
+"date", "journal"} object per line. Batches of raw documents are decoded and
+normalized in a process pool, while the main process writes the results with
+JournalEntry.save inside durable.batch(), one batch at a time. Only a bounded
+number of batches is ever in flight, so memory stays flat however large the
+source is.
+
+Each document's date (a "date" field, a front matter "date:" line, or else
+the file's mtime) becomes its entry name in TIMESTAMP_FORMAT, so imported
+entries sort chronologically and shard by month like entries written in the
+app; its title becomes the entry's first heading. Existing entries are never
+overwritten: a clashing timestamp is moved on by a second.
+
+Each written batch is recorded in the metadata catalog, search index,
+statistics and revision histories at once, one connection per store, so an
+interrupted import leaves every imported entry indexed and in its history.
+
+Usage:
+    python -m silentmemoir.importer SOURCE --journal NAME [--by-folder]
+        [--names date|title] [--workers N]
+"""
+
+import datetime
+import json
+import os
+import re
+import sys
+import tarfile
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+from silentmemoir import durable, layout
+from silentmemoir.config import IMPORT_BATCH_SIZE, MARKDOWN_EXTENSION
+
+TEXT_EXTENSIONS = (".md", ".markdown", ".txt")
+"""Files taken from directory trees and archives; everything else is skipped."""
+
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+
+# Date formats tried after ISO 8601
+_DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y/%m/%d", "%d.%m.%Y")
+
+_HEADING = re.compile(r"^#\s+(.+?)\s*#*\s*$", re.MULTILINE)
+_FRONT_MATTER = re.compile(r"\A---\n(.*?)\n---\n", re.DOTALL)
+
+# Longest entry title kept when documents are named by title
+_MAX_TITLE = 120
+
+
+class SourceError(Exception):
+    """Raised when a source cannot be imported."""
+
+
+@dataclass
+class RawDocument:
+    """A document as read from the source, before normalization."""
+
+    journal: str
+    name: str
+    data: Union[bytes, str]
+    title: Optional[str] = None
+    date: Union[str, float, None] = None
+    mtime: Optional[float] = None
+
+
+@dataclass
+class Document:
+    """A normalized document, ready to be written as an entry."""
+
+    journal: str
+    title: str
+    body: str
+    date: datetime.datetime
+
+
+@dataclass
+class ImportResult:
+    """What an import did."""
+
+    imported: int = 0
+    failed: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Documents imported per second."""
+        return self.imported / self.seconds if self.seconds else 0.0
+
+
+# ----------------------------
+# Sources
+# ----------------------------
+
+
+def _is_text(name: str) -> bool:
+    return name.lower().endswith(TEXT_EXTENSIONS)
+
+
+def _folder_journal(relpath: str, journal: str, by_folder: bool) -> str:
+    parts = relpath.replace(os.sep, "/").split("/")
+    return parts[0] if by_folder and len(parts) > 1 else journal
+
+
+def read_tree(
+    root: str, journal: str, by_folder: bool = False
+) -> Iterator[RawDocument]:
+    """
+    Stream the text files under a directory.
+
+    Args:
+        root: The directory to import
+        journal: Journal the documents go into
+        by_folder: Put each top-level folder's documents in a journal named
+            after it instead
+
+    Yields:
+        One raw document per file
+    """
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for filename in sorted(filenames):
+            if not _is_text(filename):
+                continue
+            path = os.path.join(directory, filename)
+            relpath = os.path.relpath(path, root)
+            with open(path, "rb") as f:
+                data = f.read()
+            yield RawDocument(
+                _folder_journal(relpath, journal, by_folder),
+                filename,
+                data,
+                mtime=os.stat(path).st_mtime,
+            )
+
+
+def read_tar(
+    path: str, journal: str, by_folder: bool = False
+) -> Iterator[RawDocument]:
+    """
+    Stream the text files of a tar archive, compressed or not.
+
+    The archive is read front to back in one pass, never extracted.
+
+    Args:
+        path: The archive, or "-" for standard input
+        journal: Journal the documents go into
+        by_folder: Put each top-level folder's documents in a journal named
+            after it instead
+
+    Yields:
+        One raw document per file
+    """
+    fileobj = sys.stdin.buffer if path == "-" else None
+    with tarfile.open(None if fileobj else path, "r|*", fileobj=fileobj) as tar:
+        for member in tar:
+            if not member.isfile() or not _is_text(member.name):
+                continue
+            f = tar.extractfile(member)
+            if f is None:
+                continue
+            relpath = member.name.removeprefix("./")
+            yield RawDocument(
+                _folder_journal(relpath, journal, by_folder),
+                os.path.basename(member.name),
+                f.read(),
+                mtime=member.mtime,
+            )
+
+
+def read_jsonl(path: str, journal: str) -> Iterator[RawDocument]:
+    """
+    Stream the documents of a JSONL file.
+
+    Each line is an object with a "body" (or "content"/"text"), and
+    optionally a "title", a "date" (ISO 8601 or a Unix time) and a "journal"
+    overriding the default one. Lines that aren't such an object are skipped.
+
+    Args:
+        path: The file, or "-" for standard input
+        journal: Journal the documents go into unless they name one
+
+    Yields:
+        One raw document per line
+    """
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                body = next(
+                    record[key] for key in ("body", "content", "text") if key in record
+                )
+            except (ValueError, StopIteration, TypeError):
+                sys.stderr.write(f"skipped line {number}: not a document\n")
+                continue
+            yield RawDocument(
+                str(record.get("journal") or journal),
+                f"line {number}",
+                str(body),
+                title=record.get("title"),
+                date=record.get("date"),
+            )
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def open_source(
+    source: str, journal: str, by_folder: bool = False
+) -> Iterator[RawDocument]:
+    """
+    Stream the documents of a source, picking the reader from its type.
+
+    Args:
+        source: A directory, a tar archive or a .jsonl file
+        journal: Default journal for the documents
+        by_folder: For trees and archives, one journal per top-level folder
+
+    Returns:
+        The raw documents
+
+    Raises:
+        SourceError: If the source isn't something that can be imported
+    """
+    if os.path.isdir(source):
+        return read_tree(source, journal, by_folder)
+    if source.lower().endswith(JSONL_EXTENSIONS):
+        return read_jsonl(source, journal)
+    if source == "-" or (os.path.isfile(source) and tarfile.is_tarfile(source)):
+        return read_tar(source, journal, by_folder)
+    raise SourceError(f"{source}: not a directory, tar archive or .jsonl file")
+
+
+# ----------------------------
+# Normalization (runs in the pool)
+# ----------------------------
+
+
+def parse_date(value: Union[str, float, None]) -> Optional[datetime.datetime]:
+    """
+    Parse a source date.
+
+    Args:
+        value: An ISO 8601 string, a common date format, or a Unix time
+
+    Returns:
+        The date in local time without timezone, or None if unparseable
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.datetime.fromtimestamp(value)
+    value = str(value).strip()
+    try:
+        date = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        for fmt in _DATE_FORMATS:
+            try:
+                date = datetime.datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+    if date.tzinfo is not None:
+        date = date.astimezone().replace(tzinfo=None)
+    return date
+
+
+def normalize(raw: RawDocument) -> Document:
+    """
+    Turn a raw document into entry text with a title and a date.
+
+    Text is decoded as UTF-8 (invalid bytes replaced), line endings become
+    "\\n" and trailing whitespace is trimmed. The title is the source's own,
+    else the front matter's, else the first heading, else the file name; it
+    is added as a heading unless the text already starts with one.
+
+    Args:
+        raw: The document as read
+
+    Returns:
+        The normalized document
+
+    Raises:
+        ValueError: If the document names an invalid journal
+    """
+    if not layout.is_valid_journal_name(raw.journal):
+        raise ValueError(f"invalid journal name {raw.journal!r}")
+
+    text = raw.data
+    if isinstance(text, bytes):
+        text = text.decode("utf-8-sig", errors="replace")
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\0", "")
+    text = text.strip() + "\n"
+
+    front = {}
+    match = _FRONT_MATTER.match(text)
+    if match:
+        for line in match.group(1).splitlines():
+            key, sep, value = line.partition(":")
+            if sep:
+                front[key.strip().lower()] = value.strip().strip("\"'")
+
+    heading = _HEADING.search(text)
+    title = (
+        raw.title
+        or front.get("title")
+        or (heading.group(1) if heading else None)
+        or os.path.splitext(raw.name)[0]
+    )
+    title = " ".join(str(title).split())
+    if not text.startswith("# ") and not match:
+        text = f"# {title}\n\n{text}"
+
+    date = parse_date(raw.date) or parse_date(front.get("date"))
+    if date is None:
+        date = datetime.datetime.fromtimestamp(raw.mtime or time.time())
+    return Document(raw.journal, title, text, date.replace(microsecond=0))
+
+
+def normalize_batch(raws: list[RawDocument]) -> list[Union[Document, str]]:
+    """
+    Normalize a batch of documents in a pool worker.
+
+    Args:
+        raws: The raw documents
+
+    Returns:
+        A document for each one, or an error message where it failed
+    """
+    results = []
+    for raw in raws:
+        try:
+            results.append(normalize(raw))
+        except Exception as e:  # noqa: BLE001 - one bad document mustn't stop the rest
+            results.append(f"{raw.name}: {e}")
+    return results
+
+
+# ----------------------------
+# Import
+# ----------------------------
+
+
+def _batches(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _normalized(
+    raws: Iterable[RawDocument], workers: int, batch_size: int
+) -> Iterator[list[Union[Document, str]]]:
+    # Keep a couple of batches per worker queued: enough to keep the pool
+    # busy while the main process writes, few enough to bound memory
+    if workers <= 1:
+        for batch in _batches(raws, batch_size):
+            yield normalize_batch(batch)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for batch in _batches(raws, batch_size):
+            pending.append(pool.submit(normalize_batch, batch))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class _Namer:
+    """Hands out entry titles that are unused in their journal."""
+
+    def __init__(self, by_title: bool):
+        self.by_title = by_title
+        self.taken: dict[str, set[str]] = {}
+        # Where the last search for a free name ended, per journal and wanted
+        # name, so documents sharing a date don't all retry every taken one
+        self.resume: dict[tuple[str, str], tuple[str, object]] = {}
+
+    def claim(self, journal, doc: Document) -> str:
+        taken = self.taken.get(journal.name)
+        if taken is None:
+            taken = self.taken[journal.name] = {
+                name[: -len(MARKDOWN_EXTENSION)] for name in journal.list_entries()
+            }
+        if self.by_title:
+            base = re.sub(r"[/\\]+", "-", doc.title)[:_MAX_TITLE].strip()
+            base = base or "untitled"
+        else:
+            base = layout.dated_title(doc.date)
+        title, step = self.resume.get((journal.name, base), (base, None))
+        while title in taken:
+            if self.by_title:
+                step = (step or 1) + 1
+                title = f"{base} ({step})"
+            else:
+                # Clashing dates move on a second at a time
+                step = (step or doc.date) + datetime.timedelta(seconds=1)
+                title = layout.dated_title(step)
+        self.resume[(journal.name, base)] = (title, step)
+        taken.add(title)
+        return title
+
+
+def import_documents(
+    raws: Iterable[RawDocument],
+    by_title: bool = False,
+    workers: Optional[int] = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    progress: Optional[Callable[[ImportResult], None]] = None,
+) -> ImportResult:
+    """
+    Write documents into journals, creating the journals as needed.
+
+    Args:
+        raws: The documents, e.g. from open_source()
+        by_title: Name entries after document titles instead of their dates
+        workers: Processes normalizing documents; defaults to the CPU count
+        batch_size: Documents per batch handed to a worker and written at once
+        progress: Called with the running totals after each batch
+
+    Returns:
+        Totals for the import
+
+    Raises:
+        OSError: If an entry cannot be written
+    """
+    from silentmemoir.catalog import dir_mtime_ns
+    from silentmemoir.models import Journal, JournalEntry
+
+    workers = workers or os.cpu_count() or 1
+    result = ImportResult()
+    journals: dict[str, Journal] = {}
+    namer = _Namer(by_title)
+    start = time.perf_counter()
+
+    for batch in _normalized(raws, workers, batch_size):
+        written = []
+        # Entry directories' mtimes before the batch wrote into them
+        mtimes: dict[str, Optional[int]] = {}
+        with durable.batch():
+            for doc in batch:
+                if isinstance(doc, str):
+                    sys.stderr.write(f"skipped {doc}\n")
+                    result.failed += 1
+                    continue
+                journal = journals.get(doc.journal)
+                if journal is None:
+                    journal = journals[doc.journal] = Journal(doc.journal)
+                entry = JournalEntry(journal, namer.claim(journal, doc))
+                directory = os.path.dirname(entry.filepath)
+                if directory not in mtimes:
+                    mtimes[directory] = dir_mtime_ns(directory)
+                # Indexes are brought up to date per batch below
+                entry.save(doc.body, index=False)
+                written.append((entry, doc))
+                result.imported += 1
+                result.bytes += len(doc.body)
+        _index_batch(written, mtimes)
+        result.seconds = time.perf_counter() - start
+        if progress:
+            progress(result)
+
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _index_batch(written: list[tuple], mtimes: dict[str, Optional[int]]) -> None:
+    """
+    Record a written batch in the catalog, search index, statistics and
+    revision histories.
+
+    Args:
+        written: (entry, document) for each entry saved
+        mtimes: Entry directories' mtimes before the batch was written
+    """
+    from silentmemoir.catalog import Catalog, count_words
+    from silentmemoir.history import HistoryStore
+    from silentmemoir.search import SearchIndex
+    from silentmemoir.stats import StatsStore
+
+    by_journal: dict[str, list[tuple]] = {}
+    for entry, doc in written:
+        by_journal.setdefault(entry.journal.name, []).append((entry, doc))
+
+    with Catalog() as catalog:
+        for items in by_journal.values():
+            journal = items[0][0].journal
+            if journal.segment_store is not None:
+                continue  # Listed from the store's own index
+            for entry, doc in items:
+                directory = os.path.dirname(entry.filepath)
+                shard = os.path.relpath(directory, journal.journal_path)
+                catalog.record_entry(
+                    journal.name,
+                    entry.filename,
+                    entry.filepath,
+                    doc.body,
+                    mtimes.get(directory),
+                    "" if shard == os.curdir else shard,
+                )
+    with SearchIndex() as index:
+        for entry, doc in written:
+            index.update_entry(entry, doc.body)
+    with StatsStore() as stats:
+        stats.record_entries(
+            (
+                entry.journal.name,
+                entry.title,
+                count_words(doc.body),
+                doc.date.timestamp(),
+            )
+            for entry, doc in written
+        )
+    for items in by_journal.values():
+        with HistoryStore(items[0][0].journal.journal_path) as history:
+            for entry, doc in items:
+                history.record(entry.title, doc.body)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import notes into journals.")
+    parser.add_argument(
+        "source", help='directory, tar archive or .jsonl file ("-" reads a tar)'
+    )
+    parser.add_argument("--journal", required=True, help="journal to import into")
+    parser.add_argument(
+        "--by-folder",
+        action="store_true",
+        help="one journal per top-level folder of a tree or archive",
+    )
+    parser.add_argument(
+        "--names",
+        choices=("date", "title"),
+        default="date",
+        help="name entries by date (default) or by title",
+    )
+    parser.add_argument("--workers", type=int, help="normalizing processes")
+    args = parser.parse_args()
+
+    def report(result: ImportResult) -> None:
+        sys.stdout.write(
+            f"\r{result.imported} imported, {result.rate:.0f} docs/s, "
+            f"{result.bytes / max(result.seconds, 1e-9) / 1e6:.1f} MB/s"
+        )
+        sys.stdout.flush()
+
+    try:
+        raws = open_source(args.source, args.journal, args.by_folder)
+        result = import_documents(
+            raws, args.names == "title", args.workers, progress=report
+        )
+    except (SourceError, tarfile.TarError) as e:
+        parser.error(str(e))
+    report(result)
+    sys.stdout.write(f" in {result.seconds:.1f}s, {result.failed} failed\n")
+
+
+if __name__ == "__main__":
+    main()
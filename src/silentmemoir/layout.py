@@ -0,0 +1,197 @@
+"""
+On-disk layout of journal entries.
+
+A journal is either flat (every entry directly in the journal directory) or
+sharded: entries whose titles carry a timestamp (DEFAULT_ENTRY_PREFIX +
+TIMESTAMP_FORMAT) live in YYYY/MM subdirectories, and only custom-titled
+entries stay at the top. A LAYOUT_MARKER file in the journal directory marks
+it as sharded.
+
+Paths are resolved so a layout change can happen while the app is running:
+the location the current layout prescribes is used if it exists, otherwise
+the other one, and new files always go where the layout says. An entry kept
+compressed (see compression.py) counts as present at its .md path.
+"""
+
+import datetime
+import os
+from typing import Optional
+
+from silentmemoir.config import (
+    COMPRESSED_EXTENSION,
+    DEFAULT_ENTRY_PREFIX,
+    LAYOUT_MARKER,
+    MARKDOWN_EXTENSION,
+    TIMESTAMP_FORMAT,
+)
+
+
+def is_valid_journal_name(name: str) -> bool:
+    """
+    Check that a journal name names a directory right inside the journals
+    directory.
+
+    Args:
+        name: The journal name
+
+    Returns:
+        False if the name is empty, hidden (which includes "." and ".."), or
+        holds a path separator or NUL, else True
+    """
+    if not name or name.startswith(".") or "\0" in name:
+        return False
+    # Without separators the name is a single component, so never ".." again
+    return not any(sep and sep in name for sep in ("/", os.sep, os.altsep))
+
+
+def is_sharded(journal_path: str) -> bool:
+    """
+    Check whether a journal uses the sharded layout.
+
+    Args:
+        journal_path: The journal's directory
+
+    Returns:
+        True if dated entries live in year/month subdirectories
+    """
+    return os.path.exists(os.path.join(journal_path, LAYOUT_MARKER))
+
+
+def set_sharded(journal_path: str, sharded: bool) -> None:
+    """
+    Switch the layout new entries are written in.
+
+    Existing entries stay readable where they are; migrate.py moves them.
+
+    Args:
+        journal_path: The journal's directory
+        sharded: Whether to use the sharded layout
+    """
+    marker = os.path.join(journal_path, LAYOUT_MARKER)
+    if sharded:
+        with open(marker, "w", encoding="utf-8") as f:
+            f.write("sharded\n")
+    else:
+        try:
+            os.remove(marker)
+        except FileNotFoundError:
+            pass
+
+
+def dated_title(date: datetime.datetime) -> str:
+    """
+    Return the auto-generated title for an entry written at a given time.
+
+    Args:
+        date: The entry's timestamp
+
+    Returns:
+        DEFAULT_ENTRY_PREFIX followed by the date in TIMESTAMP_FORMAT
+    """
+    return f"{DEFAULT_ENTRY_PREFIX}{date.strftime(TIMESTAMP_FORMAT)}"
+
+
+def entry_date(title: str) -> Optional[datetime.datetime]:
+    """
+    Return the timestamp encoded in an auto-generated entry title.
+
+    Args:
+        title: The entry title (without .md extension)
+
+    Returns:
+        The timestamp, or None for custom titles
+    """
+    if not title.startswith(DEFAULT_ENTRY_PREFIX):
+        return None
+    try:
+        return datetime.datetime.strptime(
+            title[len(DEFAULT_ENTRY_PREFIX) :], TIMESTAMP_FORMAT
+        )
+    except ValueError:
+        return None
+
+
+def shard_for(title: str) -> str:
+    """
+    Return the subdirectory an entry belongs in under the sharded layout.
+
+    Args:
+        title: The entry title (without .md extension)
+
+    Returns:
+        Relative "YYYY/MM" directory, or "" for entries without a timestamp
+    """
+    date = entry_date(title)
+    if date is None:
+        return ""
+    return os.path.join(f"{date:%Y}", f"{date:%m}")
+
+
+def entry_paths(journal_path: str, title: str) -> tuple[str, str]:
+    """
+    Return where an entry should live and where it may still be.
+
+    Args:
+        journal_path: The journal's directory
+        title: The entry title (without .md extension)
+
+    Returns:
+        (path under the journal's current layout, path under the other one)
+    """
+    filename = f"{title}{MARKDOWN_EXTENSION}"
+    flat = os.path.join(journal_path, filename)
+    sharded = os.path.join(journal_path, shard_for(title), filename)
+    if is_sharded(journal_path):
+        return sharded, flat
+    return flat, sharded
+
+
+def _present(path: str) -> bool:
+    return os.path.exists(path) or os.path.exists(path + COMPRESSED_EXTENSION)
+
+
+def resolve(journal_path: str, title: str) -> str:
+    """
+    Find an entry's file, whichever layout it is currently stored in.
+
+    Args:
+        journal_path: The journal's directory
+        title: The entry title (without .md extension)
+
+    Returns:
+        The .md path of the existing entry (its file may be compressed), or
+        the path a new entry should be written to
+    """
+    primary, alternate = entry_paths(journal_path, title)
+    if primary != alternate and not _present(primary) and _present(alternate):
+        return alternate
+    return primary
+
+
+def shard_dirs(journal_path: str) -> list[str]:
+    """
+    List the year/month subdirectories of a journal.
+
+    Args:
+        journal_path: The journal's directory
+
+    Returns:
+        Sorted relative "YYYY/MM" directories that exist
+    """
+    shards = []
+    try:
+        with os.scandir(journal_path) as years:
+            for year in years:
+                if not (year.is_dir() and len(year.name) == 4 and year.name.isdigit()):
+                    continue
+                with os.scandir(year.path) as months:
+                    shards.extend(
+                        os.path.join(year.name, month.name)
+                        for month in months
+                        if month.is_dir()
+                        and len(month.name) == 2
+                        and month.name.isdigit()
+                    )
+    except FileNotFoundError:
+        pass
+    return sorted(shards)
@@ -1,19 +1,94 @@
+import sys
+
 from textual.app import App
+from textual.binding import Binding
 
+from silentmemoir.buffers import BufferManager
+from silentmemoir.config import COLD_ENTRY_DAYS, COMPRESSION_START_DELAY
 from silentmemoir.screens.opening_screen import OpeningScreen
-from silentmemoir.screens.view_journals import ViewJournals
+
+
+def view_journals_screen():
+    # Imported on first use so it stays off the path to the first frame
+    from silentmemoir.screens.view_journals import ViewJournals
+
+    return ViewJournals()
+
+
+def dashboard_screen():
+    from silentmemoir.screens.stats import Dashboard
+
+    return Dashboard()
+
+
+def title_finder():
+    from silentmemoir.commands import TitleFinder
+
+    return TitleFinder
+
+
+def backup_commands():
+    from silentmemoir.commands import BackupCommands
+
+    return BackupCommands
+
+
+def preload_screens():
+    import silentmemoir.screens.entry  # noqa: F401
+    import silentmemoir.screens.view_journals  # noqa: F401
+    from silentmemoir.finder import title_index
+
+    # Load the command palette's title index ahead of its first use
+    title_index.build()
+
+
+def compress_cold_entries():
+    from silentmemoir.compression import compress_cold_entries
+
+    compress_cold_entries(COLD_ENTRY_DAYS)
 
 
 class SilentMemoir(App):
     CSS_PATH = "assets/css.tcss"
 
+    BINDINGS = [
+        Binding("f12", "toggle_perf_overlay", "Performance", show=False, priority=True),
+    ]
+
+    COMMANDS = App.COMMANDS | {title_finder, backup_commands}
+
     SCREENS = {
         "Opening Screen": OpeningScreen,
-        "View Journals": ViewJournals,
+        "View Journals": view_journals_screen,
+        "Dashboard": dashboard_screen,
     }
 
+    def __init__(self):
+        super().__init__()
+        # Entry editors kept alive for quick switching between entries
+        self.buffers = BufferManager(self)
+
     def on_mount(self):
         self.push_screen("Opening Screen")
+        # Warm up the remaining screens in the background once the first
+        # frame is on screen, so entering the journals view stays instant
+        self.call_after_refresh(self.run_worker, preload_screens, thread=True)
+        if COLD_ENTRY_DAYS is not None:
+            self.set_timer(COMPRESSION_START_DELAY, self.start_compression)
+
+    def start_compression(self) -> None:
+        self.run_worker(
+            compress_cold_entries, thread=True, group="maintenance", exclusive=True
+        )
+
+    def action_toggle_perf_overlay(self) -> None:
+        from silentmemoir.widgets import PerfOverlay
+
+        overlays = self.screen.query(PerfOverlay)
+        if overlays:
+            overlays.remove()
+        else:
+            self.screen.mount(PerfOverlay(markup=False))
 
     def action_toggle_dark(self) -> None:
         self.theme = (
@@ -21,11 +96,20 @@ class SilentMemoir(App):
         )
 
 
+def shutdown_storage():
+    # Wait for saves still queued on the I/O pool, if it was ever started
+    storage = sys.modules.get("silentmemoir.storage")
+    if storage is not None:
+        storage.shutdown()
+
+
 def run():
     app = SilentMemoir()
-    app.run()
+    try:
+        app.run()
+    finally:
+        shutdown_storage()
 
 
 if __name__ == "__main__":
-    app = SilentMemoir()
-    app.run()
+    run()
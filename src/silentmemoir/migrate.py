@@ -0,0 +1,168 @@
+"""
+Online, resumable migration between the flat and sharded journal layouts.
+
+The journal's layout marker is switched first, so every save made from then
+on already lands in the new layout. Existing files are then moved one by one.
+A move is a hard link followed by removing the old name, so an entry saved
+under the new layout while the migration runs is never overwritten by its
+older copy. An interrupted migration is finished by running it again.
+
+Usage:
+    python -m silentmemoir.migrate shard|flatten JOURNAL [JOURNAL ...]
+    python -m silentmemoir.migrate shard|flatten --all
+"""
+
+import argparse
+import os
+import sys
+from typing import Callable, Optional
+
+from silentmemoir import compression, durable, layout, segments
+from silentmemoir.config import COMPRESSED_EXTENSION, MARKDOWN_EXTENSION
+
+
+class MigrationError(Exception):
+    """Raised when a journal cannot be migrated."""
+
+
+def _is_entry_file(name: str) -> bool:
+    return compression.entry_filename(name).endswith(MARKDOWN_EXTENSION)
+
+
+def _title(path: str) -> str:
+    return compression.entry_filename(os.path.basename(path))[: -len(MARKDOWN_EXTENSION)]
+
+
+def stray_entries(journal_path: str, sharded: bool) -> list[str]:
+    """
+    List entry files that are not where the target layout puts them.
+
+    Args:
+        journal_path: The journal's directory
+        sharded: The target layout
+
+    Returns:
+        Paths of the entry files still to be moved
+    """
+    if sharded:
+        with os.scandir(journal_path) as it:
+            return sorted(
+                d.path
+                for d in it
+                if d.is_file()
+                and _is_entry_file(d.name)
+                and layout.shard_for(_title(d.name))
+            )
+
+    paths = []
+    for shard in layout.shard_dirs(journal_path):
+        directory = os.path.join(journal_path, shard)
+        with os.scandir(directory) as it:
+            paths.extend(
+                d.path
+                for d in it
+                if d.is_file() and _is_entry_file(d.name)
+            )
+    return sorted(paths)
+
+
+def _move(src: str, dst: str) -> None:
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        pass  # Saved under the new layout meanwhile; that copy is newer
+    except OSError:
+        # No hard links on this filesystem: fall back to a plain rename
+        if not os.path.exists(dst):
+            os.rename(src, dst)
+            durable.written(dst)
+            return
+    os.remove(src)
+    durable.written(dst)
+    durable.written(src)
+
+
+def migrate_journal(
+    journal_path: str,
+    sharded: bool,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    Move a journal's entries into the flat or sharded layout.
+
+    Safe to run while the app is using the journal, and to run again after
+    an interruption.
+
+    Args:
+        journal_path: The journal's directory
+        sharded: True to shard by year/month, False to flatten
+        progress: Called with (entries moved, entries to move) after each move
+
+    Returns:
+        Number of entries moved
+
+    Raises:
+        MigrationError: If the journal keeps its entries in a segment store
+        OSError: If an entry cannot be moved
+    """
+    if segments.is_segmented(journal_path):
+        raise MigrationError(f"{journal_path} uses the segment store")
+
+    layout.set_sharded(journal_path, sharded)
+    pending = stray_entries(journal_path, sharded)
+
+    with durable.batch():
+        for done, src in enumerate(pending, start=1):
+            dst, _ = layout.entry_paths(journal_path, _title(src))
+            if src.endswith(COMPRESSED_EXTENSION):
+                dst = compression.compressed_path(dst)
+            _move(src, dst)
+            if progress:
+                progress(done, len(pending))
+
+    if not sharded:
+        for shard in layout.shard_dirs(journal_path):
+            for directory in (shard, os.path.dirname(shard)):
+                try:
+                    os.rmdir(os.path.join(journal_path, directory))
+                except OSError:
+                    pass  # Not empty: something else lives there
+
+    return len(pending)
+
+
+def main() -> None:
+    from silentmemoir.models import Journal
+
+    parser = argparse.ArgumentParser(description="Change the layout of journals.")
+    parser.add_argument("layout", choices=("shard", "flatten"))
+    parser.add_argument("journals", nargs="*", help="journal names")
+    parser.add_argument("--all", action="store_true", help="migrate every journal")
+    args = parser.parse_args()
+
+    if args.all:
+        journals = Journal.list_all()
+    elif args.journals:
+        journals = [Journal(name, create=False) for name in args.journals]
+    else:
+        parser.error("name at least one journal, or pass --all")
+
+    for journal in journals:
+        if not os.path.isdir(journal.journal_path):
+            parser.error(f"no such journal: {journal.name}")
+
+        def report(done: int, total: int, name: str = journal.name) -> None:
+            if done % 500 == 0 or done == total:
+                sys.stdout.write(f"\r{name}: {done}/{total}")
+                sys.stdout.flush()
+
+        try:
+            moved = migrate_journal(journal.journal_path, args.layout == "shard", report)
+        except MigrationError as e:
+            parser.error(str(e))
+        sys.stdout.write(f"\r{journal.name}: moved {moved} entries\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,77 @@ This module contains all data classes and business logic for journals and entrie
 separated from UI concerns.
 """
 
+import codecs
 import os
-from typing import ClassVar
-
-from textual.widgets import Label, ListItem
-
-from silentmemoir.config import JOURNALS_BASE_PATH
+import shutil
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, ClassVar, Optional
+
+from silentmemoir import compression, durable, layout, segments, trash
+from silentmemoir.catalog import Catalog, EntryInfo, count_words, dir_mtime_ns
+from silentmemoir.config import (
+    JOURNALS_BASE_PATH,
+    MARKDOWN_EXTENSION,
+    SEGMENT_STORE_DEFAULT,
+    SHARDED_LAYOUT_DEFAULT,
+)
+from silentmemoir.trace import traced
+
+if TYPE_CHECKING:
+    from silentmemoir.history import Revision
+
+# Most stores each thread keeps open for saves and deletes
+_SHARED_STORE_LIMIT = 8
+
+_local = threading.local()
+
+
+def _file_identity(path: str) -> Optional[tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+def shared_store(cls, *args):
+    """
+    Return an open store for the calling thread, opening it on first use.
+
+    Saves and deletes update the catalog, search index, statistics and the
+    journal's history; opening all four every time costs more than the
+    update. SQLite connections belong to the thread that opened them, so
+    each thread keeps its own, closing the least recently used beyond
+    _SHARED_STORE_LIMIT. A store whose database file was deleted or replaced
+    since, e.g. with its journal, is opened again.
+
+    Args:
+        cls: Catalog, SearchIndex, StatsStore or HistoryStore
+        *args: Arguments the store is opened with
+
+    Returns:
+        The open store; don't close it or use it as a context manager
+    """
+    stores = getattr(_local, "stores", None)
+    if stores is None:
+        stores = _local.stores = OrderedDict()
+    key = (cls, getattr(cls, "path", None), args)
+    cached = stores.pop(key, None)
+    if cached is not None:
+        store, identity = cached
+        if _file_identity(store.path) == identity:
+            stores[key] = cached
+            return store
+        store.close()
+
+    store = cls(*args)
+    stores[key] = (store, _file_identity(store.path))
+    while len(stores) > _SHARED_STORE_LIMIT:
+        _, (evicted, _) = stores.popitem(last=False)
+        evicted.close()
+    return store
 
 
 class Journal:
@@ -18,18 +83,67 @@ class Journal:
 
     base_path: ClassVar[str] = JOURNALS_BASE_PATH
 
-    def __init__(self, name: str):
+    def __init__(self, name: str, create: bool = True):
         """
         Initialize a journal.
 
         Args:
             name: The name of the journal
+            create: Whether to create the journal directory if it is missing
         """
         self.name = name
         self.journal_path = os.path.join(self.base_path, self.name)
-        os.makedirs(self.journal_path, exist_ok=True)
+        if create and not os.path.isdir(self.journal_path):
+            os.makedirs(self.base_path, exist_ok=True)
+            mtime_before = dir_mtime_ns(self.base_path)
+            os.makedirs(self.journal_path, exist_ok=True)
+            if SHARDED_LAYOUT_DEFAULT:
+                layout.set_sharded(self.journal_path, True)
+            if SEGMENT_STORE_DEFAULT:
+                segments.open_store(self.journal_path)
+            try:
+                with Catalog() as catalog:
+                    catalog.record_journal(self.base_path, self.name, mtime_before)
+            except sqlite3.Error:
+                pass
+
+    @property
+    def segment_store(self) -> Optional[segments.SegmentStore]:
+        """The journal's segment store, or None if entries are plain files."""
+        if segments.is_segmented(self.journal_path):
+            return segments.open_store(self.journal_path)
+        return None
+
+    @property
+    def sharded(self) -> bool:
+        """Whether dated entries are filed in year/month subdirectories."""
+        return layout.is_sharded(self.journal_path)
+
+    def _shards(self, month: Optional[str]) -> tuple[str, ...]:
+        if month is not None:
+            return (month,)
+        if self.sharded:
+            return ("", *layout.shard_dirs(self.journal_path))
+        return ("",)
+
+    @classmethod
+    @traced("storage")
+    def list_names(cls) -> list[str]:
+        """
+        List the names of all journals in the base path.
+
+        Served from the metadata catalog; the base directory is only rescanned
+        when its mtime changed.
+
+        Returns:
+            Sorted list of journal names
+        """
+        os.makedirs(cls.base_path, exist_ok=True)
+        with Catalog() as catalog:
+            return catalog.journal_names(cls.base_path)
 
     @classmethod
+    @traced("storage")
     def list_all(cls) -> list["Journal"]:
         """
         List all journals in the base path.
@@ -37,28 +151,208 @@ class Journal:
         Returns:
             List of Journal objects
         """
-        os.makedirs(cls.base_path, exist_ok=True)
-        return [
-            cls(d)
-            for d in os.listdir(cls.base_path)
-            if os.path.isdir(os.path.join(cls.base_path, d))
-        ]
+        return [cls(name, create=False) for name in cls.list_names()]
 
-    def list_entries(self) -> list[str]:
+    @traced("storage")
+    def list_months(self) -> list[str]:
+        """
+        List the year/month subdirectories of a sharded journal.
+
+        Returns:
+            Sorted relative "YYYY/MM" directories; empty for flat journals
+        """
+        if self.segment_store is not None or not self.sharded:
+            return []
+        return layout.shard_dirs(self.journal_path)
+
+    @traced("storage")
+    def list_entries(self, month: Optional[str] = None) -> list[str]:
         """
         List all entry files in this journal.
 
+        Served from the segment index for segmented journals, otherwise from
+        the metadata catalog; each directory is only rescanned when its mtime
+        changed.
+
+        Args:
+            month: Only list this subdirectory (from list_months()); "" lists
+                the undated entries at the top of a sharded journal
+
         Returns:
             Sorted list of entry filenames
         """
-        return sorted(os.listdir(self.journal_path))
+        store = self.segment_store
+        if store is not None:
+            return [f"{title}{MARKDOWN_EXTENSION}" for title in store.titles()]
+        with Catalog() as catalog:
+            return catalog.entry_names(
+                self.name, self.journal_path, self._shards(month)
+            )
+
+    @traced("storage")
+    def entry_details(self, month: Optional[str] = None) -> list[EntryInfo]:
+        """
+        List cached metadata (size, mtime, created time, word count) for entries.
 
-    def delete(self) -> None:
-        """Delete this journal and all its entries."""
-        import shutil
+        Args:
+            month: Only list this subdirectory (from list_months())
+
+        Returns:
+            Entry metadata sorted by filename
+        """
+        store = self.segment_store
+        if store is not None:
+            return store.details()
+        with Catalog() as catalog:
+            return catalog.entry_details(
+                self.name, self.journal_path, self._shards(month)
+            )
+
+    @traced("storage")
+    def delete(self) -> Optional[trash.TrashedJournal]:
+        """
+        Delete this journal and all its entries.
 
+        The directory is moved to the trash in one rename; its files are only
+        removed when the trash is purged.
+
+        Returns:
+            The trashed journal, or None if it didn't exist
+
+        Raises:
+            OSError: If the journal cannot be moved to the trash
+        """
+        mtime_before = dir_mtime_ns(self.base_path)
+        trashed = None
         if os.path.exists(self.journal_path):
-            shutil.rmtree(self.journal_path)
+            trashed = trash.move_to_trash(self.journal_path, self.name)
+        segments.forget_store(self.journal_path)
+
+        from silentmemoir.search import SearchIndex
+        from silentmemoir.stats import StatsStore
+
+        try:
+            with Catalog() as catalog:
+                catalog.remove_journal(
+                    self.base_path, self.name, self.journal_path, mtime_before
+                )
+            with SearchIndex() as index:
+                index.remove_journal(self.name)
+            with StatsStore() as stats:
+                stats.remove_journal(self.name)
+        except sqlite3.Error:
+            pass  # Indexes are caches; the next sync drops stale rows
+        return trashed
+
+    @classmethod
+    @traced("storage")
+    def restore(cls, item: trash.TrashedJournal) -> "Journal":
+        """
+        Bring a deleted journal back from the trash.
+
+        Args:
+            item: The trashed journal
+
+        Returns:
+            The restored journal
+
+        Raises:
+            TrashError: If it is already being purged or its name is taken
+            OSError: If it cannot be moved back
+        """
+        from silentmemoir.stats import StatsStore
+
+        journal = cls(item.name, create=False)
+        mtime_before = dir_mtime_ns(cls.base_path)
+        trash.restore(item, journal.journal_path)
+
+        # The search index picks the entries up again on its next sync, and
+        # the statistics on their next rebuild
+        try:
+            with Catalog() as catalog:
+                catalog.record_journal(cls.base_path, item.name, mtime_before)
+            with StatsStore() as stats:
+                stats.invalidate()
+        except sqlite3.Error:
+            pass
+        return journal
+
+    @traced("storage")
+    def enable_segments(self) -> int:
+        """
+        Move this journal's entry files into a segment store.
+
+        Returns:
+            Number of entries moved
+
+        Raises:
+            SegmentError: If the journal already uses the segment store or
+                the sharded layout
+            OSError: If the entries cannot be moved
+        """
+        if self.sharded:
+            raise segments.SegmentError(
+                f"{self.name} uses the sharded layout; flatten it first"
+            )
+        moved = segments.convert_to_segments(self.journal_path)
+        self._reset_catalog()
+        return moved
+
+    @traced("storage")
+    def disable_segments(self) -> int:
+        """
+        Write this journal's segmented entries back out as .md files.
+
+        Returns:
+            Number of entries written
+
+        Raises:
+            SegmentError: If the journal doesn't use the segment store
+            OSError: If the entries cannot be written
+        """
+        written = segments.convert_to_files(self.journal_path)
+        self._reset_catalog()
+        return written
+
+    @traced("storage")
+    def export_entries(self, dest: str) -> int:
+        """
+        Copy every entry to dest as a plain .md file.
+
+        Args:
+            dest: Directory to write the entries into
+
+        Returns:
+            Number of entries written
+
+        Raises:
+            OSError: If the entries cannot be written
+        """
+        store = self.segment_store
+        if store is not None:
+            return store.export(dest)
+
+        os.makedirs(dest, exist_ok=True)
+        filenames = self.list_entries()
+        for filename in filenames:
+            entry = JournalEntry(self, filename[: -len(MARKDOWN_EXTENSION)])
+            path = entry.stored_path()
+            if path is None:
+                continue
+            if path == entry.filepath:
+                shutil.copy2(path, dest)
+            else:
+                # Compressed entries are exported as plain text
+                with open(os.path.join(dest, filename), "w", encoding="utf-8") as f:
+                    f.write(compression.read_text(path))
+        return len(filenames)
+
+    def _reset_catalog(self) -> None:
+        try:
+            with Catalog() as catalog:
+                catalog.reset_entries(self.name, self.journal_path)
+        except sqlite3.Error:
+            pass
 
 
 class JournalEntry:
@@ -74,28 +368,87 @@ class JournalEntry:
         """
         self.journal = journal
         self.title = title
-        self.filepath = os.path.join(self.journal.journal_path, f"{title}.md")
+        self.filename = f"{title}{MARKDOWN_EXTENSION}"
+        self.filepath = layout.resolve(self.journal.journal_path, self.title)
+
+    def _locate(self) -> str:
+        # The file may have moved since construction if the layout changed
+        self.filepath = layout.resolve(self.journal.journal_path, self.title)
+        return self.filepath
 
-    def save(self, content: str) -> None:
+    def stored_path(self) -> Optional[str]:
+        """
+        Return the file currently holding this entry.
+
+        Returns:
+            The .md file, its compressed copy if only that exists, or None
+        """
+        path = self._locate()
+        for candidate in (path, compression.compressed_path(path)):
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    @traced("storage")
+    def save(self, content: str, index: bool = True) -> None:
         """
         Save the entry content to disk.
 
+        The file is replaced atomically, so a crash never leaves it half
+        written, and synced to disk according to DURABILITY_POLICY. A
+        compressed entry is written back uncompressed.
+
         Args:
             content: The markdown content to save
+            index: Update the catalog and search index and record a revision;
+                bulk writers pass False and bring the indexes up to date once
+                at the end
 
         Raises:
             IOError: If the file cannot be written
             OSError: If there are permission or disk space issues
         """
+        store = self.journal.segment_store
+        if store is not None:
+            try:
+                store.put(self.title, content)
+            except OSError as e:
+                raise OSError(f"Failed to save entry: {e}") from e
+            if index:
+                self.update_indexes(content)
+                self.record_revision(content)
+            store.compact_in_background()
+            return
+
+        # Always write where the journal's layout says, then drop any copy
+        # left in the old location
+        self.filepath, stale_path = layout.entry_paths(
+            self.journal.journal_path, self.title
+        )
         try:
             # Ensure the parent directory exists
             os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
-
-            with open(self.filepath, "w", encoding="utf-8") as f:
-                f.write(content)
+            mtime_before = dir_mtime_ns(os.path.dirname(self.filepath))
+
+            # The old copies go only once the new file is in place, which
+            # inside a durable.batch() is when the batch ends
+            durable.atomic_write(
+                self.filepath,
+                content,
+                supersedes=(
+                    compression.compressed_path(self.filepath),
+                    stale_path,
+                    compression.compressed_path(stale_path),
+                ),
+            )
         except OSError as e:
             raise OSError(f"Failed to save entry: {e}") from e
 
+        if index:
+            self.update_indexes(content, mtime_before)
+            self.record_revision(content)
+
+    @traced("storage")
     def read(self) -> str:
         """
         Read the entry content from disk.
@@ -106,15 +459,83 @@ class JournalEntry:
         Raises:
             IOError: If the file cannot be read
         """
-        if not os.path.exists(self.filepath):
+        store = self.journal.segment_store
+        if store is not None:
+            try:
+                return store.get(self.title) or ""
+            except OSError as e:
+                raise OSError(f"Failed to read entry: {e}") from e
+
+        path = self.stored_path()
+        if path is None:
             return ""
 
         try:
-            with open(self.filepath, encoding="utf-8") as f:
-                return f.read()
+            return compression.read_text(path)
+        except OSError as e:
+            raise OSError(f"Failed to read entry: {e}") from e
+
+    @traced("storage")
+    def read_chunks(self, chunk_size: int):
+        """
+        Read the entry content from disk in pieces.
+
+        Decoding (and decompression) is incremental, so multi-byte characters
+        are never split across chunks and the whole entry is never in memory.
+
+        Args:
+            chunk_size: Maximum number of characters per chunk
+
+        Yields:
+            Successive pieces of the entry content
+
+        Raises:
+            IOError: If the file cannot be read
+        """
+        store = self.journal.segment_store
+        if store is not None:
+            yield from self._read_segment_chunks(store, chunk_size)
+            return
+
+        path = self.stored_path()
+        if path is None:
+            return
+
+        try:
+            with compression.open_text(path) as f:
+                while chunk := f.read(chunk_size):
+                    yield chunk
+        except OSError as e:
+            raise OSError(f"Failed to read entry: {e}") from e
+
+    def _read_segment_chunks(self, store: segments.SegmentStore, chunk_size: int):
+        try:
+            opened = store.open_body(self.title)
+            if opened is None:
+                return
+            f, remaining = opened
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            with f:
+                while remaining > 0:
+                    data = f.read(min(chunk_size, remaining))
+                    if not data:
+                        break
+                    remaining -= len(data)
+                    if chunk := decoder.decode(data, final=remaining == 0):
+                        yield chunk
         except OSError as e:
             raise OSError(f"Failed to read entry: {e}") from e
 
+    def size(self) -> int:
+        """
+        Return the size of the entry file in bytes.
+
+        Returns:
+            The (uncompressed) file size, or 0 if the file doesn't exist
+        """
+        version = self.version()
+        return version[1] if version else 0
+
     def exists(self) -> bool:
         """
         Check if the entry file exists.
@@ -122,8 +543,39 @@ class JournalEntry:
         Returns:
             True if the file exists, False otherwise
         """
-        return os.path.exists(self.filepath)
+        store = self.journal.segment_store
+        if store is not None:
+            return store.locate(self.title) is not None
+        return self.stored_path() is not None
 
+    def version(self) -> Optional[tuple[int, int]]:
+        """
+        Return the entry's modification time and size.
+
+        Compressed entries report those of the file they were compressed from,
+        so compressing doesn't make the entry look modified.
+
+        Returns:
+            (mtime in nanoseconds, size in bytes), or None if it doesn't exist
+        """
+        store = self.journal.segment_store
+        if store is not None:
+            loc = store.locate(self.title)
+            return (loc.mtime_ns, loc.length) if loc else None
+        path = self.stored_path()
+        try:
+            if path is None:
+                return None
+            if path != self.filepath:
+                header = compression.read_header(path)
+                if header is not None:
+                    return header[2], header[1]
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    @traced("storage")
     def delete(self) -> None:
         """
         Delete this entry from disk.
@@ -131,47 +583,134 @@ class JournalEntry:
         Raises:
             IOError: If the file cannot be deleted
         """
-        if os.path.exists(self.filepath):
+        store = self.journal.segment_store
+        if store is not None:
             try:
-                os.remove(self.filepath)
+                store.delete(self.title)
             except OSError as e:
                 raise OSError(f"Failed to delete entry: {e}") from e
+            self.update_indexes()
+            store.compact_in_background()
+            return
+
+        path = self._locate()
+        mtime_before = dir_mtime_ns(os.path.dirname(path))
+        for entry_path in layout.entry_paths(self.journal.journal_path, self.title):
+            for candidate in (entry_path, compression.compressed_path(entry_path)):
+                if os.path.exists(candidate):
+                    try:
+                        os.remove(candidate)
+                    except OSError as e:
+                        raise OSError(f"Failed to delete entry: {e}") from e
+
+        self.update_indexes(mtime_before=mtime_before)
+
+    @traced("storage")
+    def record_revision(self, content: str) -> None:
+        """
+        Record saved content in the journal's revision history.
+
+        The entry itself is already saved, so a history that can't be written
+        doesn't fail the save; the next save records a full copy again.
+
+        Args:
+            content: The text that was saved
+        """
+        from silentmemoir.history import HistoryStore
+
+        try:
+            history = shared_store(HistoryStore, self.journal.journal_path)
+            history.record(self.title, content)
+        except (OSError, sqlite3.Error):
+            pass
 
+    @traced("storage")
+    def revisions(self) -> list["Revision"]:
+        """
+        List the recorded revisions of this entry.
 
-# ----------------------------
-# UI Helper Classes
-# ----------------------------
+        Returns:
+            Revisions, newest first
 
+        Raises:
+            OSError: If the history cannot be read
+        """
+        from silentmemoir.history import HistoryStore
 
-class JournalListItem(ListItem):
-    """Custom ListItem for displaying a journal in a ListView."""
+        try:
+            with HistoryStore(self.journal.journal_path) as history:
+                return history.revisions(self.title)
+        except sqlite3.Error as e:
+            raise OSError(f"Failed to read entry history: {e}") from e
 
-    def __init__(self, journal_name: str):
+    @traced("storage")
+    def read_revision(self, number: int) -> Optional[str]:
         """
-        Initialize a journal list item.
+        Reconstruct the text of one revision of this entry.
 
         Args:
-            journal_name: The name of the journal to display
-        """
-        super().__init__(Label(journal_name))
-        self.journal_name = journal_name
+            number: The revision number
 
+        Returns:
+            The text, or None if there is no such revision
 
-class EntryListItem(ListItem):
-    """Custom ListItem for displaying an entry in a ListView."""
+        Raises:
+            OSError: If the history cannot be read
+        """
+        from silentmemoir.history import HistoryStore
 
-    def __init__(self, entry_name: str, is_new_entry: bool = False):
+        try:
+            with HistoryStore(self.journal.journal_path) as history:
+                return history.text(self.title, number)
+        except sqlite3.Error as e:
+            raise OSError(f"Failed to read entry history: {e}") from e
+
+    @traced("storage")
+    def update_indexes(self, content: str = None, mtime_before: int = None) -> None:
         """
-        Initialize an entry list item.
+        Bring the derived indexes in line with this entry's stored content.
+
+        Indexes are caches: failures are swallowed here and repaired by the
+        next full sync rather than failing the save or delete.
 
         Args:
-            entry_name: The name of the entry to display
-            is_new_entry: Whether this represents the "Create New Entry" item
-        """
-        super().__init__(Label(entry_name))
-        self.entry_name = entry_name
-        self.is_new_entry = is_new_entry
-        if is_new_entry:
-            self.add_class("new_entry")
-        else:
-            self.add_class("journal-entry")
+            content: The entry text, or None if the entry was deleted
+            mtime_before: The entry directory's mtime before the change
+        """
+        from silentmemoir.search import SearchIndex
+        from silentmemoir.stats import StatsStore
+
+        directory = os.path.dirname(self.filepath)
+        shard = os.path.relpath(directory, self.journal.journal_path)
+        if shard == os.curdir:
+            shard = ""
+
+        try:
+            # Segmented journals are listed from their own index instead
+            if self.journal.segment_store is None:
+                catalog = shared_store(Catalog)
+                if content is None:
+                    catalog.remove_entry(
+                        self.journal.name,
+                        self.filename,
+                        directory,
+                        mtime_before,
+                    )
+                else:
+                    catalog.record_entry(
+                        self.journal.name,
+                        self.filename,
+                        self.filepath,
+                        content,
+                        mtime_before,
+                        shard,
+                    )
+            shared_store(SearchIndex).update_entry(self, content)
+            stats = shared_store(StatsStore)
+            if content is None:
+                stats.remove_entry(self.journal.name, self.title)
+            else:
+                stats.record_entry(self.journal.name, self.title, count_words(content))
+        except (OSError, sqlite3.Error):
+            pass
+
@@ -0,0 +1,158 @@
+"""
+Entry prefetching for the journals view.
+
+While the cursor moves through the entries list, the highlighted entry and
+its neighbours are read in the background, and their Markdown is split into
+preview chunks. Both are kept in a least-recently-used cache capped at
+PREFETCH_CACHE_BYTES, so opening an entry can show its text straight away
+and render its preview without splitting it again.
+Cached text is only trusted while the entry's version (mtime and size) still
+matches what was read.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from silentmemoir.config import LARGE_ENTRY_THRESHOLD, PREFETCH_CACHE_BYTES
+from silentmemoir.preview import split_chunks
+
+if TYPE_CHECKING:
+    from silentmemoir.models import Journal, JournalEntry
+
+
+@dataclass
+class CachedEntry:
+    """An entry's text as read at a given version, with its preview chunks."""
+
+    version: tuple[int, int]
+    text: str
+    chunks: tuple[str, ...]
+    nbytes: int
+
+
+def _key(entry: "JournalEntry") -> tuple[str, str]:
+    return entry.journal.journal_path, entry.title
+
+
+class EntryCache:
+    """Thread-safe LRU cache of entry contents, bounded by memory use."""
+
+    def __init__(self, max_bytes: int = PREFETCH_CACHE_BYTES):
+        """
+        Create an empty cache.
+
+        Args:
+            max_bytes: Approximate memory the cached texts and chunks may use
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._items: OrderedDict[tuple[str, str], CachedEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def peek(self, entry: "JournalEntry") -> Optional[CachedEntry]:
+        """
+        Return what is cached for an entry without checking it is current.
+
+        Does no I/O, so it is safe to call from the UI thread; callers must
+        compare the version with entry.version() before trusting the text.
+
+        Args:
+            entry: The entry to look up
+
+        Returns:
+            The cached entry, or None
+        """
+        with self._lock:
+            cached = self._items.get(_key(entry))
+            if cached is not None:
+                self._items.move_to_end(_key(entry))
+            return cached
+
+    def put(self, entry: "JournalEntry", version: tuple[int, int], text: str) -> None:
+        """
+        Cache an entry's text and preview chunks, evicting the oldest entries.
+
+        Args:
+            entry: The entry the text belongs to
+            version: The entry's version when the text was read
+            text: The entry's text
+        """
+        chunks = split_chunks(text)
+        nbytes = sys.getsizeof(text) + sum(sys.getsizeof(c) for c in chunks)
+        if nbytes > self.max_bytes:
+            return
+        key = _key(entry)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._items[key] = CachedEntry(version, text, chunks, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def discard(self, entry: "JournalEntry") -> None:
+        """
+        Drop an entry from the cache.
+
+        Args:
+            entry: The entry to forget
+        """
+        with self._lock:
+            old = self._items.pop(_key(entry), None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+
+entry_cache = EntryCache()
+"""The cache shared by the journals view and the entry editor."""
+
+
+def prefetch(journal: "Journal", titles: Iterable[str]) -> int:
+    """
+    Read entries into the cache unless they are already cached and current.
+
+    Entries too large for the editor's one-shot load are skipped; they are
+    streamed in when opened.
+
+    Args:
+        journal: The journal containing the entries
+        titles: Titles of the entries to read, most wanted first
+
+    Returns:
+        Number of entries read
+    """
+    from silentmemoir.models import JournalEntry
+
+    read = 0
+    for title in titles:
+        try:
+            entry = JournalEntry(journal, title)
+            version = entry.version()
+            if version is None or version[1] > LARGE_ENTRY_THRESHOLD:
+                continue
+            cached = entry_cache.peek(entry)
+            if cached is not None and cached.version == version:
+                continue
+            text = entry.read()
+            # Only cache text known to match the version it is filed under
+            if entry.version() == version:
+                entry_cache.put(entry, version, text)
+                read += 1
+        except (OSError, UnicodeDecodeError):
+            continue
+    return read
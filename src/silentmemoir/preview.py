@@ -0,0 +1,88 @@
+"""
+Markdown block splitting for the incremental preview.
+
+This module cuts a document into its top-level Markdown blocks (headings,
+paragraphs, lists, fences, ...) and groups them into chunks, so the preview can
+diff one version against the next and re-render only the chunks that changed.
+"""
+
+import zlib
+from functools import lru_cache
+
+from markdown_it import MarkdownIt
+
+from silentmemoir.config import PREVIEW_CACHE_SIZE, PREVIEW_CHUNK_BLOCKS
+
+_parser = None
+
+
+def get_parser() -> MarkdownIt:
+    """
+    Return the shared Markdown parser, matching the one Textual renders with.
+
+    Returns:
+        A "gfm-like" MarkdownIt parser
+    """
+    global _parser
+    if _parser is None:
+        _parser = MarkdownIt("gfm-like")
+    return _parser
+
+
+def split_blocks(markdown: str) -> tuple[str, ...]:
+    """
+    Split a document into the source text of its top-level blocks.
+
+    Documents that use link reference definitions are returned as a single
+    block, since a definition in one block can affect how another renders.
+
+    Args:
+        markdown: The document text
+
+    Returns:
+        Tuple of block sources in document order
+    """
+    env: dict = {}
+    tokens = get_parser().parse(markdown, env)
+    if env.get("references"):
+        return (markdown,)
+
+    lines = markdown.splitlines(keepends=True)
+    return tuple(
+        "".join(lines[token.map[0] : token.map[1]])
+        for token in tokens
+        if token.level == 0 and token.nesting >= 0 and token.map
+    )
+
+
+@lru_cache(maxsize=PREVIEW_CACHE_SIZE)
+def split_chunks(markdown: str) -> tuple[str, ...]:
+    """
+    Split a document into chunks of consecutive top-level blocks.
+
+    Chunk boundaries are chosen from the content of the blocks themselves (a
+    chunk ends after a block whose checksum is divisible by the target size),
+    so editing one block only changes the chunk that contains it instead of
+    shifting every boundary after it.
+
+    Args:
+        markdown: The document text
+
+    Returns:
+        Tuple of chunk sources in document order
+    """
+    # Memoized by content, so toggling the preview on an unchanged document
+    # doesn't even re-parse it
+    chunks = []
+    current: list[str] = []
+    for block in split_blocks(markdown):
+        if not block.endswith("\n"):
+            block += "\n"
+        current.append(block)
+        boundary = zlib.crc32(block.encode("utf-8")) % PREVIEW_CHUNK_BLOCKS == 0
+        if boundary or len(current) >= PREVIEW_CHUNK_BLOCKS * 4:
+            chunks.append("\n".join(current))
+            current = []
+    if current:
+        chunks.append("\n".join(current))
+    return tuple(chunks)
@@ -0,0 +1,53 @@
+"""
+Backup dialogs.
+
+The command palette runs backups without a screen of their own; restoring
+writes into the journals, so it asks for confirmation first.
+"""
+
+from textual.app import ComposeResult
+from textual.binding import Binding
+from textual.containers import Container, Horizontal, Vertical
+from textual.screen import ModalScreen
+from textual.widgets import Button, Label
+
+from silentmemoir.trace import traced
+
+
+class ConfirmRestoreModal(ModalScreen[bool]):
+    """Modal dialog for confirming a restore from the latest backup."""
+
+    # Leaving the journals alone is the choice that can't lose anything
+    BINDINGS = [Binding("escape", "dismiss(False)", "Cancel", show=False)]
+
+    @traced("ui")
+    def compose(self) -> ComposeResult:
+        """
+        Compose the UI for this dialog.
+
+        Returns:
+            The composed UI elements
+        """
+        with Container(id="modal_container"):
+            with Vertical(id="modal_content"):
+                yield Label("Restore from latest backup?", classes="titleText")
+                yield Label("Journals and entries missing since the latest")
+                yield Label("snapshot will be copied back into place.")
+                yield Label("Existing entries are left as they are.")
+                with Horizontal():
+                    yield Button("Restore", id="restore_yes", variant="warning")
+                    yield Button("Cancel", id="restore_no", variant="primary")
+                yield Label("")
+                yield Label("Press 'Esc' to cancel")
+
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        """
+        Handle button press events.
+
+        Args:
+            event: The button pressed event
+        """
+        if event.button.id == "restore_yes":
+            self.dismiss(True)
+        elif event.button.id == "restore_no":
+            self.dismiss(False)
@@ -5,22 +5,37 @@ This screen provides the interface for creating and editing journal entries,
 with support for Markdown editing and live preview.
 """
 
+import asyncio
 import datetime
+import os
+import sys
+from typing import Optional
 
+from textual import work
 from textual.app import ComposeResult
 from textual.binding import Binding
-from textual.containers import ScrollableContainer, Vertical
+from textual.containers import Container, Horizontal, ScrollableContainer, Vertical
 from textual.screen import ModalScreen
-from textual.widgets import Input, Label, Markdown, TextArea
+from textual.widgets import Button, Input, Label, TextArea
 
+from silentmemoir import storage
+from silentmemoir.autosave import Autosaver, SwapMismatchError, recover, swap_path
 from silentmemoir.config import (
+    AUTOSAVE_INTERVAL,
     DEFAULT_ENTRY_PREFIX,
     EMPTY_PREVIEW_MESSAGE,
+    LARGE_ENTRY_CHUNK_SIZE,
+    LARGE_ENTRY_THRESHOLD,
     MARKDOWN_EXTENSION,
-    NEW_ENTRY_PLACEHOLDER,
+    NEW_ENTRY_SWAP_NAME,
+    PREVIEW_THROTTLE_INTERVAL,
     TIMESTAMP_FORMAT,
 )
 from silentmemoir.models import Journal, JournalEntry
+from silentmemoir.prefetch import entry_cache
+from silentmemoir.screens.history import EntryHistory
+from silentmemoir.trace import traced
+from silentmemoir.widgets import MarkdownPreview
 
 
 class Entry(ModalScreen):
@@ -30,6 +45,8 @@ class Entry(ModalScreen):
         Binding("ctrl+s", "save_entry", "Save", show=True),
         Binding("escape", "dismiss_screen", "Exit", show=True),
         Binding("tab", "toggle_preview", "Toggle Mode", show=True, priority=True),
+        Binding("f2", "toggle_split", "Split View", show=True),
+        Binding("f3", "show_history", "History", show=True),
     ]
 
     def __init__(
@@ -51,6 +68,16 @@ class Entry(ModalScreen):
         self.entry_name = entry_name
         self.is_new_entry = is_new_entry
         self.editing_mode = True
+        self.split_mode = False
+        self.live_preview_pending = False
+        # Existing entries are read in the background after mounting
+        self.loaded = is_new_entry
+        self.autosaver = None
+        self.autosave_pending = False
+        # Serializes saves so swap bookkeeping matches what reached the file
+        self.save_lock = asyncio.Lock()
+        # Version of the entry the editor text was last loaded from or saved as
+        self.saved_version = None
 
         self.text_area = None
         self.markdown_viewer = None
@@ -62,9 +89,13 @@ class Entry(ModalScreen):
             self.journal_entry = JournalEntry(
                 journal, entry_name.replace(MARKDOWN_EXTENSION, "")
             )
+            # Prefetched text is shown at once and confirmed current after mount
+            self.cached = entry_cache.peek(self.journal_entry)
         else:
             self.journal_entry = None
+            self.cached = None
 
+    @traced("ui")
     def compose(self) -> ComposeResult:
         """
         Compose the UI for this screen.
@@ -89,25 +120,18 @@ class Entry(ModalScreen):
         )
         yield self.status_label
 
-        content = ""
-        if not self.is_new_entry and self.journal_entry:
-            try:
-                if self.journal_entry.exists():
-                    content = self.journal_entry.read()
-            except OSError as e:
-                # If we can't read the file, show an error and use empty content
-                content = f"# Error\n\nCould not read entry: {e}"
-
         with Vertical(id="contentcontainer"):
-            self.text_area = TextArea(content, id="entry_content")
+            self.text_area = TextArea(
+                self.cached.text if self.cached else "",
+                id="entry_content",
+                read_only=not self.loaded,
+            )
             yield self.text_area
 
+            # The preview starts empty and is only built when first shown
             self.scroll_container = ScrollableContainer(id="markdown_scroll")
             with self.scroll_container:
-                self.markdown_viewer = Markdown(
-                    content or NEW_ENTRY_PLACEHOLDER,
-                    id="markdown_preview",
-                )
+                self.markdown_viewer = MarkdownPreview(id="markdown_preview")
                 yield self.markdown_viewer
             self.scroll_container.display = False
 
@@ -131,6 +155,37 @@ class Entry(ModalScreen):
         """Action to toggle between editing and preview modes (alternative binding)."""
         self.toggle_mode()
 
+    def action_toggle_split(self):
+        """Action to toggle the side-by-side live preview."""
+        self.toggle_split()
+
+    def action_show_history(self):
+        """Action to browse the entry's earlier revisions."""
+        if not self.loaded or self.is_new_entry and not self.saved_version:
+            return
+        self.app.push_screen(
+            EntryHistory(self.journal_entry, self.text_area.text),
+            self.restore_revision,
+        )
+
+    def restore_revision(self, text: Optional[str]) -> None:
+        """
+        Put a revision chosen in the history screen into the editor.
+
+        The replacement can be undone, and is saved like any other edit.
+
+        Args:
+            text: The revision's text, or None if none was chosen
+        """
+        if text is None:
+            return
+        if not self.editing_mode:
+            self.toggle_mode()
+        document = self.text_area.document
+        self.text_area.replace(text, document.start, document.end)
+        self.text_area.focus()
+        self.status_label.update("Restored an earlier revision | Ctrl+S: Save")
+
     def on_input_submitted(self, event: Input.Submitted) -> None:
         """
         Handle input submission (Enter key on title input).
@@ -145,16 +200,19 @@ class Entry(ModalScreen):
     # TOGGLE
     # ------------------------------------
 
+    @traced("ui")
     def toggle_mode(self):
         """Toggle between editing mode and preview mode."""
+        if not self.loaded:
+            return
+
+        if self.split_mode:
+            self.toggle_split()
+
         if self.editing_mode:
             self.save_entry(exit_after=False)
 
-            current_content = self.text_area.text
-            if current_content.strip():
-                self.markdown_viewer.update(current_content)
-            else:
-                self.markdown_viewer.update(EMPTY_PREVIEW_MESSAGE)
+            self.render_preview()
 
             self.text_area.display = False
             self.scroll_container.display = True
@@ -175,6 +233,64 @@ class Entry(ModalScreen):
                 "Mode: Editing | Tab: Toggle Preview | Ctrl+S: Save | Esc: Exit"
             )
 
+    @traced("ui")
+    def toggle_split(self):
+        """Toggle a live preview shown side by side with the editor."""
+        if not self.loaded:
+            return
+
+        if not self.editing_mode:
+            self.toggle_mode()
+
+        self.split_mode = not self.split_mode
+        self.query_one("#contentcontainer").set_class(self.split_mode, "split")
+        self.scroll_container.display = self.split_mode
+        if self.split_mode:
+            self.render_preview()
+            self.status_label.update(
+                "Mode: Split | F2: Close Preview | Ctrl+S: Save | Esc: Exit"
+            )
+        else:
+            self.status_label.update(
+                "Mode: Editing | Tab: Toggle Preview | Ctrl+S: Save | Esc: Exit"
+            )
+        self.text_area.focus()
+
+    @traced("ui")
+    def render_preview(self):
+        """Render the editor's current text in the preview."""
+        current_content = self.text_area.text
+        if not current_content.strip():
+            self.markdown_viewer.update(EMPTY_PREVIEW_MESSAGE)
+        elif self.cached is not None and current_content == self.cached.text:
+            # Still the prefetched text: reuse the chunks split back then
+            self.markdown_viewer.update(current_content, self.cached.chunks)
+        else:
+            self.markdown_viewer.update(current_content)
+
+    def on_text_area_changed(self, event: TextArea.Changed) -> None:
+        """
+        Schedule a live preview refresh and an autosave.
+
+        Both are throttled, so their cost per second is bounded no matter how
+        fast the user types.
+
+        Args:
+            event: The text area changed event
+        """
+        if self.split_mode and not self.live_preview_pending:
+            self.live_preview_pending = True
+            self.set_timer(PREVIEW_THROTTLE_INTERVAL, self.refresh_live_preview)
+        if self.autosaver and not self.autosave_pending:
+            self.autosave_pending = True
+            self.set_timer(AUTOSAVE_INTERVAL, self.autosave)
+
+    def refresh_live_preview(self):
+        """Render the pending live preview update."""
+        self.live_preview_pending = False
+        if self.split_mode:
+            self.render_preview()
+
     # ------------------------------------
     # SAVE
     # ------------------------------------
@@ -189,6 +305,12 @@ class Entry(ModalScreen):
         if not self.journal:
             return
 
+        if not self.loaded:
+            # The entry hasn't been read yet, so there is nothing to save
+            if exit_after:
+                self.dismiss(None)
+            return
+
         content = self.text_area.text
 
         if self.is_new_entry:
@@ -206,20 +328,297 @@ class Entry(ModalScreen):
             self.journal_entry = JournalEntry(self.journal, self.entry_name)
 
         if self.journal_entry:
-            try:
-                self.journal_entry.save(content)
-                if exit_after:
-                    self.dismiss(f"Saved: {self.entry_name}")
-            except OSError as e:
-                # Show error to user - update status label
-                self.status_label.update(f"Error saving entry: {e}")
-                # Don't dismiss if there was an error
+            self.write_entry(self.journal_entry, content, exit_after)
+
+    @work(group="save")
+    async def write_entry(
+        self, journal_entry: JournalEntry, content: str, exit_after: bool
+    ):
+        """
+        Write the entry off the UI thread, then optionally exit.
+
+        Args:
+            journal_entry: The entry to write
+            content: The markdown content to save
+            exit_after: Whether to exit the screen after saving
+        """
+        try:
+            async with self.save_lock:
+                await self.persist(journal_entry, content)
+        except OSError as e:
+            # Show error to user - update status label
+            self.status_label.update(f"Error saving entry: {e}")
+            # Don't dismiss if there was an error
+            return
+
+        if exit_after and self.is_current:
+            self.dismiss(f"Saved: {self.entry_name}")
+
+    async def persist(self, journal_entry: JournalEntry, content: str):
+        """
+        Save content to the entry file and drop the swap records it covers.
+
+        Must be called with save_lock held.
+
+        Args:
+            journal_entry: The entry to write
+            content: The markdown content to save
+
+        Raises:
+            OSError: If the entry cannot be written
+        """
+        autosaver = self.autosaver
+        if autosaver:
+            await storage.run_io(autosaver.mark_saved, content)
+        await storage.save_entry(journal_entry, content)
+        self.saved_version = await storage.entry_version(journal_entry)
+        if autosaver is None:
+            return
+
+        expected = swap_path(self.journal.name, journal_entry.title)
+        if autosaver.path == expected:
+            await storage.run_io(autosaver.discard, content)
+        else:
+            # A new entry just got its title: continue in the entry's swap
+            self.autosaver = Autosaver(expected, content)
+            await storage.run_io(autosaver.remove)
+            await storage.run_io(self.autosaver.record, autosaver.last_text)
+
+    # ------------------------------------
+    # AUTOSAVE
+    # ------------------------------------
+
+    def autosave(self):
+        """Write the edits made since the last autosave to the swap file."""
+        self.autosave_pending = False
+        if self.autosaver and self.loaded:
+            self.write_swap(self.text_area.text)
+
+    @work(group="autosave")
+    async def write_swap(self, text: str):
+        """
+        Append a delta record off the UI thread, coalescing when due.
+
+        Args:
+            text: The editor's current text
+        """
+        try:
+            async with self.save_lock:
+                autosaver = self.autosaver
+                await storage.run_io(autosaver.record, text)
+                if not autosaver.coalesce_due():
+                    return
+                if self.journal_entry is None:
+                    await storage.run_io(autosaver.rewrite, text)
+                else:
+                    await self.persist(self.journal_entry, text)
+        except OSError as e:
+            self.status_label.update(f"Error autosaving entry: {e}")
+
+    @work(exclusive=True, group="autosave")
+    async def start_autosave(self, saved_text: str):
+        """
+        Begin autosaving, offering to recover edits an earlier session lost.
+
+        Args:
+            saved_text: The entry's text as currently saved
+        """
+        title = self.journal_entry.title if self.journal_entry else NEW_ENTRY_SWAP_NAME
+        path = swap_path(self.journal.name, title)
+
+        try:
+            recovered = await storage.run_io(recover, path, saved_text)
+        except SwapMismatchError:
+            # The entry changed since the swap was written; keep it for the user
+            await storage.run_io(os.replace, path, path + ".stale")
+            self.status_label.update(
+                f"Unsaved edits no longer match this entry; kept in {path}.stale"
+            )
+            recovered = None
+        except OSError:
+            recovered = None
+
+        self.autosaver = Autosaver(path, saved_text)
+        if recovered is None:
+            return
+
+        def apply_choice(keep: bool) -> None:
+            if keep:
+                self.text_area.load_text(recovered)
+                self.autosaver.adopt(recovered)
+            else:
+                self.run_worker(storage.run_io(self.autosaver.remove))
+
+        self.app.push_screen(ConfirmRecoverModal(title), apply_choice)
+
+    # ------------------------------------
+    # LOAD
+    # ------------------------------------
+
+    @work(exclusive=True, group="load")
+    @traced("ui")
+    async def load_entry(self):
+        """Read the entry off the UI thread and show it in the editor."""
+        try:
+            version = await storage.entry_version(self.journal_entry)
+            if self.cached is None or version != self.cached.version:
+                await self.read_into_editor()
+                version = await storage.entry_version(self.journal_entry)
+            self.saved_version = version
+        except OSError as e:
+            # If we can't read the file, show an error and use empty content
+            self.text_area.load_text(f"# Error\n\nCould not read entry: {e}")
+            self.text_area.read_only = False
+            self.loaded = True
+            return
+
+        self.text_area.read_only = False
+        self.loaded = True
+        self.start_autosave(self.text_area.text)
+
+    @work(exclusive=True, group="load")
+    async def revalidate(self):
+        """Reload the entry if it changed on disk while its buffer was parked."""
+        if not self.loaded or self.journal_entry is None:
+            return
+        try:
+            version = await storage.entry_version(self.journal_entry)
+            if version == self.saved_version:
                 return
+            self.loaded = False
+            self.text_area.read_only = True
+            await self.read_into_editor()
+            self.saved_version = await storage.entry_version(self.journal_entry)
+            self.start_autosave(self.text_area.text)
+        except OSError as e:
+            self.status_label.update(f"Error reloading entry: {e}")
+        finally:
+            self.text_area.read_only = False
+            self.loaded = True
+
+    def buffer_size(self) -> int:
+        """
+        Estimate the memory this editor holds while its buffer is kept alive.
+
+        Returns:
+            Approximate bytes used by the text and the rendered preview
+        """
+        if self.text_area is None:
+            return 0
+        preview = self.markdown_viewer.chunks if self.markdown_viewer else ()
+        return sys.getsizeof(self.text_area.text) + sum(
+            sys.getsizeof(chunk) for chunk in preview
+        )
+
+    async def read_into_editor(self):
+        """
+        Replace the editor's text with the entry as stored on disk.
+
+        Raises:
+            OSError: If the entry cannot be read
+        """
+        size = await storage.entry_size(self.journal_entry)
+        if size > LARGE_ENTRY_THRESHOLD:
+            await self.load_large_entry(size)
+        else:
+            self.text_area.load_text(await storage.read_entry(self.journal_entry))
+
+    async def load_large_entry(self, size: int):
+        """
+        Show the first page of a large entry at once and stream in the rest.
+
+        The editor stays read-only until the whole entry is loaded, so a save
+        can never write back a truncated document.
+
+        Args:
+            size: The entry file size in bytes
+        """
+        loaded_bytes = 0
+        first = True
+        async for chunk in storage.read_entry_chunks(
+            self.journal_entry, LARGE_ENTRY_CHUNK_SIZE
+        ):
+            if first:
+                self.text_area.load_text(chunk)
+                first = False
+            else:
+                self.text_area.insert(chunk, self.text_area.document.end)
+            loaded_bytes += len(chunk.encode("utf-8"))
+            self.status_label.update(
+                f"Loading large entry... {min(100, loaded_bytes * 100 // size)}%"
+            )
+
+        # Streaming the text in shouldn't be undoable
+        self.text_area.history.clear()
+        self.status_label.update(
+            "Mode: Editing | Tab: Toggle Preview | Ctrl+S: Save | Esc: Exit"
+        )
 
     def on_mount(self):
-        """Set focus when the screen is mounted."""
+        """Set focus and start loading the entry when the screen is mounted."""
         if self.is_new_entry and self.title_input:
             self.title_input.focus()
         else:
             if hasattr(self, "text_area"):
                 self.text_area.focus()
+
+        if not self.loaded:
+            if self.journal_entry:
+                self.load_entry()
+            else:
+                self.loaded = True
+                self.text_area.read_only = False
+        elif self.journal:
+            self.start_autosave("")
+
+
+class ConfirmRecoverModal(ModalScreen[bool]):
+    """Modal dialog offering to restore edits from an interrupted session."""
+
+    # Keeping the edits is the choice that can't lose anything
+    BINDINGS = [Binding("escape", "dismiss(True)", "Recover", show=False)]
+
+    def __init__(self, entry_name: str):
+        """
+        Initialize the recovery dialog.
+
+        Args:
+            entry_name: Name of the entry with unsaved edits
+        """
+        super().__init__()
+        self.entry_name = entry_name
+
+    @traced("ui")
+    def compose(self) -> ComposeResult:
+        """
+        Compose the UI for this dialog.
+
+        Returns:
+            The composed UI elements
+        """
+        if self.entry_name == NEW_ENTRY_SWAP_NAME:
+            description = "an unsaved new entry"
+        else:
+            description = f'"{self.entry_name}"'
+        with Container(id="modal_container"):
+            with Vertical(id="modal_content"):
+                yield Label("Recover unsaved edits?", classes="titleText")
+                yield Label(f"The last session ended with unsaved edits to {description}.")
+                yield Label("")
+                with Horizontal():
+                    yield Button("Recover", id="recover_yes", variant="primary")
+                    yield Button("Discard", id="recover_no", variant="error")
+                yield Label("")
+                yield Label("Press 'Esc' to recover")
+
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        """
+        Handle button press events.
+
+        Args:
+            event: The button pressed event
+        """
+        if event.button.id == "recover_yes":
+            self.dismiss(True)
+        elif event.button.id == "recover_no":
+            self.dismiss(False)
@@ -0,0 +1,163 @@
+"""
+Entry history screen.
+
+This screen lists the recorded revisions of an entry, shows the text of the
+highlighted one (or how it differs from the editor), and hands the chosen
+revision back to the editor to restore.
+"""
+
+import difflib
+
+from textual import work
+from textual.app import ComposeResult
+from textual.binding import Binding
+from textual.containers import Horizontal, Vertical
+from textual.screen import ModalScreen
+from textual.widgets import Label, ListView, TextArea
+
+from silentmemoir import storage
+from silentmemoir.models import JournalEntry
+from silentmemoir.trace import traced
+from silentmemoir.widgets import RevisionItem
+
+
+class EntryHistory(ModalScreen):
+    """Screen for browsing and restoring the revisions of an entry."""
+
+    BINDINGS = [
+        Binding("escape", "dismiss_screen", "Exit", show=True),
+        Binding("d", "toggle_diff", "Diff", show=True),
+    ]
+
+    def __init__(self, journal_entry: JournalEntry, current_text: str):
+        """
+        Initialize the history screen.
+
+        Args:
+            journal_entry: The entry whose revisions to show
+            current_text: The editor's text, which revisions are compared to
+        """
+        super().__init__()
+        self.journal_entry = journal_entry
+        self.current_text = current_text
+        self.show_diff = False
+        # Number and text of the highlighted revision, once loaded
+        self.revision_number = None
+        self.revision_text = None
+
+    @traced("ui")
+    def compose(self) -> ComposeResult:
+        """
+        Compose the UI for this screen.
+
+        Returns:
+            The composed UI elements
+        """
+        with Vertical(id="history_panel"):
+            yield Label(
+                f"History of {self.journal_entry.title}",
+                classes="titleText",
+                markup=False,
+            )
+            yield Label("Loading revisions...", id="history_status")
+            with Horizontal(id="history_container"):
+                yield ListView(id="revision_list")
+                yield TextArea("", id="revision_text", read_only=True)
+
+    def on_mount(self):
+        """Load the revisions in the background."""
+        self.load_revisions()
+
+    # ------------------------------------
+    # ACTIONS
+    # ------------------------------------
+
+    def action_dismiss_screen(self):
+        """Action to exit without restoring anything."""
+        self.dismiss(None)
+
+    def action_toggle_diff(self):
+        """Action to switch between the revision's text and its differences."""
+        self.show_diff = not self.show_diff
+        self.show_revision()
+
+    # ------------------------------------
+    # REVISIONS
+    # ------------------------------------
+
+    @work(exclusive=True, group="revisions")
+    async def load_revisions(self):
+        """List the entry's revisions, newest first."""
+        status = self.query_one("#history_status", Label)
+        try:
+            revisions = await storage.list_revisions(self.journal_entry)
+        except OSError as e:
+            status.update(f"Error reading history: {e}")
+            return
+
+        if not revisions:
+            status.update("No revisions recorded yet")
+            return
+        status.update(
+            f"{len(revisions)} revisions | Enter: Restore | D: Diff | Esc: Exit"
+        )
+        revision_list = self.query_one("#revision_list", ListView)
+        await revision_list.extend(RevisionItem(revision) for revision in revisions)
+        revision_list.index = 0
+        revision_list.focus()
+
+    def on_list_view_highlighted(self, event: ListView.Highlighted) -> None:
+        """
+        Show the highlighted revision.
+
+        Args:
+            event: The highlight event
+        """
+        if isinstance(event.item, RevisionItem):
+            self.load_revision(event.item.revision.number)
+
+    @work(exclusive=True, group="revision")
+    async def load_revision(self, number: int):
+        """
+        Read a revision and show it.
+
+        Args:
+            number: The revision number
+        """
+        self.revision_number = self.revision_text = None
+        try:
+            self.revision_text = await storage.read_revision(
+                self.journal_entry, number
+            )
+            self.revision_number = number
+        except OSError as e:
+            self.query_one("#history_status", Label).update(
+                f"Error reading revision: {e}"
+            )
+        self.show_revision()
+
+    def show_revision(self):
+        """Display the loaded revision, or its differences from the editor."""
+        text = self.revision_text or ""
+        if self.show_diff:
+            diff = difflib.unified_diff(
+                self.current_text.splitlines(keepends=True),
+                text.splitlines(keepends=True),
+                fromfile="editor",
+                tofile="revision",
+            )
+            text = "".join(diff) or "No differences from the editor"
+        self.query_one("#revision_text", TextArea).load_text(text)
+
+    def on_list_view_selected(self, event: ListView.Selected) -> None:
+        """
+        Hand the selected revision back to the editor.
+
+        Args:
+            event: The selection event
+        """
+        if not isinstance(event.item, RevisionItem):
+            return
+        # Ignore Enter until the highlighted revision has been read
+        if event.item.revision.number == self.revision_number:
+            self.dismiss(self.revision_text)
@@ -1,13 +1,15 @@
 import random
 
-from pyfiglet import Figlet
 from textual.app import ComposeResult
 from textual.containers import Horizontal
 from textual.events import Key
 from textual.screen import Screen
 from textual.widgets import Label
 
+from silentmemoir.banner import render_banner
+from silentmemoir.config import BANNER_FONT
 from silentmemoir.data.quotes import QUOTES
+from silentmemoir.trace import traced
 
 
 class OpeningScreen(Screen):
@@ -15,10 +17,10 @@ class OpeningScreen(Screen):
         if event.key == "e" or event.key == "E":
             self.enter()
 
+    @traced("ui")
     def compose(self) -> ComposeResult:
-        f = Figlet(font="shadow")
         # Fonts I like: Slant, Big,
-        title = f.renderText("Silent Memoir")
+        title = render_banner(BANNER_FONT)
 
         with Horizontal(id="os_title"):
             yield Label(title, classes="titleText")
@@ -0,0 +1,222 @@
+"""
+Full-text search screen.
+
+This screen queries the persistent search index across all journals and opens
+the selected hit in the entry editor. Queries run in a worker thread once
+typing pauses, and snippets are only read for the results scrolled into view.
+"""
+
+import os
+import time
+from typing import Optional
+
+from textual import work
+from textual.app import ComposeResult
+from textual.binding import Binding
+from textual.containers import Vertical
+from textual.events import Key
+from textual.screen import ModalScreen
+from textual.timer import Timer
+from textual.widgets import Input, Label, ListView
+from textual.worker import get_current_worker
+
+from silentmemoir.config import SEARCH_DEBOUNCE_DELAY
+from silentmemoir.models import Journal
+from silentmemoir.search import SearchHit, SearchIndex, make_snippet, tokenize
+from silentmemoir.trace import traced
+from silentmemoir.widgets import SearchResultItem
+
+
+class Search(ModalScreen):
+    """Screen for searching entries across all journals."""
+
+    BINDINGS = [
+        Binding("escape", "dismiss_screen", "Exit", show=True),
+    ]
+
+    def __init__(self):
+        """Initialize the search screen."""
+        super().__init__()
+        self.debounce: Optional[Timer] = None
+        # Terms of the query the displayed results matched
+        self.terms: list[str] = []
+
+    @traced("ui")
+    def compose(self) -> ComposeResult:
+        """
+        Compose the UI for this screen.
+
+        Returns:
+            The composed UI elements
+        """
+        with Vertical(id="search_panel"):
+            yield Label("Search all journals", classes="titleText")
+            yield Input(placeholder="Type to search...", id="search_input")
+            yield Label("", id="search_status")
+            yield ListView(id="search_results")
+
+    def on_mount(self):
+        """Focus the input and refresh the index in the background."""
+        self.query_one("#search_input", Input).focus()
+        self.watch(
+            self.query_one("#search_results", ListView),
+            "scroll_y",
+            lambda _: self.load_visible_snippets(),
+            init=False,
+        )
+        self.run_worker(self.sync_index, thread=True, exclusive=True)
+
+    def sync_index(self):
+        """Pick up entries changed outside the app, then refresh the results."""
+        with SearchIndex() as index:
+            changed = index.sync()
+        if changed:
+            query = self.query_one("#search_input", Input).value
+            self.app.call_from_thread(self.run_search, query)
+
+    # ------------------------------------
+    # ACTIONS
+    # ------------------------------------
+
+    def action_dismiss_screen(self):
+        """Action to exit the search screen."""
+        self.dismiss(None)
+
+    def on_key(self, event: Key):
+        """
+        Handle keyboard events.
+
+        Args:
+            event: The keyboard event
+        """
+        results = self.query_one("#search_results", ListView)
+        if event.key == "down" and self.focused is not results and results.children:
+            results.focus()
+            event.prevent_default()
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        """
+        Search once the user pauses typing.
+
+        Args:
+            event: The input changed event
+        """
+        if self.debounce is not None:
+            self.debounce.stop()
+        query = event.value
+        self.debounce = self.set_timer(
+            SEARCH_DEBOUNCE_DELAY, lambda: self.run_search(query)
+        )
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        """
+        Move focus to the results when Enter is pressed.
+
+        Args:
+            event: The input submitted event
+        """
+        results = self.query_one("#search_results", ListView)
+        if results.children:
+            results.focus()
+            results.index = 0
+
+    # ------------------------------------
+    # SEARCH
+    # ------------------------------------
+
+    @work(thread=True, exclusive=True, group="search")
+    def run_search(self, query: str):
+        """
+        Run a query against the index and display the hits.
+
+        Args:
+            query: The text to search for
+        """
+        started = time.perf_counter()
+        hits = []
+        if query.strip():
+            with SearchIndex() as index:
+                hits = index.search(query, snippets=False)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if not get_current_worker().is_cancelled:
+            self.app.call_from_thread(self.show_hits, query, hits, elapsed_ms)
+
+    @traced("ui")
+    def show_hits(self, query: str, hits: list[SearchHit], elapsed_ms: float):
+        """
+        Replace the results with new hits, without snippets yet.
+
+        Args:
+            query: The query the hits are for
+            hits: The ranked hits
+            elapsed_ms: How long the query took
+        """
+        self.workers.cancel_group(self, "snippets")
+        self.terms = tokenize(query)
+        results = self.query_one("#search_results", ListView)
+        results.clear()
+        results.extend(SearchResultItem(hit.journal, hit.title) for hit in hits)
+
+        status = self.query_one("#search_status", Label)
+        if query.strip():
+            status.update(f"{len(hits)} results in {elapsed_ms:.1f} ms")
+        else:
+            status.update("")
+        self.call_after_refresh(self.load_visible_snippets)
+
+    def load_visible_snippets(self):
+        """Read the snippets of the results in view that don't have one yet."""
+        results = self.query_one("#search_results", ListView)
+        top = results.scroll_y
+        bottom = top + results.scrollable_content_region.height
+        pending = []
+        y = 0
+        for item in results.children:
+            height = item.outer_size.height or 1
+            if y >= bottom:
+                break
+            if y + height > top and isinstance(item, SearchResultItem):
+                if item.snippet is None:
+                    pending.append(item)
+            y += height
+        if pending:
+            self.load_snippets(pending, self.terms)
+
+    @work(thread=True, exclusive=True, group="snippets")
+    def load_snippets(self, items: list[SearchResultItem], terms: list[str]):
+        """
+        Read entries and show their snippets.
+
+        Args:
+            items: The results to fill in
+            terms: The query terms to excerpt around
+        """
+        worker = get_current_worker()
+        for item in items:
+            if worker.is_cancelled:
+                return
+            hit = SearchHit(item.journal_name, item.entry_title, 0)
+            snippet = make_snippet(hit, terms)
+            if not worker.is_cancelled:
+                self.app.call_from_thread(item.set_snippet, snippet)
+
+    def on_list_view_selected(self, event: ListView.Selected) -> None:
+        """
+        Open the selected hit in the entry editor.
+
+        Args:
+            event: The selection event
+        """
+        if not isinstance(event.item, SearchResultItem):
+            return
+
+        # The journal may have been deleted since the results were shown
+        journal = Journal(event.item.journal_name, create=False)
+        if not os.path.isdir(journal.journal_path):
+            self.query_one("#search_status", Label).update(
+                f"Journal {journal.name} no longer exists"
+            )
+            return
+
+        entry_screen = self.app.buffers.open(journal, event.item.entry_title)
+        self.app.push_screen(entry_screen)
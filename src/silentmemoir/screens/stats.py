@@ -0,0 +1,242 @@
+"""
+Writing statistics dashboard.
+
+This screen shows totals, streaks, a calendar of the recent days and an
+hour-of-week heatmap for all journals or one of them. The figures come from
+the statistics store, which saves keep up to date, so the dashboard only
+reads a cached summary instead of the entries.
+"""
+
+import datetime
+import math
+
+from rich.console import Group, RenderableType
+from rich.table import Table
+from rich.text import Text
+from textual import work
+from textual.app import ComposeResult
+from textual.binding import Binding
+from textual.containers import Horizontal, Vertical, VerticalScroll
+from textual.screen import ModalScreen
+from textual.widgets import Label, ListView, Static
+
+from silentmemoir import storage
+from silentmemoir.stats import Summary
+from silentmemoir.trace import traced
+from silentmemoir.widgets import StatsJournalItem
+
+# Cell shades from nothing written to the busiest cell
+SHADES = "·░▒▓█"
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def shade(value: int, busiest: int) -> str:
+    """
+    Pick the shade for a cell.
+
+    Args:
+        value: The cell's count
+        busiest: The highest count of any cell
+
+    Returns:
+        A block character, darker for busier cells
+    """
+    if value <= 0 or busiest <= 0:
+        return SHADES[0]
+    levels = len(SHADES) - 1
+    return SHADES[min(levels, math.ceil(value * levels / busiest))]
+
+
+def render_calendar(recent: list[tuple[str, int, int]]) -> Text:
+    """
+    Lay the recent days out as weekday rows and week columns.
+
+    Args:
+        recent: (day, entries, words) per day, oldest first
+
+    Returns:
+        The calendar, shaded by words written
+    """
+    if not recent:
+        return Text()
+    # Pad the first week so every column starts on a Monday
+    padding = datetime.date.fromisoformat(recent[0][0]).weekday()
+    cells = [None] * padding + recent
+    weeks = math.ceil(len(cells) / 7)
+    busiest = max(words for _, _, words in recent)
+    text = Text()
+    for weekday, name in enumerate(WEEKDAYS):
+        text.append(f"{name} ", style="dim")
+        for week in range(weeks):
+            index = week * 7 + weekday
+            cell = cells[index] if index < len(cells) else None
+            if cell is None:
+                text.append("  ")
+            else:
+                text.append(shade(cell[2], busiest) * 2, style="green")
+        text.append("\n")
+    return text
+
+
+def render_heatmap(heatmap: list[list[int]]) -> Text:
+    """
+    Draw the entries written per weekday and hour.
+
+    Args:
+        heatmap: Entries per weekday (Monday first) and hour
+
+    Returns:
+        The heatmap, one row per weekday
+    """
+    busiest = max((max(row) for row in heatmap), default=0)
+    text = Text("    ")
+    text.append("".join(f"{hour:<12}" for hour in range(0, 24, 6)), style="dim")
+    text.append("\n")
+    for name, row in zip(WEEKDAYS, heatmap):
+        text.append(f"{name} ", style="dim")
+        text.append("".join(shade(value, busiest) * 2 for value in row), style="cyan")
+        text.append("\n")
+    return text
+
+
+def render_summary(summary: Summary, all_journals: bool) -> RenderableType:
+    """
+    Build the dashboard body for a summary.
+
+    Args:
+        summary: The statistics to show
+        all_journals: Whether the summary covers every journal, which adds a
+            table of the journals
+
+    Returns:
+        The renderable dashboard
+    """
+    totals = Text()
+    for value, label in (
+        (summary.entries, "entries"),
+        (summary.words, "words"),
+        (summary.days_written, "days written"),
+        (summary.current_streak, "day streak"),
+        (summary.longest_streak, "longest streak"),
+    ):
+        totals.append(f"{value:,}", style="bold")
+        totals.append(f" {label}   ")
+
+    parts: list[RenderableType] = [
+        totals,
+        Text(f"\nLast {len(summary.recent)} days", style="bold"),
+        render_calendar(summary.recent),
+        Text("Time of day", style="bold"),
+        render_heatmap(summary.heatmap),
+    ]
+    if all_journals and summary.journals:
+        table = Table("Journal", "Entries", "Words", box=None, header_style="bold")
+        for name, entries, words in summary.journals:
+            table.add_row(Text(name), f"{entries:,}", f"{words:,}")
+        parts.append(table)
+    return Group(*parts)
+
+
+class Dashboard(ModalScreen):
+    """Screen showing writing statistics."""
+
+    BINDINGS = [
+        Binding("escape", "dismiss_screen", "Exit", show=True),
+        Binding("r", "rebuild", "Recount", show=True),
+    ]
+
+    def __init__(self):
+        """Initialize the dashboard."""
+        super().__init__()
+        # The journal whose statistics are shown; None for all journals
+        self.journal_name = None
+
+    @traced("ui")
+    def compose(self) -> ComposeResult:
+        """
+        Compose the UI for this screen.
+
+        Returns:
+            The composed UI elements
+        """
+        with Vertical(id="stats_panel"):
+            yield Label("Writing statistics", classes="titleText")
+            yield Label("Loading statistics...", id="stats_status")
+            with Horizontal(id="stats_container"):
+                yield ListView(id="stats_journals")
+                with VerticalScroll(id="stats_body"):
+                    yield Static("", id="stats_view")
+
+    def on_screen_resume(self):
+        """Refresh the journals and figures each time the dashboard is opened."""
+        self.load_journals()
+        self.load_summary()
+
+    # ------------------------------------
+    # ACTIONS
+    # ------------------------------------
+
+    def action_dismiss_screen(self):
+        """Action to exit the dashboard."""
+        self.dismiss(None)
+
+    def action_rebuild(self):
+        """Action to recount every journal, e.g. after editing files by hand."""
+        self.load_summary(rebuild=True)
+
+    # ------------------------------------
+    # STATISTICS
+    # ------------------------------------
+
+    @work(exclusive=True, group="stats_journals")
+    async def load_journals(self):
+        """List the journals to choose from."""
+        try:
+            names = await storage.list_journals()
+        except OSError as e:
+            self.query_one("#stats_status", Label).update(
+                f"Error loading journals: {e}"
+            )
+            return
+        journals = self.query_one("#stats_journals", ListView)
+        await journals.clear()
+        choices = [None, *names]
+        await journals.extend(StatsJournalItem(name) for name in choices)
+        if self.journal_name not in choices:
+            self.journal_name = None
+        journals.index = choices.index(self.journal_name)
+        journals.focus()
+
+    def on_list_view_highlighted(self, event: ListView.Highlighted) -> None:
+        """
+        Show the statistics of the highlighted journal.
+
+        Args:
+            event: The highlight event
+        """
+        if not isinstance(event.item, StatsJournalItem):
+            return
+        if event.item.journal_name != self.journal_name:
+            self.journal_name = event.item.journal_name
+            self.load_summary()
+
+    @work(exclusive=True, group="stats_summary")
+    async def load_summary(self, rebuild: bool = False):
+        """
+        Read the summary of the chosen journal and display it.
+
+        Args:
+            rebuild: Recount everything from the journals first
+        """
+        status = self.query_one("#stats_status", Label)
+        if rebuild:
+            status.update("Recounting entries...")
+        try:
+            summary = await storage.writing_summary(self.journal_name, rebuild)
+        except OSError as e:
+            status.update(f"Error reading statistics: {e}")
+            return
+        status.update("R: Recount | Esc: Exit")
+        self.query_one("#stats_view", Static).update(
+            render_summary(summary, self.journal_name is None)
+        )
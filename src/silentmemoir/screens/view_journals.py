@@ -5,18 +5,53 @@ This screen provides the main interface for viewing, creating, and managing
 journals and their entries.
 """
 
-import os
+import asyncio
+import bisect
 
+from textual import work
 from textual.app import ComposeResult
 from textual.binding import Binding
 from textual.containers import Container, Horizontal, Vertical
 from textual.events import Key
 from textual.screen import ModalScreen, Screen
-from textual.widgets import Button, Footer, Input, Label, ListView
-
-from silentmemoir.config import ERROR_MESSAGE_DISPLAY_DURATION, JOURNALS_BASE_PATH
-from silentmemoir.models import EntryListItem, Journal, JournalListItem
-
+from textual.widgets import Button, Footer, Input, Label, ListView, ProgressBar
+from textual.worker import get_current_worker
+
+from silentmemoir import layout, storage, trash
+from silentmemoir.config import (
+    ERROR_MESSAGE_DISPLAY_DURATION,
+    MARKDOWN_EXTENSION,
+    PREFETCH_DELAY,
+    PREFETCH_NEIGHBOURS,
+    TRASH_PURGE_DELAY,
+)
+from silentmemoir.finder import title_index
+from silentmemoir.models import Journal, JournalEntry
+from silentmemoir.trace import traced
+from silentmemoir.trash import TrashedJournal, TrashError
+from silentmemoir.watcher import Delta, JournalWatcher
+from silentmemoir.widgets import EntryList, JournalListItem
+
+# Seconds the file watcher waits per read, bounding how long it takes to stop
+WATCH_READ_TIMEOUT = 0.5
+
+
+def update_title_index(delta: Delta):
+    """
+    Keep the command palette's finder current for every journal.
+
+    Args:
+        delta: A change reported by the watcher
+    """
+    title = delta.name.replace(MARKDOWN_EXTENSION, "")
+    if delta.kind == "entry_added":
+        title_index.add(delta.journal, title)
+    elif delta.kind == "entry_removed":
+        title_index.remove(delta.journal, title)
+    elif delta.kind == "journal_added":
+        title_index.add(delta.name)
+    elif delta.kind == "journal_removed":
+        title_index.remove_journal(delta.name)
 
 class ViewJournals(Screen):
     """Main screen for viewing and managing journals and entries."""
@@ -26,13 +61,36 @@ class ViewJournals(Screen):
         Binding(key="Enter", action="select_cursor", description="Accept"),
         Binding(key="n", action="goto_new_journal", description="New Journal"),
         Binding(key="d", action="delete_item", description="Delete Highlighted Item"),
+        Binding(key="u", action="undo_delete", description="Undo Delete"),
+        Binding(key="slash", action="goto_search", description="Search"),
+        Binding(key="s", action="goto_stats", description="Statistics"),
+        Binding(
+            key="left_square_bracket",
+            action="previous_month",
+            description="Previous Month",
+        ),
+        Binding(
+            key="right_square_bracket", action="next_month", description="Next Month"
+        ),
     ]
 
     def __init__(self):
         """Initialize the ViewJournals screen."""
         super().__init__()
         self.current_journal = None
-
+        # Deleted journals that can still be restored, most recent last
+        self.trashed: list[TrashedJournal] = []
+        # The journal whose entries are shown, and the watcher keeping both
+        # lists in step with the disk
+        self.listed_journal = None
+        self.watcher = None
+        # Sharded journals are listed a month at a time: the journal's months
+        # ("" holding the undated entries) and the one listed, or None when
+        # the whole journal is
+        self.months: list[str] = []
+        self.listed_month = None
+
+    @traced("ui")
     def compose(self) -> ComposeResult:
         """
         Compose the UI for this screen.
@@ -40,27 +98,32 @@ class ViewJournals(Screen):
         Returns:
             The composed UI elements
         """
-        journals = Journal.list_all()
-
-        self.journals_list = ListView(
-            *[JournalListItem(journal.name) for journal in journals], id="journals_list"
-        )
+        # Journals are listed in the background once the screen is mounted
+        self.journals_list = ListView(id="journals_list")
 
-        self.entries_list = ListView(id="entries_list")
+        self.entries_list = EntryList(id="entries_list")
 
         with Horizontal(id="main_container"):
             with Vertical(id="journal_panel"):
                 yield Label("Journals")
                 yield self.journals_list
                 yield Label("", id="journal_error")
+                yield ProgressBar(id="purge_progress", show_eta=False)
 
             with Vertical(id="entries_panel"):
-                yield Label("Entries")
+                yield Label("Entries", id="entries_label")
                 yield self.entries_list
                 yield Label("", id="entries_error")
 
             yield Footer()
 
+    def on_mount(self):
+        """Load the journals list when the screen is mounted."""
+        self.refresh_journals()
+        self.watch_files()
+        # Finish purges a previous session left behind
+        self.purge_trash()
+
     def on_key(self, event: Key):
         """
         Handle keyboard events.
@@ -73,19 +136,16 @@ class ViewJournals(Screen):
                 selected_item = self.journals_list.highlighted_child
                 if isinstance(selected_item, JournalListItem):
                     journal_name = selected_item.journal_name
-                    self.current_journal = Journal(journal_name)
+                    self.current_journal = Journal(journal_name, create=False)
 
                     self.rebuild_entries_list(self.current_journal)
                     self.set_focus(self.entries_list)
-
-                    if len(self.entries_list.children) > 0:
-                        self.entries_list.index = 0
-
-                    self.set_focus(self.entries_list)
                     event.prevent_default()
         if event.key == "left":
             self.set_focus(self.journals_list)
             self.entries_list.clear()
+            self.listed_journal = None
+            self.show_month(None)
             event.prevent_default()
 
     # ----------------------------
@@ -96,23 +156,142 @@ class ViewJournals(Screen):
         """Navigate to the home screen."""
         self.app.push_screen("Opening Screen")
 
+    def action_goto_search(self):
+        """Open the full-text search screen."""
+        from silentmemoir.screens.search import Search
+
+        self.app.push_screen(Search())
+
+    def action_goto_stats(self):
+        """Open the writing statistics dashboard."""
+        self.app.push_screen("Dashboard")
+
     def action_goto_new_journal(self):
         """Open the new journal creation dialog."""
 
         def on_new_journal_created(journal_name):
             if journal_name:
-                self.refresh_journals()
+                self.add_journal_item(journal_name)
 
         self.app.push_screen(NewJournal(), on_new_journal_created)
 
-    def refresh_journals(self):
+    @work(exclusive=True, group="journals")
+    @traced("ui")
+    async def refresh_journals(self):
         """Refresh the journals list from disk."""
-        journals = Journal.list_all()
+        journal_names = await storage.list_journals()
+
+        await self.journals_list.clear()
+        await self.journals_list.extend(
+            JournalListItem(journal_name) for journal_name in journal_names
+        )
+
+    def _journal_names(self) -> list[str]:
+        return [
+            item.journal_name
+            for item in self.journals_list.children
+            if isinstance(item, JournalListItem)
+        ]
+
+    def add_journal_item(self, name: str):
+        """
+        Insert a journal into the list at its sorted position.
+
+        Args:
+            name: Name of the journal; ignored if it is already listed
+        """
+        names = self._journal_names()
+        index = bisect.bisect_left(names, name)
+        if index == len(names) or names[index] != name:
+            self.journals_list.insert(index, [JournalListItem(name)])
+
+    def remove_journal_item(self, name: str):
+        """
+        Remove a journal from the list.
+
+        Args:
+            name: Name of the journal; ignored if it isn't listed
+        """
+        names = self._journal_names()
+        if name in names:
+            self.journals_list.remove_items([names.index(name)])
+        if self.listed_journal and self.listed_journal.name == name:
+            self.entries_list.clear()
+            self.listed_journal = None
+            self.show_month(None)
+
+    def show_journal(self, name: str):
+        """
+        Open a journal's entries as if it had been picked from the list.
+
+        Args:
+            name: Name of the journal
+        """
+        names = self._journal_names()
+        if name in names:
+            self.journals_list.index = names.index(name)
+        self.current_journal = Journal(name, create=False)
+        self.rebuild_entries_list(self.current_journal)
+        self.set_focus(self.entries_list)
+
+    @work(thread=True, exclusive=True, group="watch")
+    def watch_files(self):
+        """Apply filesystem changes to the lists until the screen goes away."""
+        worker = get_current_worker()
+        self.watcher = JournalWatcher(Journal.base_path)
+        if self.listed_journal:
+            self.watcher.follow(self.listed_journal)
+        try:
+            while not worker.is_cancelled:
+                deltas = self.watcher.read(WATCH_READ_TIMEOUT)
+                if deltas:
+                    self.app.call_from_thread(self.apply_deltas, deltas)
+        except RuntimeError:
+            pass  # The app is shutting down
+        finally:
+            self.watcher.close()
+
+    def apply_deltas(self, deltas: list[Delta]):
+        """
+        Update the lists in place for changes seen on disk.
 
-        self.journals_list.clear()
+        Args:
+            deltas: Changes reported by the watcher
+        """
+        listed = []
+        for delta in deltas:
+            update_title_index(delta)
+            if delta.kind == "journal_added":
+                self.add_journal_item(delta.name)
+            elif delta.kind == "journal_removed":
+                self.remove_journal_item(delta.name)
+            elif delta.kind == "journals_changed":
+                self.refresh_journals()
+            elif self.listed_journal and delta.journal == self.listed_journal.name:
+                listed.append(delta)
+        if listed:
+            self.apply_entry_deltas(listed)
 
-        for journal in journals:
-            self.journals_list.append(JournalListItem(journal.name))
+    def apply_entry_deltas(self, deltas: list[Delta]):
+        """
+        Update the entries list for changes in the listed journal.
+
+        Args:
+            deltas: Entry deltas for the listed journal
+        """
+        if any(delta.kind == "entries_changed" for delta in deltas):
+            self.rebuild_entries_list(self.listed_journal, self.listed_month)
+            return
+        removed = [d.name for d in deltas if d.kind == "entry_removed"]
+        added = [
+            d.name
+            for d in deltas
+            if d.kind == "entry_added" and self.in_listed_month(d.name)
+        ]
+        if removed:
+            self.entries_list.remove_entries(removed)
+        if added:
+            self.entries_list.add_entries(added)
 
     def action_delete_item(self):
         """
@@ -131,65 +310,146 @@ class ViewJournals(Screen):
         if not self.current_journal:
             return
 
-        journal_name = self.current_journal.name
+        journal = self.current_journal
 
         def on_confirm(confirmed: bool):
             if confirmed:
-                try:
-                    self.current_journal.delete()
-                    self.show_temporary_message(
-                        f"Deleted journal: {journal_name}", "#journal_error"
-                    )
-                except OSError as e:
-                    self.show_temporary_message(
-                        f"Error deleting journal: {e}", "#journal_error"
-                    )
-
                 self.current_journal = None
-                self.refresh_journals()
                 self.entries_list.clear()
+                self.remove_journal(journal)
 
         self.app.push_screen(
-            ConfirmDeleteModal("journal", journal_name), on_confirm
+            ConfirmDeleteModal("journal", journal.name), on_confirm
         )
 
+    @work(group="delete")
+    async def remove_journal(self, journal: Journal):
+        """
+        Delete a journal off the UI thread and refresh the list.
+
+        Args:
+            journal: The journal to delete
+        """
+        try:
+            trashed = await storage.delete_journal(journal)
+            self.remove_journal_item(journal.name)
+            self.show_temporary_message(
+                f"Deleted journal: {journal.name} (u to undo)", "#journal_error"
+            )
+            self.app.buffers.discard(journal)
+            if trashed is not None:
+                self.trashed.append(trashed)
+                self.set_timer(TRASH_PURGE_DELAY, lambda: self.purge_trash(trashed))
+        except OSError as e:
+            self.show_temporary_message(
+                f"Error deleting journal: {e}", "#journal_error"
+            )
+
+    def action_undo_delete(self):
+        """Restore the most recently deleted journal, if it isn't purged yet."""
+        if self.trashed:
+            self.restore_journal(self.trashed.pop())
+
+    @work(group="delete")
+    async def restore_journal(self, item: TrashedJournal):
+        """
+        Move a deleted journal back out of the trash and refresh the list.
+
+        Args:
+            item: The trashed journal
+        """
+        try:
+            await storage.restore_journal(item)
+            self.add_journal_item(item.name)
+            self.show_temporary_message(
+                f"Restored journal: {item.name}", "#journal_error"
+            )
+        except (TrashError, OSError) as e:
+            self.show_temporary_message(
+                f"Error restoring journal: {e}", "#journal_error"
+            )
+
+    @work(thread=True, group="purge")
+    def purge_trash(self, item: TrashedJournal = None):
+        """
+        Permanently remove deleted journals, showing progress.
+
+        Args:
+            item: The journal to purge; by default every journal whose
+                restore window has passed
+        """
+        bar = self.query_one("#purge_progress", ProgressBar)
+
+        def show_progress(done: int, total: int):
+            bar.display = True
+            bar.update(total=total, progress=done)
+
+        def progress(done: int, total: int):
+            self.app.call_from_thread(show_progress, done, total)
+
+        def finish():
+            # self.trashed belongs to the UI thread, like the widgets
+            bar.display = False
+            if item in self.trashed:
+                self.trashed.remove(item)
+
+        try:
+            if item is None:
+                trash.purge_expired(TRASH_PURGE_DELAY, progress)
+            else:
+                trash.purge(item, progress)
+        except OSError as e:
+            self.app.call_from_thread(
+                self.show_temporary_message,
+                f"Error purging trash: {e}",
+                "#journal_error",
+            )
+        finally:
+            self.app.call_from_thread(finish)
+
     def delete_entry(self):
         """Delete the currently selected entry."""
         if not self.current_journal:
             return
 
-        selected_item = self.entries_list.highlighted_child
+        # None when nothing or the "new entry" item is highlighted
+        entry_name = self.entries_list.highlighted_entry
 
-        if not selected_item:
-            return
-
-        # Don't allow deletion of the "new entry" item
-        if isinstance(selected_item, EntryListItem) and selected_item.is_new_entry:
-            return
-
-        if isinstance(selected_item, EntryListItem):
-            entry_name = selected_item.entry_name
-            entry_path = os.path.join(self.current_journal.journal_path, entry_name)
+        if entry_name:
+            entry = JournalEntry(
+                self.current_journal, entry_name.replace(MARKDOWN_EXTENSION, "")
+            )
 
             def on_confirm(confirmed: bool):
                 if confirmed:
-                    try:
-                        if os.path.exists(entry_path):
-                            os.remove(entry_path)
-                            self.show_temporary_message(
-                                f"Deleted entry: {entry_name}", "#entries_error"
-                            )
-                    except OSError as e:
-                        self.show_temporary_message(
-                            f"Error deleting entry: {e}", "#entries_error"
-                        )
-
-                    self.rebuild_entries_list(self.current_journal)
+                    self.remove_entry(entry)
 
             self.app.push_screen(
                 ConfirmDeleteModal("entry", entry_name), on_confirm
             )
 
+    @work(group="delete")
+    async def remove_entry(self, entry: JournalEntry):
+        """
+        Delete an entry off the UI thread and refresh the list.
+
+        Args:
+            entry: The entry to delete
+        """
+        try:
+            await storage.delete_entry(entry)
+            self.app.buffers.discard(entry.journal, entry.title)
+            self.show_temporary_message(
+                f"Deleted entry: {entry.filename}", "#entries_error"
+            )
+        except OSError as e:
+            self.show_temporary_message(
+                f"Error deleting entry: {e}", "#entries_error"
+            )
+
+        if self.listed_journal and self.listed_journal.name == entry.journal.name:
+            self.entries_list.remove_entries([entry.filename])
+
     def show_temporary_message(self, message: str, label_id: str):
         """
         Display a temporary message that auto-clears after a duration.
@@ -206,34 +466,142 @@ class ViewJournals(Screen):
     # ENTRY HANDLING
     # ----------------------------
 
-    def rebuild_entries_list(self, journal: Journal):
+    @work(exclusive=True, group="entries")
+    @traced("ui")
+    async def rebuild_entries_list(self, journal: Journal, month: str = None):
         """
         Rebuild the entries list for the given journal.
 
+        Sharded journals only list one month, so opening them reads a single
+        small directory however many entries the journal has.
+
         Args:
             journal: The journal whose entries should be displayed
+            month: The month of a sharded journal to list (from
+                Journal.list_months(), or "" for undated entries); the latest
+                one by default
+        """
+        # Follow the journal first, so nothing changing during the listing is missed
+        if self.watcher is not None:
+            await storage.run_io(self.watcher.follow, journal)
+        months = await storage.list_months(journal)
+        if months:
+            months = ["", *months]
+            if month not in months:
+                month = months[-1]
+        else:
+            month = None
+        entry_names = await storage.list_entries(journal, month)
+
+        # The list is virtualized, so this is cheap even for huge journals
+        self.entries_list.set_entries(entry_names)
+        self.listed_journal = journal
+        self.months = months
+        self.show_month(month)
+
+    def show_month(self, month: str = None):
+        """
+        Record and display which month of the journal is listed.
+
+        Args:
+            month: The listed month, "" for undated entries, or None if the
+                whole journal (or nothing) is listed
+        """
+        self.listed_month = month
+        if month is None:
+            text = "Entries"
+        else:
+            text = f"Entries: {month or 'undated'}  ([ ] to change month)"
+        self.query_one("#entries_label", Label).update(text)
+
+    def in_listed_month(self, filename: str) -> bool:
+        """
+        Check whether an entry belongs in the listed month.
+
+        Args:
+            filename: The entry filename
+
+        Returns:
+            True if the whole journal is listed or the entry is filed there
         """
-        # Remove all children and rebuild
-        self.entries_list.clear()
+        if self.listed_month is None:
+            return True
+        title = filename[: -len(MARKDOWN_EXTENSION)]
+        return layout.shard_for(title) == self.listed_month
 
-        # Add the "Create New Entry" item
-        self.entries_list.append(EntryListItem("Create New Entry", is_new_entry=True))
+    def action_previous_month(self):
+        """List the month before the listed one."""
+        self.step_month(-1)
 
-        # Add actual entries
-        for entry in journal.list_entries():
-            self.entries_list.append(EntryListItem(entry, is_new_entry=False))
+    def action_next_month(self):
+        """List the month after the listed one."""
+        self.step_month(1)
+
+    def step_month(self, step: int):
+        """
+        Move the listing to another month of a sharded journal.
+
+        Args:
+            step: How many months to move, negative for earlier ones
+        """
+        if self.listed_journal is None or self.listed_month not in self.months:
+            return
+        index = self.months.index(self.listed_month) + step
+        if 0 <= index < len(self.months):
+            self.rebuild_entries_list(self.listed_journal, self.months[index])
+            self.set_focus(self.entries_list)
 
     def on_list_view_selected(self, event: ListView.Selected) -> None:
         """
-        Handle selection of items in either the journals or entries list.
+        Handle selection of items in the journals list.
 
         Args:
             event: The selection event
         """
         if event.list_view.id == "journals_list":
             self.handle_journal_selected(event.item)
-        elif event.list_view.id == "entries_list":
-            self.handle_entry_selected(event.item)
+
+    def on_entry_list_highlighted(self, event: EntryList.Highlighted) -> None:
+        """
+        Start reading the highlighted entry and its neighbours ahead of time.
+
+        Args:
+            event: The highlight event
+        """
+        if self.current_journal:
+            self.prefetch_entries(self.current_journal, event.entry_list.cursor)
+
+    @work(exclusive=True, group="prefetch")
+    async def prefetch_entries(self, journal: Journal, cursor: int):
+        """
+        Prefetch entries around a row once the cursor has come to rest.
+
+        Args:
+            journal: The journal being listed
+            cursor: The highlighted row
+        """
+        # Cancelled by the next highlight while the cursor is still moving
+        await asyncio.sleep(PREFETCH_DELAY)
+
+        rows = [cursor]
+        for distance in range(1, PREFETCH_NEIGHBOURS + 1):
+            rows += [cursor + distance, cursor - distance]
+        titles = [
+            name[: -len(MARKDOWN_EXTENSION)]
+            for row in rows
+            if 0 <= row < self.entries_list.row_count
+            and (name := self.entries_list.entry_at(row))
+        ]
+        await storage.prefetch_entries(journal, titles)
+
+    def on_entry_list_selected(self, event: EntryList.Selected) -> None:
+        """
+        Handle selection of items in the entries list.
+
+        Args:
+            event: The selection event
+        """
+        self.handle_entry_selected(event.entry_name)
 
     def handle_journal_selected(self, selected_item):
         """
@@ -244,64 +612,55 @@ class ViewJournals(Screen):
         """
         if isinstance(selected_item, JournalListItem):
             journal_name = selected_item.journal_name
-            self.current_journal = Journal(journal_name)
+            self.current_journal = Journal(journal_name, create=False)
 
             self.rebuild_entries_list(self.current_journal)
             self.set_focus(self.entries_list)
 
-            if len(self.entries_list.children) > 0:
-                self.entries_list.index = 0
-
-    def handle_entry_selected(self, selected_item):
+    def handle_entry_selected(self, entry_name):
         """
         Handle selection of an entry (or the new entry item).
 
         Args:
-            selected_item: The selected entry list item
+            entry_name: The selected entry filename, or None for the new entry item
         """
         if not self.current_journal:
             return
 
-        if not isinstance(selected_item, EntryListItem):
-            return
-
         # Import here to avoid circular dependency
         from silentmemoir.screens.entry import Entry
 
-        if selected_item.is_new_entry:
+        if entry_name is None:
             # Creating a new entry
             def on_entry_saved(result):
-                if result:
-                    self.rebuild_entries_list(self.current_journal)
+                saved = entry_screen.journal_entry
+                if (
+                    result
+                    and saved
+                    and self.listed_journal
+                    and self.listed_journal.name == saved.journal.name
+                    and self.in_listed_month(saved.filename)
+                ):
+                    self.entries_list.add_entries([saved.filename])
 
             entry_screen = Entry(
                 journal=self.current_journal, entry_name=None, is_new_entry=True
             )
             self.app.push_screen(entry_screen, on_entry_saved)
         else:
-            # Editing an existing entry
-            entry_name = selected_item.entry_name
-
+            # Editing an existing entry, in its kept-alive buffer if it has one
             def on_entry_saved(result):
                 # Optionally rebuild list if needed
                 pass
 
-            entry_screen = Entry(
-                journal=self.current_journal,
-                entry_name=entry_name,
-                is_new_entry=False,
-            )
+            entry_screen = self.app.buffers.open(self.current_journal, entry_name)
             self.app.push_screen(entry_screen, on_entry_saved)
 
 
 class NewJournal(ModalScreen[str]):
     """Modal dialog for creating a new journal."""
 
-    def __init__(self):
-        """Initialize the new journal dialog."""
-        super().__init__()
-        self.journals_path = JOURNALS_BASE_PATH
-
+    @traced("ui")
     def compose(self) -> ComposeResult:
         """
         Compose the UI for this dialog.
@@ -340,7 +699,8 @@ class NewJournal(ModalScreen[str]):
         """
         self.create_journal(event)
 
-    def create_journal(self, text):
+    @work(exclusive=True)
+    async def create_journal(self, text):
         """
         Create a new journal with the given name.
 
@@ -351,30 +711,24 @@ class NewJournal(ModalScreen[str]):
         if not journal_name:
             self.query_one("#error_message", Label).update("Please enter a name")
             return
-        elif journal_name in self.get_existing_journals():
+        elif journal_name in await self.get_existing_journals():
             self.query_one("#error_message", Label).update("Journal already exists")
             return
 
         try:
-            journal = Journal(journal_name)
+            journal = await storage.create_journal(journal_name)
             self.dismiss(journal.name)
         except OSError as e:
             self.query_one("#error_message", Label).update(f"Error creating journal: {e}")
 
-    def get_existing_journals(self):
+    async def get_existing_journals(self):
         """
         Get list of existing journal names.
 
         Returns:
-            List of journal directory names
+            List of journal names
         """
-        if not os.path.exists(self.journals_path):
-            return []
-        return [
-            d
-            for d in os.listdir(self.journals_path)
-            if os.path.isdir(os.path.join(self.journals_path, d))
-        ]
+        return await storage.list_journals()
 
 
 class ConfirmDeleteModal(ModalScreen[bool]):
@@ -392,6 +746,7 @@ class ConfirmDeleteModal(ModalScreen[bool]):
         self.item_type = item_type
         self.item_name = item_name
 
+    @traced("ui")
     def compose(self) -> ComposeResult:
         """
         Compose the UI for this dialog.
@@ -0,0 +1,376 @@
+"""
+Full-text search for SilentMemoir.
+
+This module maintains a persistent inverted index over every entry in every
+journal. The index lives in a SQLite file next to the journals directory and is
+kept current incrementally: an entry is only re-tokenized when its mtime or
+size differs from what the index last recorded.
+"""
+
+import math
+import os
+import re
+import sqlite3
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, ClassVar, Optional
+
+from silentmemoir.config import (
+    MARKDOWN_EXTENSION,
+    SEARCH_INDEX_PATH,
+    SEARCH_RESULT_LIMIT,
+    SEARCH_SNIPPET_LENGTH,
+)
+
+if TYPE_CHECKING:
+    from silentmemoir.models import JournalEntry
+
+TOKEN_PATTERN = re.compile(r"\w+")
+TRAILING_TOKEN = re.compile(r"\w+$")
+
+# Characters read at a time when indexing an entry from disk
+READ_CHUNK_SIZE = 64 * 1024
+
+# BM25 tuning constants
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    journal TEXT NOT NULL,
+    title TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    UNIQUE (journal, title)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    freq INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+"""
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into lowercase search terms.
+
+    Args:
+        text: The text to tokenize
+
+    Returns:
+        List of terms in document order
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def tokenize_chunks(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Tokenize text arriving in pieces, e.g. from a decompressing reader.
+
+    A term cut in two by a chunk boundary is still yielded whole.
+
+    Args:
+        chunks: Successive pieces of the text
+
+    Yields:
+        Terms in document order
+    """
+    carry = ""
+    for chunk in chunks:
+        text = carry + chunk.lower()
+        partial = TRAILING_TOKEN.search(text)
+        cut = partial.start() if partial else len(text)
+        yield from TOKEN_PATTERN.findall(text, 0, cut)
+        carry = text[cut:]
+    yield from TOKEN_PATTERN.findall(carry)
+
+
+@dataclass
+class SearchHit:
+    """A single ranked search result."""
+
+    journal: str
+    title: str
+    score: float
+    snippet: str = ""
+
+
+class SearchIndex:
+    """Persistent inverted index over all journal entries."""
+
+    path: ClassVar[str] = SEARCH_INDEX_PATH
+
+    def __init__(self):
+        """Open (and create if needed) the on-disk index."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self.conn.close()
+
+    # ----------------------------
+    # Maintenance
+    # ----------------------------
+
+    def update_entry(self, entry: "JournalEntry", content: Optional[str] = None) -> bool:
+        """
+        Re-index an entry if it changed since it was last indexed.
+
+        Args:
+            entry: The entry to index
+            content: The entry text, if already in memory
+
+        Returns:
+            True if the entry was (re)indexed, False if it was already current
+        """
+        journal, title = entry.journal.name, entry.title
+        version = entry.version()
+        if version is None:
+            self.remove_entry(journal, title)
+            return True
+        mtime_ns, size = version
+
+        row = self.conn.execute(
+            "SELECT id, mtime_ns, size FROM documents WHERE journal = ? AND title = ?",
+            (journal, title),
+        ).fetchone()
+        if row and row[1] == mtime_ns and row[2] == size:
+            return False
+
+        if content is None:
+            # Streamed, so large or compressed entries are never held whole
+            terms = Counter(tokenize_chunks(entry.read_chunks(READ_CHUNK_SIZE)))
+        else:
+            terms = Counter(tokenize(content))
+
+        with self.conn:
+            if row:
+                doc_id = row[0]
+                self.conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+                self.conn.execute(
+                    "UPDATE documents SET mtime_ns = ?, size = ?, length = ? WHERE id = ?",
+                    (mtime_ns, size, sum(terms.values()), doc_id),
+                )
+            else:
+                doc_id = self.conn.execute(
+                    "INSERT INTO documents (journal, title, mtime_ns, size, length)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (journal, title, mtime_ns, size, sum(terms.values())),
+                ).lastrowid
+            self.conn.executemany(
+                "INSERT INTO postings (term, doc_id, freq) VALUES (?, ?, ?)",
+                ((term, doc_id, freq) for term, freq in terms.items()),
+            )
+        return True
+
+    def remove_entry(self, journal: str, title: str) -> None:
+        """
+        Drop an entry from the index.
+
+        Args:
+            journal: Name of the journal containing the entry
+            title: The entry title (without .md extension)
+        """
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT id FROM documents WHERE journal = ? AND title = ?",
+                (journal, title),
+            ).fetchone()
+            if row:
+                self.conn.execute("DELETE FROM postings WHERE doc_id = ?", row)
+                self.conn.execute("DELETE FROM documents WHERE id = ?", row)
+
+    def remove_journal(self, journal: str) -> None:
+        """
+        Drop every entry of a journal from the index.
+
+        Args:
+            journal: Name of the journal
+        """
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM postings WHERE doc_id IN"
+                " (SELECT id FROM documents WHERE journal = ?)",
+                (journal,),
+            )
+            self.conn.execute("DELETE FROM documents WHERE journal = ?", (journal,))
+
+    def sync(self) -> int:
+        """
+        Reconcile the index with the journals on disk.
+
+        Only entries whose mtime or size changed are re-read, so this is cheap
+        when little has changed. It picks up edits made outside the app.
+
+        Returns:
+            Number of entries that were (re)indexed or removed
+        """
+        from silentmemoir.models import Journal, JournalEntry
+
+        changed = 0
+        known = set(
+            self.conn.execute("SELECT journal, title FROM documents").fetchall()
+        )
+        seen = set()
+
+        for journal in Journal.list_all():
+            for filename in journal.list_entries():
+                if not filename.endswith(MARKDOWN_EXTENSION):
+                    continue
+                title = filename[: -len(MARKDOWN_EXTENSION)]
+                seen.add((journal.name, title))
+                try:
+                    if self.update_entry(JournalEntry(journal, title)):
+                        changed += 1
+                except (OSError, UnicodeDecodeError):
+                    continue
+
+        for journal_name, title in known - seen:
+            self.remove_entry(journal_name, title)
+            changed += 1
+
+        return changed
+
+    # ----------------------------
+    # Queries
+    # ----------------------------
+
+    def search(
+        self, query: str, limit: int = SEARCH_RESULT_LIMIT, snippets: bool = True
+    ) -> list[SearchHit]:
+        """
+        Rank entries against a query using BM25.
+
+        The last query term is matched as a prefix so results update sensibly
+        while the user is still typing. Hits in journals deleted since they
+        were indexed are left out.
+
+        Args:
+            query: Free-text query
+            limit: Maximum number of hits to return
+            snippets: Read the entries to fill in each hit's snippet; callers
+                that only show some of the hits build them with make_snippet()
+
+        Returns:
+            Hits ordered by descending score
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        total, avg_length = self.conn.execute(
+            "SELECT COUNT(*), AVG(length) FROM documents"
+        ).fetchone()
+        if not total:
+            return []
+        avg_length = avg_length or 1
+
+        prefix = None if query[-1:].isspace() else terms[-1]
+        scores: Counter = Counter()
+
+        for term in terms:
+            if term == prefix:
+                rows = self.conn.execute(
+                    "SELECT p.doc_id, SUM(p.freq), d.length FROM postings p"
+                    " JOIN documents d ON d.id = p.doc_id"
+                    " WHERE p.term >= ? AND p.term < ? GROUP BY p.doc_id",
+                    (term, term + "\uffff"),
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT p.doc_id, p.freq, d.length FROM postings p"
+                    " JOIN documents d ON d.id = p.doc_id WHERE p.term = ?",
+                    (term,),
+                ).fetchall()
+
+            df = len(rows)
+            if not df:
+                continue
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for doc_id, freq, length in rows:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                scores[doc_id] += idf * freq * (BM25_K1 + 1) / (freq + norm)
+
+        hits = self._live_hits(scores.most_common(limit), limit)
+        if len(hits) < limit < len(scores):
+            # Stale hits were dropped; look further down the ranking
+            hits = self._live_hits(scores.most_common(), limit)
+
+        if snippets:
+            for hit in hits:
+                hit.snippet = make_snippet(hit, terms)
+        return hits
+
+    def _live_hits(
+        self, ranked: list[tuple[int, float]], limit: int
+    ) -> list[SearchHit]:
+        from silentmemoir.models import Journal
+
+        hits = []
+        journals: dict[str, bool] = {}
+        for doc_id, score in ranked:
+            journal, title = self.conn.execute(
+                "SELECT journal, title FROM documents WHERE id = ?", (doc_id,)
+            ).fetchone()
+            if journal not in journals:
+                path = Journal(journal, create=False).journal_path
+                journals[journal] = os.path.isdir(path)
+            if journals[journal]:
+                hits.append(SearchHit(journal, title, score))
+                if len(hits) == limit:
+                    break
+        return hits
+
+
+def make_snippet(hit: SearchHit, terms: list[str]) -> str:
+    """
+    Build a short excerpt of an entry around the first matching term.
+
+    Args:
+        hit: The search hit to excerpt
+        terms: The query terms
+
+    Returns:
+        A single-line excerpt, or an empty string if the entry can't be read
+    """
+    from silentmemoir.models import Journal, JournalEntry
+
+    journal = Journal(hit.journal, create=False)
+    if not os.path.isdir(journal.journal_path):
+        return ""
+    try:
+        content = JournalEntry(journal, hit.title).read()
+    except (OSError, UnicodeDecodeError):
+        return ""
+
+    pattern = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+    match = pattern.search(content)
+    start = 0
+    if match:
+        start = max(0, match.start() - SEARCH_SNIPPET_LENGTH // 3)
+        # Don't start the excerpt mid-word
+        space = content.find(" ", start, match.start())
+        if start > 0 and space != -1:
+            start = space + 1
+    excerpt = " ".join(content[start : start + SEARCH_SNIPPET_LENGTH].split())
+    if start > 0:
+        excerpt = "…" + excerpt
+    if start + SEARCH_SNIPPET_LENGTH < len(content):
+        excerpt += "…"
+    return excerpt
@@ -0,0 +1,760 @@
+"""
+Append-only segment store for SilentMemoir journals.
+
+A journal that has a SEGMENTS_DIRNAME directory keeps its entries there
+instead of as one Markdown file each. Every save or delete is appended as a
+record to the active segment file, and an in-memory index maps each title to
+the offset of its latest content. Opening a journal reads one JSON snapshot of
+that index and replays only the records written after it.
+
+Records are laid out as a fixed header followed by the UTF-8 title and body:
+
+    magic (4s) | op (B) | title length (I) | body length (I) |
+    mtime ns (Q) | words (I) | crc32 of title + body (I)
+
+Superseded and deleted records are reclaimed by compaction, which copies live
+records of the sealed segments into a new segment without blocking writers.
+Journals can be converted to and from plain .md files at any time.
+
+Several processes (the app and the command line, say) can write the same
+store: appends, snapshots and compaction hold an advisory lock on LOCK_FILENAME
+across processes, and a writer that finds the store changed by another
+process reloads its index before appending.
+
+Usage:
+    python -m silentmemoir.segments enable|disable|compact JOURNAL
+    python -m silentmemoir.segments export JOURNAL DEST
+"""
+
+import errno
+import json
+import os
+import re
+import shutil
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import NamedTuple, Optional
+
+from silentmemoir import compression, durable
+from silentmemoir.catalog import EntryInfo, count_words
+from silentmemoir.config import (
+    COMPRESSED_EXTENSION,
+    MARKDOWN_EXTENSION,
+    SEGMENT_COMPACT_RATIO,
+    SEGMENT_MAX_BYTES,
+    SEGMENT_SNAPSHOT_INTERVAL,
+    SEGMENTS_DIRNAME,
+)
+
+MAGIC = b"SMR1"
+OP_PUT = 1
+OP_DELETE = 2
+
+HEADER = struct.Struct("<4sBIIQII")
+"""Record header: magic, op, title length, body length, mtime ns, words, crc32."""
+
+INDEX_FILENAME = "index.json"
+LOCK_FILENAME = "lock"
+SEGMENT_PATTERN = re.compile(r"^seg-(\d{6})\.log$")
+
+
+class SegmentError(Exception):
+    """Raised when a segment store cannot be opened or converted."""
+
+
+class Location(NamedTuple):
+    """Where the latest version of an entry lives."""
+
+    segment: int
+    offset: int
+    length: int
+    mtime_ns: int
+    created: float
+    words: int
+
+
+class _FileLock:
+    """
+    Exclusive advisory lock on a file, shared by the threads of a process.
+
+    The OS lock is taken when the first thread enters and released when the
+    last one leaves; threads within the process serialize on their own locks.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.depth = 0
+        self.fd = None
+        self.mutex = threading.Lock()
+
+    def __enter__(self) -> "_FileLock":
+        with self.mutex:
+            if self.depth == 0:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    _lock_fd(fd)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                self.fd = fd
+            self.depth += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        with self.mutex:
+            self.depth -= 1
+            if self.depth == 0:
+                try:
+                    _unlock_fd(self.fd)
+                finally:
+                    os.close(self.fd)
+                    self.fd = None
+
+
+if sys.platform == "win32":
+    import msvcrt
+
+    # How long to wait for another process holding the lock, in seconds
+    _LOCK_TIMEOUT = 60.0
+
+    def _lock_fd(fd: int) -> None:
+        # LK_LOCK itself gives up after ten one-second attempts; keep waiting
+        # while another process holds the lock, but not on any other error
+        deadline = time.monotonic() + _LOCK_TIMEOUT
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError as e:
+                if e.errno not in (errno.EDEADLOCK, errno.EACCES):
+                    raise
+                if time.monotonic() >= deadline:
+                    raise TimeoutError("Timed out waiting for the segment store lock") from e
+                time.sleep(0.1)
+
+    def _unlock_fd(fd: int) -> None:
+        # msvcrt unlocks the byte range at the current position
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock_fd(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock_fd(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def segment_filename(number: int) -> str:
+    """
+    Return the filename of a segment.
+
+    Args:
+        number: The segment number
+
+    Returns:
+        The segment's filename
+    """
+    return f"seg-{number:06d}.log"
+
+
+def is_segmented(journal_path: str) -> bool:
+    """
+    Check whether a journal uses the segment store.
+
+    Args:
+        journal_path: The journal's directory
+
+    Returns:
+        True if the journal keeps its entries in segments
+    """
+    return os.path.isdir(os.path.join(journal_path, SEGMENTS_DIRNAME))
+
+
+class SegmentStore:
+    """Entries of one journal kept in append-only segment files."""
+
+    def __init__(self, journal_path: str):
+        """
+        Open (and create if needed) the segment store of a journal.
+
+        Args:
+            journal_path: The journal's directory
+        """
+        self.path = os.path.join(journal_path, SEGMENTS_DIRNAME)
+        self.lock = threading.RLock()
+        self.compacting = False
+        self.seen = None
+
+        os.makedirs(self.path, exist_ok=True)
+        self.file_lock = _FileLock(os.path.join(self.path, LOCK_FILENAME))
+        with self.file_lock:
+            self._load()
+
+    # ----------------------------
+    # Opening
+    # ----------------------------
+
+    def _segment_numbers(self) -> list[int]:
+        numbers = []
+        with os.scandir(self.path) as it:
+            for d in it:
+                match = SEGMENT_PATTERN.match(d.name)
+                if match:
+                    numbers.append(int(match.group(1)))
+                elif d.name.endswith(".tmp"):
+                    os.remove(d.path)  # Left over from an interrupted compaction
+        return sorted(numbers)
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.path, segment_filename(number))
+
+    def _disk_state(self) -> tuple:
+        try:
+            active_size = os.path.getsize(self._segment_path(self.active))
+        except FileNotFoundError:
+            active_size = 0
+        return os.stat(self.path).st_mtime_ns, active_size
+
+    def _mark_current(self) -> None:
+        self.seen = self._disk_state()
+
+    def is_stale(self) -> bool:
+        """
+        Check whether another process changed the store since it was loaded.
+
+        Returns:
+            True if the in-memory index may be out of date
+        """
+        with self.lock:
+            if self.compacting:
+                return False
+            try:
+                return self._disk_state() != self.seen
+            except FileNotFoundError:
+                return True
+
+    def _load(self) -> None:
+        # Called with the file lock held, so no other process is mid-append
+        # when torn tails are truncated
+        self.index: dict[str, Location] = {}
+        self.active = 0
+        self.active_size = 0
+        self.live_bytes = 0
+        self.total_bytes = 0
+        self.unsnapshotted = 0
+        replay_segment, replay_offset = 0, 0
+        try:
+            with open(os.path.join(self.path, INDEX_FILENAME), encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self.index = {
+                title: Location(*fields) for title, fields in snapshot["entries"].items()
+            }
+            replay_segment, replay_offset = snapshot["segment"], snapshot["offset"]
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError):
+            self.index = {}  # Damaged snapshot: rebuild from the segments
+
+        numbers = self._segment_numbers()
+        for number in numbers:
+            size = os.path.getsize(self._segment_path(number))
+            self.total_bytes += size
+            if number > replay_segment:
+                self._replay(number, 0)
+            elif number == replay_segment:
+                self._replay(number, replay_offset)
+
+        # Compaction may have reserved a segment number that was never written
+        self.active = max(numbers[-1] if numbers else 0, replay_segment)
+        if self.active in numbers:
+            self.active_size = os.path.getsize(self._segment_path(self.active))
+        self.live_bytes = sum(loc.length for loc in self.index.values())
+        self._mark_current()
+
+    def _replay(self, number: int, start: int) -> None:
+        path = self._segment_path(number)
+        with open(path, "rb") as f:
+            f.seek(start)
+            offset = start
+            while True:
+                record = _read_record(f)
+                if record is None:
+                    break
+                op, title, length, mtime_ns, words = record
+                body_offset = offset + HEADER.size + len(title.encode("utf-8"))
+                self._apply(op, title, number, body_offset, length, mtime_ns, words)
+                offset = f.tell()
+                self.unsnapshotted += 1
+
+        if offset < os.path.getsize(path):
+            # A torn write at the tail: drop it so new records follow valid ones
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+
+    def _apply(
+        self,
+        op: int,
+        title: str,
+        segment: int,
+        offset: int,
+        length: int,
+        mtime_ns: int,
+        words: int,
+    ) -> None:
+        previous = self.index.pop(title, None)
+        if previous:
+            self.live_bytes -= previous.length
+        if op == OP_PUT:
+            created = previous.created if previous else mtime_ns / 1e9
+            self.index[title] = Location(segment, offset, length, mtime_ns, created, words)
+            self.live_bytes += length
+
+    # ----------------------------
+    # Writing
+    # ----------------------------
+
+    def _append(self, op: int, title: str, body: bytes, words: int = 0) -> None:
+        # Called with both locks held
+        if self.is_stale():
+            self._load()  # Another process wrote since; append after its records
+        if self.active_size >= SEGMENT_MAX_BYTES:
+            self.active += 1
+            self.active_size = 0
+
+        title_bytes = title.encode("utf-8")
+        mtime_ns = time.time_ns()
+        crc = zlib.crc32(body, zlib.crc32(title_bytes))
+        header = HEADER.pack(
+            MAGIC, op, len(title_bytes), len(body), mtime_ns, words, crc
+        )
+        path = self._segment_path(self.active)
+        with open(path, "ab") as f:
+            f.write(header + title_bytes + body)
+        durable.written(path)
+
+        offset = self.active_size + HEADER.size + len(title_bytes)
+        self._apply(op, title, self.active, offset, len(body), mtime_ns, words)
+        self.active_size += HEADER.size + len(title_bytes) + len(body)
+        self.total_bytes += HEADER.size + len(title_bytes) + len(body)
+
+        self.unsnapshotted += 1
+        if self.unsnapshotted >= SEGMENT_SNAPSHOT_INTERVAL:
+            self.write_snapshot()
+        self._mark_current()
+
+    def put(self, title: str, content: str) -> None:
+        """
+        Store a new version of an entry.
+
+        Args:
+            title: The entry title
+            content: The entry text
+
+        Raises:
+            OSError: If the record cannot be appended
+        """
+        body = content.encode("utf-8")
+        with self.lock, self.file_lock:
+            self._append(OP_PUT, title, body, count_words(content))
+
+    def delete(self, title: str) -> None:
+        """
+        Delete an entry by appending a tombstone.
+
+        Args:
+            title: The entry title
+
+        Raises:
+            OSError: If the record cannot be appended
+        """
+        with self.lock, self.file_lock:
+            if self.is_stale():
+                self._load()
+            if title in self.index:
+                self._append(OP_DELETE, title, b"")
+
+    def write_snapshot(self) -> None:
+        """Persist the index so the next open replays nothing before this point."""
+        with self.lock, self.file_lock:
+            snapshot = {
+                "segment": self.active,
+                "offset": self.active_size,
+                "entries": {title: list(loc) for title, loc in self.index.items()},
+            }
+            durable.atomic_write(
+                os.path.join(self.path, INDEX_FILENAME), json.dumps(snapshot)
+            )
+            self.unsnapshotted = 0
+            self._mark_current()
+
+    # ----------------------------
+    # Reading
+    # ----------------------------
+
+    def titles(self) -> list[str]:
+        """
+        List the titles of all live entries.
+
+        Returns:
+            Sorted list of titles
+        """
+        with self.lock:
+            return sorted(self.index)
+
+    def details(self) -> list[EntryInfo]:
+        """
+        List metadata for every live entry.
+
+        Returns:
+            Entry metadata sorted by filename
+        """
+        with self.lock:
+            items = sorted(self.index.items())
+        return [
+            EntryInfo(
+                f"{title}{MARKDOWN_EXTENSION}",
+                loc.length,
+                loc.mtime_ns / 1e9,
+                loc.created,
+                loc.words,
+            )
+            for title, loc in items
+        ]
+
+    def locate(self, title: str) -> Optional[Location]:
+        """
+        Return where an entry's latest version is stored.
+
+        Args:
+            title: The entry title
+
+        Returns:
+            The entry's location, or None if it doesn't exist
+        """
+        with self.lock:
+            return self.index.get(title)
+
+    def open_body(self, title: str):
+        """
+        Open a binary stream positioned at an entry's content.
+
+        The stream stays valid even if compaction removes the segment later.
+
+        Args:
+            title: The entry title
+
+        Returns:
+            (file object, content length), or None if the entry doesn't exist
+        """
+        with self.lock:
+            loc = self.index.get(title)
+            if loc is None:
+                return None
+            f = open(self._segment_path(loc.segment), "rb")
+        f.seek(loc.offset)
+        return f, loc.length
+
+    def get(self, title: str) -> Optional[str]:
+        """
+        Read the latest version of an entry.
+
+        Args:
+            title: The entry title
+
+        Returns:
+            The entry text, or None if it doesn't exist
+        """
+        opened = self.open_body(title)
+        if opened is None:
+            return None
+        f, length = opened
+        with f:
+            return f.read(length).decode("utf-8")
+
+    # ----------------------------
+    # Compaction
+    # ----------------------------
+
+    def needs_compaction(self) -> bool:
+        """
+        Check whether enough space is wasted on dead records to compact.
+
+        Returns:
+            True if compaction is due
+        """
+        with self.lock:
+            dead = self.total_bytes - self.live_bytes
+            return (
+                not self.compacting
+                and dead >= SEGMENT_MAX_BYTES // 4
+                and dead >= SEGMENT_COMPACT_RATIO * self.total_bytes
+            )
+
+    def compact_in_background(self) -> None:
+        """Start compaction on a daemon thread if it is due and not running."""
+        if self.needs_compaction():
+            threading.Thread(
+                target=self.compact, name="silentmemoir-compact", daemon=True
+            ).start()
+
+    def compact(self) -> None:
+        """
+        Rewrite the live records of sealed segments into one new segment.
+
+        Writers in this process keep appending to a fresh active segment while
+        the copy runs; the lock is only held to seal segments and to swap in the
+        result. Other processes wait on the file lock until it is done.
+        """
+        with self.lock:
+            if self.compacting:
+                return
+            self.file_lock.__enter__()
+            if self.is_stale():
+                self._load()
+            self.compacting = True
+            old = [n for n in self._segment_numbers() if n <= self.active]
+            target = self.active + 1
+            self.active += 2  # Records written from now on sort after the copy
+            self.active_size = 0
+            sealed = {title: loc for title, loc in self.index.items() if loc.segment in old}
+
+        try:
+            moved = self._copy_live(sealed, target)
+            with self.lock:
+                for title, (loc, new_loc) in moved.items():
+                    if self.index.get(title) is loc:
+                        self.index[title] = new_loc
+                self.write_snapshot()
+                for number in old:
+                    os.remove(self._segment_path(number))
+                self.total_bytes = sum(
+                    os.path.getsize(self._segment_path(n)) for n in self._segment_numbers()
+                )
+                self._mark_current()
+        finally:
+            self.compacting = False
+            self.file_lock.__exit__(None, None, None)
+
+    def _copy_live(self, sealed: dict[str, Location], target: int) -> dict:
+        moved = {}
+        target_path = self._segment_path(target)
+        tmp_path = target_path + ".tmp"
+        offset = 0
+        with open(tmp_path, "wb") as out:
+            for title, loc in sorted(
+                sealed.items(), key=lambda item: (item[1].segment, item[1].offset)
+            ):
+                with open(self._segment_path(loc.segment), "rb") as f:
+                    f.seek(loc.offset)
+                    body = f.read(loc.length)
+                title_bytes = title.encode("utf-8")
+                crc = zlib.crc32(body, zlib.crc32(title_bytes))
+                out.write(
+                    HEADER.pack(
+                        MAGIC, OP_PUT, len(title_bytes), len(body),
+                        loc.mtime_ns, loc.words, crc,
+                    )
+                    + title_bytes
+                    + body
+                )
+                body_offset = offset + HEADER.size + len(title_bytes)
+                moved[title] = (
+                    loc,
+                    Location(
+                        target, body_offset, loc.length,
+                        loc.mtime_ns, loc.created, loc.words,
+                    ),
+                )
+                offset = body_offset + len(body)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, target_path)
+        return moved
+
+    # ----------------------------
+    # Conversion
+    # ----------------------------
+
+    def export(self, dest: str) -> int:
+        """
+        Write every live entry to dest as a plain .md file.
+
+        Args:
+            dest: Directory to write the entries into
+
+        Returns:
+            Number of entries written
+        """
+        os.makedirs(dest, exist_ok=True)
+        titles = self.titles()
+        with durable.batch():
+            for title in titles:
+                content = self.get(title)
+                if content is not None:
+                    durable.atomic_write(
+                        os.path.join(dest, f"{title}{MARKDOWN_EXTENSION}"), content
+                    )
+        return len(titles)
+
+
+# ----------------------------
+# Store registry
+# ----------------------------
+
+_stores: dict[str, SegmentStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(journal_path: str) -> SegmentStore:
+    """
+    Return the shared store of a journal, opening it on first use.
+
+    All Journal objects for the same directory share one store, so its index
+    is read once per process and writes are serialized by one lock. The store
+    is reloaded if another process appended to it in the meantime.
+
+    Args:
+        journal_path: The journal's directory
+
+    Returns:
+        The journal's segment store
+    """
+    with _stores_lock:
+        store = _stores.get(journal_path)
+        if store is None or store.is_stale():
+            store = _stores[journal_path] = SegmentStore(journal_path)
+        return store
+
+
+def forget_store(journal_path: str) -> None:
+    """
+    Drop a journal's store from the registry (e.g. after deleting the journal).
+
+    Args:
+        journal_path: The journal's directory
+    """
+    with _stores_lock:
+        _stores.pop(journal_path, None)
+
+
+def convert_to_segments(journal_path: str) -> int:
+    """
+    Move a journal's .md files into a new segment store.
+
+    Args:
+        journal_path: The journal's directory
+
+    Returns:
+        Number of entries moved
+
+    Raises:
+        SegmentError: If the journal already uses the segment store
+    """
+    if is_segmented(journal_path):
+        raise SegmentError(f"{journal_path} already uses the segment store")
+
+    filenames = sorted(
+        name
+        for name in os.listdir(journal_path)
+        if compression.entry_filename(name).endswith(MARKDOWN_EXTENSION)
+    )
+    store = open_store(journal_path)
+    with durable.batch():
+        for filename in filenames:
+            title = compression.entry_filename(filename)[: -len(MARKDOWN_EXTENSION)]
+            if filename.endswith(COMPRESSED_EXTENSION) and store.locate(title):
+                continue  # Stale copy of a plain file that was just moved
+            store.put(title, compression.read_text(os.path.join(journal_path, filename)))
+        store.write_snapshot()
+
+    # Only remove the originals once every entry is safely in a segment
+    for filename in filenames:
+        os.remove(os.path.join(journal_path, filename))
+    return len(filenames)
+
+
+def convert_to_files(journal_path: str) -> int:
+    """
+    Export a segmented journal back to .md files and remove its segments.
+
+    Args:
+        journal_path: The journal's directory
+
+    Returns:
+        Number of entries written
+
+    Raises:
+        SegmentError: If the journal doesn't use the segment store
+    """
+    if not is_segmented(journal_path):
+        raise SegmentError(f"{journal_path} does not use the segment store")
+
+    written = open_store(journal_path).export(journal_path)
+    forget_store(journal_path)
+    shutil.rmtree(os.path.join(journal_path, SEGMENTS_DIRNAME))
+    return written
+
+
+def _read_record(f) -> Optional[tuple]:
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    magic, op, title_len, body_len, mtime_ns, words, crc = HEADER.unpack(header)
+    if magic != MAGIC or op not in (OP_PUT, OP_DELETE):
+        return None
+    title_bytes = f.read(title_len)
+    body = f.read(body_len)
+    if len(title_bytes) < title_len or len(body) < body_len:
+        return None
+    if zlib.crc32(body, zlib.crc32(title_bytes)) != crc:
+        return None
+    return op, title_bytes.decode("utf-8"), body_len, mtime_ns, words
+
+
+def main() -> None:
+    import argparse
+
+    from silentmemoir.models import Journal
+
+    # Run as a script this module is __main__; catch the class models raises
+    from silentmemoir.segments import SegmentError
+
+    parser = argparse.ArgumentParser(description="Manage segment-store journals.")
+    parser.add_argument("command", choices=("enable", "disable", "compact", "export"))
+    parser.add_argument("journal", help="journal name")
+    parser.add_argument("dest", nargs="?", help="destination directory for export")
+    args = parser.parse_args()
+
+    journal = Journal(args.journal, create=False)
+    if not os.path.isdir(journal.journal_path):
+        parser.error(f"no such journal: {args.journal}")
+
+    try:
+        if args.command == "enable":
+            moved = journal.enable_segments()
+            sys.stdout.write(f"moved {moved} entries into segments\n")
+        elif args.command == "disable":
+            written = journal.disable_segments()
+            sys.stdout.write(f"wrote {written} entries as .md files\n")
+        elif args.command == "compact":
+            store = journal.segment_store
+            if store is None:
+                parser.error(f"{args.journal} does not use the segment store")
+            store.compact()
+        else:
+            if not args.dest:
+                parser.error("export needs a destination directory")
+            exported = journal.export_entries(args.dest)
+            sys.stdout.write(f"exported {exported} entries\n")
+    except SegmentError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+"""
+Writing statistics for SilentMemoir.
+
+Statistics are kept in SQLite as running aggregates rather than computed from
+the entries: each entry has one row (its word count and when it was written),
+and two roll-up tables hold entry and word totals per journal and day, and per
+journal and hour of the week. Saving or deleting an entry adjusts its row and
+the two totals it counts towards, so keeping them current costs a few row
+updates per save. A summary (totals, streaks, recent days and the hour-of-week
+heatmap) only reads the roll-ups, whose size depends on how many days have
+entries, not on how many entries there are, and is cached per process until
+the statistics change.
+
+An entry counts as written when its title's timestamp says, or else when it
+was first recorded. Changes made outside the app are picked up by rebuild(),
+which reads the metadata catalog rather than the entry files.
+
+Usage:
+    python -m silentmemoir.stats [JOURNAL]
+    python -m silentmemoir.stats --rebuild
+"""
+
+import datetime
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import ClassVar, Optional
+
+from silentmemoir import layout
+from silentmemoir.config import MARKDOWN_EXTENSION, STATS_PATH, STATS_RECENT_DAYS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    journal TEXT NOT NULL,
+    title TEXT NOT NULL,
+    day TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    words INTEGER NOT NULL,
+    PRIMARY KEY (journal, title)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS days (
+    journal TEXT NOT NULL,
+    day TEXT NOT NULL,
+    entries INTEGER NOT NULL,
+    words INTEGER NOT NULL,
+    PRIMARY KEY (journal, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS slots (
+    journal TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    entries INTEGER NOT NULL,
+    words INTEGER NOT NULL,
+    PRIMARY KEY (journal, slot)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Summaries computed by this process, per journal (None: all journals) and
+# day, with the generation of the statistics they were computed from
+_summaries: dict[tuple[Optional[str], str], tuple[int, "Summary"]] = {}
+_summaries_lock = threading.Lock()
+
+
+def _slot(written: datetime.datetime) -> int:
+    """Hour of the week, 0 being Monday 00:00-00:59."""
+    return written.weekday() * 24 + written.hour
+
+
+@dataclass
+class Summary:
+    """Statistics of one journal, or of all of them."""
+
+    entries: int = 0
+    words: int = 0
+    days_written: int = 0
+    current_streak: int = 0
+    """Consecutive days with entries up to today (or yesterday, so a streak
+    isn't broken before today's entry is written)."""
+    longest_streak: int = 0
+    recent: list[tuple[str, int, int]] = field(default_factory=list)
+    """(day, entries, words) for each of the last STATS_RECENT_DAYS days,
+    oldest first, days without entries included."""
+    heatmap: list[list[int]] = field(default_factory=list)
+    """Entries written per weekday (Monday first) and hour."""
+    journals: list[tuple[str, int, int]] = field(default_factory=list)
+    """(journal, entries, words) per journal, most words first."""
+
+
+def streaks(days: list[str], today: datetime.date) -> tuple[int, int]:
+    """
+    Work out the current and longest runs of consecutive days.
+
+    Args:
+        days: Sorted ISO dates with entries
+        today: The date the current streak is counted up to
+
+    Returns:
+        (current streak, longest streak) in days
+    """
+    longest = run = 0
+    previous = None
+    for day in map(datetime.date.fromisoformat, days):
+        run = run + 1 if previous and (day - previous).days == 1 else 1
+        longest = max(longest, run)
+        previous = day
+    if previous is None or (today - previous).days > 1:
+        return 0, longest
+    return run, longest
+
+
+class StatsStore:
+    """SQLite-backed writing statistics, updated as entries change."""
+
+    path: ClassVar[str] = STATS_PATH
+
+    def __init__(self):
+        """Open (and create if needed) the statistics database."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self) -> "StatsStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self.conn.close()
+
+    def _meta(self, key: str) -> int:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,))
+        row = row.fetchone()
+        return row[0] if row else 0
+
+    def _set_meta(self, key: str, value: int) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def _changed(self) -> None:
+        self._set_meta("generation", self._meta("generation") + 1)
+
+    def _add(self, journal: str, day: str, slot: int, entries: int, words: int):
+        # Adjust both roll-ups, dropping rows that no longer count anything
+        for table, column, value in (("days", "day", day), ("slots", "slot", slot)):
+            self.conn.execute(
+                f"INSERT INTO {table} (journal, {column}, entries, words)"
+                f" VALUES (?, ?, ?, ?) ON CONFLICT (journal, {column}) DO UPDATE"
+                " SET entries = entries + excluded.entries,"
+                " words = words + excluded.words",
+                (journal, value, entries, words),
+            )
+            self.conn.execute(
+                f"DELETE FROM {table}"
+                f" WHERE journal = ? AND {column} = ? AND entries <= 0",
+                (journal, value),
+            )
+
+    # ----------------------------
+    # Maintenance
+    # ----------------------------
+
+    @property
+    def built(self) -> bool:
+        """Whether the statistics were ever built from the journals."""
+        return bool(self._meta("built"))
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped by every change to the statistics."""
+        return self._meta("generation")
+
+    def _record(self, entries: Iterable[tuple[str, str, int, Optional[float]]]):
+        changed = False
+        for journal, title, words, written in entries:
+            row = self.conn.execute(
+                "SELECT day, slot, words FROM entries WHERE journal = ? AND title = ?",
+                (journal, title),
+            ).fetchone()
+            if row is not None:
+                day, slot, old_words = row
+                if words == old_words:
+                    continue
+                self.conn.execute(
+                    "UPDATE entries SET words = ? WHERE journal = ? AND title = ?",
+                    (words, journal, title),
+                )
+                self._add(journal, day, slot, 0, words - old_words)
+            else:
+                date = layout.entry_date(title) or datetime.datetime.fromtimestamp(
+                    time.time() if written is None else written
+                )
+                day, slot = date.date().isoformat(), _slot(date)
+                self.conn.execute(
+                    "INSERT INTO entries (journal, title, day, slot, words)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (journal, title, day, slot, words),
+                )
+                self._add(journal, day, slot, 1, words)
+            changed = True
+        return changed
+
+    def record_entries(
+        self, entries: Iterable[tuple[str, str, int, Optional[float]]]
+    ) -> None:
+        """
+        Record the word counts of saved entries.
+
+        Args:
+            entries: (journal, title, words, written) per entry, written being
+                a Unix time or None; it only counts for entries not seen
+                before, and the title's timestamp wins over it
+        """
+        with self.conn:
+            if self._record(entries):
+                self._changed()
+
+    def record_entry(
+        self, journal: str, title: str, words: int, written: Optional[float] = None
+    ) -> None:
+        """
+        Record the word count of a saved entry.
+
+        Args:
+            journal: Name of the journal
+            title: The entry title
+            words: Number of words in the entry
+            written: Unix time the entry was written, if it's new
+        """
+        self.record_entries([(journal, title, words, written)])
+
+    def remove_entry(self, journal: str, title: str) -> None:
+        """
+        Stop counting a deleted entry.
+
+        Args:
+            journal: Name of the journal
+            title: The entry title
+        """
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT day, slot, words FROM entries WHERE journal = ? AND title = ?",
+                (journal, title),
+            ).fetchone()
+            if row is None:
+                return
+            self.conn.execute(
+                "DELETE FROM entries WHERE journal = ? AND title = ?", (journal, title)
+            )
+            day, slot, words = row
+            self._add(journal, day, slot, -1, -words)
+            self._changed()
+
+    def remove_journal(self, journal: str) -> None:
+        """
+        Stop counting a deleted journal.
+
+        Args:
+            journal: Name of the journal
+        """
+        with self.conn:
+            for table in ("entries", "days", "slots"):
+                self.conn.execute(f"DELETE FROM {table} WHERE journal = ?", (journal,))
+            self._changed()
+
+    def invalidate(self) -> None:
+        """Mark the statistics for a rebuild, e.g. after a journal is restored."""
+        with self.conn:
+            self._set_meta("built", 0)
+            self._changed()
+
+    def rebuild(self) -> None:
+        """Recount every journal from the metadata catalog."""
+        from silentmemoir.models import Journal
+
+        rows = []
+        for journal in Journal.list_all():
+            try:
+                details = journal.entry_details()
+            except (OSError, sqlite3.Error):
+                continue
+            rows.extend(
+                (
+                    journal.name,
+                    info.filename[: -len(MARKDOWN_EXTENSION)],
+                    info.words,
+                    info.created,
+                )
+                for info in details
+            )
+        with self.conn:
+            for table in ("entries", "days", "slots"):
+                self.conn.execute(f"DELETE FROM {table}")
+            self._record(rows)
+            self._set_meta("built", 1)
+            self._changed()
+
+    # ----------------------------
+    # Queries
+    # ----------------------------
+
+    def summary(
+        self, journal: Optional[str] = None, today: Optional[datetime.date] = None
+    ) -> Summary:
+        """
+        Summarize the statistics of a journal, or of all journals.
+
+        Args:
+            journal: Name of the journal; None for all of them
+            today: The date streaks and recent days end at; defaults to today
+
+        Returns:
+            The summary, from the cache if nothing changed since it was made
+        """
+        today = today or datetime.date.today()
+        key = (journal, today.isoformat())
+        generation = self.generation
+        with _summaries_lock:
+            cached = _summaries.get(key)
+        if cached and cached[0] == generation:
+            return cached[1]
+
+        where, params = ("WHERE journal = ?", (journal,)) if journal else ("", ())
+        summary = Summary()
+        by_day = {
+            day: (entries, words)
+            for day, entries, words in self.conn.execute(
+                f"SELECT day, SUM(entries), SUM(words) FROM days {where}"
+                " GROUP BY day ORDER BY day",
+                params,
+            )
+        }
+        summary.days_written = len(by_day)
+        summary.entries = sum(entries for entries, _ in by_day.values())
+        summary.words = sum(words for _, words in by_day.values())
+        summary.current_streak, summary.longest_streak = streaks(list(by_day), today)
+        for offset in range(STATS_RECENT_DAYS - 1, -1, -1):
+            day = (today - datetime.timedelta(days=offset)).isoformat()
+            summary.recent.append((day, *by_day.get(day, (0, 0))))
+
+        summary.heatmap = [[0] * 24 for _ in range(7)]
+        for slot, entries in self.conn.execute(
+            f"SELECT slot, SUM(entries) FROM slots {where} GROUP BY slot", params
+        ):
+            summary.heatmap[slot // 24][slot % 24] = entries
+
+        summary.journals = list(
+            self.conn.execute(
+                f"SELECT journal, SUM(entries), SUM(words) FROM days {where}"
+                " GROUP BY journal ORDER BY SUM(words) DESC",
+                params,
+            )
+        )
+        with _summaries_lock:
+            _summaries[key] = (generation, summary)
+        return summary
+
+
+def load_summary(journal: Optional[str] = None, rebuild: bool = False) -> Summary:
+    """
+    Summarize the statistics, building them first if they never were.
+
+    Args:
+        journal: Name of the journal; None for all of them
+        rebuild: Recount everything from the journals first
+
+    Returns:
+        The summary
+
+    Raises:
+        OSError: If the statistics cannot be read
+    """
+    try:
+        with StatsStore() as stats:
+            if rebuild or not stats.built:
+                stats.rebuild()
+            return stats.summary(journal)
+    except sqlite3.Error as e:
+        raise OSError(f"Failed to read statistics: {e}") from e
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show writing statistics.")
+    parser.add_argument("journal", nargs="?", help="journal name (default: all)")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="recount everything from the journals"
+    )
+    args = parser.parse_args()
+
+    try:
+        summary = load_summary(args.journal, args.rebuild)
+    except OSError as e:
+        parser.error(str(e))
+    sys.stdout.write(f"entries         {summary.entries}\n")
+    sys.stdout.write(f"words           {summary.words}\n")
+    sys.stdout.write(f"days written    {summary.days_written}\n")
+    sys.stdout.write(f"current streak  {summary.current_streak}\n")
+    sys.stdout.write(f"longest streak  {summary.longest_streak}\n")
+    if not args.journal:
+        for name, entries, words in summary.journals:
+            sys.stdout.write(f"  {name}: {entries} entries, {words} words\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Asynchronous storage API for SilentMemoir.
+
+This module wraps the blocking Journal and JournalEntry operations in
+awaitables that run on a small, bounded thread pool. Screens call them from
+Textual workers so disk I/O never stalls the event loop, even on slow or
+network-backed home directories.
+"""
+
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+
+from silentmemoir.config import STORAGE_MAX_WORKERS
+from silentmemoir.finder import title_index
+from silentmemoir.history import Revision
+from silentmemoir.models import Journal, JournalEntry
+from silentmemoir.prefetch import entry_cache, prefetch
+from silentmemoir.stats import Summary, load_summary
+from silentmemoir.trash import TrashedJournal
+
+_executor = None
+
+# One lock per entry so overlapping saves/deletes of the same entry are
+# applied in the order they were requested.
+_entry_locks: "weakref.WeakValueDictionary[tuple[str, str], asyncio.Lock]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return the shared I/O thread pool, creating it on first use.
+
+    Returns:
+        The storage thread pool
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=STORAGE_MAX_WORKERS, thread_name_prefix="silentmemoir-io"
+        )
+    return _executor
+
+
+def shutdown() -> None:
+    """Wait for in-flight I/O to finish and release the thread pool."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def run_io(func, *args, **kwargs):
+    """
+    Run a blocking callable on the storage thread pool.
+
+    Args:
+        func: The blocking callable
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
+
+
+def _lock_for(entry: JournalEntry) -> asyncio.Lock:
+    # Keyed by title rather than path, which moves if the journal's layout changes
+    key = (entry.journal.journal_path, entry.title)
+    lock = _entry_locks.get(key)
+    if lock is None:
+        lock = asyncio.Lock()
+        _entry_locks[key] = lock
+    return lock
+
+
+# ----------------------------
+# Journals
+# ----------------------------
+
+
+async def list_journals() -> list[str]:
+    """
+    List the names of all journals.
+
+    Returns:
+        Sorted list of journal names
+    """
+    return await run_io(Journal.list_names)
+
+
+async def create_journal(name: str) -> Journal:
+    """
+    Create a journal (or open it if it already exists).
+
+    Args:
+        name: The name of the journal
+
+    Returns:
+        The journal
+    """
+    journal = await run_io(Journal, name)
+    title_index.add(journal.name)
+    return journal
+
+
+async def delete_journal(journal: Journal) -> Optional[TrashedJournal]:
+    """
+    Move a journal and all its entries to the trash.
+
+    Args:
+        journal: The journal to delete
+
+    Returns:
+        The trashed journal, or None if it didn't exist
+    """
+    trashed = await run_io(journal.delete)
+    title_index.remove_journal(journal.name)
+    return trashed
+
+
+async def restore_journal(item: TrashedJournal) -> Journal:
+    """
+    Bring a deleted journal back from the trash.
+
+    Args:
+        item: The trashed journal
+
+    Returns:
+        The restored journal
+    """
+    journal = await run_io(Journal.restore, item)
+    await run_io(title_index.add_journal, journal)
+    return journal
+
+
+async def list_months(journal: Journal) -> list[str]:
+    """
+    List the year/month subdirectories of a sharded journal.
+
+    Args:
+        journal: The journal to list
+
+    Returns:
+        Sorted relative "YYYY/MM" directories; empty for flat journals
+    """
+    return await run_io(journal.list_months)
+
+
+async def list_entries(journal: Journal, month: Optional[str] = None) -> list[str]:
+    """
+    List the entry filenames in a journal.
+
+    Args:
+        journal: The journal to list
+        month: Only list this subdirectory (from list_months()); "" lists the
+            undated entries at the top of a sharded journal
+
+    Returns:
+        Sorted list of entry filenames
+    """
+    return await run_io(journal.list_entries, month)
+
+
+# ----------------------------
+# Entries
+# ----------------------------
+
+
+async def read_entry(entry: JournalEntry) -> str:
+    """
+    Read an entry's content.
+
+    Args:
+        entry: The entry to read
+
+    Returns:
+        The entry content, or empty string if it doesn't exist
+    """
+    async with _lock_for(entry):
+        return await run_io(entry.read)
+
+
+async def read_entry_chunks(entry: JournalEntry, chunk_size: int):
+    """
+    Read an entry's content in pieces, each read on the thread pool.
+
+    Args:
+        entry: The entry to read
+        chunk_size: Maximum number of characters per chunk
+
+    Yields:
+        Successive pieces of the entry content
+    """
+    async with _lock_for(entry):
+        chunks = entry.read_chunks(chunk_size)
+        while (chunk := await run_io(next, chunks, None)) is not None:
+            yield chunk
+
+
+async def entry_size(entry: JournalEntry) -> int:
+    """
+    Return the size of an entry file in bytes.
+
+    Args:
+        entry: The entry to measure
+
+    Returns:
+        The file size, or 0 if the file doesn't exist
+    """
+    return await run_io(entry.size)
+
+
+async def entry_version(entry: JournalEntry) -> Optional[tuple[int, int]]:
+    """
+    Return an entry's modification time and size.
+
+    Args:
+        entry: The entry to check
+
+    Returns:
+        (mtime in nanoseconds, size in bytes), or None if it doesn't exist
+    """
+    return await run_io(entry.version)
+
+
+async def list_revisions(entry: JournalEntry) -> list[Revision]:
+    """
+    List an entry's recorded revisions.
+
+    Args:
+        entry: The entry whose history to list
+
+    Returns:
+        Revisions, newest first
+    """
+    return await run_io(entry.revisions)
+
+
+async def read_revision(entry: JournalEntry, number: int) -> Optional[str]:
+    """
+    Reconstruct the text of one of an entry's revisions.
+
+    Args:
+        entry: The entry
+        number: The revision number
+
+    Returns:
+        The text, or None if there is no such revision
+    """
+    return await run_io(entry.read_revision, number)
+
+
+async def writing_summary(
+    journal_name: Optional[str] = None, rebuild: bool = False
+) -> Summary:
+    """
+    Summarize the writing statistics.
+
+    Args:
+        journal_name: Name of the journal; None for all of them
+        rebuild: Recount everything from the journals first
+
+    Returns:
+        The summary
+    """
+    return await run_io(load_summary, journal_name, rebuild)
+
+
+async def save_entry(entry: JournalEntry, content: str) -> None:
+    """
+    Save an entry's content.
+
+    Args:
+        entry: The entry to save
+        content: The markdown content to save
+    """
+    async with _lock_for(entry):
+        entry_cache.discard(entry)
+        await run_io(entry.save, content)
+        title_index.add(entry.journal.name, entry.title)
+
+
+async def delete_entry(entry: JournalEntry) -> None:
+    """
+    Delete an entry.
+
+    Args:
+        entry: The entry to delete
+    """
+    async with _lock_for(entry):
+        entry_cache.discard(entry)
+        await run_io(entry.delete)
+        title_index.remove(entry.journal.name, entry.title)
+
+
+async def prefetch_entries(journal: Journal, titles: list[str]) -> int:
+    """
+    Read entries into the shared entry cache in the background.
+
+    Args:
+        journal: The journal containing the entries
+        titles: Titles of the entries to read, most wanted first
+
+    Returns:
+        Number of entries read
+    """
+    return await run_io(prefetch, journal, titles)
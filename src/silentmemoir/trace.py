@@ -0,0 +1,164 @@
+"""
+Opt-in timing instrumentation for SilentMemoir.
+
+Set $SILENTMEMOIR_TRACE to enable it: storage calls and screen hot paths are
+then timed, each span is appended to a Chrome trace-event JSON file (open it in
+chrome://tracing or Perfetto), and recent latencies are kept in memory for the
+in-app performance overlay. When tracing is off the decorators return the
+original functions, so there is no overhead at all.
+
+$SILENTMEMOIR_TRACE may be a file path, or "1" to use the default TRACE_PATH.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from silentmemoir.config import TRACE_PATH, TRACE_SAMPLE_SIZE
+
+_setting = os.environ.get("SILENTMEMOIR_TRACE", "")
+ENABLED = _setting not in ("", "0")
+"""Whether instrumentation is active for this process."""
+
+_trace_file_path = TRACE_PATH if _setting == "1" else _setting
+_trace_file = None
+_lock = threading.Lock()
+_samples: "defaultdict[str, deque[float]]" = defaultdict(
+    lambda: deque(maxlen=TRACE_SAMPLE_SIZE)
+)
+
+
+def _open_trace_file():
+    global _trace_file
+    os.makedirs(os.path.dirname(os.path.abspath(_trace_file_path)), exist_ok=True)
+    _trace_file = open(_trace_file_path, "w", encoding="utf-8")
+    _trace_file.write("[\n")
+    atexit.register(_close_trace_file)
+
+
+def _close_trace_file():
+    global _trace_file
+    with _lock:
+        if _trace_file is not None:
+            # An empty event keeps the array valid after the trailing comma
+            _trace_file.write("{}]\n")
+            _trace_file.close()
+            _trace_file = None
+
+
+def record(name: str, category: str, started: float, duration: float) -> None:
+    """
+    Store one finished span.
+
+    Args:
+        name: Operation name
+        category: Trace category (e.g. "storage" or "ui")
+        started: Start time from time.perf_counter()
+        duration: Elapsed seconds
+    """
+    event = {
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": started * 1e6,
+        "dur": duration * 1e6,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+    }
+    with _lock:
+        _samples[name].append(duration)
+        if _trace_file is None:
+            _open_trace_file()
+        _trace_file.write(json.dumps(event) + ",\n")
+
+
+@contextmanager
+def span(name: str, category: str = "app"):
+    """
+    Time the enclosed block.
+
+    Args:
+        name: Operation name
+        category: Trace category
+    """
+    if not ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, category, started, time.perf_counter() - started)
+
+
+def traced(category: str = "app", name: str = None):
+    """
+    Decorate a function so each call is recorded as a span.
+
+    Works for plain functions, coroutines and generators (such as compose),
+    timing the full run rather than just the call. Returns the function
+    unchanged when tracing is disabled.
+
+    Args:
+        category: Trace category
+        name: Operation name, defaulting to the function's qualified name
+    """
+
+    def decorator(func):
+        if not ENABLED:
+            return func
+        span_name = name or func.__qualname__
+        # Only needed when tracing, and slow to import for the command line
+        import inspect
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, category):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        if inspect.isgeneratorfunction(func):
+
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                with span(span_name, category):
+                    return (yield from func(*args, **kwargs))
+
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, category):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def latency_summary() -> list[tuple[str, int, float, float]]:
+    """
+    Summarize recent latencies per operation.
+
+    Returns:
+        (name, sample count, p50 seconds, p99 seconds) tuples, slowest p99 first
+    """
+    with _lock:
+        snapshot = {name: sorted(values) for name, values in _samples.items()}
+
+    rows = []
+    for name, values in snapshot.items():
+        if not values:
+            continue
+        p50 = values[int(0.50 * (len(values) - 1))]
+        p99 = values[int(0.99 * (len(values) - 1))]
+        rows.append((name, len(values), p50, p99))
+    return sorted(rows, key=lambda row: row[3], reverse=True)
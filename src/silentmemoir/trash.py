@@ -0,0 +1,187 @@
+"""
+Trash for deleted journals.
+
+Deleting a journal renames its directory into TRASH_PATH, which is a single
+atomic operation however many entries it holds. The files are reclaimed later
+by purge(), typically from a background worker. A trashed journal can be
+restored until its purge starts: purging first renames it to a claimed name,
+so a restore and a purge can never both get it.
+"""
+
+import os
+import time
+from typing import Callable, NamedTuple, Optional
+
+from silentmemoir.config import TRASH_PATH
+
+PURGING_PREFIX = ".purging-"
+"""Prefix of trashed journals whose purge has started."""
+
+# Files removed between two progress callbacks
+_PROGRESS_STEP = 200
+
+
+class TrashError(Exception):
+    """Raised when a trashed journal cannot be restored."""
+
+
+class TrashedJournal(NamedTuple):
+    """A journal waiting in the trash to be purged."""
+
+    name: str
+    path: str
+    deleted: float
+
+
+def move_to_trash(journal_path: str, name: str) -> TrashedJournal:
+    """
+    Move a journal directory into the trash.
+
+    Args:
+        journal_path: The journal's directory
+        name: Name of the journal
+
+    Returns:
+        The trashed journal
+
+    Raises:
+        OSError: If the directory cannot be moved
+    """
+    os.makedirs(TRASH_PATH, exist_ok=True)
+    deleted = time.time_ns()
+    path = os.path.join(TRASH_PATH, f"{deleted}-{name}")
+    os.rename(journal_path, path)
+    return TrashedJournal(name, path, deleted / 1e9)
+
+
+def list_trash() -> list[TrashedJournal]:
+    """
+    List the journals in the trash that can still be restored.
+
+    Returns:
+        Trashed journals, oldest first
+    """
+    items = []
+    try:
+        with os.scandir(TRASH_PATH) as it:
+            for d in it:
+                stamp, _, name = d.name.partition("-")
+                if d.is_dir() and stamp.isdigit() and name:
+                    items.append(TrashedJournal(name, d.path, int(stamp) / 1e9))
+    except FileNotFoundError:
+        pass
+    return sorted(items, key=lambda item: item.deleted)
+
+
+def restore(item: TrashedJournal, journal_path: str) -> None:
+    """
+    Move a trashed journal back to where it lived.
+
+    Args:
+        item: The trashed journal
+        journal_path: The directory to restore it to
+
+    Raises:
+        TrashError: If its purge already started or the name is taken again
+        OSError: If the directory cannot be moved
+    """
+    if os.path.exists(journal_path):
+        raise TrashError(f"A journal named {item.name} already exists")
+    try:
+        os.rename(item.path, journal_path)
+    except FileNotFoundError:
+        raise TrashError(f"{item.name} is already being purged") from None
+
+
+def _claim(item: TrashedJournal) -> Optional[str]:
+    claimed = os.path.join(TRASH_PATH, PURGING_PREFIX + os.path.basename(item.path))
+    try:
+        os.rename(item.path, claimed)
+    except FileNotFoundError:
+        return None  # Restored, or claimed by another purge
+    return claimed
+
+
+def _remove_tree(path: str, progress: Optional[Callable[[int, int], None]]) -> int:
+    total = sum(len(files) for _, _, files in os.walk(path)) if progress else 0
+    removed = 0
+    for root, dirs, files in os.walk(path, topdown=False):
+        for name in files:
+            try:
+                os.unlink(os.path.join(root, name))
+            except FileNotFoundError:
+                pass
+            removed += 1
+            if progress and removed % _PROGRESS_STEP == 0:
+                progress(removed, total)
+        for name in dirs:
+            try:
+                os.rmdir(os.path.join(root, name))
+            except FileNotFoundError:
+                pass
+    os.rmdir(path)
+    if progress:
+        progress(removed, total)
+    return removed
+
+
+def purge(
+    item: TrashedJournal, progress: Optional[Callable[[int, int], None]] = None
+) -> bool:
+    """
+    Permanently remove a trashed journal.
+
+    Args:
+        item: The trashed journal
+        progress: Called with (files removed, total files) as the purge runs
+
+    Returns:
+        True if it was purged, False if it was restored or purged elsewhere
+
+    Raises:
+        OSError: If its files cannot be removed
+    """
+    claimed = _claim(item)
+    if claimed is None:
+        return False
+    _remove_tree(claimed, progress)
+    return True
+
+
+def purge_expired(
+    older_than: float, progress: Optional[Callable[[int, int], None]] = None
+) -> int:
+    """
+    Purge journals trashed more than older_than seconds ago.
+
+    Also finishes purges that were interrupted, e.g. by quitting the app.
+
+    Args:
+        older_than: Seconds a journal stays restorable
+        progress: Called with (files removed, total files) during each purge
+
+    Returns:
+        Number of journals purged
+    """
+    purged = 0
+    try:
+        with os.scandir(TRASH_PATH) as it:
+            interrupted = [d.path for d in it if d.name.startswith(PURGING_PREFIX)]
+    except FileNotFoundError:
+        return 0
+    for path in interrupted:
+        try:
+            _remove_tree(path, progress)
+            purged += 1
+        except OSError:
+            continue
+
+    cutoff = time.time() - older_than
+    for item in list_trash():
+        if item.deleted > cutoff:
+            continue
+        try:
+            purged += purge(item, progress)
+        except OSError:
+            continue
+    return purged
@@ -0,0 +1,501 @@
+"""
+Filesystem watching for the journals view.
+
+Two backends report names added to, removed from, or renamed within watched
+directories: Linux inotify (through ctypes) and, everywhere else, polling
+that diffs directory listings and pairs renames by inode. Names starting with
+a dot (temporary files, layout markers) are not reported; renaming one into
+place is reported as an addition.
+
+JournalWatcher builds on either backend and turns those changes into deltas
+for the journals and entries lists, so files created or removed outside the
+app, by scripts or through a synced folder, show up without a rescan.
+"""
+
+import ctypes
+import os
+import select
+import struct
+import threading
+import time
+from collections.abc import Iterator
+from typing import NamedTuple, Optional
+
+from silentmemoir import compression, layout
+from silentmemoir.config import (
+    MARKDOWN_EXTENSION,
+    SEGMENTS_DIRNAME,
+    WATCH_POLL_INTERVAL,
+)
+from silentmemoir.segments import SegmentError
+
+# inotify(7) event masks
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+EVENT = struct.Struct("iIII")
+"""inotify_event header: watch descriptor, mask, cookie, name length."""
+
+_WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+
+
+class Change(NamedTuple):
+    """A name that appeared in, disappeared from or was renamed in a directory."""
+
+    kind: str
+    """Either "added", "removed", "renamed", or "rescan" if events were lost."""
+    directory: str
+    name: str = ""
+    old_name: str = ""
+
+
+def _visible(name: str) -> bool:
+    return bool(name) and not name.startswith(".")
+
+
+def _change(
+    kind: str, directory: str, name: str, old_name: str = ""
+) -> Optional[Change]:
+    # Fold hidden names away, so a temp file renamed into place is an addition
+    if kind == "renamed":
+        if not _visible(old_name):
+            kind = "added"
+        elif not _visible(name):
+            kind, name = "removed", old_name
+    if kind != "rescan" and not _visible(name):
+        return None
+    return Change(kind, directory, name, old_name if kind == "renamed" else "")
+
+
+class InotifyWatcher:
+    """Directory watcher backed by Linux inotify."""
+
+    def __init__(self):
+        """
+        Open an inotify instance.
+
+        Raises:
+            OSError: If inotify isn't available on this system
+        """
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            self._add_watch = libc.inotify_add_watch
+            self._rm_watch = libc.inotify_rm_watch
+            init = libc.inotify_init1
+        except (AttributeError, OSError) as e:
+            raise OSError(f"inotify is not available: {e}") from e
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+
+        self.fd = init(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        self._paths: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def watch(self, path: str) -> None:
+        """
+        Start reporting changes in a directory.
+
+        Args:
+            path: The directory to watch
+
+        Raises:
+            OSError: If the directory cannot be watched
+        """
+        wd = self._add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"Cannot watch {path}: {os.strerror(errno)}")
+        with self._lock:
+            self._paths[wd] = path
+
+    def unwatch(self, path: str) -> None:
+        """
+        Stop reporting changes in a directory.
+
+        Args:
+            path: A directory passed to watch()
+        """
+        with self._lock:
+            wds = [wd for wd, watched in self._paths.items() if watched == path]
+            for wd in wds:
+                del self._paths[wd]
+        for wd in wds:
+            self._rm_watch(self.fd, wd)
+
+    def read(self, timeout: float) -> list[Change]:
+        """
+        Wait for changes in the watched directories.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            The changes, possibly none if the timeout passed
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        changes = []
+        moves: dict[int, tuple[str, str]] = {}
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            for wd, mask, cookie, name in self._events(data):
+                changes.extend(self._translate(wd, mask, cookie, name, moves))
+
+        # Moved out of every watched directory
+        changes.extend(_change("removed", d, n) for d, n in moves.values())
+        return [change for change in changes if change is not None]
+
+    @staticmethod
+    def _events(data: bytes) -> Iterator[tuple[int, int, int, str]]:
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            yield wd, mask, cookie, name
+
+    def _translate(
+        self, wd: int, mask: int, cookie: int, name: str, moves: dict
+    ) -> list[Optional[Change]]:
+        """
+        Turn one inotify event into changes.
+
+        Args:
+            wd: The watch descriptor the event is for
+            mask: The event mask
+            cookie: Pairs the two halves of a rename
+            name: The name within the watched directory
+            moves: Renames seen leaving a directory, by cookie, waiting for
+                their other half
+
+        Returns:
+            The changes, None where a name isn't reported
+        """
+        if mask & IN_Q_OVERFLOW:
+            with self._lock:
+                watched = list(self._paths.values())
+            return [Change("rescan", path) for path in watched]
+        with self._lock:
+            directory = self._paths.get(wd)
+            if mask & IN_IGNORED:
+                self._paths.pop(wd, None)
+        if directory is None:
+            return []
+
+        if mask & IN_MOVED_FROM:
+            moves[cookie] = (directory, name)
+            return []
+        if mask & IN_MOVED_TO and cookie in moves:
+            old_directory, old_name = moves.pop(cookie)
+            if old_directory == directory:
+                return [_change("renamed", directory, name, old_name)]
+            return [
+                _change("removed", old_directory, old_name),
+                _change("added", directory, name),
+            ]
+        if mask & (IN_CREATE | IN_MOVED_TO):
+            return [_change("added", directory, name)]
+        if mask & IN_DELETE:
+            return [_change("removed", directory, name)]
+        return []
+
+    def close(self) -> None:
+        """Release the inotify instance."""
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Directory watcher that compares listings every WATCH_POLL_INTERVAL seconds."""
+
+    def __init__(self, interval: float = WATCH_POLL_INTERVAL):
+        """
+        Create a watcher with nothing watched yet.
+
+        Args:
+            interval: Seconds between listings
+        """
+        self.interval = interval
+        self._snapshots: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._next_poll = time.monotonic() + interval
+
+    @staticmethod
+    def _scan(path: str) -> dict[str, int]:
+        try:
+            with os.scandir(path) as it:
+                return {d.name: d.inode() for d in it}
+        except FileNotFoundError:
+            return {}
+
+    def watch(self, path: str) -> None:
+        """
+        Start reporting changes in a directory.
+
+        Args:
+            path: The directory to watch
+        """
+        snapshot = self._scan(path)
+        with self._lock:
+            self._snapshots[path] = snapshot
+
+    def unwatch(self, path: str) -> None:
+        """
+        Stop reporting changes in a directory.
+
+        Args:
+            path: A directory passed to watch()
+        """
+        with self._lock:
+            self._snapshots.pop(path, None)
+
+    def read(self, timeout: float) -> list[Change]:
+        """
+        Wait for the next poll and report what changed since the last one.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            The changes, possibly none if the timeout passed first
+        """
+        delay = self._next_poll - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(0.0, delay))
+        self._next_poll = time.monotonic() + self.interval
+
+        with self._lock:
+            paths = list(self._snapshots)
+        changes = []
+        for path in paths:
+            current = self._scan(path)
+            with self._lock:
+                if path not in self._snapshots:
+                    continue  # Unwatched meanwhile
+                previous = self._snapshots[path]
+                self._snapshots[path] = current
+            added = {n: i for n, i in current.items() if previous.get(n) != i}
+            removed = {n: i for n, i in previous.items() if current.get(n) != i}
+            renamed_from = {i: n for n, i in removed.items()}
+            for name, inode in added.items():
+                old_name = renamed_from.get(inode)
+                if old_name is not None and old_name not in current:
+                    del removed[old_name]
+                    changes.append(_change("renamed", path, name, old_name))
+                else:
+                    changes.append(_change("added", path, name))
+            changes.extend(_change("removed", path, name) for name in removed)
+        return [change for change in changes if change is not None]
+
+    def close(self) -> None:
+        """Stop watching everything."""
+        with self._lock:
+            self._snapshots.clear()
+
+
+def create_watcher():
+    """
+    Return the best directory watcher available on this system.
+
+    Returns:
+        An InotifyWatcher on Linux, otherwise a PollingWatcher
+    """
+    try:
+        return InotifyWatcher()
+    except OSError:
+        return PollingWatcher()
+
+
+class Delta(NamedTuple):
+    """A minimal update to the journals or entries list."""
+
+    kind: str
+    """One of "journal_added", "journal_removed", "journals_changed" (relist),
+    "entry_added", "entry_removed" or "entries_changed" (relist)."""
+    name: str = ""
+    journal: str = ""
+    """For entry deltas, the journal they apply to."""
+
+
+class JournalWatcher:
+    """Watches the journals directory and the journal currently listed."""
+
+    def __init__(self, base_path: str, watcher=None):
+        """
+        Start watching the journals directory.
+
+        Args:
+            base_path: Directory containing the journals
+            watcher: Backend to use; the best available by default
+        """
+        self.base_path = os.path.normpath(base_path)
+        self.watcher = watcher or create_watcher()
+        self.journal = None
+        self._journal_dirs: set[str] = set()
+        # Titles in the followed journal's segment store, to diff on appends
+        self._segment_titles: Optional[set[str]] = None
+        self._lock = threading.Lock()
+        os.makedirs(self.base_path, exist_ok=True)
+        self.watcher.watch(self.base_path)
+
+    def _watch_dir(self, path: str) -> None:
+        try:
+            self.watcher.watch(path)
+        except OSError:
+            return  # Gone already; the listing that follows shows the truth
+        with self._lock:
+            self._journal_dirs.add(path)
+
+    def follow(self, journal) -> None:
+        """
+        Report entry changes for a journal instead of the previous one.
+
+        Args:
+            journal: The journal being listed, or None
+        """
+        with self._lock:
+            previous = self._journal_dirs
+            self._journal_dirs = set()
+            self.journal = journal
+            self._segment_titles = None
+        for path in previous:
+            self.watcher.unwatch(path)
+        if journal is None:
+            return
+
+        root = journal.journal_path
+        self._watch_dir(root)
+        segments_dir = os.path.join(root, SEGMENTS_DIRNAME)
+        if os.path.isdir(segments_dir):
+            self._watch_dir(segments_dir)
+            self._segment_titles = self._read_segment_titles(journal)
+        for shard in layout.shard_dirs(root):
+            self._watch_dir(os.path.join(root, os.path.dirname(shard)))
+            self._watch_dir(os.path.join(root, shard))
+
+    def read(self, timeout: float) -> list[Delta]:
+        """
+        Wait for changes and translate them into list updates.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Deltas in the order they should be applied
+        """
+        deltas = []
+        for change in self.watcher.read(timeout):
+            if change.directory == self.base_path:
+                deltas.extend(self._journal_deltas(change))
+            else:
+                deltas.extend(self._entry_deltas(change))
+        return deltas
+
+    def _journal_deltas(self, change: Change) -> list[Delta]:
+        if change.kind == "rescan":
+            return [Delta("journals_changed")]
+        deltas = []
+        if change.kind in ("removed", "renamed"):
+            old_name = change.old_name or change.name
+            if not os.path.isdir(os.path.join(self.base_path, old_name)):
+                deltas.append(Delta("journal_removed", old_name))
+        if change.kind in ("added", "renamed"):
+            if os.path.isdir(os.path.join(self.base_path, change.name)):
+                deltas.append(Delta("journal_added", change.name))
+        return deltas
+
+    def _entry_deltas(self, change: Change) -> list[Delta]:
+        with self._lock:
+            journal = self.journal
+            watched = change.directory in self._journal_dirs
+        if journal is None or not watched:
+            return []
+        if os.path.basename(change.directory) == SEGMENTS_DIRNAME:
+            return self._segment_deltas(journal)
+        if change.kind == "rescan":
+            return [Delta("entries_changed", journal=journal.name)]
+
+        path = os.path.join(change.directory, change.name)
+        if change.kind in ("added", "renamed") and os.path.isdir(path):
+            # A new year or month directory: follow it and relist
+            self._watch_dir(path)
+            for month in os.listdir(path):
+                if os.path.isdir(os.path.join(path, month)):
+                    self._watch_dir(os.path.join(path, month))
+            return [Delta("entries_changed", journal=journal.name)]
+        return self._file_deltas(journal, change)
+
+    @staticmethod
+    def _file_deltas(journal, change: Change) -> list[Delta]:
+        from silentmemoir.models import JournalEntry
+
+        deltas = []
+        if change.kind in ("removed", "renamed"):
+            filename = compression.entry_filename(change.old_name or change.name)
+            title = filename[: -len(MARKDOWN_EXTENSION)]
+            # Compressing or re-filing an entry removes one of its files only
+            if (
+                filename.endswith(MARKDOWN_EXTENSION)
+                and not JournalEntry(journal, title).exists()
+            ):
+                deltas.append(Delta("entry_removed", filename, journal.name))
+        if change.kind in ("added", "renamed"):
+            filename = compression.entry_filename(change.name)
+            if filename.endswith(MARKDOWN_EXTENSION):
+                deltas.append(Delta("entry_added", filename, journal.name))
+        return deltas
+
+    @staticmethod
+    def _read_segment_titles(journal) -> Optional[set[str]]:
+        try:
+            store = journal.segment_store
+            return None if store is None else set(store.titles())
+        except (OSError, SegmentError):
+            return None
+
+    def _segment_deltas(self, journal) -> list[Delta]:
+        """
+        Diff a segmented journal's titles against the last ones seen.
+
+        Segment files don't map to entry names, so every change in the
+        segments directory compares the store's titles instead; appends that
+        only rewrite existing entries produce no deltas at all.
+
+        Args:
+            journal: The followed journal
+
+        Returns:
+            Entry deltas, or a relist if the titles cannot be read
+        """
+        previous = self._segment_titles
+        current = self._segment_titles = self._read_segment_titles(journal)
+        if previous is None or current is None:
+            return [Delta("entries_changed", journal=journal.name)]
+        return [
+            Delta("entry_removed", f"{title}{MARKDOWN_EXTENSION}", journal.name)
+            for title in sorted(previous - current)
+        ] + [
+            Delta("entry_added", f"{title}{MARKDOWN_EXTENSION}", journal.name)
+            for title in sorted(current - previous)
+        ]
+
+    def close(self) -> None:
+        """Stop watching."""
+        self.watcher.close()
@@ -0,0 +1,461 @@
+"""
+Custom widgets for SilentMemoir.
+
+This module contains reusable widgets that don't map onto a stock Textual
+widget, separated from the screens that use them.
+"""
+
+import bisect
+import datetime
+from difflib import SequenceMatcher
+from typing import Optional
+
+from rich.segment import Segment
+from textual import events
+from textual.binding import Binding
+from textual.containers import Vertical
+from textual.geometry import Region, Size
+from textual.message import Message
+from textual.reactive import reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.widgets import Label, ListItem, Markdown, Static
+
+from silentmemoir import trace
+from silentmemoir.config import NEW_ENTRY_LABEL, TRACE_OVERLAY_REFRESH
+from silentmemoir.history import Revision
+from silentmemoir.preview import split_chunks
+from silentmemoir.trace import traced
+
+
+class EntryList(ScrollView, can_focus=True):
+    """
+    Virtualized list of a journal's entries.
+
+    Entries are kept as a flat list of filenames and drawn with Textual's line
+    API: only the rows inside the viewport are rendered, and no widget is
+    mounted per entry. Opening a journal therefore costs the same whether it
+    holds a hundred entries or a hundred thousand.
+
+    Row 0 is always the "Create New Entry" item.
+    """
+
+    COMPONENT_CLASSES = {
+        "entry-list--cursor",
+        "entry-list--new-entry",
+    }
+
+    DEFAULT_CSS = """
+    EntryList {
+        background: $surface;
+        height: 1fr;
+    }
+    EntryList > .entry-list--new-entry {
+        color: $text-accent;
+    }
+    EntryList > .entry-list--cursor {
+        color: $block-cursor-blurred-foreground;
+        background: $block-cursor-blurred-background;
+        text-style: $block-cursor-blurred-text-style;
+    }
+    EntryList:focus {
+        background-tint: $foreground 5%;
+    }
+    EntryList:focus > .entry-list--cursor {
+        color: $block-cursor-foreground;
+        background: $block-cursor-background;
+        text-style: $block-cursor-text-style;
+    }
+    """
+
+    BINDINGS = [
+        Binding("enter", "select_cursor", "Select", show=False),
+        Binding("up", "cursor_up", "Cursor up", show=False),
+        Binding("down", "cursor_down", "Cursor down", show=False),
+        Binding("pageup", "page_up", "Page up", show=False),
+        Binding("pagedown", "page_down", "Page down", show=False),
+        Binding("home", "first", "First", show=False),
+        Binding("end", "last", "Last", show=False),
+    ]
+
+    cursor = reactive(0, init=False, always_update=True)
+    """Index of the highlighted row (0 is the "Create New Entry" row)."""
+
+    class Highlighted(Message):
+        """Posted when the highlighted row changes."""
+
+        def __init__(self, entry_list: "EntryList", entry_name: Optional[str]):
+            super().__init__()
+            self.entry_list = entry_list
+            self.entry_name = entry_name
+            """The highlighted entry filename, or None for the new entry row."""
+
+    class Selected(Message):
+        """Posted when a row is selected with Enter or a click."""
+
+        def __init__(self, entry_list: "EntryList", entry_name: Optional[str]):
+            super().__init__()
+            self.entry_list = entry_list
+            self.entry_name = entry_name
+            """The selected entry filename, or None for the new entry row."""
+
+    def __init__(self, *, id: str = None):  # noqa: A002 (matches Textual)
+        """
+        Initialize an empty entry list.
+
+        Args:
+            id: The widget ID
+        """
+        super().__init__(id=id)
+        self.entries: list[str] = []
+        self.has_new_entry_row = False
+
+    # ----------------------------
+    # Contents
+    # ----------------------------
+
+    @property
+    def row_count(self) -> int:
+        """Number of rows, including the "Create New Entry" row."""
+        return len(self.entries) + self.has_new_entry_row
+
+    def set_entries(self, entries: list[str]) -> None:
+        """
+        Replace the list contents and move the cursor to the top.
+
+        Args:
+            entries: Entry filenames, in display order
+        """
+        self.entries = entries
+        self.has_new_entry_row = True
+        self._update_virtual_size()
+        self.scroll_to(0, 0, animate=False)
+        self.cursor = 0
+
+    def clear(self) -> None:
+        """Remove every row, including the "Create New Entry" row."""
+        self.entries = []
+        self.has_new_entry_row = False
+        self._update_virtual_size()
+        self.scroll_to(0, 0, animate=False)
+        self.refresh()
+
+    def add_entries(self, names: list[str]) -> None:
+        """
+        Insert entries at their sorted positions, keeping the cursor on its row.
+
+        Names already listed are ignored.
+
+        Args:
+            names: Entry filenames to add
+        """
+        for name in names:
+            index = bisect.bisect_left(self.entries, name)
+            if index < len(self.entries) and self.entries[index] == name:
+                continue
+            self.entries.insert(index, name)
+            if index + self.has_new_entry_row <= self.cursor:
+                self.set_reactive(EntryList.cursor, self.cursor + 1)
+        self._update_virtual_size()
+        self.refresh()
+
+    def remove_entries(self, names: list[str]) -> None:
+        """
+        Remove entries, keeping the cursor on its row if that entry stays.
+
+        Names that aren't listed are ignored.
+
+        Args:
+            names: Entry filenames to remove
+        """
+        for name in names:
+            index = bisect.bisect_left(self.entries, name)
+            if index == len(self.entries) or self.entries[index] != name:
+                continue
+            del self.entries[index]
+            if index + self.has_new_entry_row < self.cursor:
+                self.set_reactive(EntryList.cursor, self.cursor - 1)
+        self.set_reactive(EntryList.cursor, self.validate_cursor(self.cursor))
+        self._update_virtual_size()
+        self.refresh()
+
+    def entry_at(self, row: int) -> Optional[str]:
+        """
+        Return the entry filename shown on a row.
+
+        Args:
+            row: The row index
+
+        Returns:
+            The filename, or None for the "Create New Entry" row
+        """
+        if self.has_new_entry_row:
+            row -= 1
+        return self.entries[row] if row >= 0 else None
+
+    @property
+    def highlighted_entry(self) -> Optional[str]:
+        """The highlighted entry filename, or None if no entry row is highlighted."""
+        if not 0 <= self.cursor < self.row_count:
+            return None
+        return self.entry_at(self.cursor)
+
+    # ----------------------------
+    # Cursor
+    # ----------------------------
+
+    def validate_cursor(self, cursor: int) -> int:
+        return max(0, min(cursor, self.row_count - 1))
+
+    def watch_cursor(self, cursor: int) -> None:
+        if not self.row_count:
+            return
+        self.scroll_to_region(
+            Region(0, cursor, max(1, self.size.width), 1), animate=False
+        )
+        self.refresh()
+        self.post_message(self.Highlighted(self, self.entry_at(cursor)))
+
+    def action_cursor_up(self) -> None:
+        self.cursor -= 1
+
+    def action_cursor_down(self) -> None:
+        self.cursor += 1
+
+    def action_page_up(self) -> None:
+        self.cursor -= max(1, self.scrollable_content_region.height - 1)
+
+    def action_page_down(self) -> None:
+        self.cursor += max(1, self.scrollable_content_region.height - 1)
+
+    def action_first(self) -> None:
+        self.cursor = 0
+
+    def action_last(self) -> None:
+        self.cursor = self.row_count - 1
+
+    def action_select_cursor(self) -> None:
+        if self.row_count:
+            self.post_message(self.Selected(self, self.entry_at(self.cursor)))
+
+    def on_click(self, event: events.Click) -> None:
+        offset = event.get_content_offset(self)
+        if offset is None:
+            return
+        row = self.scroll_offset.y + offset.y
+        if row < self.row_count:
+            self.cursor = row
+            self.action_select_cursor()
+
+    # ----------------------------
+    # Rendering
+    # ----------------------------
+
+    def on_resize(self, event: events.Resize) -> None:
+        self._update_virtual_size()
+
+    def _update_virtual_size(self) -> None:
+        self.virtual_size = Size(self.scrollable_content_region.width, self.row_count)
+
+    def render_line(self, y: int) -> Strip:
+        width = self.scrollable_content_region.width
+        row = self.scroll_offset.y + y
+        if row >= self.row_count:
+            return Strip.blank(width, self.rich_style)
+
+        entry_name = self.entry_at(row)
+        style = self.rich_style
+        if entry_name is None:
+            label = NEW_ENTRY_LABEL
+            style += self.get_component_rich_style("entry-list--new-entry")
+        else:
+            label = entry_name
+        if row == self.cursor:
+            style += self.get_component_rich_style("entry-list--cursor")
+
+        return Strip([Segment(f" {label}", style)]).adjust_cell_length(width, style)
+
+
+class MarkdownPreview(Vertical):
+    """
+    Markdown viewer that re-renders only the parts that changed.
+
+    The document is split into chunks of top-level blocks, each rendered by its
+    own Markdown widget. On update the old and new chunk lists are diffed by
+    content and only inserted or modified chunks are parsed and mounted;
+    unchanged chunks keep their existing widgets.
+    """
+
+    DEFAULT_CSS = """
+    MarkdownPreview {
+        height: auto;
+    }
+    """
+
+    def __init__(self, markdown: str = "", *, id: str = None):  # noqa: A002
+        """
+        Initialize the preview.
+
+        Args:
+            markdown: Initial document to render once mounted
+            id: The widget ID
+        """
+        super().__init__(id=id)
+        self.chunks: tuple[str, ...] = ()
+        self.chunk_widgets: list[Markdown] = []
+        self._initial_markdown = markdown
+
+    def on_mount(self) -> None:
+        if self._initial_markdown:
+            self.update(self._initial_markdown)
+
+    @traced("ui")
+    def update(self, markdown: str, chunks: Optional[tuple[str, ...]] = None) -> None:
+        """
+        Show a new version of the document.
+
+        Args:
+            markdown: The document text
+            chunks: The text already split by split_chunks, if known
+        """
+        if chunks is None:
+            chunks = split_chunks(markdown)
+        matcher = SequenceMatcher(None, self.chunks, chunks, autojunk=False)
+
+        chunk_widgets = []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                chunk_widgets.extend(self.chunk_widgets[i1:i2])
+                continue
+
+            for widget in self.chunk_widgets[i1:i2]:
+                widget.remove()
+
+            new_widgets = [Markdown(chunk) for chunk in chunks[j1:j2]]
+            if new_widgets:
+                # Mount ahead of the first old chunk after this change, which
+                # is either kept or removed later in this loop
+                if i2 < len(self.chunk_widgets):
+                    self.mount_all(new_widgets, before=self.chunk_widgets[i2])
+                else:
+                    self.mount_all(new_widgets)
+            chunk_widgets.extend(new_widgets)
+
+        self.chunks = chunks
+        self.chunk_widgets = chunk_widgets
+
+
+class PerfOverlay(Static):
+    """Floating panel showing p50/p99 latencies of traced operations."""
+
+    DEFAULT_CSS = """
+    PerfOverlay {
+        overlay: screen;
+        dock: right;
+        width: 64;
+        height: auto;
+        max-height: 60%;
+        padding: 0 1;
+        border: round $primary;
+        background: $panel 90%;
+    }
+    """
+
+    def on_mount(self) -> None:
+        self.refresh_stats()
+        self.set_interval(TRACE_OVERLAY_REFRESH, self.refresh_stats)
+
+    def refresh_stats(self) -> None:
+        """Redraw the latency table from the latest samples."""
+        if not trace.ENABLED:
+            self.update("Tracing is off.\nSet SILENTMEMOIR_TRACE=1 and restart.")
+            return
+
+        lines = [f"{'operation':<36}{'n':>6}{'p50 ms':>9}{'p99 ms':>9}"]
+        for name, count, p50, p99 in trace.latency_summary():
+            lines.append(f"{name[:36]:<36}{count:>6}{p50 * 1000:>9.1f}{p99 * 1000:>9.1f}")
+        self.update("\n".join(lines))
+
+
+class JournalListItem(ListItem):
+    """Custom ListItem for displaying a journal in a ListView."""
+
+    def __init__(self, journal_name: str):
+        """
+        Initialize a journal list item.
+
+        Args:
+            journal_name: The name of the journal to display
+        """
+        super().__init__(Label(journal_name))
+        self.journal_name = journal_name
+
+
+class SearchResultItem(ListItem):
+    """Custom ListItem for displaying a search hit in a ListView."""
+
+    def __init__(
+        self, journal_name: str, entry_title: str, snippet: Optional[str] = None
+    ):
+        """
+        Initialize a search result list item.
+
+        Args:
+            journal_name: The journal containing the matching entry
+            entry_title: The title of the matching entry
+            snippet: Excerpt of the entry around the match, or None to fill it
+                in later with set_snippet()
+        """
+        super().__init__(
+            Label(f"{entry_title} in {journal_name}", classes="entry_title", markup=False),
+            Label(snippet or "", classes="entry_content", markup=False),
+        )
+        self.journal_name = journal_name
+        self.entry_title = entry_title
+        self.snippet = snippet
+
+    def set_snippet(self, snippet: str) -> None:
+        """
+        Show the excerpt once it has been read.
+
+        Args:
+            snippet: Excerpt of the entry around the match
+        """
+        self.snippet = snippet
+        self.query_one(".entry_content", Label).update(snippet)
+
+
+class RevisionItem(ListItem):
+    """Custom ListItem for displaying an entry revision in a ListView."""
+
+    def __init__(self, revision: Revision):
+        """
+        Initialize a revision list item.
+
+        Args:
+            revision: The revision to display
+        """
+        saved = datetime.datetime.fromtimestamp(revision.saved)
+        super().__init__(
+            Label(
+                f"#{revision.number}  {saved:%Y-%m-%d %H:%M}", classes="entry_title"
+            ),
+            Label(f"{revision.length} characters", classes="entry_content"),
+        )
+        self.revision = revision
+
+
+class StatsJournalItem(ListItem):
+    """Custom ListItem for choosing whose statistics the dashboard shows."""
+
+    def __init__(self, journal_name: Optional[str]):
+        """
+        Initialize a statistics journal list item.
+
+        Args:
+            journal_name: The journal, or None for all journals
+        """
+        super().__init__(
+            Label(journal_name or "All journals", classes="entry_title", markup=False)
+        )
+        self.journal_name = journal_name
@@ -0,0 +1,56 @@
+"""
+Shared fixtures.
+
+Every test gets its own data directory: the journals, the catalog, the search
+index, the statistics and the trash all live under the test's tmp_path, so
+tests never touch the user's data or see each other's.
+"""
+
+import os
+import tempfile
+
+# Anything resolved from the configuration at import time (the trace file,
+# the banner cache) must not land in the user's home either
+os.environ["SILENTMEMOIR_HOME"] = tempfile.mkdtemp(prefix="silentmemoir-tests-")
+
+import pytest  # noqa: E402
+
+from silentmemoir import compression, stats, trash  # noqa: E402
+from silentmemoir.catalog import Catalog  # noqa: E402
+from silentmemoir.models import Journal  # noqa: E402
+from silentmemoir.search import SearchIndex  # noqa: E402
+from silentmemoir.stats import StatsStore  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def home(tmp_path, monkeypatch):
+    """
+    Point every store at a fresh directory.
+
+    Returns:
+        The test's data directory
+    """
+    monkeypatch.setattr(Journal, "base_path", os.path.join(tmp_path, "journals", ""))
+    monkeypatch.setattr(Catalog, "path", os.path.join(tmp_path, "catalog.db"))
+    monkeypatch.setattr(SearchIndex, "path", os.path.join(tmp_path, "search.db"))
+    monkeypatch.setattr(StatsStore, "path", os.path.join(tmp_path, "stats.db"))
+    monkeypatch.setattr(trash, "TRASH_PATH", os.path.join(tmp_path, "trash", ""))
+    monkeypatch.setattr(
+        compression,
+        "INCOMPRESSIBLE_PATH",
+        os.path.join(tmp_path, "cache", "incompressible.json"),
+    )
+    # Summaries are cached per process by journal and day, not by database
+    monkeypatch.setattr(stats, "_summaries", {})
+    return tmp_path
+
+
+@pytest.fixture
+def journal():
+    """
+    Create an empty journal.
+
+    Returns:
+        The journal
+    """
+    return Journal("notes")
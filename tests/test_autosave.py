@@ -0,0 +1,140 @@
+"""Tests for crash-recovery autosave."""
+
+import os
+
+import pytest
+
+from silentmemoir.autosave import (
+    Autosaver,
+    SwapMismatchError,
+    recover,
+    text_delta,
+)
+
+SAVED = "# Diary\n\nFirst line.\n"
+
+
+@pytest.fixture
+def path(tmp_path):
+    return os.path.join(tmp_path, "swap", "entry.swp")
+
+
+def apply(old: str, delta) -> str:
+    start, end, replacement = delta
+    return old[:start] + replacement + old[end:]
+
+
+@pytest.mark.parametrize(
+    ("old", "new"),
+    [
+        ("", "typed"),
+        ("erased", ""),
+        ("abc", "abXc"),
+        ("aaaa", "aaaaa"),
+        ("aaaa", "aa"),
+        ("ünï", "ünïcode ✓"),
+        ("x" * 10000 + "tail", "x" * 10000 + "TAIL"),
+        ("head" + "y" * 10000, "HEAD" + "y" * 10000),
+    ],
+)
+def test_text_delta_round_trip(old, new):
+    assert apply(old, text_delta(old, new)) == new
+
+
+def test_text_delta_of_equal_texts():
+    assert text_delta("same", "same") is None
+
+
+def test_recover_edits(path):
+    saver = Autosaver(path, SAVED)
+    assert saver.record(SAVED + "Second line.\n")
+    assert not saver.record(SAVED + "Second line.\n")
+    saver.record("# Diary\n\nFirst line, edited.\nSecond line.\n")
+
+    assert recover(path, SAVED) == "# Diary\n\nFirst line, edited.\nSecond line.\n"
+
+
+def test_nothing_to_recover(path):
+    assert recover(path, SAVED) is None
+    saver = Autosaver(path, SAVED)
+    saver.record(SAVED + "typo")
+    saver.record(SAVED)
+    assert recover(path, SAVED) is None
+
+
+def test_recover_after_torn_write(path):
+    saver = Autosaver(path, SAVED)
+    saver.record(SAVED + "kept")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"start": 3, "end": 3, "te')  # The crash cut this record short
+
+    assert recover(path, SAVED) == SAVED + "kept"
+
+
+def test_torn_header_recovers_nothing(path):
+    os.makedirs(os.path.dirname(path))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"base": 12')
+    assert recover(path, SAVED) is None
+
+
+def test_swap_against_other_text_is_refused(path):
+    saver = Autosaver(path, SAVED)
+    saver.record(SAVED + "unsaved edit")
+
+    # The entry was changed elsewhere, so the deltas would land in the wrong place
+    with pytest.raises(SwapMismatchError):
+        recover(path, "# Diary\n\nRewritten elsewhere.\n")
+
+
+def test_swap_already_saved_is_not_recovered(path):
+    saver = Autosaver(path, SAVED)
+    text = SAVED + "coalesced"
+    saver.record(text)
+    saver.mark_saved(text)
+    # Crash after the entry file was written, before the swap was removed
+    assert recover(path, text) is None
+    assert recover(path, SAVED) == text
+
+
+def test_discard_keeps_edits_made_after_the_save(path):
+    saver = Autosaver(path, SAVED)
+    saving = SAVED + "saved part"
+    saver.record(saving)
+    saver.mark_saved(saving)
+    # Typing continues while the save is written
+    saver.record(saving + " and more")
+    saver.discard(saving)
+
+    assert recover(path, saving) == saving + " and more"
+    saver.record(saving + " and more, still")
+    assert recover(path, saving) == saving + " and more, still"
+
+
+def test_discard_without_pending_edits_removes_swap(path):
+    saver = Autosaver(path, SAVED)
+    saver.record(SAVED + "x")
+    saver.discard(SAVED + "x")
+    assert not os.path.exists(path)
+    assert saver.swap_bytes == 0
+
+
+def test_rewrite_new_entry(path):
+    saver = Autosaver(path, "")
+    for text in ("d", "dr", "draft"):
+        saver.record(text)
+    saver.rewrite("draft")
+    with open(path, encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 2
+    assert recover(path, "") == "draft"
+
+
+def test_adopt_continues_recovered_swap(path):
+    Autosaver(path, SAVED).record(SAVED + "before crash")
+    recovered = recover(path, SAVED)
+
+    saver = Autosaver(path, SAVED)
+    saver.adopt(recovered)
+    assert saver.swap_bytes == os.path.getsize(path)
+    saver.record(recovered + ", after")
+    assert recover(path, SAVED) == SAVED + "before crash, after"
@@ -0,0 +1,137 @@
+"""Tests for incremental backups."""
+
+import os
+import shutil
+
+import pytest
+
+from silentmemoir import backup
+from silentmemoir.backup import BackupError
+from silentmemoir.config import HISTORY_FILENAME
+from silentmemoir.models import Journal, JournalEntry
+
+
+@pytest.fixture
+def target(tmp_path):
+    return os.path.join(tmp_path, "backups")
+
+
+def snapshot(target):
+    return backup.create_snapshot(target=target, source=Journal.base_path)
+
+
+def restore(snap, **kwargs):
+    return backup.restore_snapshot(snap, dest=Journal.base_path, **kwargs)
+
+
+def read(journal, title):
+    return JournalEntry(journal, title).read()
+
+
+def test_snapshot_round_trip(journal, target):
+    JournalEntry(journal, "one").save("first entry")
+    JournalEntry(journal, "two").save("second entry")
+    JournalEntry(journal, "two").save("second entry, edited")
+
+    result = snapshot(target)
+    assert set(result.snapshot.files) == {
+        "notes/one.md",
+        "notes/two.md",
+        f"notes/{HISTORY_FILENAME}",
+    }
+    assert backup.verify_snapshot(result.snapshot) == []
+
+    shutil.rmtree(journal.journal_path)
+    assert restore(result.snapshot) == 3
+    assert read(journal, "one") == "first entry"
+    assert read(journal, "two") == "second entry, edited"
+    # The history comes back too, including revisions still in its WAL
+    assert JournalEntry(journal, "two").read_revision(1) == "second entry"
+
+
+def test_unchanged_files_are_linked(journal, target):
+    JournalEntry(journal, "same").save("unchanged")
+    JournalEntry(journal, "edited").save("before")
+    first = snapshot(target).snapshot
+
+    JournalEntry(journal, "edited").save("after")
+    result = snapshot(target)
+    assert result.snapshot.name != first.name
+    assert result.linked >= 1
+    assert os.path.samefile(
+        first.file_path("notes/same.md"), result.snapshot.file_path("notes/same.md")
+    )
+    assert not os.path.samefile(
+        first.file_path("notes/edited.md"), result.snapshot.file_path("notes/edited.md")
+    )
+    assert backup.verify_snapshot(result.snapshot) == []
+
+
+def test_renamed_file_is_linked(journal, target):
+    JournalEntry(journal, "old name").save("content that moves")
+    first = snapshot(target).snapshot
+    os.rename(
+        os.path.join(journal.journal_path, "old name.md"),
+        os.path.join(journal.journal_path, "new name.md"),
+    )
+
+    second = snapshot(target).snapshot
+    assert os.path.samefile(
+        first.file_path("notes/old name.md"), second.file_path("notes/new name.md")
+    )
+
+
+def test_verify_finds_damage(journal, target):
+    JournalEntry(journal, "damaged").save("original text")
+    JournalEntry(journal, "lost").save("will be deleted")
+    snap = snapshot(target).snapshot
+
+    with open(snap.file_path("notes/damaged.md"), "w") as f:
+        f.write("ORIGINAL TEXT")
+    os.remove(snap.file_path("notes/lost.md"))
+
+    problems = backup.verify_snapshot(snap)
+    assert len(problems) == 2
+    assert any(p.startswith("notes/damaged.md: content") for p in problems)
+    assert "notes/lost.md: missing" in problems
+    assert backup.verify_snapshot(snap, quick=True) == ["notes/lost.md: missing"]
+
+
+def test_restore_keeps_later_edits(journal, target):
+    JournalEntry(journal, "entry").save("backed up")
+    snap = snapshot(target).snapshot
+    JournalEntry(journal, "entry").save("edited since")
+
+    assert restore(snap) == 0
+    assert read(journal, "entry") == "edited since"
+    assert restore(snap, overwrite=True) >= 1
+    assert read(journal, "entry") == "backed up"
+
+
+def test_restore_selected_journals(target):
+    for name in ("kept", "other"):
+        JournalEntry(Journal(name), "entry").save(name)
+    snap = snapshot(target).snapshot
+    for name in ("kept", "other"):
+        shutil.rmtree(Journal(name, create=False).journal_path)
+
+    restore(snap, journals=["kept"])
+    assert Journal.list_names() == ["kept"]
+
+
+def test_interrupted_snapshot_is_ignored(journal, target):
+    JournalEntry(journal, "entry").save("text")
+    done = snapshot(target).snapshot
+    os.makedirs(os.path.join(target, "later" + backup.PARTIAL_SUFFIX, "journals"))
+
+    assert [s.name for s in backup.list_snapshots(target)] == [done.name]
+    assert backup.find_snapshot(target=target).name == done.name
+
+    snapshot(target)
+    assert not any(n.endswith(backup.PARTIAL_SUFFIX) for n in os.listdir(target))
+
+
+def test_no_snapshots(target):
+    with pytest.raises(BackupError):
+        backup.find_snapshot(target=target)
+    assert backup.list_snapshots(target) == []
@@ -0,0 +1,99 @@
+"""Tests for the metadata catalog."""
+
+import os
+import sqlite3
+
+from silentmemoir.catalog import Catalog, count_words
+from silentmemoir.models import Journal, JournalEntry
+
+
+def write_outside_app(journal: Journal, filename: str, content: str) -> None:
+    path = os.path.join(journal.journal_path, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    # Directory timestamps can be coarser than two writes apart
+    st = os.stat(journal.journal_path)
+    os.utime(journal.journal_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_count_words():
+    assert count_words("") == 0
+    assert count_words("  one\ttwo\n\nthree ") == 3
+
+
+def test_saves_are_listed(journal):
+    JournalEntry(journal, "b").save("two words")
+    JournalEntry(journal, "a").save("just three words")
+
+    assert journal.list_entries() == ["a.md", "b.md"]
+    details = {info.filename: info for info in journal.entry_details()}
+    assert details["a.md"].words == 3
+    assert details["b.md"].size == len("two words")
+
+
+def test_resave_updates_details(journal):
+    entry = JournalEntry(journal, "entry")
+    entry.save("short")
+    journal.entry_details()
+    entry.save("a good deal longer now")
+
+    [info] = journal.entry_details()
+    assert info.words == 5
+    assert info.size == len("a good deal longer now")
+
+
+def test_deletes_are_dropped(journal):
+    JournalEntry(journal, "kept").save("text")
+    JournalEntry(journal, "gone").save("text")
+    JournalEntry(journal, "gone").delete()
+
+    assert journal.list_entries() == ["kept.md"]
+
+
+def test_files_changed_outside_the_app_are_picked_up(journal):
+    JournalEntry(journal, "saved").save("from the app")
+    assert journal.list_entries() == ["saved.md"]
+
+    write_outside_app(journal, "external.md", "copied in by hand")
+    assert journal.list_entries() == ["external.md", "saved.md"]
+    os.remove(os.path.join(journal.journal_path, "external.md"))
+    # Dotfiles are layout markers and in-flight temporary files
+    write_outside_app(journal, ".saved.md.1234.tmp", "half written")
+    assert journal.list_entries() == ["saved.md"]
+
+
+def test_save_after_outside_change_still_rescans(journal):
+    JournalEntry(journal, "first").save("text")
+    journal.list_entries()
+
+    # The save must not mark the directory current over the unseen file
+    write_outside_app(journal, "external.md", "unseen")
+    JournalEntry(journal, "second").save("text")
+    assert journal.list_entries() == ["external.md", "first.md", "second.md"]
+
+
+def test_journal_names():
+    Journal("b")
+    Journal("a")
+    assert Journal.list_names() == ["a", "b"]
+
+    Journal("a", create=False).delete()
+    assert Journal.list_names() == ["b"]
+    os.makedirs(os.path.join(Journal.base_path, "c"))
+    st = os.stat(Journal.base_path)
+    os.utime(Journal.base_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert Journal.list_names() == ["b", "c"]
+
+
+def test_outdated_catalog_is_rebuilt(journal):
+    JournalEntry(journal, "entry").save("text")
+    journal.list_entries()
+    conn = sqlite3.connect(Catalog.path)
+    conn.execute("PRAGMA user_version = 1")
+    conn.execute("DELETE FROM entries")
+    conn.commit()
+    conn.close()
+
+    with Catalog() as catalog:
+        assert catalog.cached_mtime(journal.journal_path) is None
+    assert journal.list_entries() == ["entry.md"]
@@ -0,0 +1,98 @@
+"""Tests for the command-line subcommands."""
+
+import io
+import os
+
+import pytest
+
+from silentmemoir import cli
+from silentmemoir.models import Journal, JournalEntry
+
+
+def run(capsys, *argv: str) -> tuple[int, str, str]:
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(list(argv))
+    out, err = capsys.readouterr()
+    return exit_info.value.code, out, err
+
+
+def test_new_and_cat(capsys):
+    assert run(capsys, "new", "notes", "Monday", "-m", "Went for a walk.\n") == (
+        0,
+        "Monday\n",
+        "",
+    )
+    assert JournalEntry(Journal("notes"), "Monday").read() == "Went for a walk.\n"
+    assert run(capsys, "cat", "notes", "Monday.md") == (0, "Went for a walk.\n", "")
+
+    status, _, err = run(capsys, "new", "notes", "Monday", "-m", "again")
+    assert status == 2 and "already exists" in err
+
+
+def test_new_reads_stdin_and_dates_untitled_entries(capsys, monkeypatch):
+    monkeypatch.setattr("sys.stdin", io.StringIO("from a pipe"))
+    status, out, _ = run(capsys, "new", "notes")
+    assert status == 0 and out.startswith("entry_")
+    assert JournalEntry(Journal("notes"), out.strip()).read() == "from a pipe"
+
+
+def test_append(capsys):
+    run(capsys, "append", "notes", "log", "-m", "first")
+    run(capsys, "append", "notes", "log", "-m", "second\n")
+    assert JournalEntry(Journal("notes"), "log").read() == "first\nsecond\n"
+
+
+def test_ls(capsys):
+    JournalEntry(Journal("b"), "one").save("two words")
+    JournalEntry(Journal("a"), "two").save("text")
+    Journal("empty")
+
+    assert run(capsys, "ls") == (0, "a\nb\nempty\n", "")
+    assert run(capsys, "ls", "b") == (0, "one\n", "")
+    assert run(capsys, "ls", "--recent", "1")[1] == "a/two\n"
+    assert run(capsys, "ls", "-l", "b")[1].endswith("      2  one\n")
+
+    status, _, err = run(capsys, "ls", "missing")
+    assert status == 2 and "no such journal: missing" in err
+    assert not os.path.exists(Journal("missing", create=False).journal_path)
+
+
+def test_cat_reports_missing_entries(capsys):
+    JournalEntry(Journal("notes"), "kept").save("text")
+    assert run(capsys, "cat", "notes", "gone", "kept") == (
+        1,
+        "text",
+        "silentmemoir cat: gone: no such entry\n",
+    )
+
+
+def test_grep(capsys):
+    JournalEntry(Journal("a"), "entry").save("Saw a heron\nand a gull\nHERON again")
+    JournalEntry(Journal("b"), "entry").save("nothing here")
+
+    assert run(capsys, "grep", "heron") == (0, "a/entry:1:Saw a heron\n", "")
+    assert run(capsys, "grep", "-i", "heron", "a")[1] == (
+        "a/entry:1:Saw a heron\na/entry:3:HERON again\n"
+    )
+    assert run(capsys, "grep", "-il", "heron")[1] == "a/entry\n"
+    assert run(capsys, "grep", "swan") == (1, "", "")
+    assert run(capsys, "grep", "(")[0] == 2
+
+
+def test_export(capsys, tmp_path):
+    JournalEntry(Journal("notes"), "entry").save("text")
+    dest = os.path.join(tmp_path, "out")
+    assert run(capsys, "export", "notes", dest) == (0, "exported 1 entries\n", "")
+    assert os.listdir(dest) == ["entry.md"]
+
+
+@pytest.mark.parametrize("name", ["", ".hidden", "..", "../up", "a/b"])
+def test_invalid_journal_names(capsys, name):
+    status, _, err = run(capsys, "new", name, "title", "-m", "text")
+    assert status == 2 and "invalid journal name" in err
+
+
+@pytest.mark.parametrize("title", ["  ", "a/b", ".md"])
+def test_invalid_titles(capsys, title):
+    status, _, err = run(capsys, "new", "notes", title, "-m", "text")
+    assert status == 2 and "invalid entry title" in err
@@ -0,0 +1,130 @@
+"""Tests for compressing cold entries."""
+
+import os
+import shutil
+
+import pytest
+
+from silentmemoir import compression, durable
+from silentmemoir.models import JournalEntry
+
+TEXT = "A long, quiet entry about the sea. " * 100
+
+
+def files(directory: str) -> list[str]:
+    # Dotfiles are the journal's history and any temporary files left behind
+    return sorted(name for name in os.listdir(directory) if not name.startswith("."))
+
+
+def leftovers(directory: str) -> list[str]:
+    return [
+        name for name in os.listdir(directory) if name.endswith(durable.TEMP_SUFFIX)
+    ]
+
+
+@pytest.fixture
+def entry(journal):
+    entry = JournalEntry(journal, "cold")
+    entry.save(TEXT)
+    return entry
+
+
+@pytest.mark.parametrize("algorithm", ["gzip", "lzma"])
+def test_round_trip(entry, algorithm):
+    path = entry.filepath
+    mtime = os.stat(path).st_mtime_ns
+    assert compression.compress_file(path, algorithm)
+
+    target = compression.compressed_path(path)
+    assert files(entry.journal.journal_path) == ["cold.md.z"]
+    assert os.path.getsize(target) < len(TEXT)
+    assert compression.read_header(target)[1:] == (len(TEXT), mtime)
+    assert compression.read_text(target) == TEXT
+    with compression.open_text(target) as f:
+        assert f.readline() == TEXT.splitlines(keepends=True)[0]
+    assert entry.stored_path() == target
+    assert JournalEntry(entry.journal, "cold").read() == TEXT
+    assert leftovers(entry.journal.journal_path) == []
+
+
+def test_plain_files_read_as_is(entry):
+    assert compression.read_header(entry.filepath) is None
+    assert compression.read_text(entry.filepath) == TEXT
+
+
+def test_saving_writes_back_uncompressed(entry):
+    compression.compress_file(entry.filepath)
+    JournalEntry(entry.journal, "cold").save("fresh")
+    assert files(entry.journal.journal_path) == ["cold.md"]
+    assert JournalEntry(entry.journal, "cold").read() == "fresh"
+
+
+def test_not_smaller_is_kept_plain(journal):
+    entry = JournalEntry(journal, "short")
+    entry.save("hi")
+    assert not compression.compress_file(entry.filepath)
+    assert files(journal.journal_path) == ["short.md"]
+
+
+def test_save_during_compression_wins(entry, monkeypatch):
+    copy = shutil.copyfileobj
+
+    def save_meanwhile(src, dst, length):
+        copy(src, dst, length)
+        JournalEntry(entry.journal, "cold").save("saved while compressing")
+
+    monkeypatch.setattr(compression.shutil, "copyfileobj", save_meanwhile)
+    assert not compression.compress_file(entry.filepath)
+
+    assert files(entry.journal.journal_path) == ["cold.md"]
+    assert leftovers(entry.journal.journal_path) == []
+    assert entry.read() == "saved while compressing"
+
+
+def test_save_after_setting_aside_is_kept(entry, monkeypatch):
+    replace = os.replace
+    aside = []
+
+    def save_after(src, dst):
+        replace(src, dst)
+        if src == entry.filepath and not aside:
+            aside.append(dst)
+            JournalEntry(entry.journal, "cold").save("saved just after")
+
+    monkeypatch.setattr(compression.os, "replace", save_after)
+    compression.compress_file(entry.filepath)
+    monkeypatch.setattr(compression.os, "replace", replace)
+
+    assert aside and not os.path.exists(aside[0])
+    assert JournalEntry(entry.journal, "cold").read() == "saved just after"
+
+
+def test_deleted_during_compression(entry, monkeypatch):
+    copy = shutil.copyfileobj
+
+    def delete_meanwhile(src, dst, length):
+        copy(src, dst, length)
+        os.remove(entry.filepath)
+
+    monkeypatch.setattr(compression.shutil, "copyfileobj", delete_meanwhile)
+    assert not compression.compress_file(entry.filepath)
+    assert files(entry.journal.journal_path) == []
+    assert leftovers(entry.journal.journal_path) == []
+
+
+def test_cold_entries_and_incompressible_record(journal, monkeypatch):
+    JournalEntry(journal, "cold").save(TEXT)
+    JournalEntry(journal, "short").save("hi")
+    monkeypatch.setattr(compression, "COLD_ENTRY_MIN_BYTES", 0)
+
+    assert compression.compress_cold_entries(days=-1) == 1
+    assert os.path.exists(compression.INCOMPRESSIBLE_PATH)
+
+    def fail(path, algorithm):
+        pytest.fail(f"{path} compressed again")
+
+    # Neither the compressed entry nor the known incompressible one is retried
+    monkeypatch.setattr(compression, "_compress", fail)
+    assert compression.compress_cold_entries(days=-1) == 0
+    # Nothing is cold yet
+    assert compression.compress_cold_entries(days=1) == 0
@@ -0,0 +1,169 @@
+"""Tests for crash-safe writes."""
+
+import os
+import stat
+
+import pytest
+
+from silentmemoir import durable
+
+
+@pytest.fixture
+def fsyncs(monkeypatch):
+    """
+    Record fsyncs instead of making them.
+
+    Returns:
+        The paths fsynced, in order
+    """
+    durable.commit()  # Whatever earlier tests left pending
+    synced = []
+    monkeypatch.setattr(
+        durable, "_fsync_path", lambda path, directory=False: synced.append(path)
+    )
+    return synced
+
+
+def leftovers(directory) -> list[str]:
+    return [
+        name for name in os.listdir(directory) if name.endswith(durable.TEMP_SUFFIX)
+    ]
+
+
+def test_atomic_write_round_trip(tmp_path):
+    path = os.path.join(tmp_path, "entry.md")
+    durable.atomic_write(path, "first ✓")
+    durable.atomic_write(path, "second")
+
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "second"
+    assert leftovers(tmp_path) == []
+
+
+def test_atomic_write_keeps_mode(tmp_path):
+    path = os.path.join(tmp_path, "private.md")
+    with open(path, "w") as f:
+        f.write("old")
+    os.chmod(path, 0o600)
+
+    durable.atomic_write(path, "new")
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_failed_rename_leaves_old_version(tmp_path, monkeypatch):
+    path = os.path.join(tmp_path, "entry.md")
+    durable.atomic_write(path, "old version")
+
+    def crash(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(durable.os, "replace", crash)
+    with pytest.raises(OSError):
+        durable.atomic_write(path, "new version")
+
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "old version"
+    assert leftovers(tmp_path) == []
+
+
+def test_interrupted_write_leaves_old_version(tmp_path, monkeypatch):
+    path = os.path.join(tmp_path, "entry.md")
+    durable.atomic_write(path, "old version")
+
+    def interrupt(fd):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(durable.os, "fsync", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        durable.atomic_write(path, "new version")
+
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "old version"
+    assert leftovers(tmp_path) == []
+
+
+def test_save_policy_syncs_directory(tmp_path, monkeypatch, fsyncs):
+    monkeypatch.setattr(durable, "DURABILITY_POLICY", "save")
+    durable.atomic_write(os.path.join(tmp_path, "entry.md"), "text")
+    assert fsyncs == [str(tmp_path)]
+
+
+def test_none_policy_never_syncs(tmp_path, monkeypatch, fsyncs):
+    monkeypatch.setattr(durable, "DURABILITY_POLICY", "none")
+    with durable.batch():
+        durable.atomic_write(os.path.join(tmp_path, "entry.md"), "text")
+        durable.written(os.path.join(tmp_path, "entry.md"))
+    assert fsyncs == []
+
+
+def test_batch_syncs_files_then_each_directory_once_at_the_end(
+    tmp_path, monkeypatch, fsyncs
+):
+    monkeypatch.setattr(durable, "DURABILITY_POLICY", "save")
+    monkeypatch.setattr(durable.os, "fsync", lambda fd: pytest.fail("fsync per save"))
+    with durable.batch():
+        for i in range(5):
+            durable.atomic_write(os.path.join(tmp_path, f"{i}.md"), "text")
+        assert fsyncs == []
+    assert len(fsyncs) == 6
+    assert all(path.endswith(durable.TEMP_SUFFIX) for path in fsyncs[:5])
+    assert fsyncs[5] == str(tmp_path)
+    assert leftovers(tmp_path) == []
+
+
+def test_batch_writes_appear_when_it_ends(tmp_path, fsyncs):
+    path = os.path.join(tmp_path, "entry.md")
+    durable.atomic_write(path, "old")
+    with durable.batch():
+        durable.atomic_write(path, "new")
+        with durable.batch():
+            durable.atomic_write(os.path.join(tmp_path, "other.md"), "text")
+        # Only the outermost batch publishes
+        assert not os.path.exists(os.path.join(tmp_path, "other.md"))
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == "old"
+
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "new"
+    assert os.path.exists(os.path.join(tmp_path, "other.md"))
+    assert leftovers(tmp_path) == []
+
+
+def test_superseded_files_go_after_the_rename(tmp_path, fsyncs):
+    old = os.path.join(tmp_path, "old.md")
+    path = os.path.join(tmp_path, "new.md")
+    durable.atomic_write(old, "text")
+    with durable.batch():
+        durable.atomic_write(path, "text", supersedes=(old, path))
+        assert os.path.exists(old)
+    assert os.listdir(tmp_path) == ["new.md"]
+
+
+def test_failed_batch_rename_keeps_old_copies(tmp_path, monkeypatch, fsyncs):
+    old = os.path.join(tmp_path, "old.md")
+    durable.atomic_write(old, "old version")
+    replace = os.replace
+
+    def crash(src, dst):
+        if dst.endswith("new.md"):
+            raise OSError("disk full")
+        replace(src, dst)
+
+    monkeypatch.setattr(durable.os, "replace", crash)
+    with pytest.raises(OSError):
+        with durable.batch():
+            durable.atomic_write(
+                os.path.join(tmp_path, "new.md"), "x", supersedes=[old]
+            )
+            durable.atomic_write(os.path.join(tmp_path, "later.md"), "y")
+
+    # Later writes of the batch still land
+    assert sorted(os.listdir(tmp_path)) == ["later.md", "old.md"]
+
+
+def test_written_file_is_synced_before_its_directory(tmp_path, monkeypatch, fsyncs):
+    monkeypatch.setattr(durable, "DURABILITY_POLICY", "group")
+    path = os.path.join(tmp_path, "segment.log")
+    with durable.batch():
+        durable.written(path)
+    assert fsyncs == [path, str(tmp_path)]
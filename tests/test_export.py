@@ -0,0 +1,130 @@
+"""Tests for incremental static site export."""
+
+import json
+import os
+
+import pytest
+
+from silentmemoir import export
+from silentmemoir.export import ENTRIES_DIRNAME, SITE_MANIFEST_NAME, build_site
+from silentmemoir.models import Journal, JournalEntry
+
+
+@pytest.fixture
+def site(tmp_path):
+    return os.path.join(tmp_path, "site")
+
+
+def page(site: str, journal: str, title: str) -> str:
+    return os.path.join(site, journal, ENTRIES_DIRNAME, f"{title}.html")
+
+
+def totals(result) -> tuple[int, int, int]:
+    return result.rendered, result.unchanged, result.removed
+
+
+def bump_mtime(path: str) -> None:
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_first_build(journal, site):
+    JournalEntry(journal, "first").save("# Hello\n\n<script>x</script>")
+    JournalEntry(journal, "second").save("text")
+
+    assert totals(build_site(site, workers=1)) == (2, 0, 0)
+    with open(page(site, "notes", "first"), encoding="utf-8") as f:
+        html = f.read()
+    assert "<h1>Hello</h1>" in html and "<script>" not in html
+    with open(os.path.join(site, "index.html"), encoding="utf-8") as f:
+        assert "2 entries" in f.read()
+    with open(os.path.join(site, SITE_MANIFEST_NAME), encoding="utf-8") as f:
+        assert set(json.load(f)["journals"]["notes"]) == {"first", "second"}
+
+
+def test_unchanged_entries_are_not_read(journal, site, monkeypatch):
+    JournalEntry(journal, "entry").save("text")
+    build_site(site, workers=1)
+    index = os.path.join(site, "index.html")
+    mtime = os.stat(index).st_mtime_ns
+
+    monkeypatch.setattr(JournalEntry, "read", lambda self: pytest.fail("read"))
+    assert totals(build_site(site, workers=1)) == (0, 1, 0)
+    # Unchanged pages aren't rewritten either
+    assert os.stat(index).st_mtime_ns == mtime
+
+
+def test_same_content_is_not_rendered(journal, site, monkeypatch):
+    entry = JournalEntry(journal, "entry")
+    entry.save("text")
+    build_site(site, workers=1)
+
+    bump_mtime(entry.filepath)
+    monkeypatch.setattr(export, "render_batch", lambda pages: pytest.fail("render"))
+    assert totals(build_site(site, workers=1)) == (0, 1, 0)
+
+
+def test_only_edited_entries_are_rendered(journal, site):
+    for title in ("a", "b", "c"):
+        JournalEntry(journal, title).save(f"text of {title}")
+    build_site(site, workers=1)
+
+    JournalEntry(journal, "b").save("edited")
+    assert totals(build_site(site, workers=1)) == (1, 2, 0)
+    with open(page(site, "notes", "b"), encoding="utf-8") as f:
+        assert "edited" in f.read()
+
+
+def test_missing_page_is_rendered_again(journal, site):
+    JournalEntry(journal, "entry").save("text")
+    build_site(site, workers=1)
+    os.remove(page(site, "notes", "entry"))
+
+    assert totals(build_site(site, workers=1)) == (1, 0, 0)
+    assert os.path.exists(page(site, "notes", "entry"))
+
+
+def test_deleted_entries_and_journals_are_removed(site):
+    kept, gone = Journal("kept"), Journal("gone")
+    for journal in (kept, gone):
+        JournalEntry(journal, "one").save("text")
+        JournalEntry(journal, "two").save("text")
+    build_site(site, workers=1)
+
+    JournalEntry(kept, "two").delete()
+    gone.delete()
+    assert totals(build_site(site, workers=1)) == (0, 1, 3)
+    assert not os.path.exists(page(site, "kept", "two"))
+    assert not os.path.exists(os.path.join(site, "gone"))
+
+
+def test_exporting_some_journals_keeps_the_others(site):
+    JournalEntry(Journal("a"), "entry").save("text")
+    JournalEntry(Journal("b"), "entry").save("text")
+    build_site(site, workers=1)
+
+    JournalEntry(Journal("b"), "entry").save("edited")
+    assert totals(build_site(site, ["a"], workers=1)) == (0, 1, 0)
+    assert os.path.exists(page(site, "b", "entry"))
+    with open(os.path.join(site, SITE_MANIFEST_NAME), encoding="utf-8") as f:
+        assert set(json.load(f)["journals"]) == {"a", "b"}
+
+
+def test_unsafe_manifest_names_are_ignored(journal, site, tmp_path):
+    outside = os.path.join(tmp_path, "outside")
+    os.makedirs(outside)
+    os.makedirs(site)
+    manifest = {
+        "version": export.SITE_VERSION,
+        "journals": {"..": {"outside": {}}, "notes": {"../../../outside": {}}},
+    }
+    with open(os.path.join(site, SITE_MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    build_site(site, workers=1)
+    assert os.path.isdir(outside)
+
+
+def test_unknown_journal(site):
+    with pytest.raises(export.ExportError):
+        build_site(site, ["missing"], workers=1)
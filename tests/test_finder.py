@@ -0,0 +1,117 @@
+"""Tests for the fuzzy title finder."""
+
+import pytest
+
+from silentmemoir.finder import Match, TitleIndex, normalize, trigrams
+from silentmemoir.models import Journal, JournalEntry
+
+
+@pytest.fixture
+def index():
+    index = TitleIndex()
+    index.built = True
+    return index
+
+
+def found(matches: list[Match]) -> list[tuple[str, str]]:
+    return [(m.journal, m.title) for m in matches]
+
+
+def test_normalize_folds_punctuation():
+    assert normalize("Morning_Pages") == "morning pages"
+    assert normalize("  morning--pages!! ") == "morning pages"
+    assert normalize("___") == ""
+
+
+def test_trigrams():
+    assert trigrams("abcd") == {"abc", "bcd"}
+    assert trigrams("ab") == set()
+
+
+def test_substring_and_prefix_search(index):
+    index.add("work")
+    index.add("work", "Morning_Pages")
+    index.add("work", "evening review")
+
+    assert found(index.search("morning pages")) == [("work", "Morning_Pages")]
+    assert found(index.search("ning")) == [("work", "Morning_Pages"), ("work", "evening review")]
+    assert found(index.search("ev")) == [("work", "evening review")]
+    assert found(index.search("wo")) == [("work", "")]
+    assert index.search("") == []
+    assert index.search("!!") == []
+
+
+def test_scattered_trigrams_match(index):
+    index.add("j", "pages of the morning")
+    assert found(index.search("morning pages")) == [("j", "pages of the morning")]
+
+
+def test_typo_falls_back_to_shared_trigrams(index):
+    index.add("j", "gratitude list")
+    index.add("j", "shopping list")
+    [best, *_] = index.search("gratitdue")
+    assert (best.journal, best.title) == ("j", "gratitude list")
+    assert 0 < best.similarity < 1
+
+
+def test_limit(index):
+    for i in range(10):
+        index.add("j", f"daily note {i}")
+    assert len(index.search("daily", limit=3)) == 3
+
+
+def test_remove_and_compaction(index):
+    for i in range(50):
+        index.add("j", f"entry {i}")
+    for i in range(40):
+        index.remove("j", f"entry {i}")
+    index.remove("j", "never indexed")
+
+    assert len(index) == 10
+    assert sorted(m.title for m in index.search("entry", limit=100)) == sorted(
+        f"entry {i}" for i in range(40, 50)
+    )
+    index.add("j", "entry 1")
+    assert ("j", "entry 1") in found(index.search("entry 1"))
+
+
+def test_remove_journal(index):
+    index.add("gone")
+    index.add("gone", "entry")
+    index.add("kept", "entry")
+    index.remove_journal("gone")
+
+    assert found(index.search("entry")) == [("kept", "entry")]
+    assert index.journals() == []
+
+
+def test_build_from_journals():
+    JournalEntry(Journal("diary"), "first day").save("text")
+    Journal("empty")
+    index = TitleIndex()
+    index.build()
+
+    assert index.journals() == ["diary", "empty"]
+    assert found(index.search("first")) == [("diary", "first day")]
+
+
+def test_updates_during_build_are_replayed():
+    JournalEntry(Journal("diary"), "on disk").save("text")
+    index = TitleIndex()
+    index.add("diary", "saved while building")
+    index.remove("diary", "on disk")
+    index.build()
+
+    assert found(index.search("saved while")) == [("diary", "saved while building")]
+    assert index.search("on disk") == []
+
+
+def test_clear_reloads_on_next_build():
+    journal = Journal("diary")
+    index = TitleIndex()
+    index.build()
+    JournalEntry(journal, "later").save("text")
+    index.clear()
+    index.build()
+
+    assert found(index.search("later")) == [("diary", "later")]
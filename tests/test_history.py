@@ -0,0 +1,118 @@
+"""Tests for entry revision history."""
+
+import random
+
+import pytest
+
+from silentmemoir import history
+from silentmemoir.config import HISTORY_KEYFRAME_INTERVAL
+from silentmemoir.history import HistoryStore, apply_delta, make_delta, tokenize
+from silentmemoir.models import JournalEntry
+
+
+@pytest.fixture
+def store(tmp_path):
+    with HistoryStore(str(tmp_path)) as store:
+        yield store
+
+
+@pytest.mark.parametrize(
+    "text", ["", "one", "  leading", "trailing  \n", "a  b\n\n\tc", "ünï côdé ✓"]
+)
+def test_tokens_join_back(text):
+    assert "".join(tokenize(text)) == text
+
+
+@pytest.mark.parametrize(
+    ("old", "new"),
+    [
+        ("", "fresh text"),
+        ("all of it goes", ""),
+        ("same text", "same text"),
+        ("the quick brown fox", "the quick red fox"),
+        ("start middle end", "new start middle end"),
+        ("start middle end", "start middle end appended"),
+        ("a b c d e f", "f e d c b a"),
+        ("no trailing", "no trailing\n\nnew paragraph\n"),
+    ],
+)
+def test_delta_round_trip(old, new):
+    old_tokens, new_tokens = tokenize(old), tokenize(new)
+    delta = make_delta(old_tokens, new_tokens)
+    assert "".join(apply_delta(old_tokens, delta)) == new
+
+
+def test_delta_of_random_edits():
+    rng = random.Random(8)
+    words = [f"w{i} " for i in range(200)]
+    text = "".join(words)
+    for _ in range(50):
+        tokens = tokenize(text)
+        at = rng.randrange(len(tokens) + 1)
+        cut = rng.randrange(5)
+        edited = tokens[:at] + [f"new{rng.random():.3f} "] + tokens[at + cut :]
+        delta = make_delta(tokens, edited)
+        assert apply_delta(tokens, delta) == edited
+        text = "".join(edited)
+
+
+def test_small_edit_stores_small_delta(store):
+    text = "".join(f"word{i} " for i in range(2000))
+    store.record("entry", text)
+    store.record("entry", text + "one more sentence.")
+    latest, first = store.revisions("entry")
+    assert first.keyframe and not latest.keyframe
+    assert latest.stored < first.stored / 10
+
+
+def test_every_revision_reads_back(store):
+    texts = [f"line {i}\n" * (i % 7 + 1) + "shared tail" for i in range(70)]
+    for text in texts:
+        store.record("entry", text)
+    for number, text in enumerate(texts, 1):
+        assert store.text("entry", number) == text
+
+
+def test_keyframes_bound_replay(store):
+    for i in range(HISTORY_KEYFRAME_INTERVAL * 2 + 1):
+        store.record("entry", f"base text that barely changes {i}")
+    keyframes = [r.number for r in store.revisions("entry") if r.keyframe]
+    assert sorted(keyframes) == [
+        1,
+        HISTORY_KEYFRAME_INTERVAL + 1,
+        2 * HISTORY_KEYFRAME_INTERVAL + 1,
+    ]
+
+
+def test_unchanged_save_is_not_recorded(store):
+    assert store.record("entry", "text") == 1
+    assert store.record("entry", "text") == 0
+    assert len(store.revisions("entry")) == 1
+
+
+def test_missing_revision(store):
+    store.record("entry", "text")
+    assert store.text("entry", 2) is None
+    assert store.text("other", 1) is None
+
+
+def test_reads_without_recent_cache(tmp_path, monkeypatch):
+    with HistoryStore(str(tmp_path)) as store:
+        store.record("entry", "first version")
+    # A new process diffs against the stored revisions, not remembered tokens
+    monkeypatch.setattr(history, "_recent", history.OrderedDict())
+    with HistoryStore(str(tmp_path)) as store:
+        store.record("entry", "second version")
+        assert store.text("entry", 1) == "first version"
+        assert store.text("entry", 2) == "second version"
+
+
+def test_entry_saves_are_recorded(journal):
+    entry = JournalEntry(journal, "diary")
+    entry.save("first draft")
+    entry.save("second draft")
+    entry.save("second draft")
+
+    assert [r.number for r in entry.revisions()] == [2, 1]
+    assert entry.read_revision(1) == "first draft"
+    assert entry.read_revision(2) == "second draft"
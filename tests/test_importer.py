@@ -0,0 +1,195 @@
+"""Tests for bulk import."""
+
+import datetime
+import io
+import json
+import os
+import tarfile
+
+import pytest
+
+from silentmemoir import importer
+from silentmemoir.importer import RawDocument, SourceError
+from silentmemoir.models import Journal, JournalEntry
+from silentmemoir.search import SearchIndex
+from silentmemoir.stats import load_summary
+
+
+def write_tree(root, files: dict[str, str]) -> str:
+    for relpath, content in files.items():
+        path = os.path.join(root, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+    return str(root)
+
+
+def import_source(source, journal="imported", **kwargs):
+    by_folder = kwargs.pop("by_folder", False)
+    raws = importer.open_source(source, journal, by_folder)
+    return importer.import_documents(raws, workers=1, **kwargs)
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("2024-03-01T08:30:00", datetime.datetime(2024, 3, 1, 8, 30)),
+        ("2024-03-01 08:30", datetime.datetime(2024, 3, 1, 8, 30)),
+        ("2024/03/01", datetime.datetime(2024, 3, 1)),
+        ("01.03.2024", datetime.datetime(2024, 3, 1)),
+        ("", None),
+        (None, None),
+        ("last tuesday", None),
+    ],
+)
+def test_parse_date(value, expected):
+    assert importer.parse_date(value) == expected
+
+
+def test_parse_date_converts_to_local_time():
+    parsed = importer.parse_date("2024-03-01T08:30:00Z")
+    expected = datetime.datetime(2024, 3, 1, 8, 30, tzinfo=datetime.timezone.utc)
+    assert parsed == expected.astimezone().replace(tzinfo=None)
+
+
+def test_normalize_title_sources():
+    front = RawDocument("j", "a.md", b"---\ntitle: Front\ndate: 2024-01-02\n---\nbody")
+    doc = importer.normalize(front)
+    assert (doc.title, doc.date) == ("Front", datetime.datetime(2024, 1, 2))
+    assert doc.body.startswith("---\n")
+
+    heading = importer.normalize(RawDocument("j", "b.md", "intro\n# The  Heading\n"))
+    assert heading.title == "The Heading"
+    assert heading.body == "# The Heading\n\nintro\n# The  Heading\n"
+
+    named = importer.normalize(
+        RawDocument("j", "file name.txt", "no heading", mtime=86400)
+    )
+    assert named.title == "file name"
+    assert named.date == datetime.datetime.fromtimestamp(86400)
+
+
+def test_normalize_cleans_text():
+    raw = RawDocument("j", "x.md", b"\xef\xbb\xbf# T\r\nline\rbad \xff\x00  \n\n")
+    assert importer.normalize(raw).body == "# T\nline\nbad �\n"
+
+
+@pytest.mark.parametrize("journal", ["", ".", "..", "../up", "a/b", ".hidden", "a\0b"])
+def test_normalize_rejects_bad_journal(journal):
+    with pytest.raises(ValueError):
+        importer.normalize(RawDocument(journal, "x.md", "text"))
+
+
+def test_read_jsonl_skips_bad_lines(tmp_path):
+    path = os.path.join(tmp_path, "notes.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"title": "One", "body": "first", "date": "2024-01-01"}))
+        f.write("\nnot json\n\n[1, 2]\n")
+        f.write(json.dumps({"text": "second", "journal": "other"}) + "\n")
+
+    docs = list(importer.read_jsonl(path, "default"))
+    assert [(d.journal, d.title, d.data) for d in docs] == [
+        ("default", "One", "first"),
+        ("other", None, "second"),
+    ]
+
+
+def test_unknown_source(tmp_path):
+    path = os.path.join(tmp_path, "notes.bin")
+    with open(path, "wb") as f:
+        f.write(b"\0\1\2")
+    with pytest.raises(SourceError):
+        importer.open_source(path, "j")
+
+
+def test_import_tree(tmp_path):
+    source = write_tree(
+        tmp_path / "source",
+        {
+            "first.md": "---\ndate: 2024-05-01 09:00\n---\nhello there",
+            "sub/second.txt": "# Second\n\nmore words here",
+            "image.png": "skipped",
+            ".hidden/third.md": "skipped too",
+        },
+    )
+    result = import_source(source)
+    assert (result.imported, result.failed) == (2, 0)
+
+    journal = Journal("imported")
+    names = journal.list_entries()
+    assert "entry_2024-05-01_09-00-00.md" in names
+    assert len(names) == 2
+
+    entry = JournalEntry(journal, "entry_2024-05-01_09-00-00")
+    assert entry.read().endswith("hello there\n")
+    assert [r.number for r in entry.revisions()] == [1]
+    with SearchIndex() as index:
+        assert [hit.title for hit in index.search("hello", snippets=False)] == [
+            "entry_2024-05-01_09-00-00"
+        ]
+    summary = load_summary("imported")
+    assert summary.entries == 2
+    assert summary.words == sum(info.words for info in journal.entry_details())
+
+
+def test_clashing_dates_move_on(tmp_path):
+    source = write_tree(
+        tmp_path / "source",
+        {f"{i}.md": "---\ndate: 2024-05-01 09:00\n---\nsame time" for i in range(3)},
+    )
+    JournalEntry(Journal("imported"), "entry_2024-05-01_09-00-00").save("existing")
+
+    assert import_source(source, batch_size=2).imported == 3
+    assert Journal("imported").list_entries() == [
+        f"entry_2024-05-01_09-00-0{i}.md" for i in range(4)
+    ]
+    # Existing entries are never overwritten
+    existing = JournalEntry(Journal("imported"), "entry_2024-05-01_09-00-00")
+    assert existing.read() == "existing"
+
+
+def test_import_by_title_and_folder(tmp_path):
+    source = write_tree(
+        tmp_path / "source",
+        {
+            "work/a.md": "# Plans\n\none",
+            "work/b.md": "# Plans\n\ntwo",
+            "home/c.md": "# A/B test\n\nthree",
+        },
+    )
+    import_source(source, by_folder=True, by_title=True)
+
+    assert Journal.list_names() == ["home", "work"]
+    assert Journal("work").list_entries() == ["Plans (2).md", "Plans.md"]
+    assert Journal("home").list_entries() == ["A-B test.md"]
+
+
+def test_import_tar(tmp_path):
+    path = os.path.join(tmp_path, "notes.tar.gz")
+    with tarfile.open(path, "w:gz") as tar:
+        data = b"# From tar\n\nbody"
+        info = tarfile.TarInfo("./notes/one.md")
+        info.size, info.mtime = len(data), 1_700_000_000
+        tar.addfile(info, io.BytesIO(data))
+
+    assert import_source(path).imported == 1
+    [name] = Journal("imported").list_entries()
+    date = datetime.datetime.fromtimestamp(1_700_000_000)
+    assert name == f"entry_{date:%Y-%m-%d_%H-%M-%S}.md"
+
+
+def test_bad_documents_are_counted():
+    raws = [
+        RawDocument("good", "a.md", "fine"),
+        RawDocument("../escape", "b.md", "rejected"),
+    ]
+    result = importer.import_documents(raws, workers=1)
+    assert (result.imported, result.failed) == (1, 1)
+    assert Journal.list_names() == ["good"]
+
+
+def test_import_in_worker_processes():
+    raws = [RawDocument("pooled", f"{i}.md", f"# Doc {i}\n\ntext") for i in range(6)]
+    result = importer.import_documents(raws, by_title=True, workers=2, batch_size=2)
+    assert result.imported == 6
+    assert len(Journal("pooled").list_entries()) == 6
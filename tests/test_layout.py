@@ -0,0 +1,78 @@
+"""Tests for the flat and sharded journal layouts."""
+
+import datetime
+import os
+
+from silentmemoir import layout
+from silentmemoir.config import COMPRESSED_EXTENSION
+
+DATED = "entry_2024-03-09_08-30-00"
+
+
+def touch(path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("text")
+
+
+def test_journal_names():
+    assert layout.is_valid_journal_name("Morning pages")
+    for name in ("", ".", "..", ".hidden", "a/b", "../up", "a\0b"):
+        assert not layout.is_valid_journal_name(name)
+    for sep in filter(None, (os.sep, os.altsep)):
+        assert not layout.is_valid_journal_name(f"a{sep}b")
+
+
+def test_dated_title_round_trip():
+    date = datetime.datetime(2024, 3, 9, 8, 30)
+    assert layout.dated_title(date) == DATED
+    assert layout.entry_date(DATED) == date
+    assert layout.entry_date("Groceries") is None
+    assert layout.entry_date("entry_not a date") is None
+
+
+def test_shard_for():
+    assert layout.shard_for(DATED) == os.path.join("2024", "03")
+    assert layout.shard_for("Groceries") == ""
+
+
+def test_entry_paths_follow_the_marker(tmp_path):
+    flat = os.path.join(tmp_path, f"{DATED}.md")
+    sharded = os.path.join(tmp_path, "2024", "03", f"{DATED}.md")
+    assert not layout.is_sharded(tmp_path)
+    assert layout.entry_paths(tmp_path, DATED) == (flat, sharded)
+
+    layout.set_sharded(tmp_path, True)
+    assert layout.is_sharded(tmp_path)
+    assert layout.entry_paths(tmp_path, DATED) == (sharded, flat)
+    # Custom titles stay at the top either way
+    custom = os.path.join(tmp_path, "Groceries.md")
+    assert layout.entry_paths(tmp_path, "Groceries") == (custom, custom)
+
+    layout.set_sharded(tmp_path, False)
+    layout.set_sharded(tmp_path, False)
+    assert not layout.is_sharded(tmp_path)
+
+
+def test_resolve_finds_entries_in_the_other_layout(tmp_path):
+    flat = os.path.join(tmp_path, f"{DATED}.md")
+    sharded = os.path.join(tmp_path, "2024", "03", f"{DATED}.md")
+    layout.set_sharded(tmp_path, True)
+    assert layout.resolve(tmp_path, DATED) == sharded
+
+    touch(flat + COMPRESSED_EXTENSION)
+    assert layout.resolve(tmp_path, DATED) == flat
+    touch(sharded)
+    assert layout.resolve(tmp_path, DATED) == sharded
+
+
+def test_shard_dirs(tmp_path):
+    for shard in ("2024/03", "2023/12", "2024/3", "notes/01"):
+        os.makedirs(os.path.join(tmp_path, shard))
+    touch(os.path.join(tmp_path, "2022", "01.md"))
+
+    assert layout.shard_dirs(tmp_path) == [
+        os.path.join("2023", "12"),
+        os.path.join("2024", "03"),
+    ]
+    assert layout.shard_dirs(os.path.join(tmp_path, "missing")) == []
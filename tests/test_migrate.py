@@ -0,0 +1,114 @@
+"""Tests for migrating journals between layouts."""
+
+import os
+
+import pytest
+
+from silentmemoir import compression, layout, migrate, segments
+from silentmemoir.migrate import MigrationError, migrate_journal, stray_entries
+from silentmemoir.models import JournalEntry
+
+TITLES = [
+    "entry_2023-12-31_23-59-59",
+    "entry_2024-01-01_00-00-00",
+    "entry_2024-01-15_12-00-00",
+]
+
+
+def files(journal_path: str) -> list[str]:
+    return sorted(
+        os.path.relpath(os.path.join(root, name), journal_path)
+        for root, _, names in os.walk(journal_path)
+        for name in names
+        if not name.startswith(".")
+    )
+
+
+@pytest.fixture
+def flat(journal):
+    for title in TITLES:
+        JournalEntry(journal, title).save(f"text of {title}")
+    JournalEntry(journal, "Groceries").save("eggs")
+    return journal
+
+
+def test_shard_and_flatten(flat):
+    path = flat.journal_path
+    progress = []
+    assert migrate_journal(path, True, lambda done, total: progress.append(done)) == 3
+    assert progress == [1, 2, 3]
+    assert files(path) == [
+        os.path.join("2023", "12", f"{TITLES[0]}.md"),
+        os.path.join("2024", "01", f"{TITLES[1]}.md"),
+        os.path.join("2024", "01", f"{TITLES[2]}.md"),
+        "Groceries.md",
+    ]
+    assert JournalEntry(flat, TITLES[0]).read() == f"text of {TITLES[0]}"
+
+    assert migrate_journal(path, False) == 3
+    assert files(path) == ["Groceries.md", *(f"{title}.md" for title in TITLES)]
+    # The emptied year/month directories are gone
+    assert layout.shard_dirs(path) == []
+    assert migrate_journal(path, False) == 0
+
+
+def test_interrupted_migration_resumes(flat, monkeypatch):
+    path = flat.journal_path
+    move = migrate._move
+    moves = []
+
+    def crash_on_second(src, dst):
+        if moves:
+            raise OSError("interrupted")
+        moves.append(src)
+        move(src, dst)
+
+    monkeypatch.setattr(migrate, "_move", crash_on_second)
+    with pytest.raises(OSError):
+        migrate_journal(path, True)
+    monkeypatch.setattr(migrate, "_move", move)
+
+    # Mid-migration, entries are readable in either layout
+    assert layout.is_sharded(path)
+    assert len(stray_entries(path, True)) == 2
+    for title in TITLES:
+        assert JournalEntry(flat, title).read() == f"text of {title}"
+
+    assert migrate_journal(path, True) == 2
+    assert stray_entries(path, True) == []
+    assert len(files(path)) == 4
+
+
+def test_save_during_migration_is_not_overwritten(flat):
+    path = flat.journal_path
+    layout.set_sharded(path, True)
+    # Saved after the marker was switched, before the old copy was moved
+    entry = JournalEntry(flat, TITLES[1])
+    entry.save("newer")
+    old = os.path.join(path, f"{TITLES[1]}.md")
+    with open(old, "w", encoding="utf-8") as f:
+        f.write("older")
+
+    migrate_journal(path, True)
+    assert not os.path.exists(old)
+    assert JournalEntry(flat, TITLES[1]).read() == "newer"
+
+
+def test_compressed_entries_move_compressed(flat):
+    path = flat.journal_path
+    plain = os.path.join(path, f"{TITLES[0]}.md")
+    with open(plain, "w", encoding="utf-8") as f:
+        f.write("compressible " * 100)
+    assert compression.compress_file(plain)
+
+    migrate_journal(path, True)
+    sharded = os.path.join(path, "2023", "12", f"{TITLES[0]}.md")
+    assert os.path.exists(compression.compressed_path(sharded))
+    assert JournalEntry(flat, TITLES[0]).read() == "compressible " * 100
+
+
+def test_segmented_journal_is_refused(journal):
+    JournalEntry(journal, TITLES[0]).save("text")
+    segments.convert_to_segments(journal.journal_path)
+    with pytest.raises(MigrationError):
+        migrate_journal(journal.journal_path, True)
@@ -0,0 +1,55 @@
+"""Tests for the entry prefetch cache."""
+
+from silentmemoir.config import LARGE_ENTRY_THRESHOLD
+from silentmemoir.models import JournalEntry
+from silentmemoir.prefetch import EntryCache, entry_cache, prefetch
+from silentmemoir.preview import split_chunks
+
+TEXT = "# Title\n\nA paragraph.\n\n- a list\n"
+
+
+def test_put_keeps_text_and_chunks(journal):
+    cache = EntryCache()
+    entry = JournalEntry(journal, "entry")
+    cache.put(entry, (1, 2), TEXT)
+
+    cached = cache.peek(entry)
+    assert cached.text == TEXT
+    assert cached.chunks == split_chunks(TEXT)
+    assert cache.nbytes == cached.nbytes
+
+    cache.discard(entry)
+    assert cache.peek(entry) is None
+    assert cache.nbytes == 0
+
+
+def test_least_recently_used_is_evicted(journal):
+    entries = [JournalEntry(journal, str(i)) for i in range(3)]
+    cache = EntryCache()
+    cache.put(entries[0], (1, 1), TEXT)
+    cache.max_bytes = cache.nbytes * 2
+
+    cache.put(entries[1], (1, 1), TEXT)
+    cache.peek(entries[0])
+    cache.put(entries[2], (1, 1), TEXT)
+    assert cache.peek(entries[1]) is None
+    assert cache.peek(entries[0]) and cache.peek(entries[2])
+
+    cache.put(entries[1], (1, 1), "x" * cache.max_bytes)
+    assert cache.peek(entries[1]) is None
+
+
+def test_prefetch(journal):
+    entry_cache.clear()
+    JournalEntry(journal, "small").save(TEXT)
+    JournalEntry(journal, "large").save("x" * (LARGE_ENTRY_THRESHOLD + 1))
+
+    assert prefetch(journal, ["small", "large", "missing"]) == 1
+    assert prefetch(journal, ["small"]) == 0
+    entry = JournalEntry(journal, "small")
+    assert entry_cache.peek(entry).version == entry.version()
+
+    entry.save(TEXT + "more")
+    assert prefetch(journal, ["small"]) == 1
+    assert entry_cache.peek(entry).text == TEXT + "more"
+    entry_cache.clear()
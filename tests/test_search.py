@@ -0,0 +1,123 @@
+"""Tests for the full-text search index."""
+
+import os
+import shutil
+
+import pytest
+
+from silentmemoir.models import Journal, JournalEntry
+from silentmemoir.search import (
+    SearchHit,
+    SearchIndex,
+    make_snippet,
+    tokenize,
+    tokenize_chunks,
+)
+
+
+@pytest.fixture
+def index():
+    with SearchIndex() as index:
+        yield index
+
+
+def bump_mtime(path: str) -> None:
+    # Directory timestamps can be coarser than two writes apart
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def titles(hits) -> list[str]:
+    return [hit.title for hit in hits]
+
+
+def test_tokenize():
+    assert tokenize("Hello, World! it's 2024") == ["hello", "world", "it", "s", "2024"]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 100])
+def test_tokenize_chunks_keeps_split_terms_whole(size):
+    text = "Morning pages, written early; evening review."
+    chunks = [text[i : i + size] for i in range(0, len(text), size)]
+    assert list(tokenize_chunks(chunks)) == tokenize(text)
+
+
+def test_bm25_ranking(journal, index):
+    JournalEntry(journal, "once").save("garden " + "filler " * 20)
+    JournalEntry(journal, "often").save("garden garden garden " + "filler " * 18)
+    JournalEntry(journal, "never").save("filler " * 21)
+
+    hits = index.search("garden ", snippets=False)
+    assert titles(hits) == ["often", "once"]
+    assert hits[0].score > hits[1].score > 0
+
+
+def test_rare_terms_weigh_more(journal, index):
+    JournalEntry(journal, "common").save("walk walk walk")
+    JournalEntry(journal, "rare").save("walk heron")
+    for i in range(5):
+        JournalEntry(journal, f"other {i}").save("walk today")
+
+    assert titles(index.search("walk heron ", snippets=False))[0] == "rare"
+
+
+def test_last_term_matches_as_prefix(journal, index):
+    JournalEntry(journal, "entry").save("gratitude journal")
+    assert titles(index.search("grati", snippets=False)) == ["entry"]
+    assert index.search("grati ", snippets=False) == []
+    assert index.search("", snippets=False) == []
+
+
+def test_resave_replaces_terms(journal, index):
+    entry = JournalEntry(journal, "entry")
+    entry.save("old words")
+    entry.save("new words")
+
+    assert index.search("old ", snippets=False) == []
+    assert titles(index.search("new ", snippets=False)) == ["entry"]
+    assert index.update_entry(entry) is False
+
+
+def test_deleted_entry_is_dropped(journal, index):
+    JournalEntry(journal, "entry").save("ephemeral")
+    JournalEntry(journal, "entry").delete()
+    assert index.search("ephemeral ", snippets=False) == []
+
+
+def test_hits_in_deleted_journals_are_skipped(index):
+    for name in ("gone", "kept"):
+        for i in range(3):
+            # The deleted journal's entries rank first
+            text = "shared " * (5 if name == "gone" else 1)
+            JournalEntry(Journal(name), f"{name} {i}").save(text)
+    # Removed behind the index's back, e.g. by another process
+    shutil.rmtree(Journal("gone", create=False).journal_path)
+
+    hits = index.search("shared ", limit=2, snippets=False)
+    assert [hit.journal for hit in hits] == ["kept", "kept"]
+    # Looking the journal up doesn't bring it back
+    assert not os.path.exists(Journal("gone", create=False).journal_path)
+
+
+def test_sync_picks_up_outside_changes(journal, index):
+    JournalEntry(journal, "saved").save("from the app")
+    with open(os.path.join(journal.journal_path, "external.md"), "w") as f:
+        f.write("written by hand")
+    bump_mtime(journal.journal_path)
+
+    assert index.sync() == 1
+    assert titles(index.search("hand ", snippets=False)) == ["external"]
+    assert index.sync() == 0
+
+    os.remove(os.path.join(journal.journal_path, "external.md"))
+    bump_mtime(journal.journal_path)
+    assert index.sync() == 1
+    assert index.search("hand ", snippets=False) == []
+
+
+def test_snippet(journal, index):
+    JournalEntry(journal, "long").save("intro " * 40 + "the needle is here " + "outro " * 40)
+    [hit] = index.search("needle")
+    assert "needle" in hit.snippet
+    assert hit.snippet.startswith("…") and hit.snippet.endswith("…")
+    assert make_snippet(SearchHit("missing", "long", 0), ["needle"]) == ""
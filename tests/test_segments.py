@@ -0,0 +1,180 @@
+"""Tests for the append-only segment store."""
+
+import json
+import os
+import sys
+
+import pytest
+
+from silentmemoir import segments
+from silentmemoir.models import JournalEntry
+from silentmemoir.segments import INDEX_FILENAME, SegmentError, SegmentStore
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    path = os.path.join(tmp_path, "segmented")
+    os.makedirs(path)
+    return path
+
+
+def only_segment(store: SegmentStore) -> str:
+    [name] = [n for n in os.listdir(store.path) if segments.SEGMENT_PATTERN.match(n)]
+    return os.path.join(store.path, name)
+
+
+def test_put_get_round_trip(journal_path):
+    store = SegmentStore(journal_path)
+    store.put("first", "hello world")
+    store.put("second", "ünïcode ✓")
+    store.put("first", "hello again")
+
+    reopened = SegmentStore(journal_path)
+    assert reopened.titles() == ["first", "second"]
+    assert reopened.get("first") == "hello again"
+    assert reopened.get("second") == "ünïcode ✓"
+    assert reopened.get("missing") is None
+
+
+def test_delete_survives_reopen(journal_path):
+    store = SegmentStore(journal_path)
+    store.put("gone", "soon deleted")
+    store.put("kept", "still here")
+    store.delete("gone")
+    store.delete("never existed")
+
+    reopened = SegmentStore(journal_path)
+    assert reopened.titles() == ["kept"]
+    assert reopened.get("gone") is None
+
+
+def test_details_count_words(journal_path):
+    store = SegmentStore(journal_path)
+    store.put("entry", "three little words")
+    [info] = store.details()
+    assert info.filename == "entry.md"
+    assert info.size == len(b"three little words")
+    assert info.words == 3
+
+
+def test_torn_tail_is_dropped(journal_path):
+    store = SegmentStore(journal_path)
+    store.put("whole", "written completely")
+    path = only_segment(store)
+    intact = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(segments.MAGIC + b"\x01\x05")  # A crash mid-header
+
+    reopened = SegmentStore(journal_path)
+    assert reopened.titles() == ["whole"]
+    assert os.path.getsize(path) == intact
+
+    # New records follow the valid ones and can be read back
+    reopened.put("after", "written after the crash")
+    assert SegmentStore(journal_path).get("after") == "written after the crash"
+
+
+def test_corrupt_record_is_not_replayed(journal_path):
+    store = SegmentStore(journal_path)
+    store.put("good", "fine")
+    store.put("bad", "flipped")
+    path = only_segment(store)
+    with open(path, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b"X")
+
+    reopened = SegmentStore(journal_path)
+    assert reopened.titles() == ["good"]
+
+
+def test_snapshot_replays_only_later_records(journal_path):
+    store = SegmentStore(journal_path)
+    store.put("before", "in the snapshot")
+    store.write_snapshot()
+    store.put("after", "replayed")
+
+    reopened = SegmentStore(journal_path)
+    assert reopened.unsnapshotted == 1
+    assert reopened.titles() == ["after", "before"]
+
+
+def test_damaged_snapshot_is_rebuilt(journal_path):
+    store = SegmentStore(journal_path)
+    store.put("entry", "content")
+    store.write_snapshot()
+    with open(os.path.join(store.path, INDEX_FILENAME), "w") as f:
+        f.write("{not json")
+
+    assert SegmentStore(journal_path).get("entry") == "content"
+
+
+def test_snapshot_of_missing_fields_is_rebuilt(journal_path):
+    store = SegmentStore(journal_path)
+    store.put("entry", "content")
+    with open(os.path.join(store.path, INDEX_FILENAME), "w") as f:
+        json.dump({"entries": {}}, f)
+
+    assert SegmentStore(journal_path).get("entry") == "content"
+
+
+def test_compaction_keeps_live_entries(journal_path):
+    store = SegmentStore(journal_path)
+    for i in range(20):
+        store.put("edited", f"version {i}")
+    store.put("deleted", "dead")
+    store.delete("deleted")
+    before = store.total_bytes
+
+    store.compact()
+    assert store.total_bytes < before
+    assert store.get("edited") == "version 19"
+
+    reopened = SegmentStore(journal_path)
+    assert reopened.titles() == ["edited"]
+    assert reopened.get("edited") == "version 19"
+
+
+def test_convert_round_trip(journal):
+    for title in ("a", "b"):
+        JournalEntry(journal, title).save(f"entry {title}")
+
+    assert journal.enable_segments() == 2
+    assert segments.is_segmented(journal.journal_path)
+    assert sorted(journal.list_entries()) == ["a.md", "b.md"]
+    assert JournalEntry(journal, "a").read() == "entry a"
+    JournalEntry(journal, "c").save("entry c")
+
+    assert journal.disable_segments() == 3
+    assert not segments.is_segmented(journal.journal_path)
+    assert sorted(journal.list_entries()) == ["a.md", "b.md", "c.md"]
+    assert JournalEntry(journal, "c").read() == "entry c"
+
+
+def test_convert_twice_fails(journal):
+    journal.enable_segments()
+    with pytest.raises(SegmentError):
+        journal.enable_segments()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses flock to probe the lock")
+def test_file_lock_is_released(tmp_path):
+    import fcntl
+
+    path = os.path.join(tmp_path, "lock")
+    lock = segments._FileLock(path)
+
+    def locked_elsewhere() -> bool:
+        fd = os.open(path, os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        finally:
+            os.close(fd)
+        return False
+
+    with lock:
+        with lock:
+            assert locked_elsewhere()
+        assert locked_elsewhere()
+    assert not locked_elsewhere()
@@ -0,0 +1,147 @@
+"""Tests for writing statistics."""
+
+import datetime
+import os
+
+import pytest
+
+from silentmemoir.config import STATS_RECENT_DAYS
+from silentmemoir.models import Journal, JournalEntry
+from silentmemoir.stats import StatsStore, load_summary, main, streaks
+
+TODAY = datetime.date(2024, 3, 10)
+
+
+@pytest.fixture
+def store():
+    with StatsStore() as store:
+        yield store
+
+
+def title(day: int, hour: int = 9) -> str:
+    return f"entry_2024-03-{day:02d}_{hour:02d}-00-00"
+
+
+@pytest.mark.parametrize(
+    ("days", "expected"),
+    [
+        ([], (0, 0)),
+        (["2024-03-10"], (1, 1)),
+        (["2024-03-09"], (1, 1)),  # Today's entry may still come
+        (["2024-03-08"], (0, 1)),
+        (
+            ["2024-03-01", "2024-03-02", "2024-03-03", "2024-03-09", "2024-03-10"],
+            (2, 3),
+        ),
+        (["2024-02-28", "2024-02-29", "2024-03-01"], (0, 3)),
+    ],
+)
+def test_streaks(days, expected):
+    assert streaks(days, TODAY) == expected
+
+
+def test_summary_totals(store):
+    store.record_entry("a", title(8), 10)
+    store.record_entry("a", title(9, 21), 5)
+    store.record_entry("a", title(10), 1)
+    store.record_entry("b", title(10, 22), 100)
+
+    summary = store.summary(today=TODAY)
+    assert (summary.entries, summary.words) == (4, 116)
+    assert (summary.days_written, summary.current_streak) == (3, 3)
+    assert summary.journals == [("b", 1, 100), ("a", 3, 16)]
+    assert len(summary.recent) == STATS_RECENT_DAYS
+    assert summary.recent[-1] == ("2024-03-10", 2, 101)
+    # 2024-03-10 was a Sunday
+    assert summary.heatmap[6][22] == 1
+    assert sum(map(sum, summary.heatmap)) == 4
+
+    only_a = store.summary("a", today=TODAY)
+    assert (only_a.entries, only_a.words) == (3, 16)
+
+
+def test_resave_adjusts_words(store):
+    store.record_entry("a", title(10), 10)
+    store.record_entry("a", title(10), 25)
+    summary = store.summary(today=TODAY)
+    assert (summary.entries, summary.words) == (1, 25)
+
+
+def test_untimestamped_title_uses_written_time(store):
+    written = datetime.datetime(2024, 3, 5, 13).timestamp()
+    store.record_entry("a", "my notes", 3, written)
+    assert store.summary(today=TODAY).recent[-6] == ("2024-03-05", 1, 3)
+
+
+def test_removals(store):
+    store.record_entry("a", title(9), 10)
+    store.record_entry("a", title(10), 20)
+    store.record_entry("b", title(10), 30)
+    store.remove_entry("a", title(10))
+    store.remove_entry("a", "never recorded")
+
+    summary = store.summary(today=TODAY)
+    assert (summary.entries, summary.words) == (2, 40)
+    store.remove_journal("b")
+    summary = store.summary(today=TODAY)
+    assert summary.journals == [("a", 1, 10)]
+    assert summary.recent[-1] == ("2024-03-10", 0, 0)
+
+
+def test_summary_cache_follows_changes(store):
+    store.record_entry("a", title(10), 1)
+    first = store.summary(today=TODAY)
+    assert store.summary(today=TODAY) is first
+
+    store.record_entry("a", title(9), 1)
+    assert store.summary(today=TODAY).entries == 2
+
+
+def test_empty_summary(store):
+    summary = store.summary(today=TODAY)
+    assert (summary.entries, summary.words, summary.longest_streak) == (0, 0, 0)
+    assert summary.journals == []
+
+
+def test_saves_and_rebuild_agree(journal):
+    JournalEntry(journal, "entry_2024-03-09_10-00-00").save("one two three")
+    JournalEntry(journal, "entry_2024-03-10_10-00-00").save("four five")
+    JournalEntry(Journal("other"), "loose notes").save("six")
+    JournalEntry(journal, "entry_2024-03-10_10-00-00").delete()
+
+    saved = load_summary()
+    assert (saved.entries, saved.words) == (2, 4)
+    rebuilt = load_summary(rebuild=True)
+    assert (rebuilt.entries, rebuilt.words) == (2, 4)
+    assert rebuilt.journals == saved.journals
+
+
+def test_first_summary_builds_from_journals(journal):
+    JournalEntry(journal, "entry_2024-03-09_10-00-00").save("counted")
+    with StatsStore() as store:
+        store.invalidate()
+        assert not store.built
+
+    assert load_summary().entries == 1
+    with StatsStore() as store:
+        assert store.built
+
+
+def test_missing_data_directory_is_created(tmp_path, monkeypatch):
+    path = os.path.join(tmp_path, "fresh", "cache", "stats.db")
+    monkeypatch.setattr(StatsStore, "path", path)
+    with StatsStore():
+        pass
+    assert os.path.exists(path)
+
+
+def test_main_reports_unreadable_statistics(tmp_path, monkeypatch, capsys):
+    blocker = os.path.join(tmp_path, "not a directory")
+    open(blocker, "w").close()
+    monkeypatch.setattr(StatsStore, "path", os.path.join(blocker, "stats.db"))
+    monkeypatch.setattr("sys.argv", ["stats"])
+
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 2
+    assert "error:" in capsys.readouterr().err
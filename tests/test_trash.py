@@ -0,0 +1,77 @@
+"""Tests for the journal trash."""
+
+import os
+
+import pytest
+
+from silentmemoir import trash
+from silentmemoir.models import JournalEntry
+from silentmemoir.trash import PURGING_PREFIX, TrashError
+
+
+@pytest.fixture
+def trashed(journal):
+    for i in range(3):
+        JournalEntry(journal, f"entry {i}").save("text")
+    return trash.move_to_trash(journal.journal_path, journal.name)
+
+
+def test_move_to_trash_and_restore(journal, trashed):
+    assert not os.path.exists(journal.journal_path)
+    assert trash.list_trash() == [trashed]
+
+    trash.restore(trashed, journal.journal_path)
+    assert trash.list_trash() == []
+    assert JournalEntry(journal, "entry 0").read() == "text"
+
+
+def test_restore_refuses_a_taken_name(journal, trashed):
+    os.makedirs(journal.journal_path)
+    with pytest.raises(TrashError):
+        trash.restore(trashed, journal.journal_path)
+    assert trash.list_trash() == [trashed]
+
+
+def test_purge_reports_progress(trashed):
+    progress = []
+    assert trash.purge(trashed, lambda done, total: progress.append((done, total)))
+    done, total = progress[-1]
+    assert done == total >= 3
+    assert not os.path.exists(trashed.path)
+    assert os.listdir(trash.TRASH_PATH) == []
+
+
+def test_restore_after_purge_started(journal, trashed, monkeypatch):
+    restored = []
+    remove_tree = trash._remove_tree
+
+    def restore_meanwhile(path, progress):
+        # The claim is taken: the restore must not get a half-removed journal
+        with pytest.raises(TrashError):
+            trash.restore(trashed, journal.journal_path)
+        restored.append(os.path.exists(journal.journal_path))
+        return remove_tree(path, progress)
+
+    monkeypatch.setattr(trash, "_remove_tree", restore_meanwhile)
+    assert trash.purge(trashed)
+    assert restored == [False]
+
+
+def test_purge_after_restore(journal, trashed):
+    trash.restore(trashed, journal.journal_path)
+    assert not trash.purge(trashed)
+    assert JournalEntry(journal, "entry 1").read() == "text"
+
+
+def test_purge_expired(trashed):
+    assert trash.purge_expired(older_than=3600) == 0
+    assert trash.list_trash() == [trashed]
+
+    # An interrupted purge is finished whatever its age
+    interrupted = os.path.join(trash.TRASH_PATH, PURGING_PREFIX + "1-old")
+    os.makedirs(os.path.join(interrupted, "2024"))
+    assert trash.purge_expired(older_than=3600) == 1
+    assert trash.list_trash() == [trashed]
+
+    assert trash.purge_expired(older_than=0) == 1
+    assert os.listdir(trash.TRASH_PATH) == []
@@ -0,0 +1,171 @@
+"""Tests for turning directory changes into list deltas."""
+
+import os
+
+import pytest
+
+from silentmemoir import compression, segments
+from silentmemoir.config import SEGMENTS_DIRNAME
+from silentmemoir.models import Journal, JournalEntry
+from silentmemoir.watcher import Change, Delta, JournalWatcher, PollingWatcher, _change
+
+
+class FakeWatcher:
+    """Backend that reports whatever changes the test queues."""
+
+    def __init__(self):
+        self.watched: set[str] = set()
+        self.changes: list[Change] = []
+
+    def watch(self, path):
+        if not os.path.isdir(path):
+            raise FileNotFoundError(path)
+        self.watched.add(path)
+
+    def unwatch(self, path):
+        self.watched.discard(path)
+
+    def read(self, timeout):
+        changes, self.changes = self.changes, []
+        return changes
+
+    def close(self):
+        self.watched.clear()
+
+
+@pytest.fixture
+def backend():
+    return FakeWatcher()
+
+
+@pytest.fixture
+def watcher(backend):
+    return JournalWatcher(Journal.base_path, backend)
+
+
+def deltas(watcher, *changes: Change) -> list[Delta]:
+    watcher.watcher.changes.extend(changes)
+    return watcher.read(0)
+
+
+def test_hidden_names_fold_away():
+    assert _change("added", "d", ".entry.md.123.tmp") is None
+    assert _change("renamed", "d", "entry.md", ".entry.md.123.tmp") == Change(
+        "added", "d", "entry.md"
+    )
+    assert _change("renamed", "d", ".aside.tmp", "entry.md") == Change(
+        "removed", "d", "entry.md"
+    )
+
+
+def test_journal_deltas(watcher):
+    base = watcher.base_path
+    Journal("new")
+    assert deltas(watcher, Change("added", base, "new")) == [
+        Delta("journal_added", "new")
+    ]
+    # A stray file next to the journals is no journal
+    open(os.path.join(base, "notes.txt"), "w").close()
+    assert deltas(watcher, Change("added", base, "notes.txt")) == []
+
+    os.rename(os.path.join(base, "new"), os.path.join(base, "renamed"))
+    assert deltas(watcher, Change("renamed", base, "renamed", "new")) == [
+        Delta("journal_removed", "new"),
+        Delta("journal_added", "renamed"),
+    ]
+    assert deltas(watcher, Change("rescan", base)) == [Delta("journals_changed")]
+
+
+def test_entry_deltas(watcher, journal):
+    watcher.follow(journal)
+    path = journal.journal_path
+    assert path in watcher.watcher.watched
+
+    JournalEntry(journal, "entry").save("text")
+    assert deltas(watcher, Change("added", path, "entry.md")) == [
+        Delta("entry_added", "entry.md", "notes")
+    ]
+    assert deltas(watcher, Change("added", path, "notes.txt")) == []
+
+    # Compressing only swaps the entry's file
+    compression.compress_file(JournalEntry(journal, "entry").filepath, "gzip")
+    assert deltas(watcher, Change("removed", path, "entry.md")) == []
+
+    JournalEntry(journal, "entry").delete()
+    assert deltas(watcher, Change("removed", path, "entry.md.z")) == [
+        Delta("entry_removed", "entry.md", "notes")
+    ]
+    assert deltas(watcher, Change("rescan", path)) == [
+        Delta("entries_changed", journal="notes")
+    ]
+
+
+def test_only_the_followed_journal_is_reported(watcher, journal):
+    other = Journal("other")
+    watcher.follow(journal)
+    watcher.follow(other)
+    assert journal.journal_path not in watcher.watcher.watched
+    assert deltas(watcher, Change("added", journal.journal_path, "x.md")) == []
+
+    watcher.follow(None)
+    assert deltas(watcher, Change("added", other.journal_path, "x.md")) == []
+    assert watcher.watcher.watched == {watcher.base_path}
+
+
+def test_new_shard_directories_are_followed(watcher, journal):
+    watcher.follow(journal)
+    path = journal.journal_path
+    os.makedirs(os.path.join(path, "2024", "03"))
+
+    assert deltas(watcher, Change("added", path, "2024")) == [
+        Delta("entries_changed", journal="notes")
+    ]
+    shard = os.path.join(path, "2024", "03")
+    assert shard in watcher.watcher.watched
+    assert deltas(watcher, Change("added", shard, "entry_2024-03-01_00-00-00.md")) == [
+        Delta("entry_added", "entry_2024-03-01_00-00-00.md", "notes")
+    ]
+
+
+def test_segment_deltas(watcher, journal):
+    JournalEntry(journal, "kept").save("text")
+    JournalEntry(journal, "gone").save("text")
+    segments.convert_to_segments(journal.journal_path)
+    watcher.follow(journal)
+    segments_dir = os.path.join(journal.journal_path, SEGMENTS_DIRNAME)
+    assert segments_dir in watcher.watcher.watched
+
+    JournalEntry(journal, "kept").save("rewritten")
+    JournalEntry(journal, "gone").delete()
+    JournalEntry(journal, "new").save("text")
+    assert deltas(watcher, Change("added", segments_dir, "000001.seg")) == [
+        Delta("entry_removed", "gone.md", "notes"),
+        Delta("entry_added", "new.md", "notes"),
+    ]
+    # Appends that only rewrite entries change nothing in the list
+    JournalEntry(journal, "kept").save("again")
+    assert deltas(watcher, Change("added", segments_dir, "000001.seg")) == []
+
+
+def test_polling_pairs_renames_by_inode(tmp_path):
+    poller = PollingWatcher(interval=0)
+    poller.watch(str(tmp_path))
+    for name in ("a.md", "b.md", ".c.md.tmp"):
+        open(os.path.join(tmp_path, name), "w").close()
+    assert sorted(poller.read(1)) == [
+        Change("added", str(tmp_path), "a.md"),
+        Change("added", str(tmp_path), "b.md"),
+    ]
+
+    os.rename(os.path.join(tmp_path, "a.md"), os.path.join(tmp_path, "z.md"))
+    os.remove(os.path.join(tmp_path, "b.md"))
+    os.rename(os.path.join(tmp_path, ".c.md.tmp"), os.path.join(tmp_path, "c.md"))
+    assert sorted(poller.read(1)) == [
+        Change("added", str(tmp_path), "c.md"),
+        Change("removed", str(tmp_path), "b.md"),
+        Change("renamed", str(tmp_path), "z.md", "a.md"),
+    ]
+
+    poller.unwatch(str(tmp_path))
+    open(os.path.join(tmp_path, "d.md"), "w").close()
+    assert poller.read(1) == []